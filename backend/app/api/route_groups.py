@@ -0,0 +1,111 @@
+"""
+Enregistrement des groupes de routes de l'API.
+
+Chaque groupe est une liste de modules exposant un `router`. Seuls les groupes
+listés dans `Settings.API_ROUTE_GROUPS` ("all" par défaut) sont importés au
+démarrage : une instance dédiée (ex. exports, webhooks) ne paie pas l'import
+des ~60 routes CRUD, de leurs services et schémas.
+"""
+
+from __future__ import annotations
+
+from importlib import import_module
+from typing import Dict, Iterable, List
+
+from fastapi import FastAPI
+
+# Routes CRUD générées (l'ordre d'inclusion est conservé)
+CRUD_ROUTES: List[str] = [
+    "establishments",
+    "countries",
+    "vat_rates",
+    "master_articles",
+    "mercuriale_articles",
+    "financial_ingredients",
+    "financial_reports",
+    "financial_recipes",
+    "usage_counters",
+    "user_mercuriale_access",
+    "recipes",
+    "establishment_email_alias",
+    "history_ingredients",
+    "articles",
+    "user_establishment",
+    "invite",
+    "invoices",
+    "suppliers",
+    "variations",
+    "history_recipes",
+    "mercuriales",
+    "ingredients",
+    "market_master_articles",
+    "market_articles",
+    "recipe_margin_subcategory",
+    "invoices_rejected",
+    "market_suppliers",
+    "recipe_margin_category",
+    "recipe_margin",
+    "recommendations_ai",
+    "market_supplier_alias",
+    "score_matrix",
+    "live_score",
+    "supplier_merge_suggestions",
+    "impersonations_padrino",
+    "alert_logs",
+    "maintenance",
+    "support_ticket",
+    "billing_account",
+    "user_profiles",
+    "billing_item",
+    "logs",
+    "recipes_subcategories",
+    "import_job",
+    "recipe_categories",
+    "supplier_alias",
+    "regex_patterns",
+    "messages_ia",
+    "logs_ia",
+    "sessions_ia",
+    "price_stripe",
+    "product_stripe",
+    "mercuriale_categories",
+    "supplier_merge_request",
+    "mercuriale_supplier",
+    "mercuriale_subcategories",
+    "mercuriale_master_article",
+    "mercurial_request",
+    "stripe_webhook_events",
+]
+
+ROUTE_GROUPS: Dict[str, List[str]] = {
+    # Routes de logique métier /READ ONLY
+    "read": ["app.api.routes.read"],
+    # Routes de logique métier /WRITE ONLY
+    "write": ["app.api.routes.write"],
+    "wakeuppers": ["app.api.routes.wakeuppers.wake_invoice"],
+    "pdf_recipes": ["app.api.routes.pdf_recipes"],
+    "invoice_export": ["app.api.routes.invoice_export"],
+    "monitoring": ["app.api.routes.monitoring"],
+    "crud": [f"app.api.routes.{name}" for name in CRUD_ROUTES],
+}
+
+
+def resolve_route_groups(value: str | Iterable[str]) -> List[str]:
+    """Transforme le réglage ("all" ou "read,write,...") en liste de groupes connus."""
+    names = value.split(",") if isinstance(value, str) else list(value)
+    names = [name.strip() for name in names if name and name.strip()]
+    if not names or "all" in names:
+        return list(ROUTE_GROUPS)
+    unknown = [name for name in names if name not in ROUTE_GROUPS]
+    if unknown:
+        raise ValueError(f"Groupes de routes inconnus : {', '.join(unknown)}")
+    return [name for name in ROUTE_GROUPS if name in names]
+
+
+def include_route_groups(app: FastAPI, value: str | Iterable[str]) -> List[str]:
+    """Importe et inclut les routers des groupes demandés. Renvoie les groupes inclus."""
+    groups = resolve_route_groups(value)
+    for group in groups:
+        for module_path in ROUTE_GROUPS[group]:
+            app.include_router(import_module(module_path).router)
+    return groups
@@ -4,6 +4,7 @@ from fastapi import APIRouter, HTTPException
 from fastapi.encoders import jsonable_encoder
 from typing import Optional
 from app.schemas.countries import Countries
+from app.core.reference_data import reference_data
 from app.services import countries_service
 
 router = APIRouter(prefix="/countries", tags=["Countries"])
@@ -26,7 +27,7 @@ def list_countries(
 
 @router.get("/{id}", response_model=Countries)
 def get_countries(id: UUID):
-    item = countries_service.get_countries_by_id(id)
+    item = reference_data.get_by_id("countries", id) or countries_service.get_countries_by_id(id)
     if not item:
         raise HTTPException(status_code=404, detail="Countries not found")
     return item
@@ -35,12 +36,14 @@ def get_countries(id: UUID):
 def create_countries(data: Countries):
     payload = jsonable_encoder(data.dict(exclude={"id"}))
     created = countries_service.create_countries(payload)
+    reference_data.invalidate("countries")
     return Countries(**created)
 
 @router.patch("/{id}", response_model=Countries)
 def update_countries(id: UUID, data: Countries):
     payload = jsonable_encoder(data.dict(exclude_unset=True))
     updated = countries_service.update_countries(id, payload)
+    reference_data.invalidate("countries")
     if not updated:
         raise HTTPException(status_code=404, detail="Countries not found")
     return Countries(**updated)
@@ -48,4 +51,5 @@ def update_countries(id: UUID, data: Countries):
 @router.delete("/{id}")
 def delete_countries(id: UUID):
     countries_service.delete_countries(id)
+    reference_data.invalidate("countries")
     return {"deleted": True}
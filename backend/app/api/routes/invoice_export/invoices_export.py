@@ -1,11 +1,20 @@
-from io import BytesIO
 from typing import List
+from uuid import UUID
 
 from fastapi import APIRouter, HTTPException
-from fastapi.responses import StreamingResponse
+from fastapi.responses import FileResponse, StreamingResponse
 from pydantic import BaseModel, Field
 
-from app.logic.invoice_export.export_invoices import ExportError, export_invoices
+from app.logic.invoice_export.export_invoices import (
+    ExportError,
+    iter_export_zip,
+    prepare_export,
+)
+from app.logic.invoice_export.export_jobs import (
+    get_export_archive,
+    get_export_job,
+    submit_export_job,
+)
 
 router = APIRouter(
     prefix="/invoices",
@@ -21,7 +30,7 @@ class InvoiceExportRequest(BaseModel):
 @router.post("/export")
 def export_invoices_endpoint(payload: InvoiceExportRequest):
     try:
-        export_name, zip_bytes, _missing = export_invoices(
+        export_name, rows = prepare_export(
             establishment_id=payload.establishment_id,
             invoice_ids=payload.invoice_ids,
         )
@@ -29,9 +38,43 @@ def export_invoices_endpoint(payload: InvoiceExportRequest):
         raise HTTPException(status_code=400, detail=str(exc))
 
     return StreamingResponse(
-        BytesIO(zip_bytes),
+        iter_export_zip(export_name, rows),
         media_type="application/zip",
         headers={
             "Content-Disposition": f'attachment; filename="{export_name}.zip"'
         },
     )
+
+
+@router.post("/export/jobs")
+def create_export_job_endpoint(payload: InvoiceExportRequest):
+    try:
+        job = submit_export_job(
+            establishment_id=payload.establishment_id,
+            invoice_ids=payload.invoice_ids,
+        )
+    except ExportError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return job.to_public()
+
+
+@router.get("/export/jobs/{job_id}")
+def get_export_job_endpoint(job_id: UUID):
+    job = get_export_job(str(job_id))
+    if not job:
+        raise HTTPException(status_code=404, detail="Export introuvable")
+    return job.to_public()
+
+
+@router.get("/export/jobs/{job_id}/download")
+def download_export_job_endpoint(job_id: UUID):
+    archive = get_export_archive(str(job_id))
+    if not archive:
+        raise HTTPException(status_code=404, detail="Archive indisponible")
+    job, path = archive
+    # FileResponse gère les requêtes Range : un téléchargement coupé reprend là où il s'est arrêté
+    return FileResponse(
+        path,
+        media_type="application/zip",
+        filename=f"{job.export_name or 'ravy-export'}.zip",
+    )
@@ -4,6 +4,7 @@ from fastapi import APIRouter, HTTPException
 from fastapi.encoders import jsonable_encoder
 from typing import Optional
 from app.schemas.maintenance import Maintenance
+from app.core.reference_data import reference_data
 from app.services import maintenance_service
 
 router = APIRouter(prefix="/maintenance", tags=["Maintenance"])
@@ -35,12 +36,14 @@ def get_maintenance(id: UUID):
 def create_maintenance(data: Maintenance):
     payload = jsonable_encoder(data.dict(exclude={"id"}))
     created = maintenance_service.create_maintenance(payload)
+    reference_data.invalidate("maintenance")
     return Maintenance(**created)
 
 @router.patch("/{id}", response_model=Maintenance)
 def update_maintenance(id: UUID, data: Maintenance):
     payload = jsonable_encoder(data.dict(exclude_unset=True))
     updated = maintenance_service.update_maintenance(id, payload)
+    reference_data.invalidate("maintenance")
     if not updated:
         raise HTTPException(status_code=404, detail="Maintenance not found")
     return Maintenance(**updated)
@@ -48,4 +51,5 @@ def update_maintenance(id: UUID, data: Maintenance):
 @router.delete("/{id}")
 def delete_maintenance(id: UUID):
     maintenance_service.delete_maintenance(id)
+    reference_data.invalidate("maintenance")
     return {"deleted": True}
@@ -0,0 +1,9 @@
+from fastapi import APIRouter
+
+from app.api.routes.monitoring import http_pool, reference_data
+
+router = APIRouter(tags=["Monitoring"])
+router.include_router(http_pool.router)
+router.include_router(reference_data.router)
+
+__all__ = ["router"]
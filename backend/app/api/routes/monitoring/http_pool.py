@@ -0,0 +1,20 @@
+from fastapi import APIRouter, Header, HTTPException
+
+from app.core.http_pool import pool_stats
+from app.manufacturers.config import MANUFACTURERS_KEY
+
+
+router = APIRouter(prefix="/monitoring", tags=["Monitoring"])
+
+
+@router.get("/http-pool")
+def get_http_pool_stats(x_ravy_key: str = Header(None)):
+    """
+    Statistiques du pool HTTP Supabase de ce process :
+    connexions ouvertes / utilisées, requêtes en attente d'une connexion,
+    nouvelles connexions par seconde, retries et erreurs.
+    """
+    if x_ravy_key != MANUFACTURERS_KEY:
+        raise HTTPException(status_code=401, detail="Clé invalide")
+
+    return pool_stats()
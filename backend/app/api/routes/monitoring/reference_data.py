@@ -0,0 +1,19 @@
+from fastapi import APIRouter, Header, HTTPException
+
+from app.core.reference_data import reference_data
+from app.manufacturers.config import MANUFACTURERS_KEY
+
+
+router = APIRouter(prefix="/monitoring", tags=["Monitoring"])
+
+
+@router.get("/reference-data")
+def get_reference_data_stats(x_ravy_key: str = Header(None)):
+    """
+    Cache des tables de référence de ce process : lignes en mémoire, hits,
+    chargements, taux de hit, âge et TTL par table.
+    """
+    if x_ravy_key != MANUFACTURERS_KEY:
+        raise HTTPException(status_code=401, detail="Clé invalide")
+
+    return reference_data.stats()
@@ -1,13 +1,12 @@
 from __future__ import annotations
 
 import io
-from typing import List, Optional
+from typing import List, Literal, Optional
 
 from fastapi import APIRouter
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 
-from app.logic.pdf_recipes.generator import render_recipe_pdf
 from app.schemas.recipes import Recipes
 
 
@@ -31,11 +30,20 @@ class RecipePDFPayload(BaseModel):
   instructions_html: Optional[str] = None
 
 
+class RecipeBookPDFPayload(BaseModel):
+  recipes: List[RecipePDFPayload] = Field(..., min_length=1)
+  output: Literal["pdf", "zip"] = Field("pdf", description="pdf = un seul livre | zip = un PDF par recette")
+  filename: Optional[str] = None
+
+
 router = APIRouter(prefix="/pdf/recipes", tags=["PDF Recipes"])
 
 
 @router.post("/generate", response_class=StreamingResponse)
 def generate_recipe_pdf(payload: RecipePDFPayload):
+  # Import tardif : fpdf n'est chargé qu'à la première génération
+  from app.logic.pdf_recipes.generator import render_recipe_pdf
+
   pdf_bytes = render_recipe_pdf(
     recipe=payload.recipe,
     ingredients=[ing.dict(exclude_none=True) for ing in payload.ingredients],
@@ -48,3 +56,32 @@ def generate_recipe_pdf(payload: RecipePDFPayload):
   stream = io.BytesIO(pdf_bytes)
   headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
   return StreamingResponse(stream, media_type="application/pdf", headers=headers)
+
+
+@router.post("/generate-batch", response_class=StreamingResponse)
+def generate_recipe_book(payload: RecipeBookPDFPayload):
+  from app.logic.pdf_recipes.generator import (
+    RecipeBookEntry,
+    iter_recipe_book_zip,
+    render_recipe_book_pdf,
+  )
+
+  entries = [
+    RecipeBookEntry(
+      recipe=item.recipe,
+      ingredients=[ing.dict(exclude_none=True) for ing in item.ingredients],
+      include_financials=item.include_financials,
+      technical_image_url=item.technical_image_url,
+      instructions_html=item.instructions_html,
+    )
+    for item in payload.recipes
+  ]
+  base_name = payload.filename or "livre-de-recettes"
+
+  if payload.output == "zip":
+    headers = {"Content-Disposition": f'attachment; filename="{base_name}.zip"'}
+    return StreamingResponse(iter_recipe_book_zip(entries), media_type="application/zip", headers=headers)
+
+  stream = io.BytesIO(render_recipe_book_pdf(entries))
+  headers = {"Content-Disposition": f'attachment; filename="{base_name}.pdf"'}
+  return StreamingResponse(stream, media_type="application/pdf", headers=headers)
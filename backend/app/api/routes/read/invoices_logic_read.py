@@ -1,7 +1,7 @@
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Literal, Optional, List
 from datetime import date
 from fastapi import APIRouter, Query
-from app.logic.read.invoices_logic import invoices_sum
+from app.logic.read.invoices_logic import invoices_spend_by_period, invoices_sum
 
 router = APIRouter(prefix="/invoices", tags=["Invoices - Logic"])
 
@@ -26,3 +26,28 @@ def read_invoices_sum(
         supplier_ids=supplier_ids,
         supplier_labels=supplier_labels,
     )
+
+
+@router.get("/spend", response_model=Dict[str, Any])
+def read_invoices_spend(
+    establishment_id: str,
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    granularity: Literal["day", "week", "month"] = Query("month"),
+    supplier_ids: Optional[List[str]] = Query(None),
+    supplier_labels: Optional[List[str]] = Query(None),
+):
+    """
+    Dépenses d'un établissement par période (jour / semaine / mois) en un appel :
+    - totaux HT, TVA, TTC par période (périodes vides à 0)
+    - détail par fournisseur et label fournisseur (`series`)
+    - par défaut : les 24 derniers mois
+    """
+    return invoices_spend_by_period(
+        establishment_id=establishment_id,
+        start_date=start_date,
+        end_date=end_date,
+        granularity=granularity,
+        supplier_ids=supplier_ids,
+        supplier_labels=supplier_labels,
+    )
@@ -1,8 +1,9 @@
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from datetime import date
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, HTTPException, Query
+from pydantic import BaseModel, Field
 
-from app.logic.read.market_comparator import market_comparator
+from app.logic.read.market_comparator import market_comparator_async, market_comparator_batch_async
 
 router = APIRouter(
     prefix="/market",
@@ -11,7 +12,7 @@ router = APIRouter(
 
 
 @router.get("/comparator", response_model=Dict[str, Any])
-def get_market_comparator(
+async def get_market_comparator(
     market_master_article_1_id: str,
     market_master_article_2_id: str,
     establishment_id: str,
@@ -27,7 +28,7 @@ def get_market_comparator(
     - Peut inclure ou non les données personnelles ("Seulement mes factures")
     - Retourne les statistiques complètes pour chaque produit + les écarts € et %
     """
-    return market_comparator(
+    return await market_comparator_async(
         market_master_article_1_id=market_master_article_1_id,
         market_master_article_2_id=market_master_article_2_id,
         establishment_id=establishment_id,
@@ -36,3 +37,39 @@ def get_market_comparator(
         only_my_invoices_product1=only_my_invoices_product1,
         only_my_invoices_product2=only_my_invoices_product2,
     )
+
+
+class MarketComparatorPair(BaseModel):
+    market_master_article_1_id: str
+    market_master_article_2_id: str
+    only_my_invoices_product1: bool = False
+    only_my_invoices_product2: bool = False
+
+
+class MarketComparatorBatchRequest(BaseModel):
+    establishment_id: str
+    pairs: List[MarketComparatorPair] = Field(default_factory=list)
+    market_master_article_ids: List[str] = Field(default_factory=list)
+    only_my_invoices: bool = False
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+
+
+@router.post("/comparator/batch", response_model=Dict[str, Any])
+async def post_market_comparator_batch(payload: MarketComparatorBatchRequest):
+    """
+    Comparateur multi-produits en un appel :
+    - `pairs` : N comparaisons produit 1 / produit 2 (même format que GET /comparator)
+    - `market_master_article_ids` : séries + statistiques d'un panier de produits
+    - Les prix de tous les produits sont chargés en quelques requêtes groupées
+    """
+    if not payload.pairs and not payload.market_master_article_ids:
+        raise HTTPException(status_code=400, detail="pairs ou market_master_article_ids requis")
+    return await market_comparator_batch_async(
+        establishment_id=payload.establishment_id,
+        pairs=[pair.model_dump() for pair in payload.pairs],
+        market_master_article_ids=payload.market_master_article_ids,
+        only_my_invoices=payload.only_my_invoices,
+        start_date=payload.start_date,
+        end_date=payload.end_date,
+    )
@@ -1,16 +1,41 @@
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 from datetime import date
 from fastapi import APIRouter, Query
 
-from app.logic.read.master_article_analysis import master_article_analysis
+from app.logic.read.master_article_analysis import master_article_analysis_async, master_articles_analysis
 
 router = APIRouter(
     prefix="/master-articles",
     tags=["Master Articles - Analysis"],
 )
 
+@router.get("/analysis", response_model=Dict[str, Any])
+def get_master_articles_analysis(
+    establishment_id: str,
+    master_article_ids: Optional[List[str]] = Query(None),
+    supplier_id: Optional[str] = Query(None),
+    start_date: Optional[date] = Query(None),
+    end_date: Optional[date] = Query(None),
+    include_invoices: bool = Query(False),
+):
+    """
+    Analyse groupée pour la liste produits (une requête agrégée) :
+    - produits : `master_article_ids`, sinon ceux de `supplier_id`, sinon tout l'établissement
+    - stats par produit (prix moyen/min/max, quantités, total dépensé, prix first/last)
+    - nombre de factures par produit ; détail des factures si `include_invoices`
+    """
+    return master_articles_analysis(
+        establishment_id=establishment_id,
+        master_article_ids=master_article_ids,
+        supplier_id=supplier_id,
+        start_date=start_date,
+        end_date=end_date,
+        include_invoices=include_invoices,
+    )
+
+
 @router.get("/{master_article_id}/analysis", response_model=Dict[str, Any])
-def get_master_article_analysis(
+async def get_master_article_analysis(
     master_article_id: str,
     establishment_id: str,
     start_date: Optional[date] = Query(None),
@@ -22,7 +47,7 @@ def get_master_article_analysis(
     - articles liés sur la période
     - factures correspondantes
     """
-    return master_article_analysis(
+    return await master_article_analysis_async(
         master_article_id=master_article_id,
         establishment_id=establishment_id,
         start_date=start_date,
@@ -4,6 +4,7 @@ from fastapi import APIRouter, HTTPException
 from fastapi.encoders import jsonable_encoder
 from typing import Optional
 from app.schemas.recipe_categories import RecipeCategories
+from app.core.reference_data import reference_data
 from app.services import recipe_categories_service
 
 router = APIRouter(prefix="/recipe_categories", tags=["RecipeCategories"])
@@ -36,12 +37,14 @@ def get_recipe_categories(id: UUID):
 def create_recipe_categories(data: RecipeCategories):
     payload = jsonable_encoder(data.dict(exclude={"id"}))
     created = recipe_categories_service.create_recipe_categories(payload)
+    reference_data.invalidate("recipe_categories")
     return RecipeCategories(**created)
 
 @router.patch("/{id}", response_model=RecipeCategories)
 def update_recipe_categories(id: UUID, data: RecipeCategories):
     payload = jsonable_encoder(data.dict(exclude_unset=True))
     updated = recipe_categories_service.update_recipe_categories(id, payload)
+    reference_data.invalidate("recipe_categories")
     if not updated:
         raise HTTPException(status_code=404, detail="RecipeCategories not found")
     return RecipeCategories(**updated)
@@ -49,4 +52,5 @@ def update_recipe_categories(id: UUID, data: RecipeCategories):
 @router.delete("/{id}")
 def delete_recipe_categories(id: UUID):
     recipe_categories_service.delete_recipe_categories(id)
+    reference_data.invalidate("recipe_categories")
     return {"deleted": True}
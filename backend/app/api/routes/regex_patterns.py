@@ -4,6 +4,7 @@ from fastapi import APIRouter, HTTPException
 from fastapi.encoders import jsonable_encoder
 from typing import Optional
 from app.schemas.regex_patterns import RegexPatterns
+from app.core.regex_registry import regex_patterns
 from app.services import regex_patterns_service
 
 router = APIRouter(prefix="/regex_patterns", tags=["RegexPatterns"])
@@ -35,12 +36,14 @@ def get_regex_patterns(id: UUID):
 def create_regex_patterns(data: RegexPatterns):
     payload = jsonable_encoder(data.dict(exclude={"id"}))
     created = regex_patterns_service.create_regex_patterns(payload)
+    regex_patterns.invalidate()
     return RegexPatterns(**created)
 
 @router.patch("/{id}", response_model=RegexPatterns)
 def update_regex_patterns(id: UUID, data: RegexPatterns):
     payload = jsonable_encoder(data.dict(exclude_unset=True))
     updated = regex_patterns_service.update_regex_patterns(id, payload)
+    regex_patterns.invalidate()
     if not updated:
         raise HTTPException(status_code=404, detail="RegexPatterns not found")
     return RegexPatterns(**updated)
@@ -48,4 +51,5 @@ def update_regex_patterns(id: UUID, data: RegexPatterns):
 @router.delete("/{id}")
 def delete_regex_patterns(id: UUID):
     regex_patterns_service.delete_regex_patterns(id)
+    regex_patterns.invalidate()
     return {"deleted": True}
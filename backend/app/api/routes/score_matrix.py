@@ -4,6 +4,7 @@ from fastapi import APIRouter, HTTPException
 from fastapi.encoders import jsonable_encoder
 from typing import Optional
 from app.schemas.score_matrix import ScoreMatrix
+from app.core.reference_data import reference_data
 from app.services import score_matrix_service
 
 router = APIRouter(prefix="/score_matrix", tags=["ScoreMatrix"])
@@ -35,12 +36,14 @@ def get_score_matrix(id: UUID):
 def create_score_matrix(data: ScoreMatrix):
     payload = jsonable_encoder(data.dict(exclude={"id"}))
     created = score_matrix_service.create_score_matrix(payload)
+    reference_data.invalidate("score_matrix")
     return ScoreMatrix(**created)
 
 @router.patch("/{id}", response_model=ScoreMatrix)
 def update_score_matrix(id: UUID, data: ScoreMatrix):
     payload = jsonable_encoder(data.dict(exclude_unset=True))
     updated = score_matrix_service.update_score_matrix(id, payload)
+    reference_data.invalidate("score_matrix")
     if not updated:
         raise HTTPException(status_code=404, detail="ScoreMatrix not found")
     return ScoreMatrix(**updated)
@@ -48,4 +51,5 @@ def update_score_matrix(id: UUID, data: ScoreMatrix):
 @router.delete("/{id}")
 def delete_score_matrix(id: UUID):
     score_matrix_service.delete_score_matrix(id)
+    reference_data.invalidate("score_matrix")
     return {"deleted": True}
@@ -4,6 +4,7 @@ from fastapi import APIRouter, HTTPException
 from fastapi.encoders import jsonable_encoder
 from typing import Optional
 from app.schemas.vat_rates import VatRates
+from app.core.reference_data import reference_data
 from app.services import vat_rates_service
 
 router = APIRouter(prefix="/vat_rates", tags=["VatRates"])
@@ -26,7 +27,7 @@ def list_vat_rates(
 
 @router.get("/{id}", response_model=VatRates)
 def get_vat_rates(id: UUID):
-    item = vat_rates_service.get_vat_rates_by_id(id)
+    item = reference_data.get_by_id("vat_rates", id) or vat_rates_service.get_vat_rates_by_id(id)
     if not item:
         raise HTTPException(status_code=404, detail="VatRates not found")
     return item
@@ -35,12 +36,14 @@ def get_vat_rates(id: UUID):
 def create_vat_rates(data: VatRates):
     payload = jsonable_encoder(data.dict(exclude={"id"}))
     created = vat_rates_service.create_vat_rates(payload)
+    reference_data.invalidate("vat_rates")
     return VatRates(**created)
 
 @router.patch("/{id}", response_model=VatRates)
 def update_vat_rates(id: UUID, data: VatRates):
     payload = jsonable_encoder(data.dict(exclude_unset=True))
     updated = vat_rates_service.update_vat_rates(id, payload)
+    reference_data.invalidate("vat_rates")
     if not updated:
         raise HTTPException(status_code=404, detail="VatRates not found")
     return VatRates(**updated)
@@ -48,4 +51,5 @@ def update_vat_rates(id: UUID, data: VatRates):
 @router.delete("/{id}")
 def delete_vat_rates(id: UUID):
     vat_rates_service.delete_vat_rates(id)
+    reference_data.invalidate("vat_rates")
     return {"deleted": True}
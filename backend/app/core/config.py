@@ -1,3 +1,5 @@
+from typing import Dict
+
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -15,7 +17,93 @@ class Settings(BaseSettings):
     SUPABASE_URL: str = ""
     SUPABASE_KEY: str = ""
 
+    # Groupes de routes chargés au démarrage ("all" ou ex. "read,write,crud")
+    API_ROUTE_GROUPS: str = "all"
+
+    # Pool HTTP des clients Supabase (API + workers d'import) ; HTTP/2 désactivé
+    # comme avant la mutualisation du pool, activable par déploiement (SUPABASE_HTTP2=true)
+    SUPABASE_HTTP2: bool = False
+    # Client async des routes de lecture (requêtes parallèles multiplexées) : HTTP/2 par défaut
+    SUPABASE_ASYNC_HTTP2: bool = True
+    SUPABASE_POOL_MAX_CONNECTIONS: int = 50
+    SUPABASE_POOL_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    SUPABASE_POOL_KEEPALIVE_EXPIRY_SECONDS: float = 30.0
+    SUPABASE_TIMEOUT_SECONDS: float = 30.0
+    SUPABASE_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    SUPABASE_POOL_TIMEOUT_SECONDS: float = 10.0
+    SUPABASE_RETRY_MAX_ATTEMPTS: int = 3
+    SUPABASE_RETRY_BACKOFF_SECONDS: float = 0.2
+
+    # Traçage des requêtes PostgREST (Server-Timing, détection des N+1)
+    QUERY_TRACE_ENABLED: bool = True
+    QUERY_TRACE_N_PLUS_ONE_THRESHOLD: int = 20
+    QUERY_TRACE_SLOW_QUERY_MS: float = 500.0
+    QUERY_TRACE_MAX_RECORDS: int = 2000
+
+    # Registre des regex de nettoyage (import de factures), rechargé après ce délai
+    REGEX_PATTERNS_TTL_SECONDS: float = 300.0
+
+    # Cache des tables de référence (score_matrix, maintenance, TVA, pays...) : TTL par table
+    REFERENCE_DATA_WARMUP: bool = True
+    REFERENCE_DATA_DEFAULT_TTL_SECONDS: float = 600.0
+    REFERENCE_DATA_TTL_SECONDS: Dict[str, float] = {
+        "score_matrix": 3600.0,
+        "maintenance": 30.0,
+        "vat_rates": 3600.0,
+        "countries": 86400.0,
+        "recipe_categories": 300.0,
+    }
+
+    # Résumé d'achats matérialisé (établissement × master_article × mois), maintenu à
+    # l'écriture ; lectures à activer une fois le backfill fait (scripts/rebuild_purchase_summary.py)
+    PURCHASE_SUMMARY_READS: bool = False
+
+    # Import de facture : étapes indépendantes (après création des articles) exécutées
+    # en parallèle, au plus N à la fois (1 = séquentiel dans le thread de l'import)
+    INVOICE_IMPORT_STAGE_WORKERS: int = 4
+    # Doublons (même fichier ou même facture déjà importée) clôturés sans import
+    INVOICE_IMPORT_DEDUP: bool = True
+
+    # Outbox des notifications (Telegram / alertes SMS)
+    NOTIFICATIONS_BATCH_SIZE: int = 20
+    NOTIFICATIONS_FLUSH_INTERVAL_SECONDS: float = 1.0
+    NOTIFICATIONS_MAX_ATTEMPTS: int = 5
+    NOTIFICATIONS_RETRY_BACKOFF_SECONDS: float = 2.0
+    NOTIFICATIONS_TELEGRAM_MIN_INTERVAL_SECONDS: float = 1.0
+    NOTIFICATIONS_MAX_QUEUE: int = 5000
+    # Enregistrements persistés dans internal.notification_outbox (file mémoire si indisponible)
+    NOTIFICATIONS_OUTBOX_PERSISTENT: bool = True
+    # Relecture périodique de la table (lignes d'un process arrêté, nouveaux essais)
+    NOTIFICATIONS_POLL_INTERVAL_SECONDS: float = 30.0
+    # Bail d'une ligne réservée : relivrée après expiration si le process s'arrête
+    NOTIFICATIONS_LEASE_SECONDS: int = 300
+
+    # Buffer d'écriture des logs applicatifs (internal.logs)
+    LOGS_FLUSH_BATCH_SIZE: int = 100
+    LOGS_FLUSH_INTERVAL_SECONDS: float = 2.0
+    LOGS_MAX_QUEUE: int = 10000
+    LOGS_HIGH_WATERMARK: float = 0.8
+    LOGS_SAMPLE_RATE_UNDER_PRESSURE: float = 0.1
+
+    # Export ZIP des factures : téléchargements PDF simultanés
+    INVOICE_EXPORT_DOWNLOAD_CONCURRENCY: int = 8
+
+    # Jobs d'export asynchrones (archives conservées sur disque)
+    INVOICE_EXPORT_JOBS_DIR: str = "/tmp/ravy-invoice-exports"
+    INVOICE_EXPORT_JOBS_MAX_WORKERS: int = 2
+    INVOICE_EXPORT_JOBS_TTL_HOURS: int = 24
+    # Progression écrite sur disque toutes les N secondes ; un job en cours sans
+    # écriture depuis STALE secondes est considéré interrompu
+    INVOICE_EXPORT_JOBS_HEARTBEAT_SECONDS: float = 2.0
+    INVOICE_EXPORT_JOBS_STALE_SECONDS: float = 120.0
+
+    # Génération PDF des fiches techniques (0 = un process par CPU)
+    PDF_RENDER_PROCESSES: int = 0
+    PDF_IMAGE_DOWNLOAD_CONCURRENCY: int = 8
+    PDF_IMAGE_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+
     class Config:
         env_file = ".env"
+        extra = "ignore"
 
 settings = Settings()
@@ -0,0 +1,263 @@
+"""
+Pool HTTP partagé des clients Supabase (PostgREST).
+
+- transports httpx configurés depuis `Settings` (HTTP/2, taille du pool,
+  keep-alive, timeouts)
+- retry avec backoff exponentiel sur les erreurs de connexion (connexion
+  refusée / coupée) et sur les réponses 502/503/504
+- statistiques du pool (connexions ouvertes / utilisées, requêtes en attente
+  d'une connexion, nouvelles connexions par seconde) pour dimensionner le pool
+  sur la concurrence réelle
+- chaque réponse PostgREST est enregistrée dans la trace de requêtes en cours
+  (`app.core.query_trace`)
+
+Les erreurs de connexion survenues avant l'envoi (`ConnectError`,
+`ConnectTimeout`) sont rejouées pour toutes les méthodes ; les autres
+(coupure en cours de requête, 5xx) seulement pour les méthodes idempotentes,
+afin de ne jamais doubler un insert.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+import httpx
+
+from app.core.config import settings
+from app.core.query_trace import traced_response
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS_CODES = frozenset({502, 503, 504})
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "PUT", "DELETE"})
+CONNECT_ERRORS = (httpx.ConnectError, httpx.ConnectTimeout)
+RESET_ERRORS = (httpx.ReadError, httpx.WriteError, httpx.RemoteProtocolError)
+
+NEW_CONNECTIONS_WINDOW_SECONDS = 60.0
+
+
+def pool_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=settings.SUPABASE_POOL_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.SUPABASE_POOL_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.SUPABASE_POOL_KEEPALIVE_EXPIRY_SECONDS,
+    )
+
+
+def pool_timeout() -> httpx.Timeout:
+    return httpx.Timeout(
+        settings.SUPABASE_TIMEOUT_SECONDS,
+        connect=settings.SUPABASE_CONNECT_TIMEOUT_SECONDS,
+        pool=settings.SUPABASE_POOL_TIMEOUT_SECONDS,
+    )
+
+
+def _retry_delay(attempt: int, backoff: float) -> float:
+    return backoff * (2 ** (attempt - 1))
+
+
+def _should_retry_error(exc: Exception, method: str) -> bool:
+    if isinstance(exc, CONNECT_ERRORS):
+        return True
+    return isinstance(exc, RESET_ERRORS) and method in IDEMPOTENT_METHODS
+
+
+def _should_retry_status(response: httpx.Response, method: str) -> bool:
+    return response.status_code in RETRYABLE_STATUS_CODES and method in IDEMPOTENT_METHODS
+
+
+class PoolStats:
+    """Compteurs d'un pool httpcore (lus à la demande, sans verrou côté httpx)."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._lock = threading.Lock()
+        self._pool: Any = None
+        self._known_connections: set[int] = set()
+        self._new_connections: Deque[float] = deque()
+        self._counters = {"requests": 0, "retries": 0, "errors": 0, "new_connections": 0}
+
+    def attach(self, pool: Any) -> None:
+        self._pool = pool
+
+    def record_request(self) -> None:
+        with self._lock:
+            self._counters["requests"] += 1
+
+    def record_retry(self) -> None:
+        with self._lock:
+            self._counters["retries"] += 1
+
+    def record_error(self) -> None:
+        with self._lock:
+            self._counters["errors"] += 1
+
+    def _connections(self) -> list:
+        try:
+            return list(self._pool.connections) if self._pool is not None else []
+        except Exception:
+            return []
+
+    def track_new_connections(self) -> None:
+        """Repère les connexions apparues depuis le dernier passage."""
+        now = time.monotonic()
+        current = {id(conn) for conn in self._connections()}
+        with self._lock:
+            created = len(current - self._known_connections)
+            self._known_connections = current
+            if created:
+                self._counters["new_connections"] += created
+                self._new_connections.extend([now] * created)
+            limit = now - NEW_CONNECTIONS_WINDOW_SECONDS
+            while self._new_connections and self._new_connections[0] < limit:
+                self._new_connections.popleft()
+
+    def snapshot(self) -> Dict[str, Any]:
+        self.track_new_connections()
+        connections = self._connections()
+        in_use = sum(1 for conn in connections if not _is_idle(conn))
+        try:
+            waiting = sum(
+                1 for request in getattr(self._pool, "_requests", []) if request.connection is None
+            )
+        except Exception:
+            waiting = 0
+        with self._lock:
+            return {
+                "name": self.name,
+                "connections": len(connections),
+                "in_use": in_use,
+                "idle": len(connections) - in_use,
+                "waiting": waiting,
+                "new_connections_per_second": round(
+                    len(self._new_connections) / NEW_CONNECTIONS_WINDOW_SECONDS, 3
+                ),
+                **self._counters,
+            }
+
+
+def _is_idle(connection: Any) -> bool:
+    try:
+        return connection.is_idle()
+    except Exception:
+        return False
+
+
+class RetryTransport(httpx.BaseTransport):
+    def __init__(
+        self,
+        stats: PoolStats,
+        *,
+        max_attempts: int = settings.SUPABASE_RETRY_MAX_ATTEMPTS,
+        backoff: float = settings.SUPABASE_RETRY_BACKOFF_SECONDS,
+        transport: Optional[httpx.BaseTransport] = None,
+    ) -> None:
+        self._transport = transport or httpx.HTTPTransport(
+            http2=settings.SUPABASE_HTTP2, limits=pool_limits()
+        )
+        self.stats = stats
+        self.stats.attach(getattr(self._transport, "_pool", None))
+        self.max_attempts = max(1, max_attempts)
+        self.backoff = backoff
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        self.stats.record_request()
+        started = time.perf_counter()
+        attempt = 1
+        while True:
+            try:
+                response = self._transport.handle_request(request)
+            except Exception as exc:
+                if attempt >= self.max_attempts or not _should_retry_error(exc, request.method):
+                    self.stats.record_error()
+                    raise
+                logger.warning("[http_pool] %s %s failed (%s), retry %s", request.method, request.url.path, exc, attempt)
+            else:
+                self.stats.track_new_connections()
+                if attempt >= self.max_attempts or not _should_retry_status(response, request.method):
+                    return traced_response(request, response, started)
+                response.close()
+            self.stats.record_retry()
+            time.sleep(_retry_delay(attempt, self.backoff))
+            attempt += 1
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+class AsyncRetryTransport(httpx.AsyncBaseTransport):
+    def __init__(
+        self,
+        stats: PoolStats,
+        *,
+        max_attempts: int = settings.SUPABASE_RETRY_MAX_ATTEMPTS,
+        backoff: float = settings.SUPABASE_RETRY_BACKOFF_SECONDS,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ) -> None:
+        self._transport = transport or httpx.AsyncHTTPTransport(
+            http2=settings.SUPABASE_ASYNC_HTTP2, limits=pool_limits()
+        )
+        self.stats = stats
+        self.stats.attach(getattr(self._transport, "_pool", None))
+        self.max_attempts = max(1, max_attempts)
+        self.backoff = backoff
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.stats.record_request()
+        started = time.perf_counter()
+        attempt = 1
+        while True:
+            try:
+                response = await self._transport.handle_async_request(request)
+            except Exception as exc:
+                if attempt >= self.max_attempts or not _should_retry_error(exc, request.method):
+                    self.stats.record_error()
+                    raise
+                logger.warning("[http_pool] %s %s failed (%s), retry %s", request.method, request.url.path, exc, attempt)
+            else:
+                self.stats.track_new_connections()
+                if attempt >= self.max_attempts or not _should_retry_status(response, request.method):
+                    return traced_response(request, response, started, asynchronous=True)
+                await response.aclose()
+            self.stats.record_retry()
+            await asyncio.sleep(_retry_delay(attempt, self.backoff))
+            attempt += 1
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+sync_pool_stats = PoolStats("sync")
+async_pool_stats = PoolStats("async")
+
+
+def build_sync_http_client() -> httpx.Client:
+    return httpx.Client(
+        transport=RetryTransport(sync_pool_stats),
+        timeout=pool_timeout(),
+        follow_redirects=True,
+    )
+
+
+def build_async_http_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        transport=AsyncRetryTransport(async_pool_stats),
+        timeout=pool_timeout(),
+        follow_redirects=True,
+    )
+
+
+def pool_stats() -> Dict[str, Any]:
+    """Statistiques des pools Supabase synchrone et asynchrone du process."""
+    return {
+        "http2": settings.SUPABASE_HTTP2,
+        "async_http2": settings.SUPABASE_ASYNC_HTTP2,
+        "max_connections": settings.SUPABASE_POOL_MAX_CONNECTIONS,
+        "sync": sync_pool_stats.snapshot(),
+        "async": async_pool_stats.snapshot(),
+    }
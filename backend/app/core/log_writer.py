@@ -0,0 +1,183 @@
+"""
+BufferedLogWriter
+-----------------
+
+Écriture asynchrone et groupée des logs applicatifs (table internal.logs).
+
+- `write_log(payload)` dépose le log en mémoire et rend la main immédiatement
+- un thread de fond vide le buffer en inserts multi-lignes dès que
+  `LOGS_FLUSH_BATCH_SIZE` logs sont en attente ou toutes les
+  `LOGS_FLUSH_INTERVAL_SECONDS`
+- sous pression (buffer au-delà du seuil haut), les logs de consultation
+  (`type="context"`) sont échantillonnés ; buffer plein → le log est ignoré
+- le buffer est vidé à l'arrêt du process (atexit + shutdown FastAPI)
+"""
+
+from __future__ import annotations
+
+import atexit
+import logging
+import random
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+Sink = Callable[[List[Dict[str, Any]]], Any]
+
+
+def _insert_logs_batch(payloads: List[Dict[str, Any]]) -> Any:
+    # Import tardif : le service est résolu au moment du flush
+    from app.services import logs_service
+
+    return logs_service.create_logs_bulk(payloads)
+
+
+class BufferedLogWriter:
+    def __init__(
+        self,
+        *,
+        sink: Sink = _insert_logs_batch,
+        batch_size: int = settings.LOGS_FLUSH_BATCH_SIZE,
+        flush_interval: float = settings.LOGS_FLUSH_INTERVAL_SECONDS,
+        max_queue: int = settings.LOGS_MAX_QUEUE,
+        high_watermark: float = settings.LOGS_HIGH_WATERMARK,
+        sample_rate_under_pressure: float = settings.LOGS_SAMPLE_RATE_UNDER_PRESSURE,
+        max_attempts: int = 3,
+    ) -> None:
+        self.sink = sink
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.max_queue = max(1, max_queue)
+        self.high_watermark = high_watermark
+        self.sample_rate_under_pressure = sample_rate_under_pressure
+        self.max_attempts = max(1, max_attempts)
+
+        self._buffer: Deque[Dict[str, Any]] = deque()
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._flush_requested = False
+        self._in_flight = 0
+        self._stats = {"written": 0, "flushes": 0, "sampled_out": 0, "dropped": 0, "failed": 0}
+
+    # --- Écriture ----------------------------------------------------------
+
+    def _should_keep(self, payload: Dict[str, Any]) -> bool:
+        size = len(self._buffer)
+        if size >= self.max_queue:
+            self._stats["dropped"] += 1
+            return False
+        if size >= self.max_queue * self.high_watermark and payload.get("type") == "context":
+            if random.random() >= self.sample_rate_under_pressure:
+                self._stats["sampled_out"] += 1
+                return False
+        return True
+
+    def write(self, payload: Dict[str, Any]) -> bool:
+        with self._condition:
+            if not self._should_keep(payload):
+                return False
+            self._buffer.append(dict(payload))
+            self._ensure_started()
+            if len(self._buffer) >= self.batch_size:
+                self._condition.notify()
+        return True
+
+    # --- Flush -------------------------------------------------------------
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def _take_batch(self) -> List[Dict[str, Any]]:
+        batch: List[Dict[str, Any]] = []
+        while self._buffer and len(batch) < self.batch_size:
+            batch.append(self._buffer.popleft())
+        self._in_flight += len(batch)
+        return batch
+
+    def _flush_batch(self, batch: List[Dict[str, Any]]) -> None:
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                self.sink(batch)
+                with self._condition:
+                    self._stats["written"] += len(batch)
+                    self._stats["flushes"] += 1
+                return
+            except Exception as exc:
+                if attempt == self.max_attempts:
+                    logger.warning("[log_writer] %s logs lost: %s", len(batch), exc)
+                    with self._condition:
+                        self._stats["failed"] += len(batch)
+                    return
+                time.sleep(0.2 * attempt)
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                if (
+                    len(self._buffer) < self.batch_size
+                    and not self._flush_requested
+                    and not self._stopping
+                ):
+                    self._condition.wait(timeout=self.flush_interval)
+                if not self._buffer:
+                    self._flush_requested = False
+                    if self._stopping:
+                        return
+                    continue
+                batch = self._take_batch()
+            try:
+                self._flush_batch(batch)
+            finally:
+                with self._condition:
+                    self._in_flight -= len(batch)
+                    self._condition.notify_all()
+
+    def pending(self) -> int:
+        return len(self._buffer) + self._in_flight
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Force l'écriture du buffer et attend qu'il soit vide (ou timeout)."""
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while self.pending():
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._flush_requested = True
+                self._ensure_started()
+                self._condition.notify_all()
+                self._condition.wait(timeout=min(remaining, 0.05))
+            return True
+
+    def stop(self, timeout: float = 10.0) -> bool:
+        drained = self.flush(timeout=timeout)
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        return drained
+
+    def stats(self) -> Dict[str, int]:
+        with self._condition:
+            return {**self._stats, "pending": self.pending()}
+
+
+log_writer = BufferedLogWriter()
+atexit.register(log_writer.stop, 5.0)
+
+
+def write_log(payload: Dict[str, Any]) -> None:
+    """Dépose un log applicatif dans le buffer (ne bloque jamais l'appelant)."""
+    try:
+        log_writer.write(payload)
+    except Exception:
+        pass
@@ -0,0 +1,596 @@
+"""
+NotificationOutbox
+------------------
+
+Outbox des notifications sortantes (Telegram, alertes SMS via alert_logs).
+
+Les logiques métier ne parlent plus directement aux API externes :
+- elles insèrent un enregistrement dans `internal.notification_outbox`
+  (backend/sql/notification_outbox.sql) ; table indisponible → file mémoire
+- un dispatcher en arrière-plan réserve les lignes par canal, les livre par
+  lots, respecte un débit maximum et réessaie avec backoff, puis marque les
+  lignes envoyées ou abandonnées.
+
+Une API Telegram lente ou une erreur côté alertes SMS n'ajoute donc jamais de
+latence à un import de facture, et un crash du process ne perd pas les
+notifications déjà enregistrées (reprises à l'expiration du bail par le
+prochain dispatcher). L'outbox est vidée à l'arrêt du process (atexit +
+shutdown FastAPI).
+"""
+
+from __future__ import annotations
+
+import atexit
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Deque, Dict, List, Optional, Sequence
+from uuid import UUID
+
+from fastapi.encoders import jsonable_encoder
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+TELEGRAM_MAX_MESSAGE_LENGTH = 4096
+
+OUTBOX_SCHEMA = "internal"
+OUTBOX_TABLE = "notification_outbox"
+CLAIM_RPC_NAME = "claim_notification_outbox"
+RETRY_RPC_NAME = "retry_notification_outbox"
+
+CHANNEL_TELEGRAM = "telegram"
+CHANNEL_SMS_ALERT = "sms_alert"
+
+
+@dataclass
+class NotificationRecord:
+    channel: str
+    payload: Dict[str, Any]
+    attempts: int = 0
+    next_attempt_at: float = 0.0
+    created_at: float = field(default_factory=time.monotonic)
+    # Ligne de internal.notification_outbox (None : enregistrement en mémoire)
+    id: Optional[str] = None
+
+
+# Un sender reçoit un lot d'enregistrements d'un même canal et renvoie la liste
+# des enregistrements à réessayer (vide si tout a été livré).
+Sender = Callable[[List[NotificationRecord]], List[NotificationRecord]]
+
+
+# ---------------------------------------------------------------------------
+# Senders par défaut
+# ---------------------------------------------------------------------------
+
+_telegram_client: Any = None
+_telegram_unavailable = False
+
+
+def _get_telegram_client() -> Any:
+    global _telegram_client, _telegram_unavailable
+    if _telegram_client is None and not _telegram_unavailable:
+        try:
+            from app.services.telegram.gordon_service import GordonTelegram
+
+            _telegram_client = GordonTelegram()
+        except Exception:
+            _telegram_unavailable = True
+    return _telegram_client
+
+
+def _is_html(record: NotificationRecord) -> bool:
+    return bool(record.payload.get("html", True))
+
+
+def split_telegram_text(text: str, limit: int = TELEGRAM_MAX_MESSAGE_LENGTH) -> List[str]:
+    """
+    Découpe un message trop long pour un envoi Telegram en morceaux <= limit,
+    sur les fins de ligne (une ligne plus longue que la limite est coupée net).
+    """
+    if len(text) <= limit:
+        return [text]
+    chunks: List[str] = []
+    current = ""
+    for line in text.split("\n"):
+        while len(line) > limit:
+            if current:
+                chunks.append(current)
+                current = ""
+            chunks.append(line[:limit])
+            line = line[limit:]
+        candidate = f"{current}\n{line}" if current else line
+        if len(candidate) > limit:
+            chunks.append(current)
+            current = line
+        else:
+            current = candidate
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _pack_telegram_messages(records: Sequence[NotificationRecord]) -> List[List[NotificationRecord]]:
+    """
+    Regroupe les messages consécutifs dans des envois <= TELEGRAM_MAX_MESSAGE_LENGTH,
+    sans mélanger messages HTML et texte brut (un envoi n'a qu'un parse_mode).
+    """
+    packs: List[List[NotificationRecord]] = []
+    current: List[NotificationRecord] = []
+    current_length = 0
+    for record in records:
+        length = len(record.payload.get("text") or "") + 2
+        if current and (
+            current_length + length > TELEGRAM_MAX_MESSAGE_LENGTH
+            or _is_html(record) != _is_html(current[0])
+        ):
+            packs.append(current)
+            current, current_length = [], 0
+        current.append(record)
+        current_length += length
+    if current:
+        packs.append(current)
+    return packs
+
+
+def send_telegram_batch(records: List[NotificationRecord]) -> List[NotificationRecord]:
+    client = _get_telegram_client()
+    if client is None:
+        for record in records:
+            print(f"[GORDON FALLBACK] {record.payload.get('text')}")
+        return []
+
+    failed: List[NotificationRecord] = []
+    for pack in _pack_telegram_messages(records):
+        text = "\n\n".join(record.payload.get("text") or "" for record in pack)
+        if not client.send_text(text, html=_is_html(pack[0])):
+            failed.extend(pack)
+    return failed
+
+
+def send_sms_alert_batch(records: List[NotificationRecord]) -> List[NotificationRecord]:
+    """Insère les alert_logs de tous les enregistrements en une requête multi-lignes,
+    puis rattache les variations de chaque alerte en une requête par alerte."""
+    from app.core.supabase_client import supabase
+
+    rows: List[Dict[str, Any]] = []
+    for record in records:
+        rows.extend(record.payload.get("alerts") or [])
+    if not rows:
+        return []
+
+    prepared = jsonable_encoder(
+        [{k: v for k, v in row.items() if v is not None and k != "id"} for row in rows]
+    )
+    try:
+        response = supabase.table("alert_logs").insert(prepared).execute()
+    except Exception as exc:
+        logger.warning("[notification_outbox] alert_logs insert failed: %s", exc)
+        return list(records)
+
+    created = response.data or []
+    offset = 0
+    for record in records:
+        alerts = record.payload.get("alerts") or []
+        created_for_record = created[offset : offset + len(alerts)]
+        offset += len(alerts)
+        variation_ids = [str(v) for v in record.payload.get("variation_ids") or [] if v]
+        if not created_for_record or not variation_ids:
+            continue
+        # Comme historiquement : les variations pointent vers la dernière alerte créée
+        alert_id = created_for_record[-1].get("id")
+        if not alert_id:
+            continue
+        try:
+            (
+                supabase.table("variations")
+                .update({"alert_logs_id": str(alert_id)})
+                .in_("id", variation_ids)
+                .execute()
+            )
+        except Exception as exc:
+            # Les alertes sont déjà créées : on ne réessaie pas pour éviter les doublons
+            logger.warning("[notification_outbox] variations link failed: %s", exc)
+    return []
+
+
+# ---------------------------------------------------------------------------
+# Table internal.notification_outbox
+# ---------------------------------------------------------------------------
+
+
+class OutboxTable:
+    """Lignes persistées de l'outbox (réservation, livraison, nouvel essai)."""
+
+    def __init__(self, client: Any = None) -> None:
+        self._client = client
+
+    def _db(self) -> Any:
+        client = self._client
+        if client is None:
+            from app.core.supabase_client import supabase
+
+            client = supabase
+        return client.schema(OUTBOX_SCHEMA)
+
+    def insert(self, records: Sequence[NotificationRecord]) -> None:
+        rows = [{"channel": record.channel, "payload": jsonable_encoder(record.payload)} for record in records]
+        created = self._db().table(OUTBOX_TABLE).insert(rows).execute().data or []
+        for record, row in zip(records, created):
+            record.id = str(row["id"])
+
+    def claim(self, channel: str, limit: int, lease_seconds: int) -> List[NotificationRecord]:
+        rows = (
+            self._db()
+            .rpc(CLAIM_RPC_NAME, {"p_channel": channel, "p_limit": limit, "p_lease_seconds": lease_seconds})
+            .execute()
+            .data
+            or []
+        )
+        rows.sort(key=lambda row: str(row.get("created_at") or ""))
+        return [
+            NotificationRecord(
+                channel=row["channel"],
+                payload=row.get("payload") or {},
+                attempts=int(row.get("attempts") or 0),
+                id=str(row["id"]),
+            )
+            for row in rows
+        ]
+
+    def mark_sent(self, records: Sequence[NotificationRecord]) -> None:
+        (
+            self._db()
+            .table(OUTBOX_TABLE)
+            .update(
+                {
+                    "status": "sent",
+                    "sent_at": datetime.now(timezone.utc).isoformat(),
+                    "locked_until": None,
+                }
+            )
+            .in_("id", [record.id for record in records])
+            .execute()
+        )
+
+    def retry(
+        self, records: Sequence[NotificationRecord], max_attempts: int, backoff: float, error: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Replanifie les lignes en échec ; retourne les lignes mises à jour (status 'pending' ou 'dropped')."""
+        return (
+            self._db()
+            .rpc(
+                RETRY_RPC_NAME,
+                {
+                    "p_ids": [record.id for record in records],
+                    "p_max_attempts": max_attempts,
+                    "p_backoff_seconds": backoff,
+                    "p_error": error,
+                },
+            )
+            .execute()
+            .data
+            or []
+        )
+
+
+# ---------------------------------------------------------------------------
+# Outbox
+# ---------------------------------------------------------------------------
+
+
+class NotificationOutbox:
+    def __init__(
+        self,
+        *,
+        senders: Optional[Dict[str, Sender]] = None,
+        batch_size: int = settings.NOTIFICATIONS_BATCH_SIZE,
+        flush_interval: float = settings.NOTIFICATIONS_FLUSH_INTERVAL_SECONDS,
+        max_attempts: int = settings.NOTIFICATIONS_MAX_ATTEMPTS,
+        retry_backoff: float = settings.NOTIFICATIONS_RETRY_BACKOFF_SECONDS,
+        min_interval_by_channel: Optional[Dict[str, float]] = None,
+        max_queue: int = settings.NOTIFICATIONS_MAX_QUEUE,
+        table: Optional[OutboxTable] = None,
+        persistent: bool = settings.NOTIFICATIONS_OUTBOX_PERSISTENT,
+        poll_interval: float = settings.NOTIFICATIONS_POLL_INTERVAL_SECONDS,
+        lease_seconds: int = settings.NOTIFICATIONS_LEASE_SECONDS,
+    ) -> None:
+        self.senders: Dict[str, Sender] = senders or {
+            CHANNEL_TELEGRAM: send_telegram_batch,
+            CHANNEL_SMS_ALERT: send_sms_alert_batch,
+        }
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.max_attempts = max(1, max_attempts)
+        self.retry_backoff = retry_backoff
+        self.min_interval_by_channel = (
+            min_interval_by_channel
+            if min_interval_by_channel is not None
+            else {CHANNEL_TELEGRAM: settings.NOTIFICATIONS_TELEGRAM_MIN_INTERVAL_SECONDS}
+        )
+        self.max_queue = max_queue
+        # Sans table (persistent=False) : file mémoire seule, perdue sur un crash
+        self.table: Optional[OutboxTable] = (table or OutboxTable()) if persistent else None
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+
+        self._queues: Dict[str, Deque[NotificationRecord]] = {}
+        self._last_sent_at: Dict[str, float] = {}
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._in_flight = 0
+        # Lignes insérées par ce process et pas encore livrées ni abandonnées
+        self._persisted: set[str] = set()
+        self._poll_requested = False
+        self._next_poll_at = 0.0
+        self._stats = {"enqueued": 0, "delivered": 0, "retried": 0, "dropped": 0}
+
+    # --- API d'écriture (côté logiques) -----------------------------------
+
+    def enqueue(self, channel: str, payload: Dict[str, Any]) -> bool:
+        if channel not in self.senders:
+            raise ValueError(f"Canal de notification inconnu : {channel}")
+        record = NotificationRecord(channel=channel, payload=payload)
+        if self.table is not None:
+            try:
+                self.table.insert([record])
+            except Exception as exc:
+                logger.warning("[notification_outbox] outbox table unavailable, kept in memory: %s", exc)
+            else:
+                with self._condition:
+                    self._persisted.add(record.id)
+                    self._stats["enqueued"] += 1
+                    self._poll_requested = True
+                    self._ensure_started()
+                    self._condition.notify()
+                return True
+        with self._condition:
+            queue = self._queues.setdefault(channel, deque())
+            if sum(len(q) for q in self._queues.values()) >= self.max_queue:
+                self._stats["dropped"] += 1
+                return False
+            queue.append(record)
+            self._stats["enqueued"] += 1
+            self._ensure_started()
+            self._condition.notify()
+        return True
+
+    def enqueue_telegram(self, text: str, html: bool = True) -> bool:
+        """Un message trop long pour un envoi est découpé ici : il échouerait à chaque essai."""
+        queued = [self.enqueue(CHANNEL_TELEGRAM, {"text": chunk, "html": html}) for chunk in split_telegram_text(text)]
+        return all(queued)
+
+    def enqueue_sms_alerts(
+        self, alerts: List[Dict[str, Any]], variation_ids: Sequence[UUID | str | None] = ()
+    ) -> bool:
+        if not alerts:
+            return False
+        return self.enqueue(
+            CHANNEL_SMS_ALERT,
+            {"alerts": list(alerts), "variation_ids": list(variation_ids)},
+        )
+
+    # --- Dispatcher --------------------------------------------------------
+
+    def start(self) -> None:
+        """Démarre le dispatcher : reprend les lignes laissées par un process arrêté."""
+        with self._condition:
+            self._poll_requested = self.table is not None
+            self._ensure_started()
+            self._condition.notify()
+
+    def _ensure_started(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stopping = False
+        self._thread = threading.Thread(
+            target=self._run, name="notification-outbox", daemon=True
+        )
+        self._thread.start()
+
+    def _rate_limited(self, channel: str, now: float) -> bool:
+        min_interval = self.min_interval_by_channel.get(channel, 0.0)
+        return now - self._last_sent_at.get(channel, 0.0) < min_interval
+
+    def _take_ready_batch(self, channel: str, now: float) -> List[NotificationRecord]:
+        queue = self._queues.get(channel)
+        if not queue or self._rate_limited(channel, now):
+            return []
+        batch: List[NotificationRecord] = []
+        postponed: List[NotificationRecord] = []
+        while queue and len(batch) < self.batch_size:
+            record = queue.popleft()
+            if record.next_attempt_at > now:
+                postponed.append(record)
+            else:
+                batch.append(record)
+        queue.extendleft(reversed(postponed))
+        return batch
+
+    def _next_wakeup_delay(self, now: float) -> float:
+        delay = self.flush_interval
+        if self.table is not None:
+            delay = min(delay, max(0.0, self._next_poll_at - now))
+            if self._poll_requested:
+                for channel in self.senders:
+                    min_interval = self.min_interval_by_channel.get(channel, 0.0)
+                    delay = min(delay, max(0.0, self._last_sent_at.get(channel, 0.0) + min_interval - now))
+        for channel, queue in self._queues.items():
+            if not queue:
+                continue
+            min_interval = self.min_interval_by_channel.get(channel, 0.0)
+            ready_at = max(
+                self._last_sent_at.get(channel, 0.0) + min_interval,
+                min(record.next_attempt_at for record in queue),
+            )
+            delay = min(delay, max(0.0, ready_at - now))
+        return delay
+
+    def _send(self, channel: str, batch: List[NotificationRecord]) -> List[NotificationRecord]:
+        try:
+            return self.senders[channel](batch)
+        except Exception as exc:
+            logger.warning("[notification_outbox] %s sender crashed: %s", channel, exc)
+            return batch
+
+    def _deliver(self, channel: str, batch: List[NotificationRecord]) -> None:
+        failed = self._send(channel, batch)
+
+        failed_ids = {id(record) for record in failed}
+        now = time.monotonic()
+        retry: List[NotificationRecord] = []
+        with self._condition:
+            self._in_flight -= len(batch)
+            self._last_sent_at[channel] = now
+            self._stats["delivered"] += len(batch) - len(failed_ids)
+            for record in failed:
+                record.attempts += 1
+                if record.attempts >= self.max_attempts:
+                    self._stats["dropped"] += 1
+                    logger.error(
+                        "[notification_outbox] %s notification dropped after %s attempts",
+                        channel,
+                        record.attempts,
+                    )
+                    continue
+                record.next_attempt_at = now + self.retry_backoff * (2 ** (record.attempts - 1))
+                retry.append(record)
+            if retry:
+                self._stats["retried"] += len(retry)
+                self._queues.setdefault(channel, deque()).extend(retry)
+
+    def _deliver_claimed(self, channel: str, batch: List[NotificationRecord]) -> None:
+        """Livre des lignes réservées dans la table puis les marque envoyées / replanifiées."""
+        failed = self._send(channel, batch)
+
+        failed_ids = {id(record) for record in failed}
+        delivered = [record for record in batch if id(record) not in failed_ids]
+        retried: List[Dict[str, Any]] = []
+        try:
+            if delivered:
+                self.table.mark_sent(delivered)
+            if failed:
+                retried = self.table.retry(failed, self.max_attempts, self.retry_backoff)
+        except Exception as exc:
+            # Lignes toujours réservées : relivrées à l'expiration du bail
+            logger.warning("[notification_outbox] %s outbox rows not updated: %s", channel, exc)
+
+        now = time.monotonic()
+        dropped = [row for row in retried if row.get("status") == "dropped"]
+        with self._condition:
+            self._last_sent_at[channel] = now
+            self._stats["delivered"] += len(delivered)
+            self._stats["dropped"] += len(dropped)
+            self._stats["retried"] += len(retried) - len(dropped)
+            for record in delivered:
+                self._persisted.discard(record.id)
+            for row in dropped:
+                self._persisted.discard(str(row["id"]))
+                logger.error(
+                    "[notification_outbox] %s notification dropped after %s attempts",
+                    channel,
+                    row.get("attempts"),
+                )
+
+    def _claim_ready(self, now: float) -> Dict[str, List[NotificationRecord]]:
+        """Réserve un lot par canal dans la table (lignes de ce process ou d'un autre)."""
+        claimed: Dict[str, List[NotificationRecord]] = {}
+        for channel in self.senders:
+            if self._rate_limited(channel, now):
+                with self._condition:
+                    self._poll_requested = True
+                continue
+            try:
+                batch = self.table.claim(channel, self.batch_size, self.lease_seconds)
+            except Exception as exc:
+                logger.warning("[notification_outbox] %s outbox claim failed: %s", channel, exc)
+                continue
+            if batch:
+                claimed[channel] = batch
+        return claimed
+
+    def _dispatch_once(self) -> bool:
+        """Livre au plus un lot par canal et par source. Renvoie True si un lot a été traité."""
+        now = time.monotonic()
+        with self._condition:
+            batches = {
+                channel: self._take_ready_batch(channel, now) for channel in list(self._queues)
+            }
+            self._in_flight += sum(len(batch) for batch in batches.values())
+            poll = self.table is not None and (self._poll_requested or now >= self._next_poll_at)
+            if poll:
+                self._poll_requested = False
+                self._next_poll_at = now + self.poll_interval
+        worked = False
+        for channel, batch in batches.items():
+            if batch:
+                self._deliver(channel, batch)
+                worked = True
+        if poll:
+            for channel, batch in self._claim_ready(now).items():
+                self._deliver_claimed(channel, batch)
+                worked = True
+                # Lot plein : d'autres lignes attendent peut-être
+                if len(batch) >= self.batch_size:
+                    with self._condition:
+                        self._poll_requested = True
+            with self._condition:
+                if self._persisted:
+                    # Lignes de ce process en attente d'un nouvel essai (backoff côté base)
+                    self._next_poll_at = min(self._next_poll_at, time.monotonic() + self.flush_interval)
+        return worked
+
+    def _run(self) -> None:
+        while True:
+            if self._dispatch_once():
+                continue
+            with self._condition:
+                if self._stopping and not self.pending():
+                    return
+                self._condition.wait(timeout=self._next_wakeup_delay(time.monotonic()))
+
+    # --- Contrôle ----------------------------------------------------------
+
+    def pending(self) -> int:
+        return sum(len(queue) for queue in self._queues.values()) + self._in_flight + len(self._persisted)
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Attend que l'outbox soit vide (ou timeout). Renvoie True si vidée."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            with self._condition:
+                if not self.pending():
+                    return True
+                self._ensure_started()
+                self._condition.notify()
+            time.sleep(0.05)
+        return not self.pending()
+
+    def stop(self, timeout: float = 10.0) -> bool:
+        """Vide l'outbox ; les lignes encore en table seront livrées par un prochain dispatcher."""
+        drained = self.flush(timeout=timeout)
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        return drained
+
+    def stats(self) -> Dict[str, int]:
+        with self._condition:
+            return {**self._stats, "pending": self.pending()}
+
+
+notification_outbox = NotificationOutbox()
+atexit.register(notification_outbox.stop, 5.0)
+
+
+def notify_telegram(message: str, html: bool = True) -> None:
+    """Dépose un message Telegram dans l'outbox (ne bloque jamais)."""
+    try:
+        notification_outbox.enqueue_telegram(message, html=html)
+    except Exception:
+        pass
@@ -0,0 +1,340 @@
+"""
+QueryTrace
+----------
+
+Instrumentation des requêtes PostgREST, attribuées à la requête FastAPI ou au
+job de worker en cours (contextvars).
+
+Pour chaque appel `supabase.table(...)...execute()` (sync ou async), les
+transports de `app.core.http_pool` enregistrent :
+- table (préfixée du schéma si ce n'est pas `public`) et opération
+  (select / insert / upsert / update / delete / rpc)
+- forme des filtres, sans les valeurs (`establishment_id=eq&date=gte`)
+- nombre de lignes (en-tête Content-Range), octets envoyés / reçus
+- latence jusqu'à la fin de la lecture du corps de la réponse
+
+    with trace_queries("import_job 123") as trace:
+        ...
+    trace.summary()
+
+`QueryTraceMiddleware` ouvre une trace par requête HTTP, ajoute l'en-tête
+`Server-Timing` et journalise les requêtes qui répètent une même forme de
+requête au-delà de QUERY_TRACE_N_PLUS_ONE_THRESHOLD (symptôme de N+1).
+Les requêtes plus lentes que QUERY_TRACE_SLOW_QUERY_MS sont journalisées
+individuellement.
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+import httpx
+from starlette.datastructures import MutableHeaders
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+REST_PREFIX = "/rest/v1/"
+NON_FILTER_PARAMS = frozenset({"select", "order", "limit", "offset", "on_conflict", "columns"})
+
+_current: ContextVar[Optional["QueryTrace"]] = ContextVar("query_trace", default=None)
+
+
+@dataclass
+class QueryRecord:
+    table: str
+    operation: str
+    filters: str
+    status: int
+    rows: Optional[int]
+    request_bytes: int
+    response_bytes: int
+    duration_ms: float
+
+    @property
+    def shape(self) -> Tuple[str, str, str]:
+        return (self.table, self.operation, self.filters)
+
+
+@dataclass
+class QueryTrace:
+    name: str
+    started_at: float = field(default_factory=time.perf_counter)
+    records: List[QueryRecord] = field(default_factory=list)
+    count: int = 0
+    db_ms: float = 0.0
+    dropped: int = 0
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    def add(self, record: QueryRecord) -> None:
+        with self._lock:
+            self.count += 1
+            self.db_ms += record.duration_ms
+            if len(self.records) < settings.QUERY_TRACE_MAX_RECORDS:
+                self.records.append(record)
+            else:
+                self.dropped += 1
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started_at) * 1000
+
+    def repeated_shapes(self, threshold: Optional[int] = None) -> List[Tuple[Tuple[str, str, str], int]]:
+        """Formes de requête répétées au moins `threshold` fois (N+1 probable)."""
+        threshold = threshold or settings.QUERY_TRACE_N_PLUS_ONE_THRESHOLD
+        with self._lock:
+            counts = Counter(record.shape for record in self.records)
+        return [(shape, n) for shape, n in counts.most_common() if n >= threshold]
+
+    def server_timing(self) -> str:
+        return (
+            f'db;dur={self.db_ms:.1f};desc="PostgREST x{self.count}", '
+            f"app;dur={self.elapsed_ms():.1f}"
+        )
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            records = list(self.records)
+        by_table: Counter = Counter(f"{r.operation} {r.table}" for r in records)
+        return {
+            "name": self.name,
+            "queries": self.count,
+            "db_ms": round(self.db_ms, 1),
+            "elapsed_ms": round(self.elapsed_ms(), 1),
+            "rows": sum(r.rows or 0 for r in records),
+            "response_bytes": sum(r.response_bytes for r in records),
+            "by_table": dict(by_table.most_common(10)),
+        }
+
+    def log_if_suspicious(self) -> None:
+        repeated = self.repeated_shapes()
+        if not repeated:
+            return
+        details = ", ".join(
+            f"{operation} {table}[{filters or '-'}]x{n}" for (table, operation, filters), n in repeated[:5]
+        )
+        logger.warning(
+            "[query_trace] %s: %s requêtes PostgREST (%.1f ms) — formes répétées : %s",
+            self.name,
+            self.count,
+            self.db_ms,
+            details,
+        )
+
+
+def current_trace() -> Optional[QueryTrace]:
+    return _current.get()
+
+
+@contextmanager
+def trace_queries(name: str) -> Iterator[QueryTrace]:
+    """Ouvre une trace (réutilise celle en cours si déjà ouverte)."""
+    existing = _current.get()
+    if existing is not None:
+        yield existing
+        return
+    trace = QueryTrace(name=name)
+    token = _current.set(trace)
+    try:
+        yield trace
+    finally:
+        _current.reset(token)
+        trace.log_if_suspicious()
+
+
+# ---------------------------------------------------------------------------
+# Description d'un échange HTTP PostgREST
+# ---------------------------------------------------------------------------
+
+
+def _describe(request: httpx.Request) -> Optional[Tuple[str, str, str]]:
+    path = request.url.path
+    position = path.find(REST_PREFIX)
+    if position < 0:
+        return None
+    target = path[position + len(REST_PREFIX):].strip("/")
+    method = request.method.upper()
+
+    if target.startswith("rpc/"):
+        table, operation = target[4:], "rpc"
+    else:
+        table = target
+        prefer = request.headers.get("prefer", "")
+        operation = {
+            "GET": "select",
+            "HEAD": "count",
+            "POST": "upsert" if "resolution=merge-duplicates" in prefer else "insert",
+            "PATCH": "update",
+            "DELETE": "delete",
+        }.get(method, method.lower())
+
+    schema = request.headers.get("accept-profile") or request.headers.get("content-profile")
+    if schema and schema != "public":
+        table = f"{schema}.{table}"
+
+    shape = []
+    for key, value in request.url.params.multi_items():
+        if key in NON_FILTER_PARAMS:
+            continue
+        operator = value.split(".", 1)[0] if "." in value else value
+        if operator == "not" and value.count(".") >= 2:
+            operator = "not." + value.split(".", 2)[1]
+        shape.append(f"{key}={operator}")
+    return table, operation, "&".join(sorted(shape))
+
+
+def _rows(response: httpx.Response) -> Optional[int]:
+    content_range = response.headers.get("content-range")
+    if not content_range:
+        return None
+    span = content_range.split("/", 1)[0]
+    if "-" not in span:
+        return None
+    start, _, end = span.partition("-")
+    try:
+        return int(end) - int(start) + 1
+    except ValueError:
+        return None
+
+
+class _Recorder:
+    def __init__(self, trace: QueryTrace, request: httpx.Request, description: Tuple[str, str, str], started: float):
+        self.trace = trace
+        self.request = request
+        self.description = description
+        self.started = started
+        self.response_bytes = 0
+        self.done = False
+
+    def finish(self, response: httpx.Response) -> None:
+        if self.done:
+            return
+        self.done = True
+        duration_ms = (time.perf_counter() - self.started) * 1000
+        table, operation, filters = self.description
+        try:
+            request_bytes = len(self.request.content)
+        except httpx.RequestNotRead:
+            request_bytes = 0
+        record = QueryRecord(
+            table=table,
+            operation=operation,
+            filters=filters,
+            status=response.status_code,
+            rows=_rows(response),
+            request_bytes=request_bytes,
+            response_bytes=self.response_bytes,
+            duration_ms=duration_ms,
+        )
+        self.trace.add(record)
+        if duration_ms >= settings.QUERY_TRACE_SLOW_QUERY_MS:
+            logger.warning(
+                "[query_trace] requête lente (%s) : %s %s [%s] %.1f ms, %s lignes, %s octets",
+                self.trace.name,
+                operation,
+                table,
+                filters or "-",
+                duration_ms,
+                record.rows,
+                record.response_bytes,
+            )
+
+
+class _TracedStream(httpx.SyncByteStream):
+    def __init__(self, stream: Any, recorder: _Recorder, response: httpx.Response) -> None:
+        self._stream = stream
+        self._recorder = recorder
+        self._response = response
+
+    def __iter__(self) -> Iterator[bytes]:
+        for chunk in self._stream:
+            self._recorder.response_bytes += len(chunk)
+            yield chunk
+
+    def close(self) -> None:
+        try:
+            self._stream.close()
+        finally:
+            self._recorder.finish(self._response)
+
+
+class _AsyncTracedStream(httpx.AsyncByteStream):
+    def __init__(self, stream: Any, recorder: _Recorder, response: httpx.Response) -> None:
+        self._stream = stream
+        self._recorder = recorder
+        self._response = response
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            self._recorder.response_bytes += len(chunk)
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            self._recorder.finish(self._response)
+
+
+def traced_response(
+    request: httpx.Request, response: httpx.Response, started: float, *, asynchronous: bool = False
+) -> httpx.Response:
+    """Enveloppe la réponse d'un transport pour l'enregistrer à la fin de sa lecture."""
+    trace = _current.get()
+    if trace is None or not settings.QUERY_TRACE_ENABLED:
+        return response
+    description = _describe(request)
+    if description is None:
+        return response
+    recorder = _Recorder(trace, request, description, started)
+    stream = (
+        _AsyncTracedStream(response.stream, recorder, response)
+        if asynchronous
+        else _TracedStream(response.stream, recorder, response)
+    )
+    return httpx.Response(
+        status_code=response.status_code,
+        headers=response.headers,
+        stream=stream,
+        extensions=response.extensions,
+        request=request,
+    )
+
+
+# ---------------------------------------------------------------------------
+# Middleware FastAPI
+# ---------------------------------------------------------------------------
+
+
+class QueryTraceMiddleware:
+    """Une trace par requête HTTP + en-tête Server-Timing (middleware ASGI)."""
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http" or not settings.QUERY_TRACE_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        trace = QueryTrace(name=f"{scope.get('method', '')} {scope.get('path', '')}")
+        token = _current.set(trace)
+
+        async def send_with_timing(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append("Server-Timing", trace.server_timing())
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            trace.log_if_suspicious()
@@ -0,0 +1,212 @@
+"""
+ReferenceDataCache
+------------------
+
+Cache process-wide des petites tables de référence lues sur les chemins
+chauds : `score_matrix` (rapports financiers, live score), `maintenance`
+(wakeuppers), `vat_rates`, `countries`, `recipe_categories`.
+
+- chaque table est chargée entière (pagination du service généré) puis gardée
+  REFERENCE_DATA_TTL_SECONDS[table] secondes
+- `warm_up()` charge tout au démarrage de l'API (thread d'arrière-plan)
+- les routes CRUD de ces tables appellent `invalidate(table)` à chaque écriture ;
+  les autres process (workers, wakeuppers) se rafraîchissent via le TTL
+- `stats()` expose hits / chargements / taux de hit par table
+  (GET /monitoring/reference-data)
+
+    reference_data.get("vat_rates")                 # tuple des lignes (modèles)
+    reference_data.get_by_id("recipe_categories", id)
+    reference_data.score_scale("purchase_result").score(82.5)
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = 500
+
+# Table -> filtres de chargement (ordre attendu par les consommateurs)
+REFERENCE_TABLES: Dict[str, Dict[str, Any]] = {
+    "score_matrix": {"order_by": "score", "direction": "desc"},
+    "maintenance": {},
+    "vat_rates": {},
+    "countries": {},
+    "recipe_categories": {},
+}
+
+
+def _safe_get(obj: Any, key: str, default: Any = None) -> Any:
+    if obj is None:
+        return default
+    if isinstance(obj, dict):
+        return obj.get(key, default)
+    return getattr(obj, key, default)
+
+
+def _load_table(table: str) -> List[Any]:
+    # Import tardif : les services dépendent du client Supabase
+    service_name = f"{table}_service"
+    service = getattr(__import__("app.services", fromlist=[service_name]), service_name)
+    fetcher = getattr(service, f"get_all_{table}")
+    filters = REFERENCE_TABLES.get(table, {})
+    rows: List[Any] = []
+    page = 1
+    while True:
+        batch = fetcher(filters=dict(filters), limit=PAGE_SIZE, page=page)
+        if not batch:
+            break
+        rows.extend(batch)
+        if len(batch) < PAGE_SIZE:
+            break
+        page += 1
+    return rows
+
+
+class ScoreScale:
+    """
+    Seuils de `score_matrix` pré-triés pour une colonne (purchase_result /
+    financial_result).
+
+    Même résultat que le parcours des lignes triées par score décroissant
+    (« première ligne dont le seuil est atteint ») : le score le plus élevé
+    parmi les lignes dont le seuil est <= valeur, sinon le score de la
+    dernière ligne. `convert` est appliqué aux seuils (float, Decimal...),
+    la valeur doit être du même type.
+    """
+
+    def __init__(self, rows: Iterable[Any], field_name: str, convert: Callable[[Any], Any] = float) -> None:
+        rows = list(rows)
+        pairs = []
+        for row in rows:
+            threshold = _safe_get(row, field_name)
+            score = _safe_get(row, "score")
+            if threshold is None or score is None:
+                continue
+            threshold = convert(threshold)
+            if threshold is None:
+                continue
+            pairs.append((threshold, score))
+        pairs.sort(key=lambda pair: pair[0])
+
+        self.thresholds = [threshold for threshold, _ in pairs]
+        self.best_scores: List[Any] = []
+        best = None
+        for _, score in pairs:
+            if best is None or score > best:
+                best = score
+            self.best_scores.append(best)
+        self.fallback = _safe_get(rows[-1], "score", 0) if rows else 0
+
+    def score(self, value: Any) -> Any:
+        position = bisect_right(self.thresholds, value)
+        if position:
+            return self.best_scores[position - 1]
+        return self.fallback
+
+
+@dataclass
+class _Entry:
+    rows: Tuple[Any, ...] = ()
+    by_id: Dict[str, Any] = field(default_factory=dict)
+    scales: Dict[Tuple[str, Any], ScoreScale] = field(default_factory=dict)
+    loaded_at: Optional[float] = None
+    hits: int = 0
+    loads: int = 0
+    errors: int = 0
+
+
+class ReferenceDataCache:
+    def __init__(self, loader: Callable[[str], List[Any]] = _load_table) -> None:
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._entries: Dict[str, _Entry] = {}
+
+    def ttl_seconds(self, table: str) -> float:
+        return settings.REFERENCE_DATA_TTL_SECONDS.get(table, settings.REFERENCE_DATA_DEFAULT_TTL_SECONDS)
+
+    def _entry(self, table: str) -> _Entry:
+        with self._lock:
+            entry = self._entries.setdefault(table, _Entry())
+            fresh = entry.loaded_at is not None and time.monotonic() - entry.loaded_at < self.ttl_seconds(table)
+            if fresh:
+                entry.hits += 1
+                return entry
+            try:
+                rows = tuple(self._loader(table) or [])
+            except Exception:
+                entry.errors += 1
+                raise
+            entry.rows = rows
+            entry.by_id = {str(_safe_get(row, "id")): row for row in rows if _safe_get(row, "id") is not None}
+            entry.scales = {}
+            entry.loaded_at = time.monotonic()
+            entry.loads += 1
+            return entry
+
+    def get(self, table: str) -> Tuple[Any, ...]:
+        return self._entry(table).rows
+
+    def get_by_id(self, table: str, row_id: Any) -> Optional[Any]:
+        if row_id is None:
+            return None
+        return self._entry(table).by_id.get(str(row_id))
+
+    def score_scale(self, field_name: str, convert: Callable[[Any], Any] = float) -> ScoreScale:
+        entry = self._entry("score_matrix")
+        key = (field_name, convert)
+        scale = entry.scales.get(key)
+        if scale is None:
+            scale = ScoreScale(entry.rows, field_name, convert)
+            entry.scales[key] = scale
+        return scale
+
+    def invalidate(self, table: Optional[str] = None) -> None:
+        with self._lock:
+            for name, entry in self._entries.items():
+                if table is None or name == table:
+                    entry.loaded_at = None
+
+    def warm_up(self, tables: Optional[Iterable[str]] = None) -> Dict[str, int]:
+        """Charge les tables (toutes par défaut) ; une table en erreur n'arrête pas les autres."""
+        loaded: Dict[str, int] = {}
+        for table in tables or REFERENCE_TABLES:
+            try:
+                loaded[table] = len(self.get(table))
+            except Exception:
+                logger.exception("[reference_data] préchargement de %s impossible", table)
+        return loaded
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        now = time.monotonic()
+        with self._lock:
+            snapshot = {}
+            for table, entry in self._entries.items():
+                reads = entry.hits + entry.loads
+                snapshot[table] = {
+                    "rows": len(entry.rows),
+                    "hits": entry.hits,
+                    "loads": entry.loads,
+                    "errors": entry.errors,
+                    "hit_ratio": round(entry.hits / reads, 4) if reads else None,
+                    "age_seconds": round(now - entry.loaded_at, 1) if entry.loaded_at is not None else None,
+                    "ttl_seconds": self.ttl_seconds(table),
+                }
+            return snapshot
+
+
+reference_data = ReferenceDataCache()
+
+
+def warm_up_in_background() -> threading.Thread:
+    thread = threading.Thread(target=reference_data.warm_up, name="reference-data-warmup", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,141 @@
+"""
+RegexPatternRegistry
+--------------------
+
+Registre process-wide des `regex_patterns` (nettoyage des noms fournisseurs /
+produits à l'import de facture).
+
+- toute la table est chargée en une requête, puis gardée en mémoire
+  REGEX_PATTERNS_TTL_SECONDS ; les routes CRUD `regex_patterns` invalident le
+  registre à chaque écriture (les workers se rafraîchissent via le TTL)
+- les motifs sont compilés une seule fois (`re.Pattern`)
+- `clean_names` nettoie tous les noms de produit d'une facture en un appel :
+  normalisation NFKD + suppression des accents via une table de traduction
+  (au lieu d'une boucle Python par caractère), puis regex compilée
+
+    regex_patterns.get("supplier_name")        # motif brut (str) ou None
+    regex_patterns.clean_names("market_master_article_name", names)
+"""
+
+from __future__ import annotations
+
+import re
+import threading
+import time
+import unicodedata
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from app.core.config import settings
+
+Loader = Callable[[], List[Any]]
+
+
+class _CombiningMarks(dict):
+    """Table `str.translate` : supprime les diacritiques, garde le reste."""
+
+    def __missing__(self, codepoint: int) -> Optional[str]:
+        char = chr(codepoint)
+        value = None if unicodedata.combining(char) else char
+        self[codepoint] = value
+        return value
+
+
+_COMBINING_MARKS = _CombiningMarks()
+
+
+def fold_accents(text: str) -> str:
+    """NFKD + suppression des caractères combinants (é -> e, œ conservé)."""
+    return unicodedata.normalize("NFKD", text).translate(_COMBINING_MARKS)
+
+
+@lru_cache(maxsize=256)
+def compile_pattern(pattern: str) -> re.Pattern:
+    """Compile (une fois) un motif venant de la base ; lève re.error si invalide."""
+    return re.compile(pattern)
+
+
+def _safe_get(obj: Any, key: str) -> Any:
+    if isinstance(obj, dict):
+        return obj.get(key)
+    return getattr(obj, key, None)
+
+
+def _load_regex_patterns() -> List[Any]:
+    # Import tardif : les services dépendent du client Supabase
+    from app.services import regex_patterns_service
+
+    return regex_patterns_service.get_all_regex_patterns(limit=1000, raw=True)
+
+
+class RegexPatternRegistry:
+    def __init__(self, loader: Loader = _load_regex_patterns, ttl_seconds: Optional[float] = None) -> None:
+        self._loader = loader
+        self._ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._patterns: Optional[Dict[str, str]] = None
+        self._loaded_at = 0.0
+        self.stats = {"loads": 0, "hits": 0}
+
+    @property
+    def ttl_seconds(self) -> float:
+        if self._ttl_seconds is not None:
+            return self._ttl_seconds
+        return settings.REGEX_PATTERNS_TTL_SECONDS
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._patterns = None
+
+    def _current(self) -> Dict[str, str]:
+        with self._lock:
+            fresh = self._patterns is not None and time.monotonic() - self._loaded_at < self.ttl_seconds
+            if fresh:
+                self.stats["hits"] += 1
+                return self._patterns
+            patterns: Dict[str, str] = {}
+            for row in self._loader() or []:
+                pattern_type = _safe_get(row, "type")
+                regex = _safe_get(row, "regex")
+                # Un motif par type : le premier rencontré, comme l'ancien `limit=1`
+                if pattern_type and pattern_type not in patterns:
+                    patterns[pattern_type] = regex
+            self._patterns = patterns
+            self._loaded_at = time.monotonic()
+            self.stats["loads"] += 1
+            return patterns
+
+    def get(self, pattern_type: str) -> Optional[str]:
+        return self._current().get(pattern_type)
+
+    def compiled(self, pattern_type: str) -> Optional[re.Pattern]:
+        pattern = self.get(pattern_type)
+        return compile_pattern(pattern) if pattern else None
+
+    def clean_names(self, pattern_type: str, values: Sequence[Optional[str]]) -> List[Optional[str]]:
+        """
+        Nettoie une série de noms (ordre conservé) :
+        strip -> accents / minuscules (market_master_article_name) -> regex -> strip.
+        Renvoie None pour les valeurs vides.
+        """
+        pattern = self.get(pattern_type)
+        return clean_names(values, pattern, fold=pattern_type == "market_master_article_name")
+
+
+def clean_names(values: Sequence[Optional[str]], pattern: Optional[str], *, fold: bool) -> List[Optional[str]]:
+    compiled = compile_pattern(pattern) if pattern else None
+    cleaned: List[Optional[str]] = []
+    for value in values:
+        if not value:
+            cleaned.append(None)
+            continue
+        text = value.strip()
+        if fold:
+            text = fold_accents(text).lower()
+        if compiled is not None:
+            text = compiled.sub("", text)
+        cleaned.append(text.strip() or None)
+    return cleaned
+
+
+regex_patterns = RegexPatternRegistry()
@@ -0,0 +1,175 @@
+"""
+StageGraph
+----------
+
+Cascade d'écriture découpée en étapes nommées aux dépendances déclarées
+(import de facture...) : chaque étape part dès que ses dépendances sont
+terminées, les étapes indépendantes en parallèle sur un pool de threads borné.
+
+    graph = StageGraph("invoice_import 123", max_workers=4)
+    graph.add("load", load)
+    graph.add("cascade", cascade, after=["load"])
+    graph.add("variations", create_variations, critical=False)
+    graph.add("sms", send_sms, after=["cascade", "variations"], critical=False)
+    run = graph.run()
+    run.durations  # {"load": 0.012, ...}
+
+- chaque étape s'exécute dans une copie du contexte appelant (contextvars) :
+  unit of work et trace des requêtes restent celles de la cascade
+- une étape critique qui échoue interrompt la cascade : plus rien n'est lancé,
+  les étapes en cours se terminent, puis l'exception est relevée telle quelle
+- une étape non critique qui échoue est journalisée ; les étapes qui en
+  dépendent (directement ou non) sont sautées, les autres continuent
+- `max_workers <= 1` : exécution séquentielle dans le thread appelant, dans
+  l'ordre de déclaration
+
+Les étapes échangent leurs résultats par l'état de la cascade (variables du
+code appelant) : une étape ne lit que ce qu'ont écrit ses dépendances, écrit
+avant sa fin, ce qui suffit à ordonner les accès.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class StageGraphError(Exception):
+    """Graphe d'étapes invalide (nom dupliqué, dépendance inconnue)."""
+
+
+@dataclass
+class Stage:
+    name: str
+    func: Callable[[], Any]
+    after: Tuple[str, ...] = ()
+    critical: bool = True
+
+
+@dataclass
+class StageRun:
+    """Bilan d'une exécution : résultats, durées, échecs isolés, étapes sautées."""
+
+    results: Dict[str, Any] = field(default_factory=dict)
+    durations: Dict[str, float] = field(default_factory=dict)
+    failed: Dict[str, BaseException] = field(default_factory=dict)
+    skipped: List[str] = field(default_factory=list)
+    # Ordre de fin des étapes (sert aux logs de timing)
+    completed: List[str] = field(default_factory=list)
+
+
+class StageGraph:
+    def __init__(self, name: str, max_workers: int = 1) -> None:
+        self.name = name
+        self.max_workers = max_workers
+        self._stages: Dict[str, Stage] = {}
+
+    def add(
+        self,
+        name: str,
+        func: Callable[[], Any],
+        *,
+        after: Iterable[str] = (),
+        critical: bool = True,
+    ) -> None:
+        """Déclare une étape ; ses dépendances doivent être déclarées avant elle."""
+        if name in self._stages:
+            raise StageGraphError(f"Étape déjà déclarée : {name}")
+        after = tuple(after)
+        unknown = [dep for dep in after if dep not in self._stages]
+        if unknown:
+            raise StageGraphError(f"Étape {name} : dépendances inconnues {unknown}")
+        self._stages[name] = Stage(name=name, func=func, after=after, critical=critical)
+
+    # --- Exécution ------------------------------------------------------------
+
+    def _execute(self, stage: Stage) -> Tuple[Any, float]:
+        started = time.perf_counter()
+        result = stage.func()
+        return result, time.perf_counter() - started
+
+    def _record_failure(self, run: StageRun, stage: Stage, exc: BaseException) -> None:
+        run.failed[stage.name] = exc
+        logger.warning(
+            "[stage_graph] %s : étape %s en échec (%s: %s), étapes dépendantes sautées",
+            self.name,
+            stage.name,
+            type(exc).__name__,
+            exc,
+            exc_info=exc,
+        )
+
+    def _blocked(self, run: StageRun, stage: Stage) -> bool:
+        """Vrai si une dépendance a échoué ou a été sautée : l'étape est sautée aussi."""
+        if any(dep in run.failed or dep in run.skipped for dep in stage.after):
+            run.skipped.append(stage.name)
+            return True
+        return False
+
+    def run(self) -> StageRun:
+        if self.max_workers <= 1:
+            return self._run_sequential()
+        return self._run_concurrent()
+
+    def _run_sequential(self) -> StageRun:
+        run = StageRun()
+        for stage in self._stages.values():
+            if self._blocked(run, stage):
+                continue
+            try:
+                run.results[stage.name], run.durations[stage.name] = self._execute(stage)
+            except Exception as exc:
+                if stage.critical:
+                    raise
+                self._record_failure(run, stage, exc)
+                continue
+            run.completed.append(stage.name)
+        return run
+
+    def _run_concurrent(self) -> StageRun:
+        run = StageRun()
+        waiting: List[Stage] = list(self._stages.values())
+        running: Dict[Future, Stage] = {}
+        finished: set[str] = set()
+        fatal: Optional[BaseException] = None
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="stage") as executor:
+            while True:
+                if fatal is None:
+                    # Ordre de déclaration : une étape sautée l'est avant ses dépendantes
+                    for stage in list(waiting):
+                        if not all(dep in finished for dep in stage.after):
+                            continue
+                        waiting.remove(stage)
+                        if self._blocked(run, stage):
+                            finished.add(stage.name)
+                            continue
+                        context = contextvars.copy_context()
+                        running[executor.submit(context.run, self._execute, stage)] = stage
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage = running.pop(future)
+                    finished.add(stage.name)
+                    try:
+                        run.results[stage.name], run.durations[stage.name] = future.result()
+                    except Exception as exc:
+                        if stage.critical:
+                            if fatal is None:
+                                fatal = exc
+                            continue
+                        self._record_failure(run, stage, exc)
+                        continue
+                    run.completed.append(stage.name)
+
+        if fatal is not None:
+            raise fatal
+        return run
@@ -0,0 +1,55 @@
+# backend/app/core/supabase_async_client.py
+"""
+Client Supabase asynchrone (httpx.AsyncClient, pool configuré dans
+`app.core.http_pool` à partir des réglages SUPABASE_*).
+
+Utilisé par les services `app.services.aio.*` et les logiques de lecture qui
+lancent plusieurs requêtes indépendantes en parallèle (`asyncio.gather`).
+Le client est créé à la première utilisation et rattaché à la boucle
+d'événements courante : une connexion httpx ne peut pas changer de boucle.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+from typing import Optional
+
+from supabase import AsyncClient, acreate_client
+from supabase.lib.client_options import AsyncClientOptions
+
+from app.core.http_pool import build_async_http_client
+
+SUPABASE_URL = os.getenv("SUPABASE_URL")
+SUPABASE_KEY = os.getenv("SUPABASE_KEY")
+
+_client: Optional[AsyncClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+_lock: Optional[asyncio.Lock] = None
+
+
+async def get_async_supabase() -> AsyncClient:
+    """Renvoie le client asynchrone partagé de la boucle courante."""
+    global _client, _client_loop, _lock
+    loop = asyncio.get_running_loop()
+    if _client is not None and _client_loop is loop:
+        return _client
+    if _lock is None or _client_loop is not loop:
+        _lock = asyncio.Lock()
+        _client, _client_loop = None, loop
+    async with _lock:
+        if _client is None:
+            options = AsyncClientOptions(httpx_client=build_async_http_client())
+            _client = await acreate_client(SUPABASE_URL, SUPABASE_KEY, options)
+    return _client
+
+
+async def close_async_supabase() -> None:
+    """Ferme le pool httpx du client asynchrone (shutdown FastAPI)."""
+    global _client, _client_loop, _lock
+    client, _client, _client_loop, _lock = _client, None, None, None
+    if client is None:
+        return
+    http_client = client.options.httpx_client
+    if http_client is not None:
+        await http_client.aclose()
@@ -1,13 +1,13 @@
 # backend/app/core/supabase_client.py
-import httpx
 from supabase import create_client, Client
 from supabase.lib.client_options import SyncClientOptions
 import os
 
+from app.core.http_pool import build_sync_http_client
+
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
 
-options = SyncClientOptions(
-    httpx_client=httpx.Client(http2=False, follow_redirects=True)
-)
+# Pool, HTTP/2, timeouts et retry : voir app.core.http_pool / Settings.SUPABASE_*
+options = SyncClientOptions(httpx_client=build_sync_http_client())
 supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY, options)
@@ -0,0 +1,180 @@
+"""
+UnitOfWork
+----------
+
+Identity map + regroupement des lectures `get_*_by_id` le temps d'une cascade
+d'écriture (import de facture, édition d'article, suppression de facture,
+rapport financier...).
+
+    with unit_of_work():
+        ...  # recipes_service.get_recipes_by_id(x) n'interroge la base qu'une fois
+
+- à l'intérieur du contexte, chaque ligne lue par id est mémorisée (y compris
+  les absences) ; les update / delete du service invalident l'entrée
+  correspondante. Les create n'invalident rien : l'id est généré par la base,
+  aucune lecture antérieure n'a pu le mémoriser
+- `defer(table, ids)` annonce des ids qui seront lus : la première lecture de
+  la table les récupère tous en une seule requête `in_("id", ...)`
+- côté asynchrone (`app.services.aio`), les lectures concurrentes d'une même
+  table lancées dans le même tour de boucle sont fusionnées en une requête
+  (à la DataLoader)
+- partageable entre threads (étapes parallèles de StageGraph) : l'état est
+  protégé par un verrou, relâché pendant la requête ; une ligne invalidée
+  pendant sa lecture n'est pas mémorisée
+
+Hors contexte, les services se comportent exactement comme avant.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional
+
+BatchLoader = Callable[[List[str]], Dict[str, Any]]
+AsyncBatchLoader = Callable[[List[str]], Awaitable[Dict[str, Any]]]
+
+IN_QUERY_CHUNK_SIZE = 200
+
+_current: ContextVar[Optional["UnitOfWork"]] = ContextVar("unit_of_work", default=None)
+
+
+def _chunked(values: List[str], size: int = IN_QUERY_CHUNK_SIZE) -> Iterator[List[str]]:
+    for i in range(0, len(values), size):
+        yield values[i : i + size]
+
+
+class UnitOfWork:
+    def __init__(self) -> None:
+        self._identity: Dict[str, Dict[str, Any]] = {}
+        self._deferred: Dict[str, set[str]] = {}
+        self._pending: Dict[str, Dict[str, asyncio.Future]] = {}
+        # Incrémenté à chaque invalidation : une lecture en cours pendant une
+        # écriture d'un autre thread ne mémorise pas une ligne périmée
+        self._generation: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "queries": 0}
+
+    # --- Identity map -----------------------------------------------------
+
+    def _table(self, table: str) -> Dict[str, Any]:
+        return self._identity.setdefault(table, {})
+
+    def invalidate(self, table: str, id: Any = None) -> None:
+        """Oublie une ligne (ou toute la table si `id` est None)."""
+        with self._lock:
+            self._generation[table] = self._generation.get(table, 0) + 1
+            if id is None:
+                self._identity.pop(table, None)
+                return
+            self._table(table).pop(str(id), None)
+
+    def defer(self, table: str, ids: Iterable[Any]) -> None:
+        """Annonce des ids à charger avec la prochaine lecture de la table."""
+        with self._lock:
+            known = self._table(table)
+            wanted = {str(i) for i in ids if i is not None and str(i) not in known}
+            if wanted:
+                self._deferred.setdefault(table, set()).update(wanted)
+
+    # --- Lecture synchrone -----------------------------------------------
+
+    def load(self, table: str, id: Any, loader: BatchLoader) -> Any:
+        key = str(id)
+        with self._lock:
+            known = self._table(table)
+            if key in known:
+                self.stats["hits"] += 1
+                return known[key]
+            self.stats["misses"] += 1
+            keys = [key, *(k for k in self._deferred.pop(table, set()) if k != key and k not in known)]
+            generation = self._generation.get(table, 0)
+
+        # Requêtes hors verrou : les autres étapes continuent de lire la map
+        loaded: Dict[str, Any] = {}
+        for chunk in _chunked(keys):
+            found = loader(chunk)
+            with self._lock:
+                self.stats["queries"] += 1
+            for k in chunk:
+                loaded[k] = found.get(k)
+
+        with self._lock:
+            if self._generation.get(table, 0) == generation:
+                self._table(table).update(loaded)
+        return loaded[key]
+
+    # --- Lecture asynchrone (coalescée) -------------------------------------
+
+    async def aload(self, table: str, id: Any, loader: AsyncBatchLoader) -> Any:
+        key = str(id)
+        known = self._table(table)
+        if key in known:
+            self.stats["hits"] += 1
+            return known[key]
+
+        self.stats["misses"] += 1
+        pending = self._pending.setdefault(table, {})
+        future = pending.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            if not pending:
+                # Premier id du tour de boucle : la requête part au tour suivant,
+                # une fois que les autres coroutines ont ajouté leurs ids.
+                loop.call_soon(lambda: asyncio.ensure_future(self._dispatch(table, loader)))
+            future = pending[key] = loop.create_future()
+        return await future
+
+    async def _dispatch(self, table: str, loader: AsyncBatchLoader) -> None:
+        pending = self._pending.pop(table, {})
+        known = self._table(table)
+        for k in self._deferred.pop(table, set()):
+            if k not in pending and k not in known:
+                pending[k] = asyncio.get_running_loop().create_future()
+        keys = list(pending)
+        for chunk in _chunked(keys):
+            try:
+                found = await loader(chunk)
+            except Exception as exc:
+                for k in chunk:
+                    if not pending[k].done():
+                        pending[k].set_exception(exc)
+                continue
+            self.stats["queries"] += 1
+            for k in chunk:
+                known[k] = found.get(k)
+                if not pending[k].done():
+                    pending[k].set_result(known[k])
+
+
+def current_unit_of_work() -> Optional[UnitOfWork]:
+    return _current.get()
+
+
+@contextmanager
+def unit_of_work() -> Iterator[UnitOfWork]:
+    """Ouvre une unit of work (réutilise celle en cours si déjà ouverte)."""
+    existing = _current.get()
+    if existing is not None:
+        yield existing
+        return
+    uow = UnitOfWork()
+    token = _current.set(uow)
+    try:
+        yield uow
+    finally:
+        _current.reset(token)
+
+
+def invalidate(table: str, id: Any = None) -> None:
+    uow = _current.get()
+    if uow is not None:
+        uow.invalidate(table, id)
+
+
+def defer(table: str, ids: Iterable[Any]) -> None:
+    uow = _current.get()
+    if uow is not None:
+        uow.defer(table, ids)
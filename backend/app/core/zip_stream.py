@@ -0,0 +1,23 @@
+"""Écriture de ZIP en streaming (exports de factures, fiches techniques)."""
+
+from __future__ import annotations
+
+
+class ZipChunkWriter:
+    """Sortie non-seekable pour zipfile : accumule les octets écrits jusqu'au
+    prochain `drain()`. zipfile bascule alors en mode streaming (data descriptors)."""
+
+    def __init__(self) -> None:
+        self._buffer = bytearray()
+
+    def write(self, data: bytes) -> int:
+        self._buffer.extend(data)
+        return len(data)
+
+    def flush(self) -> None:
+        return None
+
+    def drain(self) -> bytes:
+        chunk = bytes(self._buffer)
+        self._buffer.clear()
+        return chunk
@@ -1,15 +1,17 @@
 from __future__ import annotations
 
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import date, datetime
 from io import BytesIO
 import re
 import zipfile
-from typing import Iterable, Sequence
-
-from openpyxl import Workbook
+from typing import Callable, Iterable, Iterator, Sequence
 
+from app.core.config import settings
 from app.core.supabase_client import supabase
+from app.core.zip_stream import ZipChunkWriter
 
 
 class ExportError(Exception):
@@ -117,9 +119,12 @@ def _build_rows(invoices: Iterable[dict]) -> list[InvoiceExportRow]:
 
 
 def _build_xlsx(rows: list[InvoiceExportRow], filename: str) -> bytes:
-    workbook = Workbook()
-    sheet = workbook.active
-    sheet.title = "Factures"
+    # Import tardif : openpyxl n'est chargé qu'au premier export
+    from openpyxl import Workbook
+
+    # Mode write-only : les lignes sont sérialisées au fil de l'eau
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Factures")
     sheet.append(["Date", "Fournisseur", "Numéro", "HT", "TVA", "TTC", "Fichier"])
     for row in rows:
         sheet.append(
@@ -135,8 +140,7 @@ def _build_xlsx(rows: list[InvoiceExportRow], filename: str) -> bytes:
         )
     output = BytesIO()
     workbook.save(output)
-    output.seek(0)
-    return output.read()
+    return output.getvalue()
 
 
 def _download_pdf(storage_path: str) -> bytes | None:
@@ -149,7 +153,33 @@ def _download_pdf(storage_path: str) -> bytes | None:
     return None
 
 
-def export_invoices(establishment_id: str, invoice_ids: Sequence[str]) -> tuple[str, bytes, list[str]]:
+def _iter_pdfs(
+    rows: Sequence[InvoiceExportRow], max_workers: int
+) -> Iterator[tuple[InvoiceExportRow, bytes | None]]:
+    """Télécharge les PDF en parallèle (fenêtre bornée) et les restitue dans l'ordre."""
+    window = max(1, max_workers)
+    with ThreadPoolExecutor(max_workers=window) as executor:
+        pending: deque[tuple[InvoiceExportRow, Future | None]] = deque()
+        iterator = iter(rows)
+
+        def _submit_next() -> bool:
+            row = next(iterator, None)
+            if row is None:
+                return False
+            future = executor.submit(_download_pdf, row.storage_path) if row.storage_path else None
+            pending.append((row, future))
+            return True
+
+        for _ in range(window):
+            if not _submit_next():
+                break
+        while pending:
+            row, future = pending.popleft()
+            _submit_next()
+            yield row, future.result() if future is not None else None
+
+
+def prepare_export(establishment_id: str, invoice_ids: Sequence[str]) -> tuple[str, list[InvoiceExportRow]]:
     if not invoice_ids:
         raise ExportError("Aucune facture sélectionnée.")
 
@@ -167,27 +197,49 @@ def export_invoices(establishment_id: str, invoice_ids: Sequence[str]) -> tuple[
     rows = _build_rows(invoices)
     export_date = date.today()
     export_name = f"ravy-export({_format_date(export_date, '-')})"
-
-    xlsx_bytes = _build_xlsx(rows, export_name)
-
-    missing: list[str] = []
-    zip_buffer = BytesIO()
-    with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
-        zip_file.writestr(f"{export_name}.xlsx", xlsx_bytes)
-        for row in rows:
-            if not row.storage_path:
-                missing.append(row.file_name)
-                continue
-            pdf_bytes = _download_pdf(row.storage_path)
+    return export_name, rows
+
+
+def iter_export_zip(
+    export_name: str,
+    rows: list[InvoiceExportRow],
+    *,
+    missing: list[str] | None = None,
+    max_workers: int = settings.INVOICE_EXPORT_DOWNLOAD_CONCURRENCY,
+    on_invoice_done: Callable[[InvoiceExportRow, bool], None] | None = None,
+) -> Iterator[bytes]:
+    """Produit l'archive ZIP par morceaux : un PDF en mémoire à la fois par
+    téléchargement en cours, quelle que soit la taille de l'export.
+
+    `on_invoice_done(row, found)` est appelé après chaque facture traitée."""
+    missing = missing if missing is not None else []
+    output = ZipChunkWriter()
+    with zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED) as zip_file:
+        zip_file.writestr(f"{export_name}.xlsx", _build_xlsx(rows, export_name))
+        yield output.drain()
+        for row, pdf_bytes in _iter_pdfs(rows, max_workers):
+            if on_invoice_done is not None:
+                on_invoice_done(row, bool(pdf_bytes))
             if not pdf_bytes:
                 missing.append(row.file_name)
                 continue
-            zip_file.writestr(f"factures/{row.file_name}", pdf_bytes)
+            # Les PDF sont déjà compressés : on les stocke sans recompression
+            zip_file.writestr(
+                f"factures/{row.file_name}", pdf_bytes, compress_type=zipfile.ZIP_STORED
+            )
+            chunk = output.drain()
+            if chunk:
+                yield chunk
         if missing:
             zip_file.writestr(
                 "factures-manquantes.txt",
                 "\n".join(missing),
             )
+    yield output.drain()
 
-    zip_buffer.seek(0)
-    return export_name, zip_buffer.read(), missing
+
+def export_invoices(establishment_id: str, invoice_ids: Sequence[str]) -> tuple[str, bytes, list[str]]:
+    export_name, rows = prepare_export(establishment_id, invoice_ids)
+    missing: list[str] = []
+    zip_bytes = b"".join(iter_export_zip(export_name, rows, missing=missing))
+    return export_name, zip_bytes, missing
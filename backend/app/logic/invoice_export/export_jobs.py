@@ -0,0 +1,232 @@
+"""Jobs d'export de factures en arrière-plan.
+
+Un job construit l'archive (via `prepare_export` / `iter_export_zip`) dans
+INVOICE_EXPORT_JOBS_DIR. Le client suit la progression puis télécharge le
+fichier final, avec reprise possible (HTTP Range) si la connexion coupe.
+Les métadonnées du job (progression comprise, réécrite périodiquement) sont
+écrites à côté de l'archive : les autres workers suivent le job et il survit à
+un redémarrage du process. Un job pending / running lu sur disque n'est marqué
+interrompu que si son process propriétaire n'existe plus (même hôte) ou si sa
+progression n'a plus été écrite depuis INVOICE_EXPORT_JOBS_STALE_SECONDS.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta, timezone
+import json
+import os
+from pathlib import Path
+import socket
+import threading
+import time
+from typing import Sequence
+from uuid import uuid4
+
+from app.core.config import settings
+from app.logic.invoice_export.export_invoices import (
+    ExportError,
+    InvoiceExportRow,
+    iter_export_zip,
+    prepare_export,
+)
+
+JOB_STATUSES = ("pending", "running", "completed", "error")
+_HOSTNAME = socket.gethostname()
+
+
+@dataclass
+class ExportJob:
+    id: str
+    establishment_id: str
+    invoice_ids: list[str]
+    status: str = "pending"
+    export_name: str | None = None
+    invoices_total: int = 0
+    invoices_processed: int = 0
+    bytes_written: int = 0
+    missing: list[str] = field(default_factory=list)
+    error: str | None = None
+    created_at: str = field(default_factory=lambda: datetime.now(timezone.utc).isoformat())
+    finished_at: str | None = None
+    owner_host: str = field(default_factory=lambda: _HOSTNAME)
+    owner_pid: int = field(default_factory=os.getpid)
+    heartbeat_at: str | None = None
+
+    def to_public(self) -> dict:
+        data = asdict(self)
+        for key in ("invoice_ids", "owner_host", "owner_pid"):
+            data.pop(key)
+        data["missing_count"] = len(self.missing)
+        return data
+
+
+_jobs: dict[str, ExportJob] = {}
+_lock = threading.Lock()
+_executor = ThreadPoolExecutor(
+    max_workers=max(1, settings.INVOICE_EXPORT_JOBS_MAX_WORKERS),
+    thread_name_prefix="invoice-export",
+)
+
+
+def _jobs_dir() -> Path:
+    path = Path(settings.INVOICE_EXPORT_JOBS_DIR)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def _archive_path(job_id: str) -> Path:
+    return _jobs_dir() / f"{job_id}.zip"
+
+
+def _meta_path(job_id: str) -> Path:
+    return _jobs_dir() / f"{job_id}.json"
+
+
+def _save(job: ExportJob) -> None:
+    with _lock:
+        job.heartbeat_at = datetime.now(timezone.utc).isoformat()
+        data = asdict(job)
+    # Fichier temporaire propre au thread : deux écritures simultanées du même job
+    tmp_path = _meta_path(job.id).with_suffix(f".json.{os.getpid()}.{threading.get_ident()}.tmp")
+    tmp_path.write_text(json.dumps(data))
+    os.replace(tmp_path, _meta_path(job.id))
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _interrupted(job: ExportJob) -> bool:
+    """Job pending / running lu sur disque dont plus aucun process ne s'occupe."""
+    if job.owner_host == _HOSTNAME:
+        # Notre propre pid : job d'une instance précédente (sinon il serait dans `_jobs`)
+        if job.owner_pid == os.getpid() or not _pid_alive(job.owner_pid):
+            return True
+    if job.status != "running" or not job.heartbeat_at:
+        return False
+    age = datetime.now(timezone.utc) - datetime.fromisoformat(job.heartbeat_at)
+    return age.total_seconds() > settings.INVOICE_EXPORT_JOBS_STALE_SECONDS
+
+
+def _load(job_id: str) -> ExportJob | None:
+    try:
+        data = json.loads(_meta_path(job_id).read_text())
+    except (OSError, ValueError):
+        return None
+    job = ExportJob(**data)
+    if job.status in {"pending", "running"} and _interrupted(job):
+        # L'archive partielle est inutilisable
+        job.status = "error"
+        job.error = "Export interrompu, merci de relancer."
+        job.finished_at = datetime.now(timezone.utc).isoformat()
+        _save(job)
+    return job
+
+
+def _purge_expired() -> None:
+    limit = datetime.now(timezone.utc) - timedelta(hours=settings.INVOICE_EXPORT_JOBS_TTL_HOURS)
+    for meta in _jobs_dir().glob("*.json"):
+        try:
+            created_at = datetime.fromisoformat(json.loads(meta.read_text())["created_at"])
+        except (OSError, ValueError, KeyError):
+            continue
+        if created_at >= limit:
+            continue
+        job_id = meta.stem
+        with _lock:
+            job = _jobs.get(job_id)
+            if job and job.status in {"pending", "running"}:
+                continue
+            _jobs.pop(job_id, None)
+        for path in (meta, _archive_path(job_id), _archive_path(job_id).with_suffix(".zip.part")):
+            path.unlink(missing_ok=True)
+
+
+def _run_job(job: ExportJob) -> None:
+    part_path = _archive_path(job.id).with_suffix(".zip.part")
+    try:
+        with _lock:
+            job.status = "running"
+        _save(job)
+        export_name, rows = prepare_export(job.establishment_id, job.invoice_ids)
+        with _lock:
+            job.export_name = export_name
+            job.invoices_total = len(rows)
+        _save(job)
+        last_saved = time.monotonic()
+
+        def _on_invoice_done(_row: InvoiceExportRow, _found: bool) -> None:
+            nonlocal last_saved
+            with _lock:
+                job.invoices_processed += 1
+            # Progression visible des autres workers, et preuve que le job est vivant
+            if time.monotonic() - last_saved >= settings.INVOICE_EXPORT_JOBS_HEARTBEAT_SECONDS:
+                last_saved = time.monotonic()
+                _save(job)
+
+        with part_path.open("wb") as output:
+            for chunk in iter_export_zip(
+                export_name, rows, missing=job.missing, on_invoice_done=_on_invoice_done
+            ):
+                output.write(chunk)
+                with _lock:
+                    job.bytes_written += len(chunk)
+        os.replace(part_path, _archive_path(job.id))
+        with _lock:
+            job.status = "completed"
+    except Exception as exc:
+        part_path.unlink(missing_ok=True)
+        with _lock:
+            job.status = "error"
+            job.error = str(exc) if isinstance(exc, ExportError) else "Erreur lors de l'export."
+    finally:
+        with _lock:
+            job.finished_at = datetime.now(timezone.utc).isoformat()
+        _save(job)
+
+
+def submit_export_job(establishment_id: str, invoice_ids: Sequence[str]) -> ExportJob:
+    if not invoice_ids:
+        raise ExportError("Aucune facture sélectionnée.")
+    _purge_expired()
+    job = ExportJob(
+        id=str(uuid4()),
+        establishment_id=establishment_id,
+        invoice_ids=list(dict.fromkeys(str(i) for i in invoice_ids)),
+    )
+    with _lock:
+        _jobs[job.id] = job
+    _save(job)
+    _executor.submit(_run_job, job)
+    return job
+
+
+def get_export_job(job_id: str) -> ExportJob | None:
+    with _lock:
+        job = _jobs.get(job_id)
+        if job is not None:
+            return job
+    job = _load(job_id)
+    if job is not None and job.status in {"completed", "error"}:
+        # Un job en cours dans un autre worker est relu sur disque à chaque appel
+        with _lock:
+            _jobs.setdefault(job_id, job)
+    return job
+
+
+def get_export_archive(job_id: str) -> tuple[ExportJob, Path] | None:
+    job = get_export_job(job_id)
+    if job is None or job.status != "completed":
+        return None
+    path = _archive_path(job_id)
+    if not path.exists():
+        return None
+    return job, path
@@ -1,13 +1,23 @@
 from __future__ import annotations
 
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
 import io
+import multiprocessing
+import os
 from pathlib import Path
 from datetime import date as dt_date, datetime as dt_datetime
-from typing import Iterable, List, Optional
+import threading
+from typing import Iterable, Iterator, List, Optional, Sequence
+import zipfile
 
 import requests
 from fpdf import FPDF, HTMLMixin
 
+from app.core.config import settings
+from app.core.zip_stream import ZipChunkWriter
 from app.schemas.recipes import Recipes
 
 
@@ -62,6 +72,7 @@ def _safe_text(value: Optional[str]) -> str:
     return text.encode("latin-1", "ignore").decode("latin-1")
 
 
+@lru_cache(maxsize=1)
 def _resolve_logo_path() -> Optional[Path]:
     """
     Locate the ravy logo (prefer PNG, fallback SVG) relative to the project.
@@ -81,9 +92,50 @@ def _resolve_logo_path() -> Optional[Path]:
     return None
 
 
-def _fetch_image_bytes(path_or_url: Optional[str]) -> Optional[bytes]:
-    if not path_or_url:
-        return None
+class _ImageCache:
+    """LRU thread-safe borné en octets pour les images des fiches techniques."""
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self._items: OrderedDict[str, bytes] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._items.get(key)
+            if data is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def put(self, key: str, data: bytes) -> None:
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._items.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._items[key] = data
+            self._size += len(data)
+            while self._size > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self._size -= len(evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self._size = 0
+
+
+_image_cache = _ImageCache(settings.PDF_IMAGE_CACHE_MAX_BYTES)
+
+
+def _download_image_bytes(path_or_url: str) -> Optional[bytes]:
     try:
         if path_or_url.startswith(("http://", "https://")):
             resp = requests.get(path_or_url, timeout=10)
@@ -98,6 +150,28 @@ def _fetch_image_bytes(path_or_url: Optional[str]) -> Optional[bytes]:
     return None
 
 
+def _fetch_image_bytes(path_or_url: Optional[str]) -> Optional[bytes]:
+    if not path_or_url:
+        return None
+    cached = _image_cache.get(path_or_url)
+    if cached is not None:
+        return cached
+    data = _download_image_bytes(path_or_url)
+    if data:
+        _image_cache.put(path_or_url, data)
+    return data
+
+
+def prefetch_images(paths_or_urls: Iterable[Optional[str]]) -> dict[str, Optional[bytes]]:
+    """Télécharge en parallèle les images manquantes du cache."""
+    unique = list(dict.fromkeys(p for p in paths_or_urls if p))
+    if not unique:
+        return {}
+    workers = max(1, min(settings.PDF_IMAGE_DOWNLOAD_CONCURRENCY, len(unique)))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return dict(zip(unique, executor.map(_fetch_image_bytes, unique)))
+
+
 def _get_image_dimensions(data: bytes) -> Optional[tuple[int, int]]:
     if data.startswith(b"\x89PNG\r\n\x1a\n") and len(data) >= 24:
         width = int.from_bytes(data[16:20], "big")
@@ -243,6 +317,20 @@ def _format_date_long(value: Optional[dt_datetime | dt_date]) -> str:
     return f"{value.day:02d} {month} {value.year}"
 
 
+def _new_pdf() -> PDF:
+    pdf = PDF(format="A4", header_logo_path=_resolve_logo_path())
+    pdf.alias_nb_pages()
+    pdf.set_auto_page_break(auto=True, margin=15)
+    return pdf
+
+
+def _pdf_bytes(pdf: PDF) -> bytes:
+    output = pdf.output(dest="S")
+    if isinstance(output, (bytes, bytearray)):
+        return bytes(output)
+    return str(output).encode("latin1")
+
+
 def render_recipe_pdf(
     recipe: Recipes,
     ingredients: List[dict],
@@ -262,10 +350,20 @@ def render_recipe_pdf(
     Returns:
         PDF bytes.
     """
-    logo_path = _resolve_logo_path()
-    pdf = PDF(format="A4", header_logo_path=logo_path)
-    pdf.alias_nb_pages()
-    pdf.set_auto_page_break(auto=True, margin=15)
+    pdf = _new_pdf()
+    img_bytes = _fetch_image_bytes(technical_image_url or recipe.technical_data_sheet_image_path)
+    _render_recipe_pages(pdf, recipe, ingredients, include_financials, img_bytes, instructions_html)
+    return _pdf_bytes(pdf)
+
+
+def _render_recipe_pages(
+    pdf: PDF,
+    recipe: Recipes,
+    ingredients: List[dict],
+    include_financials: bool,
+    img_bytes: Optional[bytes],
+    instructions_html: Optional[str],
+) -> None:
     pdf.add_page()
     pdf.set_margins(15, 15, 15)
 
@@ -307,7 +405,6 @@ def render_recipe_pdf(
     table_start_x = pdf.l_margin
     table_height = 8 + (len(summary) * 7)
 
-    img_bytes = _fetch_image_bytes(technical_image_url or recipe.technical_data_sheet_image_path)
     image_bottom = table_start_y
     if img_bytes:
         try:
@@ -446,7 +543,100 @@ def render_recipe_pdf(
                 data_rows.append(row_cells)
         _table(pdf, headers, data_rows, col_widths=col_widths)
 
-    output = pdf.output(dest="S")
-    if isinstance(output, (bytes, bytearray)):
-        return bytes(output)
-    return str(output).encode("latin1")
+
+# ---------------------------------------------------------------------------
+# Génération par lot (livre de recettes)
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class RecipeBookEntry:
+    recipe: Recipes
+    ingredients: List[dict]
+    include_financials: bool = True
+    technical_image_url: Optional[str] = None
+    instructions_html: Optional[str] = None
+
+    @property
+    def image_source(self) -> Optional[str]:
+        return self.technical_image_url or self.recipe.technical_data_sheet_image_path
+
+
+def _safe_filename(value: str) -> str:
+    cleaned = "".join(c if c.isalnum() or c in " ()-_." else "-" for c in value).strip()
+    return cleaned or "fiche-technique"
+
+
+def _render_entry(entry: RecipeBookEntry, img_bytes: Optional[bytes]) -> bytes:
+    # Exécuté dans un process du pool : les images sont déjà téléchargées
+    pdf = _new_pdf()
+    _render_recipe_pages(
+        pdf,
+        entry.recipe,
+        entry.ingredients,
+        entry.include_financials,
+        img_bytes,
+        entry.instructions_html,
+    )
+    return _pdf_bytes(pdf)
+
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+_process_pool_lock = threading.Lock()
+
+
+def _get_process_pool() -> Optional[ProcessPoolExecutor]:
+    global _process_pool
+    workers = settings.PDF_RENDER_PROCESSES or (os.cpu_count() or 1)
+    if workers <= 1:
+        return None
+    with _process_pool_lock:
+        if _process_pool is None:
+            # spawn : pas de fork d'un process multithreadé (pools HTTP, verrous)
+            _process_pool = ProcessPoolExecutor(
+                max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _process_pool
+
+
+def render_recipe_book_pdf(entries: Sequence[RecipeBookEntry]) -> bytes:
+    """Un seul PDF contenant toutes les recettes (chacune sur ses pages)."""
+    images = prefetch_images(entry.image_source for entry in entries)
+    pdf = _new_pdf()
+    for entry in entries:
+        _render_recipe_pages(
+            pdf,
+            entry.recipe,
+            entry.ingredients,
+            entry.include_financials,
+            images.get(entry.image_source) if entry.image_source else None,
+            entry.instructions_html,
+        )
+    return _pdf_bytes(pdf)
+
+
+def iter_recipe_book_zip(entries: Sequence[RecipeBookEntry]) -> Iterator[bytes]:
+    """Un PDF par recette, rendus en parallèle dans le pool de process et
+    ajoutés au ZIP (streamé) dans l'ordre de la demande."""
+    images = prefetch_images(entry.image_source for entry in entries)
+    pool = _get_process_pool()
+    jobs = [
+        (entry, images.get(entry.image_source) if entry.image_source else None)
+        for entry in entries
+    ]
+    if pool is not None:
+        rendered = pool.map(_render_entry, *zip(*jobs)) if jobs else iter(())
+    else:
+        rendered = (_render_entry(entry, img) for entry, img in jobs)
+
+    output = ZipChunkWriter()
+    used_names: set[str] = set()
+    with zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED) as zip_file:
+        for index, (entry, pdf_bytes) in enumerate(zip(entries, rendered), start=1):
+            name = _safe_filename(entry.recipe.name or "fiche-technique")
+            if name in used_names:
+                name = f"{name} ({index})"
+            used_names.add(name)
+            zip_file.writestr(f"{name}.pdf", pdf_bytes)
+            yield output.drain()
+    yield output.drain()
@@ -2,7 +2,8 @@ from typing import Dict, Any, List
 from datetime import date
 from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
 from app.core.supabase_client import supabase
-from app.services import logs_service
+from app.core.log_writer import write_log
+from app.logic.read.last_article_prices import get_last_article_prices_before
 
 
 def _to_decimal(value: Any, default: str = "0") -> Decimal:
@@ -35,7 +36,7 @@ def get_invoice_detail(invoice_id: str) -> Dict[str, Any]:
 
     if not invoice_response.data:
         try:
-            logs_service.create_logs(
+            write_log(
                 {
                     "type": "context",
                     "action": "view",
@@ -77,35 +78,21 @@ def get_invoice_detail(invoice_id: str) -> Dict[str, Any]:
     )
     articles = articles_response.data or []
 
-    # --- 3. Préchargement des derniers prix par master_article_id ---
+    # --- 3. Dernier prix avant la facture, une ligne par master_article_id ---
     previous_by_master: Dict[str, Any] = {}
     if invoice_date and establishment_id:
-        master_ids = {
-            article.get("master_article_id")
-            for article in articles
-            if article.get("master_article_id")
-        }
-        if master_ids:
-            previous_response = (
-                supabase.table("articles")
-                .select("master_article_id, unit_price, date")
-                .eq("establishment_id", establishment_id)
-                .in_("master_article_id", list(master_ids))
-                .lt("date", str(invoice_date))
-                .order("date", desc=True)
-                .execute()
-            )
-            for row in previous_response.data or []:
-                master_id = row.get("master_article_id")
-                if master_id and master_id not in previous_by_master:
-                    previous_by_master[master_id] = row
+        previous_by_master = get_last_article_prices_before(
+            establishment_id,
+            (article.get("master_article_id") for article in articles),
+            invoice_date,
+        )
 
     # --- 4. Calcul des variations de prix ---
     for article in articles:
         master_article_id = article.get("master_article_id")
         current_price = _to_decimal(article.get("unit_price"))
         current_price = current_price.quantize(Decimal("0.001"), rounding=ROUND_HALF_UP)
-        previous_article = previous_by_master.get(master_article_id) if master_article_id else None
+        previous_article = previous_by_master.get(str(master_article_id)) if master_article_id else None
 
         if previous_article:
             previous_price = _to_decimal(previous_article.get("unit_price", 0))
@@ -138,7 +125,7 @@ def get_invoice_detail(invoice_id: str) -> Dict[str, Any]:
     }
 
     try:
-        logs_service.create_logs(
+        write_log(
             {
                 "type": "context",
                 "action": "view",
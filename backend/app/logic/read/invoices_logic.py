@@ -1,9 +1,12 @@
-from datetime import date
+import logging
+from datetime import date, datetime
 from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
 from typing import List, Optional, Dict, Any
 from dateutil.relativedelta import relativedelta
 from app.core.supabase_client import supabase
-from app.services import logs_service
+from app.core.log_writer import write_log
+
+logger = logging.getLogger(__name__)
 
 
 def _safe_decimal(value: Any) -> Decimal:
@@ -124,7 +127,7 @@ def invoices_sum(
     }
 
     try:
-        logs_service.create_logs(
+        write_log(
             {
                 "type": "context",
                 "action": "view",
@@ -144,3 +147,241 @@ def invoices_sum(
         pass
 
     return result
+
+
+# ============================================================
+# Dépenses par période (graphiques du dashboard)
+# ============================================================
+
+SPEND_GRANULARITIES = ("day", "week", "month")
+SPEND_RPC_NAME = "invoice_spend_by_period"
+SPEND_PAGE_SIZE = 1000
+SPEND_DEFAULT_MONTHS = 24
+
+
+def _as_date(value: Any) -> Optional[date]:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, str) and value:
+        try:
+            return date.fromisoformat(value[:10])
+        except ValueError:
+            return None
+    return None
+
+
+def _period_start(value: date, granularity: str) -> date:
+    if granularity == "month":
+        return value.replace(day=1)
+    if granularity == "week":
+        # Semaine ISO (lundi), comme date_trunc('week', ...)
+        return value - relativedelta(days=value.weekday())
+    return value
+
+
+def _period_starts(start_date: date, end_date: date, granularity: str) -> List[date]:
+    step = {
+        "day": relativedelta(days=1),
+        "week": relativedelta(weeks=1),
+        "month": relativedelta(months=1),
+    }[granularity]
+    periods = []
+    current = _period_start(start_date, granularity)
+    while current <= end_date:
+        periods.append(current)
+        current = current + step
+    return periods
+
+
+def _spend_rows_from_invoices(
+    establishment_id: str,
+    start_date: date,
+    end_date: date,
+    granularity: str,
+    supplier_ids: Optional[List[str]],
+    supplier_labels: Optional[List[str]],
+) -> List[Dict[str, Any]]:
+    # Repli sans la RPC : lecture paginée (pas de plafond max-rows) puis agrégation locale
+    suppliers_response = (
+        supabase.table("suppliers")
+        .select("id, label")
+        .eq("establishment_id", establishment_id)
+        .execute()
+    )
+    label_by_supplier = {str(s["id"]): s.get("label") for s in suppliers_response.data or []}
+
+    buckets: Dict[tuple, Dict[str, Any]] = {}
+    offset = 0
+    while True:
+        query = (
+            supabase.table("invoices")
+            .select("date, supplier_id, total_excl_tax, total_tax, total_incl_tax")
+            .eq("establishment_id", establishment_id)
+            .gte("date", str(start_date))
+            .lte("date", str(end_date))
+        )
+        if supplier_ids:
+            query = query.in_("supplier_id", supplier_ids)
+        page = query.order("id").range(offset, offset + SPEND_PAGE_SIZE - 1).execute().data or []
+
+        for inv in page:
+            invoice_date = _as_date(inv.get("date"))
+            if invoice_date is None:
+                continue
+            supplier_id = inv.get("supplier_id")
+            label = label_by_supplier.get(str(supplier_id)) if supplier_id else None
+            if supplier_labels and label not in supplier_labels:
+                continue
+            key = (_period_start(invoice_date, granularity), supplier_id, label)
+            bucket = buckets.setdefault(
+                key,
+                {
+                    "period": key[0],
+                    "supplier_id": supplier_id,
+                    "supplier_label": label,
+                    "invoices_count": 0,
+                    "sum_ht": Decimal("0"),
+                    "sum_tva": Decimal("0"),
+                    "sum_ttc": Decimal("0"),
+                },
+            )
+            bucket["invoices_count"] += 1
+            bucket["sum_ht"] += _safe_decimal(inv.get("total_excl_tax") or 0)
+            bucket["sum_tva"] += _safe_decimal(inv.get("total_tax") or 0)
+            bucket["sum_ttc"] += _safe_decimal(inv.get("total_incl_tax") or 0)
+
+        if len(page) < SPEND_PAGE_SIZE:
+            break
+        offset += SPEND_PAGE_SIZE
+
+    return sorted(buckets.values(), key=lambda b: (b["period"], str(b["supplier_id"])))
+
+
+def invoices_spend_by_period(
+    establishment_id: str,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    granularity: str = "month",
+    supplier_ids: Optional[List[str]] = None,
+    supplier_labels: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Dépenses (HT, TVA, TTC) d'un établissement regroupées par période
+    (jour / semaine ISO / mois) × fournisseur × label fournisseur, en un appel :
+    - agrégation côté base via la RPC `invoice_spend_by_period`
+      (backend/sql/invoice_spend_by_period.sql), repli sur une lecture paginée
+    - par défaut : les 24 derniers mois, mois courant inclus
+    - toutes les périodes de l'intervalle sont présentes (0 si aucune facture)
+    """
+
+    if granularity not in SPEND_GRANULARITIES:
+        raise ValueError(f"granularity must be one of {', '.join(SPEND_GRANULARITIES)}")
+    if not end_date:
+        end_date = get_month_bounds()[1]
+    if not start_date:
+        start_date = end_date.replace(day=1) - relativedelta(months=SPEND_DEFAULT_MONTHS - 1)
+    if start_date > end_date:
+        raise ValueError("start_date cannot be after end_date")
+
+    params = {
+        "p_establishment_id": establishment_id,
+        "p_start": str(start_date),
+        "p_end": str(end_date),
+        "p_granularity": granularity,
+        "p_supplier_ids": supplier_ids or None,
+        "p_supplier_labels": supplier_labels or None,
+    }
+    try:
+        # Paginé : le plafond max-rows de PostgREST s'applique aussi aux RPC ensemblistes
+        rows = []
+        offset = 0
+        while True:
+            page = (
+                supabase.rpc(SPEND_RPC_NAME, params)
+                .range(offset, offset + SPEND_PAGE_SIZE - 1)
+                .execute()
+                .data
+                or []
+            )
+            rows.extend(page)
+            if len(page) < SPEND_PAGE_SIZE:
+                break
+            offset += SPEND_PAGE_SIZE
+    except Exception as exc:
+        logger.warning("[invoices_logic] RPC %s indisponible (%s), lecture des factures", SPEND_RPC_NAME, exc)
+        rows = _spend_rows_from_invoices(
+            establishment_id, start_date, end_date, granularity, supplier_ids, supplier_labels
+        )
+
+    def _quantize(value: Any, exp: str = "0.01") -> float:
+        return float(_safe_decimal(value).quantize(Decimal(exp), rounding=ROUND_HALF_UP))
+
+    empty = {"sum_ht": Decimal("0"), "sum_tva": Decimal("0"), "sum_ttc": Decimal("0"), "count": 0}
+    by_period: Dict[date, Dict[str, Any]] = {
+        period: dict(empty) for period in _period_starts(start_date, end_date, granularity)
+    }
+    grand_total = dict(empty)
+    series: List[Dict[str, Any]] = []
+
+    for row in rows:
+        period = _as_date(row.get("period"))
+        count = int(row.get("invoices_count") or 0)
+        amounts = {key: _safe_decimal(row.get(key) or 0) for key in ("sum_ht", "sum_tva", "sum_ttc")}
+        for target in (by_period.setdefault(period, dict(empty)), grand_total):
+            for key, amount in amounts.items():
+                target[key] += amount
+            target["count"] += count
+        series.append(
+            {
+                "period": str(period),
+                "supplier_id": row.get("supplier_id"),
+                "supplier_label": row.get("supplier_label"),
+                "count": count,
+                **{key: _quantize(amount) for key, amount in amounts.items()},
+            }
+        )
+
+    def _totals(bucket: Dict[str, Any]) -> Dict[str, float]:
+        return {key: _quantize(bucket[key]) for key in ("sum_ht", "sum_tva", "sum_ttc")}
+
+    result = {
+        "filters": {
+            "establishment_id": establishment_id,
+            "start_date": str(start_date),
+            "end_date": str(end_date),
+            "granularity": granularity,
+            "supplier_ids": supplier_ids or [],
+            "supplier_labels": supplier_labels or [],
+        },
+        "totals": _totals(grand_total),
+        "count": grand_total["count"],
+        "periods": [
+            {"period": str(period), "totals": _totals(bucket), "count": bucket["count"]}
+            for period, bucket in sorted(by_period.items())
+        ],
+        "series": series,
+    }
+
+    try:
+        write_log(
+            {
+                "type": "context",
+                "action": "view",
+                "text": f"Dépenses par période calculées - {len(result['periods'])} périodes",
+                "establishment_id": establishment_id,
+                "element_type": "invoice",
+                "json": {
+                    "domain": "invoices",
+                    "scope": "invoices_spend_by_period",
+                    "filters": result["filters"],
+                    "count": result["count"],
+                    "totals": result["totals"],
+                },
+            }
+        )
+    except Exception:
+        pass
+
+    return result
@@ -0,0 +1,105 @@
+"""
+Dernier prix d'achat avant une date, par master_article.
+
+Une ligne par master_article (id, unit_price, date de l'article) via la RPC
+`last_article_prices_before` (voir backend/sql/last_article_prices_before.sql) :
+la base ne renvoie que le dernier achat au lieu de tout l'historique.
+
+Tant que la fonction n'est pas déployée, repli sur l'ancienne lecture
+(tous les articles antérieurs triés par date décroissante, premier par master).
+"""
+
+from __future__ import annotations
+
+import logging
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from app.core.supabase_client import supabase
+
+logger = logging.getLogger(__name__)
+
+RPC_NAME = "last_article_prices_before"
+CHUNK_SIZE = 500
+
+
+def _as_date(value: Any) -> Optional[date]:
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, str):
+        raw = value.strip()
+        if not raw:
+            return None
+        try:
+            return date.fromisoformat(raw[:10])
+        except ValueError:
+            return None
+    return None
+
+
+def _chunked(values: Sequence[str], size: int = CHUNK_SIZE) -> Iterable[List[str]]:
+    for idx in range(0, len(values), size):
+        yield list(values[idx : idx + size])
+
+
+def _scan_last_prices(establishment_id: str, master_ids: List[str], before: date) -> List[Dict[str, Any]]:
+    # Ancienne lecture : tout l'historique antérieur, premier article par master
+    rows: List[Dict[str, Any]] = []
+    seen = set()
+    response = (
+        supabase.table("articles")
+        .select("id, master_article_id, unit_price, date")
+        .eq("establishment_id", establishment_id)
+        .in_("master_article_id", master_ids)
+        .lt("date", before.isoformat())
+        .order("date", desc=True)
+        .execute()
+    )
+    for row in response.data or []:
+        master_id = row.get("master_article_id")
+        if master_id and master_id not in seen:
+            seen.add(master_id)
+            rows.append(row)
+    return rows
+
+
+def get_last_article_prices_before(
+    establishment_id: Any,
+    master_article_ids: Iterable[Any],
+    before: Any,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Retourne {master_article_id (str): {"id", "master_article_id", "unit_price", "date"}}
+    pour le dernier article de chaque master_article daté strictement avant `before`.
+    Les master_articles sans achat antérieur sont absents du résultat.
+    """
+    before_date = _as_date(before)
+    master_ids = list(dict.fromkeys(str(mid) for mid in master_article_ids if mid))
+    if not establishment_id or not before_date or not master_ids:
+        return {}
+
+    establishment_id_str = str(establishment_id)
+    last_by_master: Dict[str, Dict[str, Any]] = {}
+    for chunk in _chunked(master_ids):
+        try:
+            response = supabase.rpc(
+                RPC_NAME,
+                {
+                    "p_establishment_id": establishment_id_str,
+                    "p_master_article_ids": chunk,
+                    "p_before": before_date.isoformat(),
+                },
+            ).execute()
+            rows = response.data or []
+        except Exception as exc:
+            logger.warning("[last_article_prices] RPC %s indisponible (%s), lecture complète", RPC_NAME, exc)
+            rows = _scan_last_prices(establishment_id_str, chunk, before_date)
+        for row in rows:
+            master_id = row.get("master_article_id")
+            if master_id:
+                last_by_master[str(master_id)] = row
+    return last_by_master
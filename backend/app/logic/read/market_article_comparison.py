@@ -3,7 +3,8 @@ from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
 from typing import Dict, Any, Optional
 from dateutil.relativedelta import relativedelta
 from app.core.supabase_client import supabase
-from app.services import logs_service
+from app.core.log_writer import write_log
+from app.logic.read.price_series import PriceSeries
 
 
 def _to_decimal(value: Any, default: str = "0") -> Decimal:
@@ -63,7 +64,7 @@ def market_article_comparison(
     )
     if not master_resp.data:
         try:
-            logs_service.create_logs(
+            write_log(
                 {
                     "type": "context",
                     "action": "view",
@@ -86,7 +87,7 @@ def market_article_comparison(
     market_master_id = master_article.get("market_master_article_id")
     if not market_master_id:
         try:
-            logs_service.create_logs(
+            write_log(
                 {
                     "type": "context",
                     "action": "view",
@@ -130,7 +131,7 @@ def market_article_comparison(
     )
     if not market_master_resp.data:
         try:
-            logs_service.create_logs(
+            write_log(
                 {
                     "type": "context",
                     "action": "view",
@@ -167,33 +168,22 @@ def market_article_comparison(
     market_articles = market_articles_resp.data or []
 
     # --- 6. Stats utilisateur ---
-    user_prices = [
-        _to_decimal(a.get("unit_price"))
-        for a in user_articles
-        if a.get("unit_price") is not None
-    ]
+    user_series = PriceSeries(user_articles)
     user_qtys = [
         _to_decimal(a.get("quantity"))
         for a in user_articles
         if a.get("quantity") is not None
     ]
-    user_avg_price = (
-        _quantize(sum(user_prices) / len(user_prices)) if user_prices else 0.0
-    )
+    user_avg_price = user_series.stats()["avg_unit_price"] if len(user_series) else 0.0
     user_total_qty = _quantize(sum(user_qtys)) if user_qtys else 0.0
 
     # --- 7. Stats marché ---
-    market_prices = [
-        _to_decimal(a.get("unit_price"))
-        for a in market_articles
-        if a.get("unit_price") is not None
-    ]
-    market_avg_price = (
-        _quantize(sum(market_prices) / len(market_prices)) if market_prices else 0.0
-    )
-    market_min_price = _quantize(min(market_prices)) if market_prices else None
-    market_max_price = _quantize(max(market_prices)) if market_prices else None
-    market_count = len(market_prices)
+    market_series = PriceSeries(market_articles)
+    market_stats = market_series.stats()
+    market_avg_price = market_stats["avg_unit_price"] if len(market_series) else 0.0
+    market_min_price = market_stats["min_unit_price"]
+    market_max_price = market_stats["max_unit_price"]
+    market_count = len(market_series)
 
     # --- 8. Comparaison et économies ---
     diff_avg_price = (
@@ -252,7 +242,7 @@ def market_article_comparison(
     }
 
     try:
-        logs_service.create_logs(
+        write_log(
             {
                 "type": "context",
                 "action": "view",
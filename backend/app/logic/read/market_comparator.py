@@ -1,17 +1,13 @@
+import asyncio
 from datetime import date
-from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
-from typing import Dict, Any, Optional
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Dict, Any, Iterable, List, Optional, Sequence, Tuple
 from collections import defaultdict
 from dateutil.relativedelta import relativedelta
 from app.core.supabase_client import supabase
-from app.services import logs_service
-
-
-def _to_decimal(value: Any) -> Optional[Decimal]:
-    try:
-        return Decimal(str(value))
-    except (InvalidOperation, TypeError, ValueError):
-        return None
+from app.core.supabase_async_client import get_async_supabase
+from app.core.log_writer import write_log
+from app.logic.read.price_series import PriceSeries
 
 
 def _quantize(value: Optional[Decimal], exp: str = "0.001") -> float:
@@ -80,76 +76,142 @@ def _fetch_product_data(
             )
             rows = resp.data or []
 
-    # Normaliser l'ordre chronologique et filtrer les prix non numériques
-    rows = [r for r in rows if r.get("date")]
-    rows.sort(key=lambda r: r.get("date"))
-    price_rows = []
-    for r in rows:
-        price = _to_decimal(r.get("unit_price"))
-        if price is None:
-            continue
-        price_rows.append({**r, "unit_price": price})
-
-    if not rows:
-        return {
-            "series_daily": [],
-            "stats": {
-                "avg_unit_price": 0,
-                "min_unit_price": None,
-                "max_unit_price": None,
-                "last_unit_price": None,
-                "last_purchase_date": None,
-                "count_purchases": 0,
-                "volatility_range": None,
-            },
-        }
-
-    # --- Agrégation journalière ---
-    grouped = defaultdict(list)
-    for r in price_rows:
-        grouped[r["date"]].append(r["unit_price"])
-
-    series_daily = [
-        {"date": d, "avg_unit_price": _quantize(sum(v) / len(v))}
-        for d, v in sorted(grouped.items())
-    ]
-
-    if not price_rows:
-        return {
-            "series_daily": series_daily,
-            "stats": {
-                "avg_unit_price": 0,
-                "min_unit_price": None,
-                "max_unit_price": None,
-                "last_unit_price": None,
-                "last_purchase_date": rows[-1]["date"] if rows else None,
-                "count_purchases": len(rows),
-                "volatility_range": None,
-            },
-        }
-
-    prices = [r["unit_price"] for r in price_rows]
-    avg_price = _quantize(sum(prices) / len(prices))
-    min_price = _quantize(min(prices))
-    max_price = _quantize(max(prices))
-    last_entry = price_rows[-1]
-    last_price = _quantize(last_entry["unit_price"])
-    last_date = last_entry["date"]
+    return _build_product_data(rows)
+
+
+async def _fetch_product_data_async(
+    market_master_article_id: str,
+    establishment_id: str,
+    start_date: date,
+    end_date: date,
+    only_my_invoices: bool = False,
+) -> Dict[str, Any]:
+    """Variante asynchrone de `_fetch_product_data` (même résultat)."""
+    supabase = await get_async_supabase()
+
+    if not only_my_invoices:
+        resp = await (
+            supabase.schema("market").table("market_articles")
+            .select("unit_price, date")
+            .eq("market_master_article_id", market_master_article_id)
+            .gte("date", str(start_date))
+            .lte("date", str(end_date))
+            .order("date")
+            .execute()
+        )
+        rows = resp.data or []
+    else:
+        master_resp = await (
+            supabase.table("master_articles")
+            .select("id")
+            .eq("market_master_article_id", market_master_article_id)
+            .eq("establishment_id", establishment_id)
+            .execute()
+        )
+        master_ids = [m["id"] for m in master_resp.data or []]
+
+        if not master_ids:
+            rows = []
+        else:
+            resp = await (
+                supabase.table("articles")
+                .select("unit_price, date")
+                .in_("master_article_id", master_ids)
+                .gte("date", str(start_date))
+                .lte("date", str(end_date))
+                .order("date")
+                .execute()
+            )
+            rows = resp.data or []
+
+    return _build_product_data(rows)
+
+
+def _build_product_data(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Série journalière + statistiques à partir des lignes (unit_price, date)."""
+    series = PriceSeries(rows)
+    return {"series_daily": series.series_daily(), "stats": series.stats()}
+
+
+def _compare_products(
+    start_date: date,
+    end_date: date,
+    product1_meta: Optional[Dict[str, Any]],
+    product2_meta: Optional[Dict[str, Any]],
+    product1_data: Dict[str, Any],
+    product2_data: Dict[str, Any],
+) -> Dict[str, Any]:
+    # --- 5. Comparaison directionnelle (Produit 2 vs Produit 1) ---
+    avg1 = Decimal(str(product1_data["stats"]["avg_unit_price"] or 0))
+    avg2 = Decimal(str(product2_data["stats"]["avg_unit_price"] or 0))
+
+    diff_avg_eur = _quantize(avg2 - avg1)
+    diff_avg_pct = (
+        float(((avg2 - avg1) / avg1 * Decimal("100")).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP))
+        if avg1
+        else None
+    )
 
+    # --- 6. Résultat final ---
     return {
-        "series_daily": series_daily,
-        "stats": {
-            "avg_unit_price": avg_price,
-            "min_unit_price": min_price,
-            "max_unit_price": max_price,
-            "last_unit_price": last_price,
-            "last_purchase_date": last_date,
-            "count_purchases": len(rows),
-            "volatility_range": f"{min_price}€ → {max_price}€",
+        "period": {"start": str(start_date), "end": str(end_date)},
+        "product1": {
+            "meta": product1_meta,
+            **product1_data,
+        },
+        "product2": {
+            "meta": product2_meta,
+            **product2_data,
+        },
+        "comparison": {
+            "diff_avg_eur": diff_avg_eur,
+            "diff_avg_pct": diff_avg_pct,
         },
     }
 
 
+def _build_comparison(
+    market_master_article_1_id: str,
+    market_master_article_2_id: str,
+    establishment_id: str,
+    start_date: date,
+    end_date: date,
+    only_my_invoices_product1: bool,
+    only_my_invoices_product2: bool,
+    product1_meta: Optional[Dict[str, Any]],
+    product2_meta: Optional[Dict[str, Any]],
+    product1_data: Dict[str, Any],
+    product2_data: Dict[str, Any],
+) -> Dict[str, Any]:
+    result = _compare_products(
+        start_date, end_date, product1_meta, product2_meta, product1_data, product2_data
+    )
+
+    try:
+        write_log(
+            {
+                "type": "context",
+                "action": "view",
+                "text": "Comparateur marche charge",
+                "establishment_id": establishment_id,
+                "json": {
+                    "domain": "market",
+                    "scope": "market_comparator",
+                    "entity": "market_comparator",
+                    "market_master_article_1_id": market_master_article_1_id,
+                    "market_master_article_2_id": market_master_article_2_id,
+                    "filters": result["period"],
+                    "only_my_invoices_product1": only_my_invoices_product1,
+                    "only_my_invoices_product2": only_my_invoices_product2,
+                },
+            }
+        )
+    except Exception:
+        pass
+
+    return result
+
+
 def market_comparator(
     market_master_article_1_id: str,
     market_master_article_2_id: str,
@@ -205,50 +267,267 @@ def market_comparator(
         only_my_invoices=only_my_invoices_product2,
     )
 
-    # --- 5. Comparaison directionnelle (Produit 2 vs Produit 1) ---
-    avg1 = Decimal(str(product1_data["stats"]["avg_unit_price"] or 0))
-    avg2 = Decimal(str(product2_data["stats"]["avg_unit_price"] or 0))
+    return _build_comparison(
+        market_master_article_1_id,
+        market_master_article_2_id,
+        establishment_id,
+        start_date,
+        end_date,
+        only_my_invoices_product1,
+        only_my_invoices_product2,
+        product1_meta,
+        product2_meta,
+        product1_data,
+        product2_data,
+    )
 
-    diff_avg_eur = _quantize(avg2 - avg1)
-    diff_avg_pct = (
-        float(((avg2 - avg1) / avg1 * Decimal("100")).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP))
-        if avg1
-        else None
+
+async def _fetch_market_master_article_async(market_master_article_id: str) -> Optional[Dict[str, Any]]:
+    supabase = await get_async_supabase()
+    resp = await (
+        supabase.schema("market").table("market_master_articles")
+        .select("*")
+        .eq("id", market_master_article_id)
+        .limit(1)
+        .execute()
     )
+    return resp.data[0] if resp.data else None
+
+
+async def market_comparator_async(
+    market_master_article_1_id: str,
+    market_master_article_2_id: str,
+    establishment_id: str,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    only_my_invoices_product1: bool = False,
+    only_my_invoices_product2: bool = False,
+) -> Dict[str, Any]:
+    """
+    Variante asynchrone de `market_comparator` : les métadonnées et les séries
+    des deux produits sont récupérées en parallèle (asyncio.gather).
+    """
+    if not start_date or not end_date:
+        start_date, end_date = get_month_bounds()
+
+    product1_meta, product2_meta, product1_data, product2_data = await asyncio.gather(
+        _fetch_market_master_article_async(market_master_article_1_id),
+        _fetch_market_master_article_async(market_master_article_2_id),
+        _fetch_product_data_async(
+            market_master_article_id=market_master_article_1_id,
+            establishment_id=establishment_id,
+            start_date=start_date,
+            end_date=end_date,
+            only_my_invoices=only_my_invoices_product1,
+        ),
+        _fetch_product_data_async(
+            market_master_article_id=market_master_article_2_id,
+            establishment_id=establishment_id,
+            start_date=start_date,
+            end_date=end_date,
+            only_my_invoices=only_my_invoices_product2,
+        ),
+    )
+
+    return _build_comparison(
+        market_master_article_1_id,
+        market_master_article_2_id,
+        establishment_id,
+        start_date,
+        end_date,
+        only_my_invoices_product1,
+        only_my_invoices_product2,
+        product1_meta,
+        product2_meta,
+        product1_data,
+        product2_data,
+    )
+
+
+# ============================================================
+# Comparateur multi-produits (panier)
+# ============================================================
+
+BATCH_CHUNK_SIZE = 200
+BATCH_PAGE_SIZE = 1000
+
+
+def _chunked(values: Sequence[str], size: int = BATCH_CHUNK_SIZE) -> Iterable[List[str]]:
+    for idx in range(0, len(values), size):
+        yield list(values[idx : idx + size])
+
+
+async def _fetch_pages(build_query) -> List[Dict[str, Any]]:
+    """Lit toutes les pages d'une requête (ordre stable date, id) sans plafond max-rows."""
+    rows: List[Dict[str, Any]] = []
+    offset = 0
+    while True:
+        resp = await build_query().order("date").order("id").range(offset, offset + BATCH_PAGE_SIZE - 1).execute()
+        page = resp.data or []
+        rows.extend(page)
+        if len(page) < BATCH_PAGE_SIZE:
+            return rows
+        offset += BATCH_PAGE_SIZE
+
+
+async def _fetch_metas_batch(ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    supabase = await get_async_supabase()
+    metas: Dict[str, Dict[str, Any]] = {}
+    for chunk in _chunked(ids):
+        resp = await (
+            supabase.schema("market").table("market_master_articles")
+            .select("*")
+            .in_("id", chunk)
+            .execute()
+        )
+        for row in resp.data or []:
+            metas[str(row["id"])] = row
+    return metas
+
+
+async def _fetch_market_rows_batch(ids: List[str], start_date: date, end_date: date) -> Dict[str, List[Dict[str, Any]]]:
+    """Prix marché de tous les produits du panier, groupés par market_master_article_id."""
+    supabase = await get_async_supabase()
+    rows_by_product: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for chunk in _chunked(ids):
+        rows = await _fetch_pages(
+            lambda: supabase.schema("market").table("market_articles")
+            .select("id, market_master_article_id, unit_price, date")
+            .in_("market_master_article_id", chunk)
+            .gte("date", str(start_date))
+            .lte("date", str(end_date))
+        )
+        for row in rows:
+            rows_by_product[str(row["market_master_article_id"])].append(row)
+    return rows_by_product
+
+
+async def _fetch_my_rows_batch(
+    ids: List[str], establishment_id: str, start_date: date, end_date: date
+) -> Dict[str, List[Dict[str, Any]]]:
+    """Prix de mes factures (articles via master_articles liés), groupés par market_master_article_id."""
+    supabase = await get_async_supabase()
+    market_id_by_master: Dict[str, str] = {}
+    for chunk in _chunked(ids):
+        resp = await (
+            supabase.table("master_articles")
+            .select("id, market_master_article_id")
+            .in_("market_master_article_id", chunk)
+            .eq("establishment_id", establishment_id)
+            .execute()
+        )
+        for row in resp.data or []:
+            market_id_by_master[str(row["id"])] = str(row["market_master_article_id"])
+
+    rows_by_product: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+    for chunk in _chunked(list(market_id_by_master)):
+        rows = await _fetch_pages(
+            lambda: supabase.table("articles")
+            .select("id, master_article_id, unit_price, date")
+            .in_("master_article_id", chunk)
+            .gte("date", str(start_date))
+            .lte("date", str(end_date))
+        )
+        for row in rows:
+            market_id = market_id_by_master.get(str(row["master_article_id"]))
+            if market_id:
+                rows_by_product[market_id].append(row)
+    return rows_by_product
+
+
+async def market_comparator_batch_async(
+    establishment_id: str,
+    pairs: Optional[Sequence[Dict[str, Any]]] = None,
+    market_master_article_ids: Optional[Sequence[str]] = None,
+    only_my_invoices: bool = False,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+) -> Dict[str, Any]:
+    """
+    Compare un panier de produits marché en un appel :
+    - `pairs` : [{market_master_article_1_id, market_master_article_2_id,
+      only_my_invoices_product1, only_my_invoices_product2}] → une comparaison
+      par paire (même format que `market_comparator`)
+    - `market_master_article_ids` : séries + stats de chaque produit du panier
+      (marché, ou mes factures si `only_my_invoices`)
+
+    Métadonnées, prix marché et prix de mes factures sont chargés par requêtes
+    `in_` groupées, les trois lectures en parallèle (asyncio.gather).
+    """
+    if not start_date or not end_date:
+        start_date, end_date = get_month_bounds()
+
+    pairs = list(pairs or [])
+    basket = [str(mid) for mid in market_master_article_ids or [] if mid]
+
+    # (market_master_article_id, only_my_invoices) demandés
+    wanted: List[Tuple[str, bool]] = [(mid, only_my_invoices) for mid in basket]
+    for pair in pairs:
+        wanted.append((str(pair["market_master_article_1_id"]), bool(pair.get("only_my_invoices_product1"))))
+        wanted.append((str(pair["market_master_article_2_id"]), bool(pair.get("only_my_invoices_product2"))))
+    wanted = list(dict.fromkeys(wanted))
+
+    all_ids = list(dict.fromkeys(mid for mid, _ in wanted))
+    market_ids = list(dict.fromkeys(mid for mid, mine in wanted if not mine))
+    my_ids = list(dict.fromkeys(mid for mid, mine in wanted if mine))
+
+    async def _empty() -> Dict[str, List[Dict[str, Any]]]:
+        return {}
+
+    metas, market_rows, my_rows = await asyncio.gather(
+        _fetch_metas_batch(all_ids) if all_ids else _empty(),
+        _fetch_market_rows_batch(market_ids, start_date, end_date) if market_ids else _empty(),
+        _fetch_my_rows_batch(my_ids, establishment_id, start_date, end_date) if my_ids else _empty(),
+    )
+
+    product_data: Dict[Tuple[str, bool], Dict[str, Any]] = {
+        (mid, mine): _build_product_data((my_rows if mine else market_rows).get(mid, []))
+        for mid, mine in wanted
+    }
+
+    comparisons = []
+    for pair in pairs:
+        key1 = (str(pair["market_master_article_1_id"]), bool(pair.get("only_my_invoices_product1")))
+        key2 = (str(pair["market_master_article_2_id"]), bool(pair.get("only_my_invoices_product2")))
+        comparisons.append(
+            _compare_products(
+                start_date,
+                end_date,
+                metas.get(key1[0]),
+                metas.get(key2[0]),
+                product_data[key1],
+                product_data[key2],
+            )
+        )
 
-    # --- 6. Résultat final ---
     result = {
         "period": {"start": str(start_date), "end": str(end_date)},
-        "product1": {
-            "meta": product1_meta,
-            **product1_data,
-        },
-        "product2": {
-            "meta": product2_meta,
-            **product2_data,
-        },
-        "comparison": {
-            "diff_avg_eur": diff_avg_eur,
-            "diff_avg_pct": diff_avg_pct,
-        },
+        "products": [
+            {
+                "market_master_article_id": mid,
+                "only_my_invoices": only_my_invoices,
+                "meta": metas.get(mid),
+                **product_data[(mid, only_my_invoices)],
+            }
+            for mid in dict.fromkeys(basket)
+        ],
+        "comparisons": comparisons,
     }
 
     try:
-        logs_service.create_logs(
+        write_log(
             {
                 "type": "context",
                 "action": "view",
-                "text": "Comparateur marche charge",
+                "text": f"Comparateur marche panier charge - {len(all_ids)} produits",
                 "establishment_id": establishment_id,
                 "json": {
                     "domain": "market",
                     "scope": "market_comparator",
-                    "entity": "market_comparator",
-                    "market_master_article_1_id": market_master_article_1_id,
-                    "market_master_article_2_id": market_master_article_2_id,
+                    "entity": "market_comparator_batch",
+                    "products_count": len(all_ids),
+                    "pairs_count": len(pairs),
                     "filters": result["period"],
-                    "only_my_invoices_product1": only_my_invoices_product1,
-                    "only_my_invoices_product2": only_my_invoices_product2,
                 },
             }
         )
@@ -2,11 +2,12 @@ from __future__ import annotations
 from datetime import date
 from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
 from typing import Any, Dict, List, Optional, Tuple
-from collections import defaultdict
 from dateutil.relativedelta import relativedelta
 
 from app.core.supabase_client import supabase
-from app.services import logs_service
+from app.core.log_writer import write_log
+from app.logic.read.price_series import PriceColumns, PriceSeries
+from app.logic.read.purchase_summary import PurchaseTotals, fetch_purchase_summary, summary_reads_enabled
 
 
 def _to_decimal(value: Any) -> Optional[Decimal]:
@@ -66,26 +67,34 @@ def _fetch_market_suppliers(supplier_id: Optional[str]) -> List[Dict[str, Any]]:
 
 
 
-def _fetch_market_articles(
+MARKET_ROWS_PAGE_SIZE = 1000
+
+
+def _fetch_supplier_market_articles(
     supplier_id: str,
-    product_id: str,
     start: date,
     end: date,
 ) -> List[Dict[str, Any]]:
-    res = (
-        supabase.schema("market").table("market_articles")
-        .select("unit_price, date")
-        .eq("market_supplier_id", supplier_id)
-        .eq("market_master_article_id", product_id)
-        .gte("date", str(start))
-        .lte("date", str(end))
-        .order("date")
-        .execute()
-    )
-    rows = res.data or []
-    rows = [r for r in rows if r.get("date")]
-    rows.sort(key=lambda r: r.get("date"))
-    return rows
+    """Prix marché de tous les produits du fournisseur sur la période (toutes les pages)."""
+    rows: List[Dict[str, Any]] = []
+    offset = 0
+    while True:
+        res = (
+            supabase.schema("market").table("market_articles")
+            .select("id, market_master_article_id, unit_price, date")
+            .eq("market_supplier_id", supplier_id)
+            .gte("date", str(start))
+            .lte("date", str(end))
+            .order("date")
+            .order("id")
+            .range(offset, offset + MARKET_ROWS_PAGE_SIZE - 1)
+            .execute()
+        )
+        page = res.data or []
+        rows.extend(page)
+        if len(page) < MARKET_ROWS_PAGE_SIZE:
+            return rows
+        offset += MARKET_ROWS_PAGE_SIZE
 
 
 
@@ -115,125 +124,50 @@ def _fetch_user_articles_for_product(
         .order("date")
         .execute()
     )
-    rows = res.data or []
-    rows = [r for r in rows if r.get("date")]
-    rows.sort(key=lambda r: r.get("date"))
-    return rows
-
-
-
-# =============================
-# Metrics helpers
-# =============================
-
-def _daily_avg_series(rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    """Série quotidienne moyenne (utile pour un graph lissé, 1 point/jour)."""
-    if not rows:
-        return []
-    by_day: Dict[str, List[Decimal]] = defaultdict(list)
-    for r in rows:
-        p = r.get("unit_price")
-        d = r.get("date")
-        if p is None or not d:
-            continue
-        price = _to_decimal(p)
-        if price is None:
-            continue
-        by_day[d].append(price)
-    return [
-        {"date": d, "avg_unit_price": _quantize(sum(vals) / len(vals))}
-        for d, vals in sorted(by_day.items())
-    ]
-
-
-
-def _stats_basic(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
-    """Moyenne, min, max, dernier prix/date, volume d’achats, plage de volatilité."""
-    if not rows:
-        return {
-            "avg_unit_price": 0,
-            "min_unit_price": None,
-            "max_unit_price": None,
-            "last_unit_price": None,
-            "last_purchase_date": None,
-            "count_purchases": 0,
-            "volatility_range": None,
-        }
-    rows_sorted = sorted(rows, key=lambda r: r.get("date") or "")
-    prices = []
-    for r in rows_sorted:
-        if r.get("unit_price") is None:
-            continue
-        price = _to_decimal(r.get("unit_price"))
-        if price is None:
-            continue
-        prices.append(price)
-    if not prices:
-        return {
-            "avg_unit_price": 0,
-            "min_unit_price": None,
-            "max_unit_price": None,
-            "last_unit_price": None,
-            "last_purchase_date": rows_sorted[-1].get("date") if rows_sorted else None,
-            "count_purchases": len(rows_sorted),
-            "volatility_range": None,
-        }
-    avg_price = _quantize(sum(prices) / len(prices))
-    min_price = _quantize(min(prices))
-    max_price = _quantize(max(prices))
-    last_row = rows_sorted[-1]
-    return {
-        "avg_unit_price": avg_price,
-        "min_unit_price": min_price,
-        "max_unit_price": max_price,
-        "last_unit_price": _quantize(_to_decimal(last_row["unit_price"])),
-        "last_purchase_date": last_row["date"],
-        "count_purchases": len(rows_sorted),
-        "volatility_range": f"{min_price}€ → {max_price}€",
-    }
-
-
-
-def _variation_over_period(rows: List[Dict[str, Any]]) -> Tuple[Optional[float], Optional[float]]:
-    """Variation entre le 1er et le dernier enregistrements de la période."""
-    if not rows or len(rows) < 2:
-        return None, None
-    rows_sorted = sorted(rows, key=lambda r: r.get("date") or "")
-    first = _to_decimal(rows_sorted[0].get("unit_price"))
-    last = _to_decimal(rows_sorted[-1].get("unit_price"))
-    if first is None or last is None:
-        return None, None
-    diff = _quantize(last - first)
-    pct = (
-        float(((last - first) / first * Decimal("100")).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP))
-        if first
-        else None
-    )
-    return diff, pct
-
-
+    return res.data or []
 
-def _market_volatility_index(stats: Dict[str, Any]) -> Optional[float]:
-    """(max - min) / avg → indice de volatilité relatif (0 = très stable)."""
-    avg_p = _to_decimal(stats.get("avg_unit_price"))
-    min_p = _to_decimal(stats.get("min_unit_price")) if stats.get("min_unit_price") is not None else None
-    max_p = _to_decimal(stats.get("max_unit_price")) if stats.get("max_unit_price") is not None else None
-    if not avg_p or min_p is None or max_p is None:
-        return None
-    return _quantize((max_p - min_p) / avg_p)
 
 
+def _fetch_user_totals_by_market_product(
+    establishment_id: str,
+    start: date,
+    end: date,
+) -> Dict[str, PurchaseTotals]:
+    """
+    Achats utilisateur de la période par market_master_article, lus dans le
+    résumé mensuel : deux requêtes pour tous les produits au lieu de deux par produit.
+    """
+    market_by_master: Dict[str, str] = {}
+    offset = 0
+    while True:
+        page = (
+            supabase.table("master_articles")
+            .select("id, market_master_article_id")
+            .eq("establishment_id", establishment_id)
+            .order("id")
+            .range(offset, offset + MARKET_ROWS_PAGE_SIZE - 1)
+            .execute()
+            .data
+            or []
+        )
+        for master in page:
+            if master.get("market_master_article_id"):
+                market_by_master[str(master["id"])] = str(master["market_master_article_id"])
+        if len(page) < MARKET_ROWS_PAGE_SIZE:
+            break
+        offset += MARKET_ROWS_PAGE_SIZE
 
-def _trend_label(variation_eur: Optional[float]) -> str:
-    if variation_eur is None:
-        return "STABLE"
-    if variation_eur > 0:
-        return "UP"
-    if variation_eur < 0:
-        return "DOWN"
-    return "STABLE"
+    totals: Dict[str, PurchaseTotals] = {}
+    for row in fetch_purchase_summary(establishment_id=establishment_id, start=start, end=end):
+        market_id = market_by_master.get(str(row.get("master_article_id")))
+        if market_id:
+            totals.setdefault(market_id, PurchaseTotals()).add(row)
+    return totals
 
 
+# =============================
+# Metrics helpers
+# =============================
 
 def _days_since_last(last_date_str: Optional[str]) -> Optional[int]:
     if not last_date_str:
@@ -291,39 +225,6 @@ def _recommendation_badge(
 
 
 
-def _is_good_time_to_buy(series_daily: List[Dict[str, Any]], window_days: int = 14) -> Optional[bool]:
-    """
-    Heuristique : compare la moyenne des 14 derniers jours à la moyenne globale.
-    True  → bon moment (>= 3% moins cher)
-    False → mauvais moment (>= 3% plus cher)
-    None  → neutre / données insuffisantes
-    """
-    if not series_daily:
-        return None
-    prices = []
-    for p in series_daily:
-        if p.get("avg_unit_price") is None:
-            continue
-        dec_price = _to_decimal(p.get("avg_unit_price"))
-        if dec_price is None:
-            continue
-        prices.append(dec_price)
-    if not prices:
-        return None
-    period_avg = _to_decimal(sum(prices) / len(prices))
-    tail = prices[-min(window_days, len(prices)):]
-    if not tail:
-        return None
-    tail_avg = _to_decimal(sum(tail) / len(tail))
-    if period_avg == 0:
-        return None
-    delta = (tail_avg - period_avg) / period_avg
-    if delta <= -0.03:
-        return True
-    if delta >= 0.03:
-        return False
-    return None
-
 # =============================
 # Main logic
 # =============================
@@ -348,7 +249,7 @@ def market_database_overview(
     suppliers = _fetch_market_suppliers(supplier_id)
     if not suppliers:
         try:
-            logs_service.create_logs(
+            write_log(
                 {
                     "type": "context",
                     "action": "view",
@@ -369,24 +270,19 @@ def market_database_overview(
         return {"period": {"start": str(start), "end": str(end)}, "suppliers": []}
 
     result_suppliers: List[Dict[str, Any]] = []
+    user_totals: Optional[Dict[str, PurchaseTotals]] = None
+    if include_user_comparison and summary_reads_enabled(start, end):
+        user_totals = _fetch_user_totals_by_market_product(establishment_id, start, end)
 
     for sup in suppliers:
         sup_id = sup.get("id")
 
-        # Produits (market_master_article_id) avec activité pour ce fournisseur, dans la période
-        prod_resp = (
-            supabase.schema("market").table("market_articles")
-            .select("market_master_article_id")
-            .eq("market_supplier_id", sup_id)
-            .gte("date", str(start))
-            .lte("date", str(end))
-            .execute()
+        # Prix marché de tous les produits du fournisseur sur la période, en colonnes par produit
+        market_columns = PriceColumns(
+            _fetch_supplier_market_articles(sup_id, start, end),
+            key="market_master_article_id",
         )
-        product_ids = list({
-            r["market_master_article_id"]
-            for r in (prod_resp.data or [])
-            if r.get("market_master_article_id")
-        })
+        product_ids = market_columns.keys()
 
         products_block: List[Dict[str, Any]] = []
         if product_ids:
@@ -405,54 +301,58 @@ def market_database_overview(
 
             # Boucle par produit
             for product_id in product_ids:
-                market_rows = _fetch_market_articles(sup_id, product_id, start, end)
-                series_daily = _daily_avg_series(market_rows)
-                stats = _stats_basic(market_rows)
-                var_eur, var_pct = _variation_over_period(market_rows)
-                vol_index = _market_volatility_index(stats)
-                trend = _trend_label(var_eur)
+                market_series = market_columns.series(product_id)
+                series_daily = market_series.series_daily()
+                stats = market_series.stats()
+                var_eur, var_pct = market_series.variation()
+                vol_index = market_series.volatility_index()
+                trend = market_series.trend()
                 days_last = _days_since_last(stats.get("last_purchase_date"))
-                good_time = _is_good_time_to_buy(series_daily)
+                good_time = market_series.is_good_time_to_buy()
 
                 user_avg: Optional[float] = None
                 user_last: Optional[float] = None
                 user_vs_eur: Optional[float] = None
                 user_vs_pct: Optional[float] = None
                 potential_saving: Optional[float] = None
-                user_rows: List[Dict[str, Any]] = []
-
-                if include_user_comparison:
+                has_purchased = False
+                purchases_count = 0
+
+                if include_user_comparison and user_totals is not None:
+                    totals = user_totals.get(str(product_id))
+                    has_purchased = bool(totals and totals.purchases_count)
+                    if totals and totals.priced_count:
+                        purchases_count = totals.purchases_count
+                        user_avg = _quantize(totals.average_unit_price())
+                        user_last = _quantize(totals.last_unit_price)
+                elif include_user_comparison:
                     user_rows = _fetch_user_articles_for_product(
                         establishment_id=establishment_id,
                         market_master_article_id=product_id,
                         start=start,
                         end=end,
                     )
-                    if user_rows:
-                        user_prices = []
-                        for r in user_rows:
-                            if r.get("unit_price") is None:
-                                continue
-                            price = _to_decimal(r.get("unit_price"))
-                            if price is None:
-                                continue
-                            user_prices.append(price)
-                        if user_prices:
-                            user_avg_dec = sum(user_prices) / len(user_prices)
-                            user_avg = _quantize(user_avg_dec)
-                            user_last = _quantize(_to_decimal(user_rows[-1]["unit_price"]))
-                            user_vs_eur, user_vs_pct = _user_vs_market(
-                                user_avg,
-                                stats.get("avg_unit_price") or 0,
-                            )
-                            # Économie potentielle simple: si l'utilisateur paye + cher que la moyenne marché
-                            if user_vs_eur is not None and user_vs_eur > 0 and len(user_rows) > 0:
-                                potential_saving = float(
-                                    (
-                                        Decimal(str(user_vs_eur))
-                                        * Decimal(len(user_rows))
-                                    ).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
-                                )
+                    has_purchased = bool(user_rows)
+                    user_series = PriceSeries(user_rows)
+                    if len(user_series):
+                        purchases_count = len(user_rows)
+                        user_stats = user_series.stats()
+                        user_avg = user_stats["avg_unit_price"]
+                        user_last = user_stats["last_unit_price"]
+
+                if purchases_count:
+                    user_vs_eur, user_vs_pct = _user_vs_market(
+                        user_avg,
+                        stats.get("avg_unit_price") or 0,
+                    )
+                    # Économie potentielle simple: si l'utilisateur paye + cher que la moyenne marché
+                    if user_vs_eur is not None and user_vs_eur > 0:
+                        potential_saving = float(
+                            (
+                                Decimal(str(user_vs_eur))
+                                * Decimal(purchases_count)
+                            ).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+                        )
 
                 deal = _deal_score(user_vs_pct, vol_index)
                 badge = _recommendation_badge(user_vs_pct, vol_index, days_last)
@@ -470,7 +370,7 @@ def market_database_overview(
                         "is_good_time_to_buy": good_time,
                     },
                     "user": {
-                        "has_purchased": bool(user_rows),
+                        "has_purchased": has_purchased,
                         "user_avg_unit_price": user_avg,
                         "user_last_unit_price": user_last,
                         "user_vs_market_eur": user_vs_eur,
@@ -486,7 +386,7 @@ def market_database_overview(
     total_products = sum(len(sup.get("products") or []) for sup in result_suppliers)
 
     try:
-        logs_service.create_logs(
+        write_log(
             {
                 "type": "context",
                 "action": "view",
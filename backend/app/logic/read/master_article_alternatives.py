@@ -1,10 +1,7 @@
 import re
-import re
-import unidecode
 from typing import Dict, Any, Optional, List
-from rapidfuzz import fuzz
 from app.core.supabase_client import supabase
-from app.services import logs_service
+from app.core.log_writer import write_log
 
 
 def clean_name(name: str) -> str:
@@ -16,6 +13,9 @@ def clean_name(name: str) -> str:
     """
     if not name:
         return ""
+    # Import tardif : unidecode n'est chargé qu'au premier appel
+    import unidecode
+
     name = unidecode.unidecode(name.lower())
     name = re.sub(r"[^a-z0-9\s]", " ", name)
     # Suppression des mentions inutiles, formats, conditionnements et unités
@@ -81,7 +81,7 @@ def master_article_alternatives(
     )
     if not master_resp.data:
         try:
-            logs_service.create_logs(
+            write_log(
                 {
                     "type": "context",
                     "action": "view",
@@ -136,6 +136,8 @@ def master_article_alternatives(
     candidates = candidates_resp.data or []
 
     # --- 4. Calcul du score de similarité ---
+    from rapidfuzz import fuzz
+
     results = []
     for cand in candidates:
         cand_name = clean_name(
@@ -201,7 +203,7 @@ def master_article_alternatives(
     }
 
     try:
-        logs_service.create_logs(
+        write_log(
             {
                 "type": "context",
                 "action": "view",
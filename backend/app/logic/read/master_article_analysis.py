@@ -1,22 +1,15 @@
+import asyncio
+import logging
 from datetime import date
-from typing import Dict, Any, Optional
-from datetime import date
-from typing import Dict, Any, List, Optional
-from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from typing import Dict, Any, Iterable, List, Optional, Sequence
 from dateutil.relativedelta import relativedelta
 from app.core.supabase_client import supabase
-from app.services import logs_service
-
-
-def _to_decimal(value: Any, default: str = "0") -> Decimal:
-    try:
-        return Decimal(str(value))
-    except (InvalidOperation, TypeError, ValueError):
-        return Decimal(default)
+from app.core.supabase_async_client import get_async_supabase
+from app.core.log_writer import write_log
+from app.logic.read.price_series import PRICE_SCALE, round_ratio, scaled_price, to_float
+from app.logic.read.purchase_summary import fetch_purchase_summary, purchase_totals_by_master, summary_reads_enabled
 
-
-def _quantize(value: Decimal, exp: str = "0.001") -> float:
-    return float(value.quantize(Decimal(exp), rounding=ROUND_HALF_UP))
+logger = logging.getLogger(__name__)
 
 
 def get_month_bounds(target_date: Optional[date] = None):
@@ -28,36 +21,111 @@ def get_month_bounds(target_date: Optional[date] = None):
     return first_day, last_day
 
 
-def master_article_analysis(
-    master_article_id: str,
-    establishment_id: str,
-    start_date: Optional[date] = None,
-    end_date: Optional[date] = None,
-) -> Dict[str, Any]:
+MASTER_ARTICLE_COLUMNS = "id, unformatted_name, name, supplier_id, establishment_id, market_master_article_id"
+ARTICLE_COLUMNS = "id, date, unit_price, quantity, invoice_id, master_article_id, establishment_id"
+INVOICE_COLUMNS = "id, supplier_id, invoice_number, date, total_excl_tax, total_tax, total_incl_tax, establishment_id"
+
+PURCHASE_STATS_RPC_NAME = "master_article_purchase_stats"
+ANALYSIS_CHUNK_SIZE = 500
+ANALYSIS_PAGE_SIZE = 1000
+
+
+def _empty_stats() -> Dict[str, Any]:
+    return {
+        "count_articles": 0,
+        "avg_unit_price": 0,
+        "min_unit_price": None,
+        "max_unit_price": None,
+        "total_quantity": 0,
+        "avg_quantity": 0,
+        "total_spent": 0,
+        "price_first": None,
+        "price_last": None,
+    }
+
+
+class _PurchaseStats:
     """
-    Analyse un master_article sur une période donnée :
-    - Articles liés sur la période (achats)
-    - Statistiques clés : prix moyen, min, max, quantités, total dépensé
-    - Moyenne de quantité unitaire
-    - Liste des factures correspondantes
+    Agrégats d'achat d'un master_article calculés en une passe (lignes reçues
+    par date croissante), en entiers à l'échelle de `PRICE_SCALE`.
     """
 
-    # --- 1. Gestion de la période ---
-    if not start_date or not end_date:
-        start_date, end_date = get_month_bounds()
-
-    # --- 2. Récupération du master_article ---
-    master_resp = (
-        supabase.table("master_articles")
-        .select("id, unformatted_name, name, supplier_id, establishment_id, market_master_article_id")
-        .eq("id", master_article_id)
-        .eq("establishment_id", establishment_id)
-        .limit(1)
-        .execute()
+    __slots__ = (
+        "count", "price_total", "price_count", "price_min", "price_max",
+        "quantity_total", "quantity_count", "spent_total", "spent_count",
+        "price_first", "price_last", "invoice_ids",
     )
-    if not master_resp.data:
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.price_total = self.price_count = 0
+        self.price_min: Optional[int] = None
+        self.price_max: Optional[int] = None
+        self.quantity_total = self.quantity_count = 0
+        self.spent_total = self.spent_count = 0
+        self.price_first: Optional[int] = None
+        self.price_last: Optional[int] = None
+        self.invoice_ids: Dict[str, None] = {}
+
+    def add(self, article: Dict[str, Any]) -> None:
+        self.count += 1
+        price = scaled_price(article.get("unit_price"))
+        quantity = scaled_price(article.get("quantity"))
+        if price is not None:
+            self.price_total += price
+            self.price_count += 1
+            self.price_min = price if self.price_min is None else min(self.price_min, price)
+            self.price_max = price if self.price_max is None else max(self.price_max, price)
+            if self.price_first is None:
+                self.price_first = price
+            self.price_last = price
+        if quantity is not None:
+            self.quantity_total += quantity
+            self.quantity_count += 1
+            if price is not None:
+                self.spent_total += price * quantity
+                self.spent_count += 1
+        invoice_id = article.get("invoice_id")
+        if invoice_id:
+            self.invoice_ids[str(invoice_id)] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        def _price(value: Optional[int]) -> Optional[float]:
+            return to_float(round_ratio(value, PRICE_SCALE, 3)) if value is not None else None
+
+        return {
+            "count_articles": self.count,
+            "avg_unit_price": (
+                to_float(round_ratio(self.price_total, self.price_count * PRICE_SCALE, 3)) if self.price_count else 0.0
+            ),
+            "min_unit_price": _price(self.price_min),
+            "max_unit_price": _price(self.price_max),
+            "total_quantity": _price(self.quantity_total) if self.quantity_count else 0.0,
+            "avg_quantity": (
+                to_float(round_ratio(self.quantity_total, self.quantity_count * PRICE_SCALE, 3))
+                if self.quantity_count
+                else 0.0
+            ),
+            "total_spent": (
+                to_float(round_ratio(self.spent_total, PRICE_SCALE * PRICE_SCALE, 2), 2) if self.spent_count else 0
+            ),
+            "price_first": _price(self.price_first),
+            "price_last": _price(self.price_last),
+        }
+
+
+def _build_analysis(
+    master_article_id: str,
+    establishment_id: str,
+    start_date: date,
+    end_date: date,
+    master_article: Optional[Dict[str, Any]],
+    articles: List[Dict[str, Any]],
+    invoices: List[Dict[str, Any]],
+) -> Dict[str, Any]:
+    if master_article is None:
         try:
-            logs_service.create_logs(
+            write_log(
                 {
                     "type": "context",
                     "action": "view",
@@ -76,36 +144,11 @@ def master_article_analysis(
             pass
         return {"error": "Master article not found", "master_article_id": master_article_id}
 
-    master_article = master_resp.data[0]
-
-    # --- 3. Récupération des articles du master_article ---
-    articles_resp = (
-        supabase.table("articles")
-        .select("id, date, unit_price, quantity, invoice_id, master_article_id, establishment_id")
-        .eq("master_article_id", master_article_id)
-        .eq("establishment_id", establishment_id)
-        .gte("date", str(start_date))
-        .lte("date", str(end_date))
-        .order("date", desc=True)
-        .execute()
-    )
-    articles = articles_resp.data or []
-
     # --- 4. Si aucun article ---
     if not articles:
         result = {
             "master_article": master_article,
-            "stats": {
-                "count_articles": 0,
-                "avg_unit_price": 0,
-                "min_unit_price": None,
-                "max_unit_price": None,
-                "total_quantity": 0,
-                "avg_quantity": 0,
-                "total_spent": 0,
-                "price_first": None,
-                "price_last": None,
-            },
+            "stats": _empty_stats(),
             "articles": [],
             "invoices": [],
             "filters": {
@@ -116,7 +159,7 @@ def master_article_analysis(
             },
         }
         try:
-            logs_service.create_logs(
+            write_log(
                 {
                     "type": "context",
                     "action": "view",
@@ -136,59 +179,11 @@ def master_article_analysis(
             pass
         return result
 
-    # --- 5. Calculs statistiques ---
-    prices = [
-        _to_decimal(a.get("unit_price"))
-        for a in articles
-        if a.get("unit_price") is not None
-    ]
-    quantities = [
-        _to_decimal(a.get("quantity"))
-        for a in articles
-        if a.get("quantity") is not None
-    ]
-
-    total_quantity = _quantize(sum(quantities)) if quantities else 0.0
-    avg_quantity = _quantize(sum(quantities) / len(quantities)) if quantities else 0.0
-    avg_unit_price = _quantize(sum(prices) / len(prices)) if prices else 0.0
-    min_price = _quantize(min(prices)) if prices else None
-    max_price = _quantize(max(prices)) if prices else None
-    total_spent = (
-        float((sum(p * q for p, q in zip(prices, quantities))).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP))
-        if prices and quantities
-        else 0
-    )
-
-    # --- Évolution prix : premier et dernier article ---
-    price_first = _quantize(prices[-1]) if len(prices) > 0 else None
-    price_last = _quantize(prices[0]) if len(prices) > 0 else None
-
-    stats = {
-        "count_articles": len(articles),
-        "avg_unit_price": avg_unit_price,
-        "min_unit_price": min_price,
-        "max_unit_price": max_price,
-        "total_quantity": total_quantity,
-        "avg_quantity": avg_quantity,
-        "total_spent": total_spent,
-        "price_first": price_first,
-        "price_last": price_last,
-    }
-
-    # --- 6. Factures concernées ---
-    invoice_ids = list({a.get("invoice_id") for a in articles if a.get("invoice_id")})
-    invoices_resp = (
-        supabase.table("invoices")
-        .select(
-            "id, supplier_id, invoice_number, date, total_excl_tax, total_tax, total_incl_tax, establishment_id"
-        )
-        .in_("id", invoice_ids)
-        .eq("establishment_id", establishment_id)
-        .execute()
-        if invoice_ids
-        else None
-    )
-    invoices = invoices_resp.data if invoices_resp else []
+    # --- 5. Calculs statistiques (articles lus par date décroissante) ---
+    purchase_stats = _PurchaseStats()
+    for article in reversed(articles):
+        purchase_stats.add(article)
+    stats = purchase_stats.as_dict()
 
     # --- 7. Résultat final ---
     result = {
@@ -205,7 +200,7 @@ def master_article_analysis(
     }
 
     try:
-        logs_service.create_logs(
+        write_log(
             {
                 "type": "context",
                 "action": "view",
@@ -225,3 +220,396 @@ def master_article_analysis(
         pass
 
     return result
+
+
+def master_article_analysis(
+    master_article_id: str,
+    establishment_id: str,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+) -> Dict[str, Any]:
+    """
+    Analyse un master_article sur une période donnée :
+    - Articles liés sur la période (achats)
+    - Statistiques clés : prix moyen, min, max, quantités, total dépensé
+    - Moyenne de quantité unitaire
+    - Liste des factures correspondantes
+    """
+
+    # --- 1. Gestion de la période ---
+    if not start_date or not end_date:
+        start_date, end_date = get_month_bounds()
+
+    # --- 2. Récupération du master_article ---
+    master_resp = (
+        supabase.table("master_articles")
+        .select(MASTER_ARTICLE_COLUMNS)
+        .eq("id", master_article_id)
+        .eq("establishment_id", establishment_id)
+        .limit(1)
+        .execute()
+    )
+    master_article = master_resp.data[0] if master_resp.data else None
+    if master_article is None:
+        return _build_analysis(master_article_id, establishment_id, start_date, end_date, None, [], [])
+
+    # --- 3. Récupération des articles du master_article ---
+    articles_resp = (
+        supabase.table("articles")
+        .select(ARTICLE_COLUMNS)
+        .eq("master_article_id", master_article_id)
+        .eq("establishment_id", establishment_id)
+        .gte("date", str(start_date))
+        .lte("date", str(end_date))
+        .order("date", desc=True)
+        .execute()
+    )
+    articles = articles_resp.data or []
+
+    # --- 6. Factures concernées ---
+    invoice_ids = list({a.get("invoice_id") for a in articles if a.get("invoice_id")})
+    invoices_resp = (
+        supabase.table("invoices")
+        .select(INVOICE_COLUMNS)
+        .in_("id", invoice_ids)
+        .eq("establishment_id", establishment_id)
+        .execute()
+        if invoice_ids
+        else None
+    )
+    invoices = invoices_resp.data if invoices_resp else []
+
+    return _build_analysis(
+        master_article_id, establishment_id, start_date, end_date, master_article, articles, invoices
+    )
+
+
+async def master_article_analysis_async(
+    master_article_id: str,
+    establishment_id: str,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+) -> Dict[str, Any]:
+    """
+    Variante asynchrone de `master_article_analysis` : le master_article et
+    ses articles sont lus en parallèle, puis les factures liées.
+    """
+    if not start_date or not end_date:
+        start_date, end_date = get_month_bounds()
+
+    supabase_async = await get_async_supabase()
+    master_resp, articles_resp = await asyncio.gather(
+        supabase_async.table("master_articles")
+        .select(MASTER_ARTICLE_COLUMNS)
+        .eq("id", master_article_id)
+        .eq("establishment_id", establishment_id)
+        .limit(1)
+        .execute(),
+        supabase_async.table("articles")
+        .select(ARTICLE_COLUMNS)
+        .eq("master_article_id", master_article_id)
+        .eq("establishment_id", establishment_id)
+        .gte("date", str(start_date))
+        .lte("date", str(end_date))
+        .order("date", desc=True)
+        .execute(),
+    )
+    master_article = master_resp.data[0] if master_resp.data else None
+    if master_article is None:
+        return _build_analysis(master_article_id, establishment_id, start_date, end_date, None, [], [])
+    articles = articles_resp.data or []
+
+    invoice_ids = list({a.get("invoice_id") for a in articles if a.get("invoice_id")})
+    invoices: List[Dict[str, Any]] = []
+    if invoice_ids:
+        invoices_resp = await (
+            supabase_async.table("invoices")
+            .select(INVOICE_COLUMNS)
+            .in_("id", invoice_ids)
+            .eq("establishment_id", establishment_id)
+            .execute()
+        )
+        invoices = invoices_resp.data or []
+
+    return _build_analysis(
+        master_article_id, establishment_id, start_date, end_date, master_article, articles, invoices
+    )
+
+
+# ============================================================
+# Analyse groupée (liste produits)
+# ============================================================
+
+def _chunked(values: Sequence[str], size: int = ANALYSIS_CHUNK_SIZE) -> Iterable[List[str]]:
+    for idx in range(0, len(values), size):
+        yield list(values[idx : idx + size])
+
+
+def _fetch_all_pages(build_query) -> List[Dict[str, Any]]:
+    rows: List[Dict[str, Any]] = []
+    offset = 0
+    while True:
+        page = build_query().range(offset, offset + ANALYSIS_PAGE_SIZE - 1).execute().data or []
+        rows.extend(page)
+        if len(page) < ANALYSIS_PAGE_SIZE:
+            return rows
+        offset += ANALYSIS_PAGE_SIZE
+
+
+def _fetch_master_articles(
+    establishment_id: str,
+    master_article_ids: Optional[List[str]],
+    supplier_id: Optional[str],
+) -> List[Dict[str, Any]]:
+    def _query(chunk: Optional[List[str]] = None):
+        query = supabase.table("master_articles").select(MASTER_ARTICLE_COLUMNS).eq("establishment_id", establishment_id)
+        if chunk is not None:
+            query = query.in_("id", chunk)
+        if supplier_id:
+            query = query.eq("supplier_id", supplier_id)
+        return query.order("id")
+
+    if master_article_ids is None:
+        return _fetch_all_pages(_query)
+    masters: List[Dict[str, Any]] = []
+    for chunk in _chunked(master_article_ids):
+        masters.extend(_fetch_all_pages(lambda: _query(chunk)))
+    return masters
+
+
+def _stream_purchase_stats(
+    establishment_id: str,
+    master_ids: Optional[List[str]],
+    start_date: date,
+    end_date: date,
+) -> Dict[str, _PurchaseStats]:
+    """Lecture des articles page par page (date croissante), agrégés au fil de l'eau."""
+    stats_by_master: Dict[str, _PurchaseStats] = {}
+
+    def _query(chunk: Optional[List[str]] = None):
+        query = (
+            supabase.table("articles")
+            .select("id, date, unit_price, quantity, invoice_id, master_article_id")
+            .eq("establishment_id", establishment_id)
+            .gte("date", str(start_date))
+            .lte("date", str(end_date))
+        )
+        if chunk is not None:
+            query = query.in_("master_article_id", chunk)
+        return query.order("date").order("id")
+
+    chunks: List[Optional[List[str]]] = [None] if master_ids is None else list(_chunked(master_ids))
+    for chunk in chunks:
+        offset = 0
+        while True:
+            page = _query(chunk).range(offset, offset + ANALYSIS_PAGE_SIZE - 1).execute().data or []
+            for article in page:
+                master_id = article.get("master_article_id")
+                if master_id:
+                    stats_by_master.setdefault(str(master_id), _PurchaseStats()).add(article)
+            if len(page) < ANALYSIS_PAGE_SIZE:
+                break
+            offset += ANALYSIS_PAGE_SIZE
+    return stats_by_master
+
+
+def _stats_from_rpc_row(row: Dict[str, Any]) -> Dict[str, Any]:
+    def _number(key: str, default: Any = None) -> Any:
+        value = row.get(key)
+        return float(value) if value is not None else default
+
+    return {
+        "count_articles": int(row.get("count_articles") or 0),
+        "avg_unit_price": _number("avg_unit_price", 0.0),
+        "min_unit_price": _number("min_unit_price"),
+        "max_unit_price": _number("max_unit_price"),
+        "total_quantity": _number("total_quantity", 0.0),
+        "avg_quantity": _number("avg_quantity", 0.0),
+        "total_spent": _number("total_spent", 0),
+        "price_first": _number("price_first"),
+        "price_last": _number("price_last"),
+    }
+
+
+def _purchase_stats_by_master(
+    establishment_id: str,
+    master_ids: List[str],
+    explicit_ids: bool,
+    supplier_id: Optional[str],
+    start_date: date,
+    end_date: date,
+    include_invoices: bool = False,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    {master_article_id: {"stats", "invoices_count", "invoice_ids"}} via la RPC
+    (paginée, par tranche d'ids explicites), sinon en une passe sur les articles.
+    La liste des factures n'est lue que si `include_invoices`.
+    """
+    try:
+        rows: List[Dict[str, Any]] = []
+        for chunk in _chunked(master_ids) if explicit_ids else [None]:
+            params = {
+                "p_establishment_id": establishment_id,
+                "p_start": str(start_date),
+                "p_end": str(end_date),
+                "p_master_article_ids": chunk,
+                "p_supplier_id": supplier_id,
+                "p_include_invoices": include_invoices,
+            }
+            offset = 0
+            while True:
+                page = (
+                    supabase.rpc(PURCHASE_STATS_RPC_NAME, params)
+                    .range(offset, offset + ANALYSIS_PAGE_SIZE - 1)
+                    .execute()
+                    .data
+                    or []
+                )
+                rows.extend(page)
+                if len(page) < ANALYSIS_PAGE_SIZE:
+                    break
+                offset += ANALYSIS_PAGE_SIZE
+        return {
+            str(row["master_article_id"]): {
+                "stats": _stats_from_rpc_row(row),
+                "invoices_count": int(row.get("invoices_count") or 0),
+                "invoice_ids": [str(i) for i in row.get("invoice_ids") or []],
+            }
+            for row in rows
+        }
+    except Exception as exc:
+        logger.warning("[master_article_analysis] RPC %s indisponible (%s), lecture des articles", PURCHASE_STATS_RPC_NAME, exc)
+
+    return {
+        master_id: {
+            "stats": purchase_stats.as_dict(),
+            "invoices_count": len(purchase_stats.invoice_ids),
+            "invoice_ids": list(purchase_stats.invoice_ids) if include_invoices else [],
+        }
+        for master_id, purchase_stats in _stream_purchase_stats(
+            establishment_id, master_ids if explicit_ids or supplier_id else None, start_date, end_date
+        ).items()
+    }
+
+
+def _summary_stats_by_master(
+    establishment_id: str,
+    master_ids: List[str],
+    explicit_ids: bool,
+    supplier_id: Optional[str],
+    start_date: date,
+    end_date: date,
+) -> Dict[str, Dict[str, Any]]:
+    """Mêmes statistiques lues dans le résumé mensuel (période en mois entiers, sans détail des factures)."""
+    rows = fetch_purchase_summary(
+        establishment_id=establishment_id,
+        master_article_ids=master_ids if explicit_ids or supplier_id else None,
+        start=start_date,
+        end=end_date,
+    )
+    return {
+        master_id: {"stats": totals.analysis_stats(), "invoice_ids": [], "invoices_count": totals.invoices_count}
+        for master_id, totals in purchase_totals_by_master(rows).items()
+    }
+
+
+def _fetch_invoices(establishment_id: str, invoice_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    invoices: Dict[str, Dict[str, Any]] = {}
+    for chunk in _chunked(invoice_ids):
+        resp = (
+            supabase.table("invoices")
+            .select(INVOICE_COLUMNS)
+            .in_("id", chunk)
+            .eq("establishment_id", establishment_id)
+            .execute()
+        )
+        for invoice in resp.data or []:
+            invoices[str(invoice["id"])] = invoice
+    return invoices
+
+
+def master_articles_analysis(
+    establishment_id: str,
+    master_article_ids: Optional[Sequence[str]] = None,
+    supplier_id: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    include_invoices: bool = False,
+) -> Dict[str, Any]:
+    """
+    Analyse groupée de plusieurs master_articles sur une période (liste produits) :
+    - produits : `master_article_ids`, sinon ceux du fournisseur `supplier_id`,
+      sinon tout l'établissement
+    - mêmes statistiques que `master_article_analysis`, calculées en une requête
+      agrégée (RPC `master_article_purchase_stats`) ou une passe sur les articles ;
+      lues dans le résumé mensuel matérialisé si la période est en mois entiers
+    - factures : nombre par produit ; liste détaillée seulement si `include_invoices`
+    """
+    if not start_date or not end_date:
+        start_date, end_date = get_month_bounds()
+
+    requested_ids = list(dict.fromkeys(str(mid) for mid in master_article_ids if mid)) if master_article_ids else None
+    masters = _fetch_master_articles(establishment_id, requested_ids, supplier_id)
+    masters_by_id = {str(m["id"]): m for m in masters}
+    master_ids = [mid for mid in requested_ids if mid in masters_by_id] if requested_ids is not None else list(masters_by_id)
+
+    scope = (establishment_id, master_ids, requested_ids is not None, supplier_id, start_date, end_date)
+    if not master_ids:
+        purchases: Dict[str, Dict[str, Any]] = {}
+    elif not include_invoices and summary_reads_enabled(start_date, end_date):
+        purchases = _summary_stats_by_master(*scope)
+    else:
+        purchases = _purchase_stats_by_master(*scope, include_invoices=include_invoices)
+
+    invoices_by_id: Dict[str, Dict[str, Any]] = {}
+    if include_invoices:
+        all_invoice_ids = list(dict.fromkeys(i for p in purchases.values() for i in p["invoice_ids"]))
+        invoices_by_id = _fetch_invoices(establishment_id, all_invoice_ids)
+
+    products = []
+    for master_id in master_ids:
+        purchase = purchases.get(master_id) or {"stats": _empty_stats(), "invoices_count": 0, "invoice_ids": []}
+        product = {
+            "master_article": masters_by_id[master_id],
+            "stats": purchase["stats"],
+            "invoices_count": purchase["invoices_count"],
+        }
+        if include_invoices:
+            product["invoices"] = [invoices_by_id[i] for i in purchase["invoice_ids"] if i in invoices_by_id]
+        products.append(product)
+
+    filters = {
+        "establishment_id": establishment_id,
+        "master_article_ids": requested_ids,
+        "supplier_id": supplier_id,
+        "start_date": str(start_date),
+        "end_date": str(end_date),
+        "include_invoices": include_invoices,
+    }
+    result = {
+        "products": products,
+        "count": len(products),
+        "missing_master_article_ids": [mid for mid in requested_ids or [] if mid not in masters_by_id],
+        "filters": filters,
+    }
+
+    try:
+        write_log(
+            {
+                "type": "context",
+                "action": "view",
+                "text": f"Analyse produits - {len(products)} produits",
+                "establishment_id": establishment_id,
+                "json": {
+                    "domain": "products",
+                    "scope": "master_article_analysis",
+                    "entity": "master_articles_analysis",
+                    "filters": filters,
+                    "products_count": len(products),
+                },
+            }
+        )
+    except Exception:
+        pass
+
+    return result
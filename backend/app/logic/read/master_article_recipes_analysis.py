@@ -3,7 +3,7 @@ from typing import Dict, Any, Optional
 from datetime import date
 from dateutil.relativedelta import relativedelta
 from app.core.supabase_client import supabase
-from app.services import logs_service
+from app.core.log_writer import write_log
 
 
 def get_month_bounds(target_date: Optional[date] = None):
@@ -82,7 +82,7 @@ def master_article_impact_analysis(
             "period": {"start": str(start_date), "end": str(end_date)},
         }
         try:
-            logs_service.create_logs(
+            write_log(
                 {
                     "type": "context",
                     "action": "view",
@@ -231,7 +231,7 @@ def master_article_impact_analysis(
     }
 
     try:
-        logs_service.create_logs(
+        write_log(
             {
                 "type": "context",
                 "action": "view",
@@ -0,0 +1,403 @@
+"""
+Séries de prix en colonnes pour les statistiques marché (market_*).
+
+Les lignes (unit_price, date) sont converties une seule fois en colonnes :
+jours en ordinal (`date.toordinal()`), prix en entiers à l'échelle du
+micro-euro (`PRICE_SCALE`), ou plus fine pour une série dont un prix porte
+plus de PRICE_DECIMALS décimales (`exact_price`). Moyennes journalières,
+min / max, variation, volatilité et fenêtre récente se calculent en
+arithmétique entière exacte ; l'arrondi ROUND_HALF_UP (celui de
+`Decimal.quantize`) n'intervient qu'en sortie, ce qui donne les mêmes valeurs
+que l'ancien calcul en Decimal.
+
+`PriceColumns` regroupe plusieurs produits (une série par clé) pour traiter
+un fournisseur ou un panier entier à partir d'une seule lecture.
+"""
+
+from __future__ import annotations
+
+import math
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from fractions import Fraction
+from functools import lru_cache
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+PRICE_DECIMALS = 6
+PRICE_SCALE = 10**PRICE_DECIMALS
+
+# Précisions de sortie (identiques aux `_quantize` historiques)
+PRICE_DIGITS = 3
+PERCENT_DIGITS = 2
+
+GOOD_TIME_THRESHOLD = Fraction(3, 100)
+
+
+# ============================================================
+# Conversions
+# ============================================================
+
+def scaled_price(value: Any) -> Optional[int]:
+    """Prix → entier (× PRICE_SCALE, arrondi au micro-euro) ; None si absent ou non numérique."""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value * PRICE_SCALE
+    if isinstance(value, float):
+        if not math.isfinite(value):
+            return None
+        return round(value * PRICE_SCALE)
+    try:
+        dec = Decimal(str(value))
+    except (InvalidOperation, TypeError, ValueError):
+        return None
+    if not dec.is_finite():
+        return None
+    return int(dec.scaleb(PRICE_DECIMALS).to_integral_value(rounding=ROUND_HALF_UP))
+
+
+def exact_price(value: Any) -> Optional[Tuple[int, int]]:
+    """
+    Prix → (entier, décimales), valeur exacte de `Decimal(str(value))` :
+    au moins PRICE_DECIMALS décimales, davantage si le prix en porte plus.
+    None si absent ou non numérique.
+    """
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value * PRICE_SCALE, PRICE_DECIMALS
+    if isinstance(value, float):
+        if not math.isfinite(value):
+            return None
+        scaled = round(value * PRICE_SCALE)
+        # Division correctement arrondie : égalité ⇔ au plus PRICE_DECIMALS décimales
+        if scaled / PRICE_SCALE == value:
+            return scaled, PRICE_DECIMALS
+    try:
+        dec = Decimal(str(value))
+    except (InvalidOperation, TypeError, ValueError):
+        return None
+    if not dec.is_finite():
+        return None
+    sign, digits, exponent = dec.as_tuple()
+    decimals = max(PRICE_DECIMALS, -exponent)
+    units = int("".join(map(str, digits))) * 10 ** (exponent + decimals)
+    return (-units if sign else units), decimals
+
+
+def _append_price(prices: List[int], decimals: int, price: Tuple[int, int]) -> int:
+    """Ajoute un prix exact à une colonne ; retourne la (nouvelle) précision de la colonne."""
+    units, price_decimals = price
+    if price_decimals > decimals:
+        factor = 10 ** (price_decimals - decimals)
+        prices[:] = [p * factor for p in prices]
+        decimals = price_decimals
+    prices.append(units * 10 ** (decimals - price_decimals))
+    return decimals
+
+
+@lru_cache(maxsize=4096)
+def _day_from_text(raw: str) -> Optional[int]:
+    try:
+        return date.fromisoformat(raw.strip()[:10]).toordinal()
+    except ValueError:
+        return None
+
+
+def day_ordinal(value: Any) -> Optional[int]:
+    """Date (ISO, date ou datetime) → jour ordinal ; None si absente ou invalide."""
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value.date().toordinal()
+    if isinstance(value, date):
+        return value.toordinal()
+    if isinstance(value, str):
+        return _day_from_text(value)
+    return None
+
+
+def round_ratio(numerator: int, denominator: int, digits: int) -> int:
+    """numerator / denominator arrondi ROUND_HALF_UP à `digits` décimales, en entier × 10**digits."""
+    if denominator < 0:
+        numerator, denominator = -numerator, -denominator
+    quotient, remainder = divmod(abs(numerator) * 10**digits, denominator)
+    if 2 * remainder >= denominator:
+        quotient += 1
+    return -quotient if numerator < 0 else quotient
+
+
+def to_float(units: int, digits: int = PRICE_DIGITS) -> float:
+    """Sortie : entier × 10**digits → float (via Decimal, comme `_quantize`)."""
+    return float(Decimal(units).scaleb(-digits))
+
+
+def quantize_price(scaled: int, scale: int = PRICE_SCALE) -> int:
+    return round_ratio(scaled, scale, PRICE_DIGITS)
+
+
+def _empty_stats(last_purchase_date: Optional[str] = None, count: int = 0) -> Dict[str, Any]:
+    return {
+        "avg_unit_price": 0,
+        "min_unit_price": None,
+        "max_unit_price": None,
+        "last_unit_price": None,
+        "last_purchase_date": last_purchase_date,
+        "count_purchases": count,
+        "volatility_range": None,
+    }
+
+
+# ============================================================
+# Série d'un produit
+# ============================================================
+
+class PriceSeries:
+    """
+    Série (jour, prix) d'un produit, triée par jour (tri stable : à jour égal,
+    les lignes gardent leur ordre d'arrivée).
+
+    Les lignes sans date sont ignorées ; les lignes datées sans prix numérique
+    comptent dans `count_purchases` mais pas dans les prix. Les prix sont à
+    l'échelle `_scale` (PRICE_SCALE, ou plus fine si un prix l'exige).
+    """
+
+    __slots__ = ("_days", "_prices", "_dates", "_row_count", "_last_date", "_scale", "_summary")
+
+    def __init__(
+        self,
+        rows: Iterable[Dict[str, Any]] = (),
+        *,
+        price_field: str = "unit_price",
+        date_field: str = "date",
+    ) -> None:
+        days: List[int] = []
+        prices: List[int] = []
+        dates: List[Any] = []
+        row_count = 0
+        decimals = PRICE_DECIMALS
+        last: Tuple[int, Any] = (0, None)
+        for row in rows:
+            raw_date = row.get(date_field)
+            day = day_ordinal(raw_date)
+            if day is None:
+                continue
+            row_count += 1
+            if day >= last[0]:
+                last = (day, raw_date)
+            price = exact_price(row.get(price_field))
+            if price is None:
+                continue
+            days.append(day)
+            decimals = _append_price(prices, decimals, price)
+            dates.append(raw_date)
+        self._set_columns(days, prices, dates, row_count, last[1], decimals)
+
+    @classmethod
+    def from_columns(
+        cls,
+        days: List[int],
+        prices: List[int],
+        dates: List[Any],
+        row_count: int,
+        last_date: Any,
+        decimals: int = PRICE_DECIMALS,
+    ) -> "PriceSeries":
+        series = cls.__new__(cls)
+        series._set_columns(days, prices, dates, row_count, last_date, decimals)
+        return series
+
+    def _set_columns(
+        self,
+        days: List[int],
+        prices: List[int],
+        dates: List[Any],
+        row_count: int,
+        last_date: Any,
+        decimals: int = PRICE_DECIMALS,
+    ) -> None:
+        if any(days[i] > days[i + 1] for i in range(len(days) - 1)):
+            order = sorted(range(len(days)), key=days.__getitem__)
+            days = [days[i] for i in order]
+            prices = [prices[i] for i in order]
+            dates = [dates[i] for i in order]
+        self._days = days
+        self._prices = prices
+        self._dates = dates
+        self._row_count = row_count
+        self._last_date = last_date
+        self._scale = 10**decimals
+        self._summary: Optional[Tuple[int, int, int, int]] = None
+
+    def __len__(self) -> int:
+        return len(self._prices)
+
+    @property
+    def row_count(self) -> int:
+        return self._row_count
+
+    # ---------------------------------------------------------------- agrégats
+
+    def daily(self) -> List[Tuple[int, int, int]]:
+        """(jour, somme des prix, nombre de prix) par jour, dans l'ordre chronologique."""
+        buckets: List[Tuple[int, int, int]] = []
+        days, prices = self._days, self._prices
+        start = 0
+        for idx in range(1, len(days) + 1):
+            if idx == len(days) or days[idx] != days[start]:
+                buckets.append((days[start], sum(prices[start:idx]), idx - start))
+                start = idx
+        return buckets
+
+    def daily_means(self) -> List[int]:
+        """Moyennes journalières arrondies (entiers × 10**PRICE_DIGITS)."""
+        return [round_ratio(total, count * self._scale, PRICE_DIGITS) for _, total, count in self.daily()]
+
+    def series_daily(self) -> List[Dict[str, Any]]:
+        """Série quotidienne moyenne (1 point / jour)."""
+        return [
+            {
+                "date": date.fromordinal(day).isoformat(),
+                "avg_unit_price": to_float(round_ratio(total, count * self._scale, PRICE_DIGITS)),
+            }
+            for day, total, count in self.daily()
+        ]
+
+    def _quantized(self) -> Tuple[int, int, int, int]:
+        # (moyenne, min, max, dernier) arrondis à PRICE_DIGITS
+        if self._summary is None:
+            prices, scale = self._prices, self._scale
+            self._summary = (
+                round_ratio(sum(prices), len(prices) * scale, PRICE_DIGITS),
+                quantize_price(min(prices), scale),
+                quantize_price(max(prices), scale),
+                quantize_price(prices[-1], scale),
+            )
+        return self._summary
+
+    def stats(self) -> Dict[str, Any]:
+        """Moyenne, min, max, dernier prix / date, volume d'achats, plage de volatilité."""
+        if not self._row_count:
+            return _empty_stats()
+        if not self._prices:
+            return _empty_stats(self._last_date, self._row_count)
+        avg_units, min_units, max_units, last_units = self._quantized()
+        min_price, max_price = to_float(min_units), to_float(max_units)
+        return {
+            "avg_unit_price": to_float(avg_units),
+            "min_unit_price": min_price,
+            "max_unit_price": max_price,
+            "last_unit_price": to_float(last_units),
+            "last_purchase_date": self._dates[-1],
+            "count_purchases": self._row_count,
+            "volatility_range": f"{min_price}€ → {max_price}€",
+        }
+
+    def variation(self) -> Tuple[Optional[float], Optional[float]]:
+        """Variation (€, %) entre le premier et le dernier prix de la période."""
+        if len(self._prices) < 2:
+            return None, None
+        first, last = self._prices[0], self._prices[-1]
+        diff = last - first
+        pct = to_float(round_ratio(diff * 100, first, PERCENT_DIGITS), PERCENT_DIGITS) if first else None
+        return to_float(quantize_price(diff, self._scale)), pct
+
+    def trend(self) -> str:
+        diff, _ = self.variation()
+        if diff is None or diff == 0:
+            return "STABLE"
+        return "UP" if diff > 0 else "DOWN"
+
+    def volatility_index(self) -> Optional[float]:
+        """(max - min) / moyenne, sur les valeurs arrondies (0 = très stable)."""
+        if not self._prices:
+            return None
+        avg_units, min_units, max_units, _ = self._quantized()
+        if not avg_units:
+            return None
+        return to_float(round_ratio(max_units - min_units, avg_units, PRICE_DIGITS))
+
+    def is_good_time_to_buy(self, window_days: int = 14) -> Optional[bool]:
+        """
+        Compare la moyenne des `window_days` derniers points journaliers à la
+        moyenne de la période : True si >= 3 % moins cher, False si >= 3 % plus
+        cher, None sinon (ou données insuffisantes).
+        """
+        means = self.daily_means()
+        if not means or window_days <= 0:
+            return None
+        tail = means[-min(window_days, len(means)):]
+        period_total, tail_total = sum(means), sum(tail)
+        if not period_total:
+            return None
+        delta = Fraction(tail_total * len(means), len(tail) * period_total) - 1
+        if delta <= -GOOD_TIME_THRESHOLD:
+            return True
+        if delta >= GOOD_TIME_THRESHOLD:
+            return False
+        return None
+
+
+# ============================================================
+# Séries de plusieurs produits
+# ============================================================
+
+KeyFunc = Union[str, Callable[[Dict[str, Any]], Any]]
+
+
+class PriceColumns:
+    """
+    Colonnes (jour, prix) de plusieurs produits lues en une passe, une
+    `PriceSeries` par clé (`key` = nom de colonne ou fonction sur la ligne).
+    Les clés gardent l'ordre de première apparition.
+    """
+
+    def __init__(
+        self,
+        rows: Iterable[Dict[str, Any]],
+        key: KeyFunc,
+        *,
+        price_field: str = "unit_price",
+        date_field: str = "date",
+    ) -> None:
+        key_of = (lambda row: row.get(key)) if isinstance(key, str) else key
+        # meta : [lignes datées, dernier jour, dernière date, décimales des prix]
+        columns: Dict[Any, Tuple[List[int], List[int], List[Any], List[Any]]] = {}
+        for row in rows:
+            series_key = key_of(row)
+            if series_key is None:
+                continue
+            raw_date = row.get(date_field)
+            day = day_ordinal(raw_date)
+            if day is None:
+                continue
+            days, prices, dates, meta = columns.setdefault(series_key, ([], [], [], [0, 0, None, PRICE_DECIMALS]))
+            meta[0] += 1
+            if day >= meta[1]:
+                meta[1], meta[2] = day, raw_date
+            price = exact_price(row.get(price_field))
+            if price is None:
+                continue
+            days.append(day)
+            meta[3] = _append_price(prices, meta[3], price)
+            dates.append(raw_date)
+        self._series: Dict[Any, PriceSeries] = {
+            series_key: PriceSeries.from_columns(days, prices, dates, meta[0], meta[2], meta[3])
+            for series_key, (days, prices, dates, meta) in columns.items()
+        }
+
+    def __contains__(self, series_key: Any) -> bool:
+        return series_key in self._series
+
+    def __len__(self) -> int:
+        return len(self._series)
+
+    def keys(self) -> List[Any]:
+        return list(self._series)
+
+    def series(self, series_key: Any) -> PriceSeries:
+        """Série du produit (vide si la clé n'a aucune ligne)."""
+        return self._series.get(series_key) or PriceSeries()
+
+    def items(self) -> Iterable[Tuple[Any, PriceSeries]]:
+        return self._series.items()
@@ -0,0 +1,202 @@
+"""
+Lecture du résumé d'achats matérialisé `master_article_purchase_summary`
+(une ligne par établissement × master_article × mois, voir
+backend/sql/master_article_purchase_summary.sql).
+
+Les lignes portent des sommes et compteurs bruts : `PurchaseTotals` les
+recompose sur une période de plusieurs mois (moyennes, min / max, premier et
+dernier prix) sans relire les articles. Le résumé ne sert que des périodes en
+mois entiers ; les lectures ne l'utilisent que si `PURCHASE_SUMMARY_READS` est
+activé (après le backfill).
+"""
+
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from app.core.config import settings
+from app.core.supabase_client import supabase
+
+SUMMARY_TABLE = "master_article_purchase_summary"
+SUMMARY_CHUNK_SIZE = 200
+SUMMARY_PAGE_SIZE = 1000
+
+
+def _as_date(value: Any) -> Optional[date]:
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, str):
+        raw = value.strip()
+        if not raw:
+            return None
+        try:
+            return date.fromisoformat(raw[:10])
+        except ValueError:
+            return None
+    return None
+
+
+def _as_decimal(value: Any) -> Optional[Decimal]:
+    if value is None:
+        return None
+    try:
+        return Decimal(str(value))
+    except (InvalidOperation, TypeError, ValueError):
+        return None
+
+
+def _quantize(value: Decimal, exp: str = "0.001") -> float:
+    return float(value.quantize(Decimal(exp), rounding=ROUND_HALF_UP))
+
+
+def month_start(value: Any) -> Optional[date]:
+    parsed = _as_date(value)
+    return parsed.replace(day=1) if parsed else None
+
+
+def is_month_aligned(start: date, end: date) -> bool:
+    """Vrai si [start, end] couvre des mois entiers (du 1er au dernier jour)."""
+    return start.day == 1 and (end + timedelta(days=1)).day == 1 and start <= end
+
+
+def summary_reads_enabled(start: Optional[date] = None, end: Optional[date] = None) -> bool:
+    if not settings.PURCHASE_SUMMARY_READS:
+        return False
+    if start is None or end is None:
+        return True
+    return is_month_aligned(start, end)
+
+
+def _chunked(values: Sequence[str], size: int = SUMMARY_CHUNK_SIZE) -> Iterable[List[str]]:
+    for idx in range(0, len(values), size):
+        yield list(values[idx : idx + size])
+
+
+def fetch_purchase_summary(
+    *,
+    establishment_id: Optional[Any] = None,
+    master_article_ids: Optional[Iterable[Any]] = None,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+) -> List[Dict[str, Any]]:
+    """Lignes du résumé (par mois croissant) d'un établissement et / ou de master_articles donnés."""
+    ids = None if master_article_ids is None else list(dict.fromkeys(str(mid) for mid in master_article_ids if mid))
+    if ids is not None and not ids:
+        return []
+
+    def _query(chunk: Optional[List[str]]):
+        query = supabase.table(SUMMARY_TABLE).select("*")
+        if establishment_id:
+            query = query.eq("establishment_id", str(establishment_id))
+        if chunk is not None:
+            query = query.in_("master_article_id", chunk)
+        if start:
+            query = query.gte("month", str(month_start(start)))
+        if end:
+            query = query.lte("month", str(end))
+        return query.order("month").order("master_article_id")
+
+    rows: List[Dict[str, Any]] = []
+    for chunk in [None] if ids is None else _chunked(ids):
+        offset = 0
+        while True:
+            page = _query(chunk).range(offset, offset + SUMMARY_PAGE_SIZE - 1).execute().data or []
+            rows.extend(page)
+            if len(page) < SUMMARY_PAGE_SIZE:
+                break
+            offset += SUMMARY_PAGE_SIZE
+    rows.sort(key=lambda row: str(row.get("month")))
+    return rows
+
+
+class PurchaseTotals:
+    """
+    Cumul de lignes du résumé (à ajouter par mois croissant) : un master_article,
+    ou plusieurs liés au même produit marché.
+    """
+
+    __slots__ = (
+        "purchases_count", "invoices_count", "priced_count", "unit_price_total",
+        "min_unit_price", "max_unit_price", "first_unit_price", "last_unit_price",
+        "first_purchase_date", "last_purchase_date",
+        "quantity_count", "quantity_total", "spent_count", "spent_total",
+    )
+
+    def __init__(self) -> None:
+        self.purchases_count = self.invoices_count = self.priced_count = 0
+        self.quantity_count = self.spent_count = 0
+        self.unit_price_total = self.quantity_total = self.spent_total = Decimal("0")
+        self.min_unit_price: Optional[Decimal] = None
+        self.max_unit_price: Optional[Decimal] = None
+        self.first_unit_price: Optional[Decimal] = None
+        self.last_unit_price: Optional[Decimal] = None
+        self.first_purchase_date: Optional[date] = None
+        self.last_purchase_date: Optional[date] = None
+
+    def add(self, row: Dict[str, Any]) -> None:
+        self.purchases_count += int(row.get("purchases_count") or 0)
+        self.invoices_count += int(row.get("invoices_count") or 0)
+        self.quantity_count += int(row.get("quantity_count") or 0)
+        self.quantity_total += _as_decimal(row.get("quantity_total")) or Decimal("0")
+        self.spent_count += int(row.get("spent_count") or 0)
+        self.spent_total += _as_decimal(row.get("spent_total")) or Decimal("0")
+        priced = int(row.get("priced_count") or 0)
+        if not priced:
+            return
+        self.priced_count += priced
+        self.unit_price_total += _as_decimal(row.get("unit_price_total")) or Decimal("0")
+        for attr, pick in (("min_unit_price", min), ("max_unit_price", max)):
+            value = _as_decimal(row.get(attr))
+            if value is not None:
+                current = getattr(self, attr)
+                setattr(self, attr, value if current is None else pick(current, value))
+        # Plusieurs master_articles cumulés : premier / dernier prix départagés par date
+        first_date = _as_date(row.get("first_purchase_date"))
+        if self.first_unit_price is None or (
+            first_date and self.first_purchase_date and first_date < self.first_purchase_date
+        ):
+            self.first_unit_price = _as_decimal(row.get("first_unit_price"))
+            self.first_purchase_date = first_date
+        last_date = _as_date(row.get("last_purchase_date"))
+        if self.last_unit_price is None or not (
+            last_date and self.last_purchase_date and last_date < self.last_purchase_date
+        ):
+            self.last_unit_price = _as_decimal(row.get("last_unit_price"))
+            self.last_purchase_date = last_date
+
+    def average_unit_price(self) -> Optional[Decimal]:
+        return self.unit_price_total / self.priced_count if self.priced_count else None
+
+    def analysis_stats(self) -> Dict[str, Any]:
+        """Statistiques au format de `master_article_analysis`."""
+        def _price(value: Optional[Decimal]) -> Optional[float]:
+            return _quantize(value) if value is not None else None
+
+        average = self.average_unit_price()
+        return {
+            "count_articles": self.purchases_count,
+            "avg_unit_price": _quantize(average) if average is not None else 0.0,
+            "min_unit_price": _price(self.min_unit_price),
+            "max_unit_price": _price(self.max_unit_price),
+            "total_quantity": _quantize(self.quantity_total) if self.quantity_count else 0.0,
+            "avg_quantity": _quantize(self.quantity_total / self.quantity_count) if self.quantity_count else 0.0,
+            "total_spent": _quantize(self.spent_total, "0.01") if self.spent_count else 0,
+            "price_first": _price(self.first_unit_price),
+            "price_last": _price(self.last_unit_price),
+        }
+
+
+def purchase_totals_by_master(rows: Iterable[Dict[str, Any]]) -> Dict[str, PurchaseTotals]:
+    """Cumule les lignes du résumé (mois croissants) par master_article_id."""
+    totals: Dict[str, PurchaseTotals] = {}
+    for row in rows:
+        master_id = row.get("master_article_id")
+        if master_id:
+            totals.setdefault(str(master_id), PurchaseTotals()).add(row)
+    return totals
@@ -2,7 +2,7 @@ from datetime import date
 from typing import Dict, Any, Optional
 from dateutil.relativedelta import relativedelta
 from app.core.supabase_client import supabase
-from app.services import logs_service
+from app.core.log_writer import write_log
 
 
 def get_month_bounds(target_date: Optional[date] = None):
@@ -43,7 +43,7 @@ def recipe_ingredients_analysis(
     )
     if not recipe_resp.data:
         try:
-            logs_service.create_logs(
+            write_log(
                 {
                     "type": "context",
                     "action": "view",
@@ -87,7 +87,7 @@ def recipe_ingredients_analysis(
             "period": {"start": str(start_date), "end": str(end_date)},
         }
         try:
-            logs_service.create_logs(
+            write_log(
                 {
                     "type": "context",
                     "action": "view",
@@ -297,7 +297,7 @@ def recipe_ingredients_analysis(
     }
 
     try:
-        logs_service.create_logs(
+        write_log(
             {
                 "type": "context",
                 "action": "view",
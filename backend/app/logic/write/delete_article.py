@@ -8,6 +8,7 @@ from uuid import UUID
 from app.logic.write.shared.ingredients_history_ingredients import (
     update_ingredients_and_history_ingredients,
 )
+from app.logic.write.shared.purchase_summary import refresh_purchase_summary
 from app.logic.write.shared.recipes_average_margins import recompute_recipe_margins
 from app.logic.write.shared.recipes_history_recipes import (
     update_recipes_and_history_recipes,
@@ -179,6 +180,10 @@ def delete_article(
         }
     )
     remaining_articles = [a for a in related_articles if _safe_get(a, "id") != id_article_to_delete]
+    deleted_article_date = next(
+        (_safe_get(a, "date") for a in related_articles if _safe_get(a, "id") == id_article_to_delete),
+        None,
+    ) or target_date
 
     master_deleted = False
     if not remaining_articles:
@@ -408,6 +413,7 @@ def delete_article(
     # Suppression finale de l'article
     # ------------------------------------------------------------------
     articles_service.delete_articles(id_article_to_delete)
+    refresh_purchase_summary(establishment_id, [master_article_id], [deleted_article_date])
 
     return {
         "deleted_master_article": master_deleted,
@@ -5,9 +5,11 @@ from decimal import Decimal, InvalidOperation
 from typing import Any, Dict, List, Optional, Set
 from uuid import UUID
 
+from app.core.unit_of_work import unit_of_work
 from app.logic.write.shared.ingredients_history_ingredients import (
     update_ingredients_and_history_ingredients,
 )
+from app.logic.write.shared.purchase_summary import refresh_purchase_summary
 from app.logic.write.shared.recipes_average_margins import recompute_recipe_margins
 from app.logic.write.shared.recipes_history_recipes import (
     update_recipes_and_history_recipes,
@@ -178,6 +180,7 @@ def _delete_history_recipes(ids: List[Any]) -> None:
 # ============================================================
 
 
+@unit_of_work()
 def delete_invoice(
     *,
     establishment_id: UUID,
@@ -479,6 +482,11 @@ def delete_invoice(
         if market_article_id:
             market_articles_service.delete_market_articles(market_article_id)
     invoices_service.delete_invoices(invoice_to_delete_id)
+    refresh_purchase_summary(
+        establishment_id,
+        list_master_article_impacted,
+        [_safe_get(a, "date") or target_date for a in list_article_to_delete],
+    )
 
     supplier_invoices = invoices_service.get_all_invoices(
         filters={
@@ -210,9 +210,11 @@ def delete_recipe(
             target_date=target_date_norm,
             trigger="manual",
         )
+    # Les recettes supprimées sont retirées des marges moyennes
+    if impacted_recipes or deleted_recipe_ids:
         recompute_recipe_margins(
             establishment_id=establishment_id,
-            recipe_ids=list(impacted_recipes),
+            recipe_ids=list(impacted_recipes | deleted_recipe_ids),
             target_date=target_date_norm,
         )
 
@@ -5,9 +5,11 @@ from decimal import Decimal, InvalidOperation
 from typing import Any, Dict, List, Optional, Set
 from uuid import UUID
 
+from app.core.unit_of_work import unit_of_work
 from app.logic.write.shared.ingredients_history_ingredients import (
     update_ingredients_and_history_ingredients,
 )
+from app.logic.write.shared.purchase_summary import refresh_purchase_summary
 from app.logic.write.shared.recipes_average_margins import recompute_recipe_margins
 from app.logic.write.shared.recipes_history_recipes import (
     update_recipes_and_history_recipes,
@@ -144,6 +146,7 @@ def _compute_unit_costs(
 # ============================================================
 
 
+@unit_of_work()
 def edit_article(
     *,
     establishment_id: UUID,
@@ -181,6 +184,7 @@ def edit_article(
         "gross_unit_price": gross_unit_price
     }
     articles_service.update_articles(article_id, article_payload)
+    refresh_purchase_summary(establishment_id, [master_article_id], [target_date])
 
     latest_articles = articles_service.get_all_articles(
         filters={
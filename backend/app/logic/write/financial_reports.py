@@ -17,6 +17,9 @@ from statistics import mean
 from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Set
 from uuid import UUID
 
+from app.core.reference_data import reference_data
+from app.logic.read.purchase_summary import PurchaseTotals, fetch_purchase_summary, month_start as summary_month, summary_reads_enabled
+from app.core.unit_of_work import defer, unit_of_work
 from app.services import (
     articles_service,
     financial_ingredients_service,
@@ -28,7 +31,6 @@ from app.services import (
     market_articles_service,
     master_articles_service,
     recipes_service,
-    score_matrix_service,
     suppliers_service,
 )
 
@@ -185,6 +187,25 @@ def _fetch_history_ingredient_averages(
     return IngredientAverages(unit_cost_per_portion_recipe=ucpp, loss_value=loss_val)
 
 
+def _summary_article_average(*, master_article_id: UUID, start: date, end: date) -> Optional[float]:
+    """
+    Prix moyen d'achat du résumé mensuel, avec le même repli que la lecture des
+    articles (mois, puis mois précédent inclus, puis tout l'historique) en une requête.
+    """
+    rows = fetch_purchase_summary(master_article_ids=[master_article_id])
+    prev_start, _ = _previous_month_bounds(start)
+    for lower in (start, prev_start, None):
+        totals = PurchaseTotals()
+        for row in rows:
+            month = summary_month(row.get("month"))
+            if month is not None and (lower is None or lower <= month <= end):
+                totals.add(row)
+        if totals.purchases_count:
+            average = totals.average_unit_price()
+            return float(average) if average is not None else None
+    return None
+
+
 def _fetch_market_averages(
     *, master_article_id: Optional[UUID], market_master_article_id: Optional[UUID], start: date, end: date
 ) -> MarketAverages:
@@ -213,17 +234,18 @@ def _fetch_market_averages(
             },
         )
 
-    articles_month = _fetch_articles_range(start, end)
+    use_summary = summary_reads_enabled(start, end)
+    articles_month = [] if use_summary else _fetch_articles_range(start, end)
     market_month = _fetch_market_range(start, end)
 
-    if not articles_month or not market_month:
+    if (not use_summary and not articles_month) or not market_month:
         prev_start, prev_end = _previous_month_bounds(start)
-        if not articles_month:
+        if not use_summary and not articles_month:
             articles_month = _fetch_articles_range(prev_start, end)
         if not market_month:
             market_month = _fetch_market_range(prev_start, end)
 
-    if not articles_month:
+    if not use_summary and not articles_month:
         articles_month = _paginate(
             articles_service.get_all_articles,
             filters={
@@ -245,7 +267,11 @@ def _fetch_market_averages(
             page_size=1,
         )
 
-    article_avg = _mean_or_none(_safe_get(a, "unit_price", None) for a in articles_month)
+    article_avg = (
+        _summary_article_average(master_article_id=master_article_id, start=start, end=end)
+        if use_summary
+        else _mean_or_none(_safe_get(a, "unit_price", None) for a in articles_month)
+    )
     market_avg = _mean_or_none(_safe_get(m, "unit_price", None) for m in market_month)
     return MarketAverages(article_unit_price=article_avg, market_unit_price=market_avg)
 
@@ -356,6 +382,7 @@ def _get_flat_ingredients_for_recipe(recipe_id: UUID) -> List[Dict[str, Any]]:
 # ---------------------------------------------------------------------------
 
 
+@unit_of_work()
 def create_or_update_financial_report(
     *,
     establishment_id: UUID,
@@ -424,6 +451,7 @@ def create_or_update_financial_report(
     balanced_margin_sum = Decimal("0")
     total_revenue_sum = Decimal("0")
 
+    defer("recipes", (entry.get("id") or entry.get("recipe_id") for entry in payload))
     for entry in payload:
         recipe_id = entry.get("id") or entry.get("recipe_id")
         sales_number = _as_decimal(entry.get("sales_number") or 0) or Decimal("0")
@@ -486,6 +514,8 @@ def create_or_update_financial_report(
         # Liste plate de tous les ARTICLES (directs + via SUBRECIPES),
         # quantités déjà ramenées à "par 1 portion de la recette racine".
         flat_ingredients = _get_flat_ingredients_for_recipe(recipe_id)
+        # Un seul aller-retour pour tous les master_articles de la recette
+        defer("master_articles", (flat.get("master_article_id") for flat in flat_ingredients))
 
         for flat in flat_ingredients:
             ing_id = flat.get("ingredient_id")
@@ -653,20 +683,9 @@ def create_or_update_financial_report(
     purchase = (market_balanced_sum / consumed_value_sum * 100) if consumed_value_sum else Decimal("0")
     recipe_score_value = (balanced_margin_sum / total_revenue_sum) if total_revenue_sum else Decimal("0")
 
-    score_matrix = _paginate(
-        score_matrix_service.get_all_score_matrix,
-        filters={"order_by": "score", "direction": "desc"},
-    )
-
     def _score_from_matrix(field: str, result_value: float) -> float:
-        for row in score_matrix:
-            threshold = _safe_get(row, field, None)
-            score = _safe_get(row, "score", None)
-            if threshold is None or score is None:
-                continue
-            if result_value >= threshold:
-                return float(score)
-        return float(_safe_get(score_matrix[-1], "score", 0)) if score_matrix else 0
+        # Seuils de score_matrix pré-triés, en cache (app.core.reference_data)
+        return float(reference_data.score_scale(field).score(result_value))
 
     score_purchase_raw = _score_from_matrix("purchase_result", float(purchase))
     score_purchase = _as_decimal(score_purchase_raw) or Decimal("0")
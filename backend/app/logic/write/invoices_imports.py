@@ -6,6 +6,7 @@ from collections import defaultdict
 from datetime import date, datetime, time
 from decimal import Decimal, InvalidOperation
 import logging
+import re
 import time
 from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
 from uuid import UUID
@@ -14,9 +15,13 @@ from uuid import UUID
 
 from fastapi.encoders import jsonable_encoder
 
+from app.core.config import settings
+from app.core.notification_outbox import notification_outbox, notify_telegram
+from app.core.regex_registry import compile_pattern, fold_accents, regex_patterns
+from app.core.stage_graph import StageGraph
 from app.core.supabase_client import supabase
+from app.core.unit_of_work import unit_of_work
 from app.services import (
-    alert_logs_service,
     articles_service,
     establishments_service,
     financial_reports_service,
@@ -32,12 +37,11 @@ from app.services import (
     market_suppliers_service,
     master_articles_service,
     recipes_service,
-    regex_patterns_service,
     suppliers_service,
     user_establishment_service,
-    user_profiles_service,
     variations_service,
 )
+from app.logic.read.last_article_prices import get_last_article_prices_before
 from app.logic.write.shared.import_articles import (
     ArticleWriteError,
     ArticleEntry as SharedArticleEntry,
@@ -52,28 +56,27 @@ from app.logic.write.shared.recipes_history_recipes import (
     update_recipes_and_history_recipes,
 )
 from app.logic.write.shared.recipes_average_margins import recompute_recipe_margins
-from app.logic.write.shared.live_score import (
-    LiveScoreError,
-    create_or_update_live_score,
+from app.logic.write.shared.purchase_summary import refresh_purchase_summary
+from app.logic.write.shared.import_dedup import (
+    ImportFingerprints,
+    claim_import,
+    fingerprints_for_job,
+    link_import,
+    record_duplicate,
+    release_import,
 )
+from app.logic.write.shared.live_score import create_or_update_live_score
 
 logger = logging.getLogger(__name__)
-try:
-    from app.services.telegram.gordon_service import GordonTelegram
 
-    _telegram_client = GordonTelegram()
 
-    def _notify_invoice_rejection(message: str) -> None:
-        _telegram_client.send_text(message)
+# Les notifications passent par l'outbox : aucun appel réseau sur le chemin de l'import
+def _notify_invoice_rejection(message: str) -> None:
+    notify_telegram(message)
 
-    def _notify_invoice_variations(message: str) -> None:
-        _telegram_client.send_text(message)
-except Exception:
-    def _notify_invoice_rejection(message: str) -> None:
-        return
 
-    def _notify_invoice_variations(message: str) -> None:
-        return
+def _notify_invoice_variations(message: str) -> None:
+    notify_telegram(message)
 
 
 class LogicError(Exception):
@@ -182,9 +185,6 @@ def _reject_invoice_safely(import_job: Any, reason: str) -> None:
         pass
 
 
-import unicodedata
-import re
-
 def _apply_regex(
     pattern: Optional[str],
     value: Optional[str],
@@ -197,7 +197,7 @@ def _apply_regex(
     else:
         try:
             # Respecte les flags présents dans la regex (ex: (?i))
-            result = re.sub(pattern, "", value)
+            result = compile_pattern(pattern).sub("", value)
             result = result.strip()
         except re.error as exc:
             raise LogicError(f"Regex invalide: {pattern}") from exc
@@ -205,23 +205,14 @@ def _apply_regex(
     # --------- NORMALISATION SPÉCIALE -----------
     # si c'est un market_master_article_name → minuscule
     if pattern_type == "market_master_article_name" and result:
-        result = ''.join(
-        c for c in unicodedata.normalize('NFKD', result)
-        if not unicodedata.combining(c)
-        )
-        result = result.lower()
+        result = fold_accents(result).lower()
 
     return result or None
 
 
 def _extract_regex(pattern_type: str) -> Optional[str]:
-    patterns = regex_patterns_service.get_all_regex_patterns(
-        filters={"type": pattern_type},
-        limit=1,
-    )
-    if not patterns:
-        return None
-    return _safe_get(patterns[0], "regex")
+    # Registre process-wide : une requête pour toute la table, puis cache (TTL)
+    return regex_patterns.get(pattern_type)
 
 
 # UNIFORMISATION DES NOMBRES
@@ -312,10 +303,12 @@ def import_invoice_from_import_job(import_job_id: UUID) -> None:
         _import_invoice_from_import_job(import_job_id, import_job)
     except Exception as exc:
         _reject_invoice_safely(import_job, str(exc))
+        release_import(_safe_get(import_job, "establishment_id"), import_job_id)
         import_jobs_service.update_import_job(import_job_id, {"status": "error"})
         raise
 
 
+@unit_of_work()
 def _import_invoice_from_import_job(import_job_id: UUID, import_job: Any) -> None:
     establishment_id: Optional[UUID] = None
     lines_block: List[Any] = []
@@ -384,12 +377,43 @@ def _import_invoice_from_import_job(import_job_id: UUID, import_job: Any) -> Non
         raise LogicError("Date de facture manquante")
 
     regex_supplier = _extract_regex("supplier_name")
-    regex_master_article = _extract_regex("market_master_article_name")
 
     raw_supplier_name = supplier_block.get("raw_name")
     cleaned_supplier_name = _apply_regex(regex_supplier, raw_supplier_name, "supplier_name") or raw_supplier_name or "Fournisseur"
     _mark_timing("validate_payload")
 
+# DOUBLONS : MÊME FICHIER OU MÊME FACTURE (FOURNISSEUR, NUMÉRO, DATE, TOTAUX) DÉJÀ IMPORTÉ
+    # Avant toute écriture, empreintes réservées atomiquement : un doublon (même
+    # concurrent) est clôturé sans fournisseur, facture, articles ni cascade et
+    # rattaché au job d'origine
+    fingerprints = ImportFingerprints()
+    if settings.INVOICE_IMPORT_DEDUP:
+        fingerprints = fingerprints_for_job(import_job, ocr_payload)
+        original_import = claim_import(establishment_id, import_job_id, fingerprints)
+        if original_import:
+            saved = record_duplicate(original_import)
+            _mark_timing("dedup")
+            logger.info(
+                "[invoice_import] doublon job=%s de job=%s facture=%s (%s) : %s lignes, %.3fs évitées",
+                import_job_id,
+                original_import.get("import_job_id"),
+                original_import.get("invoice_id"),
+                original_import.get("kind"),
+                saved["lines_skipped"],
+                saved["seconds_saved"],
+            )
+            import_jobs_service.update_import_job(
+                import_job_id,
+                {
+                    "status": "completed",
+                    "duplicate_of_import_job_id": original_import.get("import_job_id"),
+                    "duplicate_of_invoice_id": original_import.get("invoice_id"),
+                },
+            )
+            _log_timings("duplicate")
+            return
+    _mark_timing("dedup")
+
     market_supplier: Optional[Any] = None
     market_supplier_id: Optional[UUID] = None
     alias = market_supplier_alias_service.get_all_market_supplier_alias(
@@ -491,7 +515,19 @@ def _import_invoice_from_import_job(import_job_id: UUID, import_job: Any) -> Non
 
     _mark_timing("create_invoice")
     
+    def _register_fingerprints() -> None:
+        if not fingerprints.items():
+            return
+        link_import(
+            establishment_id,
+            import_job_id,
+            invoice_id,
+            lines_count=len(lines_block),
+            duration_seconds=time.perf_counter() - timing_start,
+        )
+
     if is_credit_note:
+        _register_fingerprints()
         _mark_timing("credit_note_exit")
         _log_timings("credit_note")
         import_jobs_service.update_import_job(import_job_id, {"status": "completed"})
@@ -517,61 +553,77 @@ def _import_invoice_from_import_job(import_job_id: UUID, import_job: Any) -> Non
     master_articles_cache = articles_result["master_articles_cache"]
     _mark_timing("create_articles")
 
-
-#REMONTE TOUS LES INGREDIENTS & RECETTES D'UN RESTAURANT (LIMIT 10000)
-
-    ingredients_all = ingredients_service.get_all_ingredients(
-        filters={"establishment_id": establishment_id},
-        limit=10000,
-    )
-    recipes_all = recipes_service.get_all_recipes(
-        filters={"establishment_id": establishment_id},
-        limit=5000,
-    )
-    _mark_timing("load_ingredients_recipes")
-
-# CREATION DU CACHE O(1) POUR UNE RECHERCHE (TRÈS) RAPIDE
-    recipes_cache: Dict[UUID, Any] = {}
-    for recipe in recipes_all:
-        recipe_id = _safe_get(recipe, "id")
-        if recipe_id:
-            recipes_cache[recipe_id] = recipe
-
-# CRÉATION DE FILTRES POUR POUVOIR A)TROUVER TOUS LES INGREDIENTS D'UNE RECETTE B) SAVOIR QUELS RECETTES UTILISENTS QUELS MASTER_ARTICLES
+# ÉTAPES APRÈS CRÉATION DES ARTICLES : GRAPHE DE DÉPENDANCES (app.core.stage_graph)
+    # La cascade ingrédients → recettes → marges reste séquentielle ; résumé d'achats,
+    # variations et lecture du rapport financier partent en parallèle. Les étapes
+    # critiques font échouer l'import, les autres sont isolées (journalisées, leurs
+    # dépendantes sautées).
+    recipes_cache: Dict[str, Any] = {}
     ingredients_by_recipe: Dict[UUID, List[Any]] = defaultdict(list)
     recipes_by_master: Dict[UUID, Set[UUID]] = defaultdict(set)
-
-    for ingredient in ingredients_all:
-
-        # REMPLIS LE FILTRE INGREDIENT PAR RECETTE
-        recipe_id = _safe_get(ingredient, "recipe_id")
-        if recipe_id:
-            ingredients_by_recipe[recipe_id].append(ingredient)
-        # REMPLIS LE FILTRE RECIPES MASTER
-        master_id = _safe_get(ingredient, "master_article_id")
-        if (
-            _safe_get(ingredient, "type") == "ARTICLE"
-            and master_id
-            and recipe_id
-        ):
-            recipes_by_master[str(master_id)].add(recipe_id)
-
-# LISTE DES INGREDIENTS IMPACTÉS
-    # 1) Ingrédients ARTICLE impactés par les master_articles de la facture
-    ingredient_ids_article = [
-        _safe_get(ing, "id")
-        for ing in ingredients_all
-        if _safe_get(ing, "type") == "ARTICLE"
-        and str(_safe_get(ing, "master_article_id")) in master_article_ids_str
-        and _safe_get(ing, "id")
-    ]
-
     impacted_article_recipes: Set[UUID] = set()
     impacted_sub_recipes: Set[UUID] = set()
     impacted_article_recipes_str: Set[str] = set()
+    has_financial_report = False
+
+    # RÉSUMÉ D'ACHATS : RECALCUL DU MOIS DE LA FACTURE POUR LES PRODUITS TOUCHÉS
+    def _stage_purchase_summary() -> None:
+        refresh_purchase_summary(establishment_id, master_article_ids_str, [invoice_date])
+
+    #REMONTE TOUS LES INGREDIENTS & RECETTES D'UN RESTAURANT (LIMIT 10000)
+    def _stage_load_ingredients_recipes() -> None:
+        nonlocal ingredients_all, recipes_all
+
+        # Lectures internes volumineuses : lignes brutes (ids en str), sans validation Pydantic
+        ingredients_all = ingredients_service.get_all_ingredients(
+            filters={"establishment_id": establishment_id},
+            limit=10000,
+            raw=True,
+        )
+        recipes_all = recipes_service.get_all_recipes(
+            filters={"establishment_id": establishment_id},
+            limit=5000,
+            raw=True,
+        )
+
+        # CREATION DU CACHE O(1) POUR UNE RECHERCHE (TRÈS) RAPIDE
+        for recipe in recipes_all:
+            recipe_id = _safe_get(recipe, "id")
+            if recipe_id:
+                recipes_cache[str(recipe_id)] = recipe
+
+        # CRÉATION DE FILTRES POUR POUVOIR A)TROUVER TOUS LES INGREDIENTS D'UNE RECETTE B) SAVOIR QUELS RECETTES UTILISENTS QUELS MASTER_ARTICLES
+        for ingredient in ingredients_all:
+
+            # REMPLIS LE FILTRE INGREDIENT PAR RECETTE
+            recipe_id = _safe_get(ingredient, "recipe_id")
+            if recipe_id:
+                ingredients_by_recipe[recipe_id].append(ingredient)
+            # REMPLIS LE FILTRE RECIPES MASTER
+            master_id = _safe_get(ingredient, "master_article_id")
+            if (
+                _safe_get(ingredient, "type") == "ARTICLE"
+                and master_id
+                and recipe_id
+            ):
+                recipes_by_master[str(master_id)].add(recipe_id)
+
+    # LISTE DES INGREDIENTS IMPACTÉS
+    def _stage_update_ingredients_articles() -> None:
+        nonlocal ingredient_ids_article
+
+        # 1) Ingrédients ARTICLE impactés par les master_articles de la facture
+        ingredient_ids_article = [
+            _safe_get(ing, "id")
+            for ing in ingredients_all
+            if _safe_get(ing, "type") == "ARTICLE"
+            and str(_safe_get(ing, "master_article_id")) in master_article_ids_str
+            and _safe_get(ing, "id")
+        ]
+        if not ingredient_ids_article:
+            return
 
-    # 1.a) Mise à jour des ingrédients ARTICLE + historiques
-    if ingredient_ids_article:
+        # 1.a) Mise à jour des ingrédients ARTICLE + historiques
         try:
             ingredients_result_article = update_ingredients_and_history_ingredients(
                 establishment_id=establishment_id,
@@ -600,23 +652,26 @@ def _import_invoice_from_import_job(import_job_id: UUID, import_job: Any) -> Non
             except RecipesLogicError as exc:
                 raise LogicError(str(exc)) from exc
 
-            impacted_article_recipes |= set(recipes_result_article.get("all_recipes", set()))
-            impacted_sub_recipes |= set(recipes_result_article.get("recipes_with_subrecipes", set()))
-            impacted_article_recipes_str = {
+            impacted_article_recipes.update(recipes_result_article.get("all_recipes", set()))
+            impacted_sub_recipes.update(recipes_result_article.get("recipes_with_subrecipes", set()))
+            impacted_article_recipes_str.update(
                 str(recipe_id) for recipe_id in impacted_article_recipes if recipe_id
-            }
-    _mark_timing("update_ingredients_articles")
-
-    # 2) Ingrédients SUBRECIPE dont la sous-recette fait partie des recettes impactées
-    ingredient_ids_subrecipes = [
-        _safe_get(ing, "id")
-        for ing in ingredients_all
-        if _safe_get(ing, "type") == "SUBRECIPE"
-        and str(_safe_get(ing, "subrecipe_id")) in impacted_article_recipes_str
-        and _safe_get(ing, "id")
-    ]
-
-    if ingredient_ids_subrecipes:
+            )
+
+    def _stage_update_ingredients_subrecipes() -> None:
+        nonlocal ingredient_ids_subrecipes
+
+        # 2) Ingrédients SUBRECIPE dont la sous-recette fait partie des recettes impactées
+        ingredient_ids_subrecipes = [
+            _safe_get(ing, "id")
+            for ing in ingredients_all
+            if _safe_get(ing, "type") == "SUBRECIPE"
+            and str(_safe_get(ing, "subrecipe_id")) in impacted_article_recipes_str
+            and _safe_get(ing, "id")
+        ]
+        if not ingredient_ids_subrecipes:
+            return
+
         # 2.a) Mise à jour des ingrédients SUBRECIPE + historiques
         try:
             ingredients_result_sub = update_ingredients_and_history_ingredients(
@@ -646,255 +701,244 @@ def _import_invoice_from_import_job(import_job_id: UUID, import_job: Any) -> Non
             except RecipesLogicError as exc:
                 raise LogicError(str(exc)) from exc
 
-            impacted_article_recipes |= set(recipes_result_sub.get("all_recipes", set()))
-            impacted_sub_recipes |= set(recipes_result_sub.get("recipes_with_subrecipes", set()))
-    _mark_timing("update_ingredients_subrecipes")
+            impacted_article_recipes.update(recipes_result_sub.get("all_recipes", set()))
+            impacted_sub_recipes.update(recipes_result_sub.get("recipes_with_subrecipes", set()))
 
-    # 3) Recalcul des marges sur l’ensemble des recettes impactées
-    all_recipes_for_margins = list(impacted_article_recipes | impacted_sub_recipes)
+    def _stage_recompute_margins() -> None:
+        nonlocal all_recipes_for_margins
 
-    if all_recipes_for_margins:
-        recompute_recipe_margins(
-            establishment_id=establishment_id,
-            recipe_ids=all_recipes_for_margins,
-            target_date=invoice_date,
-        )
-    _mark_timing("recompute_margins")
+        # 3) Recalcul des marges sur l’ensemble des recettes impactées
+        all_recipes_for_margins = list(impacted_article_recipes | impacted_sub_recipes)
 
+        if all_recipes_for_margins:
+            recompute_recipe_margins(
+                establishment_id=establishment_id,
+                recipe_ids=all_recipes_for_margins,
+                target_date=invoice_date,
+            )
 
     # CREATION DES VARIATIONS POUR LES SMS
-    variations_created: List[Any] = []
-    variation_payloads: List[Dict[str, Any]] = []
-    previous_article_by_master: Dict[UUID, Any] = {}
-
-    candidate_master_ids = _unique(
-        [
-            entry.master_article_id
-            for entry in articles_created
-            if entry.master_article_id and entry.unit_price is not None
-        ]
-    )
-
-    if candidate_master_ids:
-        candidate_master_ids_str = [str(mid) for mid in candidate_master_ids]
-        for chunk in _chunked(candidate_master_ids_str):
-            response = (
-                supabase.table("articles")
-                .select("id, unit_price, date, master_article_id")
-                .eq("establishment_id", str(establishment_id))
-                .in_("master_article_id", chunk)
-                .lte("date", invoice_date.isoformat())
-                .order("date", desc=True)
-                .execute()
-            )
-            for row in response.data or []:
-                raw_master_id = row.get("master_article_id")
-                if not raw_master_id:
-                    continue
-                try:
-                    master_id = UUID(str(raw_master_id))
-                except ValueError:
-                    continue
-                if master_id in previous_article_by_master:
-                    continue
-                candidate_date = _as_date(row.get("date"))
-                if candidate_date and candidate_date < invoice_date:
-                    previous_article_by_master[master_id] = row
-
-    for entry in articles_created:
-        if entry.unit_price is None or entry.master_article_id is None:
-            continue
-        previous_article = previous_article_by_master.get(entry.master_article_id)
-        if not previous_article:
-            continue
-        old_price = _as_decimal(_safe_get(previous_article, "unit_price"))
-        if not old_price or old_price == 0:
-            continue
-        percentage = ((entry.unit_price - old_price) / old_price) * Decimal("100")
-        if percentage == 0:
-            continue
-        variation_payloads.append(
-            {
-                "establishment_id": establishment_id,
-                "master_article_id": entry.master_article_id,
-                "invoice_id": invoice_id,
-                "old_unit_price": old_price,
-                "new_unit_price": entry.unit_price,
-                "percentage": percentage,
-                "date": invoice_date,
-            }
+    def _stage_create_variations() -> None:
+        variation_payloads: List[Dict[str, Any]] = []
+        # Dernier achat avant la facture : une ligne par master_article (clé str)
+        previous_article_by_master = get_last_article_prices_before(
+            establishment_id,
+            (
+                entry.master_article_id
+                for entry in articles_created
+                if entry.master_article_id and entry.unit_price is not None
+            ),
+            invoice_date,
         )
 
-    if variation_payloads:
-        prepared = jsonable_encoder(
-            [{k: v for k, v in payload.items() if v is not None and k != "id"} for payload in variation_payloads]
-        )
-        try:
-            response = supabase.table("variations").insert(prepared).execute()
-            variations_created = response.data or []
-        except Exception:
-            for payload in variation_payloads:
-                variation = variations_service.create_variations(payload)
-                if variation:
-                    variations_created.append(variation)
-    _mark_timing("create_variations")
-
-    # ON CHECK SI LE USER PEUT OU VEUT RECEVOIR DES SMS POUR CE SUPPLIER
-    can_send_sms = bool(variations_created) and _safe_get(establishment, "active_sms")
-    supplier_label_effective = _safe_get(supplier, "label")
-    if can_send_sms:
-        type_sms = _safe_get(establishment, "type_sms") or "FOOD"
-        if not supplier_label_effective:
-            can_send_sms = False
-        elif type_sms == "FOOD" and supplier_label_effective != "FOOD":
-            can_send_sms = False
-        elif type_sms == "FOOD & BEVERAGES" and supplier_label_effective not in {"FOOD", "BEVERAGES"}:
-            can_send_sms = False
-
-
-    # CREATION DE L'ALERTE ID QUI SERT DE LOG + ENVOIE À N8N
-    alert_id = None
-    if can_send_sms:
-        trigger = _safe_get(establishment, "sms_variation_trigger") or "ALL"
-        threshold = Decimal(str({"ALL": 0, "±5%": 5, "±10%": 10}.get(trigger, 0))) # ON CHECK LES CONDITIONS D'ENVOIE ET SI FOURNISSEUR ELIGIBLE
-
-        filtered_variations = []
-        for variation in variations_created:
-            pct_value = _as_decimal(_safe_get(variation, "percentage")) or Decimal("0")
-            if abs(pct_value) < Decimal("0.1"): #ON EXCLUE LES VARAITIONS QUI SONT A 2 CHIFFRES APRES LA VIRGULE
+        for entry in articles_created:
+            if entry.unit_price is None or entry.master_article_id is None:
                 continue
-            if abs(pct_value) >= threshold:
-                filtered_variations.append(variation) # ON EXCLUE LES VARIATIONS NON ACCEPTE PAR LE USER (ALL 5 10)
-
+            previous_article = previous_article_by_master.get(str(entry.master_article_id))
+            if not previous_article:
+                continue
+            old_price = _as_decimal(_safe_get(previous_article, "unit_price"))
+            if not old_price or old_price == 0:
+                continue
+            percentage = ((entry.unit_price - old_price) / old_price) * Decimal("100")
+            if percentage == 0:
+                continue
+            variation_payloads.append(
+                {
+                    "establishment_id": establishment_id,
+                    "master_article_id": entry.master_article_id,
+                    "invoice_id": invoice_id,
+                    "old_unit_price": old_price,
+                    "new_unit_price": entry.unit_price,
+                    "percentage": percentage,
+                    "date": invoice_date,
+                }
+            )
 
-        if filtered_variations:
-            user_links = user_establishment_service.get_all_user_establishment(
-                filters={"establishment_id": establishment_id}
+        if variation_payloads:
+            prepared = jsonable_encoder(
+                [{k: v for k, v in payload.items() if v is not None and k != "id"} for payload in variation_payloads]
             )
-            recipient_numbers: List[str] = []
-            for link in user_links:
-                if _safe_get(link, "role") not in {"owner", "admin"}:
+            try:
+                response = supabase.table("variations").insert(prepared).execute()
+                variations_created.extend(response.data or [])
+            except Exception:
+                for payload in variation_payloads:
+                    variation = variations_service.create_variations(payload)
+                    if variation:
+                        variations_created.append(variation)
+
+    def _stage_sms_alerts() -> None:
+        # ON CHECK SI LE USER PEUT OU VEUT RECEVOIR DES SMS POUR CE SUPPLIER
+        can_send_sms = bool(variations_created) and _safe_get(establishment, "active_sms")
+        supplier_label_effective = _safe_get(supplier, "label")
+        if can_send_sms:
+            type_sms = _safe_get(establishment, "type_sms") or "FOOD"
+            if not supplier_label_effective:
+                can_send_sms = False
+            elif type_sms == "FOOD" and supplier_label_effective != "FOOD":
+                can_send_sms = False
+            elif type_sms == "FOOD & BEVERAGES" and supplier_label_effective not in {"FOOD", "BEVERAGES"}:
+                can_send_sms = False
+
+
+        # CREATION DE L'ALERTE ID QUI SERT DE LOG + ENVOIE À N8N
+        if can_send_sms:
+            trigger = _safe_get(establishment, "sms_variation_trigger") or "ALL"
+            threshold = Decimal(str({"ALL": 0, "±5%": 5, "±10%": 10}.get(trigger, 0))) # ON CHECK LES CONDITIONS D'ENVOIE ET SI FOURNISSEUR ELIGIBLE
+
+            filtered_variations = []
+            for variation in variations_created:
+                pct_value = _as_decimal(_safe_get(variation, "percentage")) or Decimal("0")
+                if abs(pct_value) < Decimal("0.1"): #ON EXCLUE LES VARAITIONS QUI SONT A 2 CHIFFRES APRES LA VIRGULE
                     continue
-                profile = user_profiles_service.get_user_profiles_by_id(_safe_get(link, "user_id"))
-                phone = _safe_get(profile, "phone_sms") if profile else None
-                if phone:
-                    recipient_numbers.append(phone) # ON CHERCHER LES PHONE DES USER AU BON STATUS
+                if abs(pct_value) >= threshold:
+                    filtered_variations.append(variation) # ON EXCLUE LES VARIATIONS NON ACCEPTE PAR LE USER (ALL 5 10)
 
 
-            if recipient_numbers:
-                filtered_variations.sort(
-                    key=lambda item: float(_safe_get(item, "percentage") or 0),
-                    reverse=True,
+            if filtered_variations:
+                user_links = user_establishment_service.get_all_user_establishment(
+                    filters={"establishment_id": establishment_id}
                 )
-                top_variations = filtered_variations[:5]
-                extra_count = max(0, len(filtered_variations) - len(top_variations)) #ON LISTE LES 5 VALEURS LES PLUS IMPORTANT ET ON COMPTE LE NOMBRE DE VARIATIONS RESTANTES
-
-                variation_lines = []
-                for variation in top_variations:
-                    master_article = master_articles_cache.get(_safe_get(variation, "master_article_id"))
-                    article_name = _safe_get(master_article, "unformatted_name") or _safe_get(master_article, "name") or "Article"
-                    pct_decimal = _as_decimal(_safe_get(variation, "percentage")) or Decimal("0")
-                    pct_value = float(pct_decimal)
-                    sign = "+" if pct_decimal > 0 else ""
-                    variation_lines.append(f"- {article_name} : {sign}{pct_value:.1f}%") # CONSTRUCTION DE LA LIGNE DE VARIATIONS
-
-                block_variations = "\n".join(variation_lines)
-                block_extra = f"+{extra_count} autres variations" if extra_count else "" #AJOUT DE "+7 AUTRES VARIATIONS"
-
-                # 1. Recettes impactées directement par les variations (master_article)
-                impacted_direct = set()
-                for variation in filtered_variations:
-                    master_id = _safe_get(variation, "master_article_id")
-                    impacted_direct.update(recipes_by_master.get(str(master_id), set()))
-                # 2. Recettes impactées indirectement via les sous-recettes
-                impacted_indirect = set(impacted_sub_recipes)
-                # 3. Fusion des deux univers
-                all_impacted_for_sms = impacted_direct | impacted_indirect
-                # 4. Filtre sur les recettes actives seulement
-                recipes_impacted_count = len(
-                    {
-                        rid for rid in all_impacted_for_sms
-                        if rid in recipes_cache and _safe_get(recipes_cache[rid], "active")
-                    }
+                recipient_user_ids = _unique(
+                    [
+                        _safe_get(link, "user_id")
+                        for link in user_links
+                        if _safe_get(link, "role") in {"owner", "admin"}
+                    ]
                 )
-
-                sms_date = _format_sms_date(invoice_date)
-                supplier_name_for_sms = _safe_get(supplier, "name") or cleaned_supplier_name
-                sms_lines = [f"{supplier_name_for_sms} du {invoice_date}:", "", block_variations]
-                
-                sms_lines = [
-                    f"{supplier_name_for_sms} du {sms_date}:",
-                    "",
-                    block_variations,
+                # UNE SEULE REQUÊTE POUR LES TÉLÉPHONES DES USERS AU BON STATUS
+                phone_by_user: Dict[str, str] = {}
+                if recipient_user_ids:
+                    response = (
+                        supabase.table("user_profiles")
+                        .select("id, phone_sms")
+                        .in_("id", [str(user_id) for user_id in recipient_user_ids])
+                        .execute()
+                    )
+                    for row in response.data or []:
+                        if row.get("phone_sms"):
+                            phone_by_user[str(row.get("id"))] = row["phone_sms"]
+                recipients = [
+                    (user_id, phone_by_user[str(user_id)])
+                    for user_id in recipient_user_ids
+                    if str(user_id) in phone_by_user
                 ]
-                
-                if block_extra:
-                    sms_lines.append(block_extra)
-                if recipes_impacted_count:
-                    sms_lines.extend(["", f"Impact sur {recipes_impacted_count} recettes."])
-
-                sms_text = "\n".join(line for line in sms_lines if line.strip())
 
-                try:
-                    establishment_name = _safe_get(establishment, "name") or str(establishment_id)
-                    _notify_invoice_variations(
-                        f"{establishment_name}\n{sms_text}"
+                if recipients:
+                    filtered_variations.sort(
+                        key=lambda item: float(_safe_get(item, "percentage") or 0),
+                        reverse=True,
+                    )
+                    top_variations = filtered_variations[:5]
+                    extra_count = max(0, len(filtered_variations) - len(top_variations)) #ON LISTE LES 5 VALEURS LES PLUS IMPORTANT ET ON COMPTE LE NOMBRE DE VARIATIONS RESTANTES
+
+                    variation_lines = []
+                    for variation in top_variations:
+                        master_article = master_articles_cache.get(_safe_get(variation, "master_article_id"))
+                        article_name = _safe_get(master_article, "unformatted_name") or _safe_get(master_article, "name") or "Article"
+                        pct_decimal = _as_decimal(_safe_get(variation, "percentage")) or Decimal("0")
+                        pct_value = float(pct_decimal)
+                        sign = "+" if pct_decimal > 0 else ""
+                        variation_lines.append(f"- {article_name} : {sign}{pct_value:.1f}%") # CONSTRUCTION DE LA LIGNE DE VARIATIONS
+
+                    block_variations = "\n".join(variation_lines)
+                    block_extra = f"+{extra_count} autres variations" if extra_count else "" #AJOUT DE "+7 AUTRES VARIATIONS"
+
+                    # 1. Recettes impactées directement par les variations (master_article)
+                    impacted_direct = set()
+                    for variation in filtered_variations:
+                        master_id = _safe_get(variation, "master_article_id")
+                        impacted_direct.update(recipes_by_master.get(str(master_id), set()))
+                    # 2. Recettes impactées indirectement via les sous-recettes
+                    impacted_indirect = set(impacted_sub_recipes)
+                    # 3. Fusion des deux univers
+                    all_impacted_for_sms = impacted_direct | impacted_indirect
+                    # 4. Filtre sur les recettes actives seulement
+                    recipes_impacted_count = len(
+                        {
+                            str(rid) for rid in all_impacted_for_sms
+                            if str(rid) in recipes_cache and _safe_get(recipes_cache[str(rid)], "active")
+                        }
                     )
-                except Exception:
-                    pass
 
-                # CREATION DE L'ALERT LOGS
-                for link in user_links:
-                    if _safe_get(link, "role") not in {"owner", "admin"}:
-                        continue
+                    sms_date = _format_sms_date(invoice_date)
+                    supplier_name_for_sms = _safe_get(supplier, "name") or cleaned_supplier_name
+                    sms_lines = [
+                        f"{supplier_name_for_sms} du {sms_date}:",
+                        "",
+                        block_variations,
+                    ]
 
-                    profile = user_profiles_service.get_user_profiles_by_id(_safe_get(link, "user_id"))
-                    phone = _safe_get(profile, "phone_sms") if profile else None
-                    if not phone:
-                        continue
+                    if block_extra:
+                        sms_lines.append(block_extra)
+                    if recipes_impacted_count:
+                        sms_lines.extend(["", f"Impact sur {recipes_impacted_count} recettes."])
 
-                    alert = alert_logs_service.create_alert_logs(
-                        {
-                            "establishment_id": establishment_id,
-                            "content": sms_text,
-                            "sent_to_number": phone,
-                            "sent_to_id": _safe_get(link, "user_id"),
-                            "payload": {
-                                "invoice_id": str(invoice_id),
-                                "variation_count": len(filtered_variations),
-                                "trigger": trigger,
-                            },
-                        }
+                    sms_text = "\n".join(line for line in sms_lines if line.strip())
+
+                    establishment_name = _safe_get(establishment, "name") or str(establishment_id)
+                    _notify_invoice_variations(f"{establishment_name}\n{sms_text}")
+
+                    # CREATION DES ALERT LOGS (INSÉRÉES PAR LOT VIA L'OUTBOX)
+                    notification_outbox.enqueue_sms_alerts(
+                        [
+                            {
+                                "establishment_id": establishment_id,
+                                "content": sms_text,
+                                "sent_to_number": phone,
+                                "sent_to_id": user_id,
+                                "payload": {
+                                    "invoice_id": str(invoice_id),
+                                    "variation_count": len(filtered_variations),
+                                    "trigger": trigger,
+                                },
+                            }
+                            for user_id, phone in recipients
+                        ],
+                        variation_ids=[_safe_get(variation, "id") for variation in filtered_variations],
                     )
 
-                    if not alert:
-                        # On loguera côté serveur, mais on ne fait pas échouer la facture
-                        return
-                    
-                    alert_id = _safe_get(alert, "id")
-
-                    if alert_id:
-                        for variation in filtered_variations:
-                            variations_service.update_variations(
-                                _safe_get(variation, "id"),
-                                {"alert_logs_id": alert_id},
-                            )
-    _mark_timing("sms_alerts")
-
-    has_financial_report = bool(
-        financial_reports_service.get_all_financial_reports(
-            filters={"establishment_id": establishment_id},
-            limit=1,
+    def _stage_financial_report_lookup() -> None:
+        nonlocal has_financial_report
+        has_financial_report = bool(
+            financial_reports_service.get_all_financial_reports(
+                filters={"establishment_id": establishment_id},
+                limit=1,
+            )
         )
-    )
 
-    if has_financial_report:
-        try:
+    # Le live score lit la marge courante des recettes : après la cascade
+    def _stage_live_score() -> None:
+        if has_financial_report:
             create_or_update_live_score(establishment_id=establishment_id)
-        except LiveScoreError:
-            pass
-    _mark_timing("live_score")
 
+    stages = StageGraph(f"invoice_import {import_job_id}", max_workers=settings.INVOICE_IMPORT_STAGE_WORKERS)
+    stages.add("purchase_summary", _stage_purchase_summary, critical=False)
+    stages.add("load_ingredients_recipes", _stage_load_ingredients_recipes)
+    stages.add("update_ingredients_articles", _stage_update_ingredients_articles, after=["load_ingredients_recipes"])
+    stages.add("update_ingredients_subrecipes", _stage_update_ingredients_subrecipes, after=["update_ingredients_articles"])
+    stages.add("recompute_margins", _stage_recompute_margins, after=["update_ingredients_subrecipes"])
+    stages.add("create_variations", _stage_create_variations, critical=False)
+    stages.add(
+        "sms_alerts",
+        _stage_sms_alerts,
+        after=["create_variations", "update_ingredients_subrecipes"],
+        critical=False,
+    )
+    stages.add("financial_report_lookup", _stage_financial_report_lookup, critical=False)
+    stages.add(
+        "live_score",
+        _stage_live_score,
+        after=["financial_report_lookup", "update_ingredients_subrecipes"],
+        critical=False,
+    )
+    stages_run = stages.run()
+    # Durée propre de chaque étape (ordre de fin), puis temps réel du graphe
+    timing_segments.extend((label, stages_run.durations[label]) for label in stages_run.completed)
+    _mark_timing("stages")
+
+    _register_fingerprints()
     import_jobs_service.update_import_job(import_job_id, {"status": "completed"})
     _mark_timing("complete_job")
     _log_timings("completed")
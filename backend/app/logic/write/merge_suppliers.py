@@ -10,6 +10,7 @@ limiter les effets de cascade liés aux FK `ON DELETE CASCADE`.
 from typing import Any, Dict, Iterable, List, Set
 from uuid import UUID
 
+from app.logic.write.shared.purchase_summary import refresh_purchase_summary
 from app.services import (
     articles_service,
     financial_ingredients_service,
@@ -244,6 +245,8 @@ def merge_suppliers(*, merge_request_id: UUID) -> Dict[str, Any]:
             continue
 
         target_supplier = establishment_targets[0] if establishment_targets else None
+        summary_master_ids: Set[Any] = set()
+        summary_dates: Set[Any] = set()
         master_article_merge_map: Dict[UUID, UUID] = {}
 
         for source_supplier in establishment_sources:
@@ -289,6 +292,11 @@ def merge_suppliers(*, merge_request_id: UUID) -> Dict[str, Any]:
                                 "master_article_id": _get_attr(target_master_article, "id"),
                             },
                         )
+                    # Résumé d'achats : les mois déplacés changent de master_article
+                    summary_master_ids.update(
+                        [_get_attr(master_article, "id"), _get_attr(target_master_article, "id")]
+                    )
+                    summary_dates.update(_get_attr(article, "date") for article in articles)
                     master_articles_service.delete_master_articles(
                         _get_attr(master_article, "id")
                     )
@@ -397,6 +405,9 @@ def merge_suppliers(*, merge_request_id: UUID) -> Dict[str, Any]:
                         _get_attr(variation, "id"), {"is_deleted": True}
                     )
 
+        if summary_master_ids and summary_dates:
+            refresh_purchase_summary(establishment_id, summary_master_ids, summary_dates)
+
         summary["processed_establishments"].append(establishment_id)
 
     return summary
\ No newline at end of file
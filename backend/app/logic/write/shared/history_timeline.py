@@ -0,0 +1,182 @@
+# FRISE CHRONOLOGIQUE D'HISTORIQUES (history_ingredients / history_recipes)
+
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+def _safe_get(obj: Any, key: str) -> Any:
+    if obj is None:
+        return None
+    if isinstance(obj, dict):
+        return obj.get(key)
+    return getattr(obj, key, None)
+
+
+def _as_date(value: Any) -> Optional[date]:
+    if value is None:
+        return None
+    if isinstance(value, date) and not isinstance(value, datetime):
+        return value
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, str):
+        raw = value.strip()
+        if not raw:
+            return None
+        try:
+            return date.fromisoformat(raw[:10])
+        except ValueError:
+            return None
+    return None
+
+
+def _id_key(row: Any) -> Optional[str]:
+    row_id = _safe_get(row, "id")
+    return str(row_id) if row_id is not None else None
+
+
+class HistoryTimeline:
+    """
+    Historiques d'un ingrédient / d'une recette triés par jour.
+
+    Les dates sont parsées une seule fois ; les recherches (même jour, précédent,
+    suivant) se font par bisection et `upsert` insère / remplace sans retrier.
+    L'ordre est celui d'un tri stable par jour : à date égale, les lignes gardent
+    leur ordre d'arrivée (ordre PostgREST `date asc`, puis créations). Les lignes
+    sans date sont rangées en tête et ignorées par les recherches.
+
+    Se lit comme la liste triée qu'elle remplace : `len`, itération, `[-1]`.
+    """
+
+    def __init__(self, rows: Iterable[Any] = ()) -> None:
+        self._rows: List[Any] = []
+        self._keys: List[date] = []
+        self._dates: List[Optional[date]] = []
+        self._by_id: Dict[str, Any] = {}
+        for row in rows:
+            self.upsert(row)
+
+    # ---------------------------------------------------------------- lecture
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __bool__(self) -> bool:
+        return bool(self._rows)
+
+    def __iter__(self) -> Iterator[Any]:
+        return iter(self._rows)
+
+    def __getitem__(self, index: Any) -> Any:
+        return self._rows[index]
+
+    @property
+    def rows(self) -> List[Any]:
+        return list(self._rows)
+
+    def get(self, history_id: Any) -> Optional[Any]:
+        return self._by_id.get(str(history_id)) if history_id is not None else None
+
+    def on(self, target_date: date) -> List[Any]:
+        """Historiques du jour `target_date`, dans l'ordre de la frise."""
+        start = bisect_left(self._keys, target_date)
+        end = bisect_right(self._keys, target_date)
+        return [self._rows[i] for i in range(start, end) if self._dates[i] is not None]
+
+    def same_day(self, target_date: date) -> Optional[Any]:
+        rows = self.on(target_date)
+        return rows[0] if rows else None
+
+    def previous(self, target_date: date) -> Optional[Any]:
+        """Dernier historique strictement antérieur à `target_date`."""
+        position = bisect_left(self._keys, target_date)
+        if position and self._dates[position - 1] is not None:
+            return self._rows[position - 1]
+        return None
+
+    def next(self, target_date: date) -> Optional[Any]:
+        """Premier historique strictement postérieur à `target_date`."""
+        position = bisect_right(self._keys, target_date)
+        return self._rows[position] if position < len(self._rows) else None
+
+    def split(self, target_date: date) -> Tuple[Optional[Any], Optional[Any], Optional[Any]]:
+        """(même jour, précédent, suivant) ; si un historique existe le jour même : (h, None, None)."""
+        same_day = self.same_day(target_date)
+        if same_day is not None:
+            return same_day, None, None
+        return None, self.previous(target_date), self.next(target_date)
+
+    def before(self, target_date: date) -> List[Any]:
+        """Historiques datés strictement avant `target_date`."""
+        position = bisect_left(self._keys, target_date)
+        return [self._rows[i] for i in range(position) if self._dates[i] is not None]
+
+    def from_date(self, target_date: date) -> List[Any]:
+        """Historiques datés à partir de `target_date` (inclus)."""
+        position = bisect_left(self._keys, target_date)
+        return self._rows[position:]
+
+    def after(self, target_date: date) -> List[Any]:
+        """Historiques datés strictement après `target_date`."""
+        return self._rows[bisect_right(self._keys, target_date):]
+
+    def latest_day(self) -> List[Any]:
+        """Historiques du jour le plus récent (équivalent de `max(..., key=date)` en tête)."""
+        if not self._rows:
+            return []
+        return self._rows[bisect_left(self._keys, self._keys[-1]):]
+
+    # ---------------------------------------------------------------- écriture
+
+    def _position(self, row: Any, row_date: Optional[date]) -> int:
+        key = row_date or date.min
+        start = bisect_left(self._keys, key)
+        end = bisect_right(self._keys, key)
+        for index in range(start, end):
+            if self._rows[index] is row:
+                return index
+        raise ValueError("historique absent de la frise")
+
+    def _insert(self, position: int, row: Any, row_date: Optional[date]) -> None:
+        self._rows.insert(position, row)
+        self._keys.insert(position, row_date or date.min)
+        self._dates.insert(position, row_date)
+
+    def upsert(self, row: Any) -> None:
+        """Ajoute ou remplace (même id) un historique en gardant la frise triée."""
+        if not row:
+            return
+        row_date = _as_date(_safe_get(row, "date"))
+        key = row_date or date.min
+        history_id = _id_key(row)
+        existing = self._by_id.get(history_id) if history_id is not None else None
+
+        if existing is None:
+            self._insert(bisect_right(self._keys, key), row, row_date)
+        else:
+            old_date = _as_date(_safe_get(existing, "date"))
+            position = self._position(existing, old_date)
+            if (old_date or date.min) == key:
+                # Même jour : remplacement sur place
+                self._rows[position] = row
+                self._dates[position] = row_date
+            else:
+                del self._rows[position], self._keys[position], self._dates[position]
+                # Tri stable : la ligne déplacée garde son rang relatif d'origine
+                moved_later = key > (old_date or date.min)
+                insert_at = bisect_left(self._keys, key) if moved_later else bisect_right(self._keys, key)
+                self._insert(insert_at, row, row_date)
+
+        if history_id is not None:
+            self._by_id[history_id] = row
+
+    def remove(self, history_id: Any) -> Optional[Any]:
+        existing = self._by_id.pop(str(history_id), None) if history_id is not None else None
+        if existing is None:
+            return None
+        position = self._position(existing, _as_date(_safe_get(existing, "date")))
+        del self._rows[position], self._keys[position], self._dates[position]
+        return existing
@@ -3,7 +3,6 @@
 from __future__ import annotations
 
 import re
-import unicodedata
 from collections import defaultdict
 from dataclasses import dataclass
 from datetime import date, datetime
@@ -14,13 +13,13 @@ from uuid import UUID
 from fastapi.encoders import jsonable_encoder
 from postgrest.exceptions import APIError
 
+from app.core.regex_registry import clean_names, compile_pattern, fold_accents, regex_patterns
 from app.core.supabase_client import supabase
 from app.services import (
     articles_service,
     market_articles_service,
     market_master_articles_service,
     master_articles_service,
-    regex_patterns_service,
 )
 
 
@@ -50,14 +49,12 @@ def _apply_regex(pattern: Optional[str], value: Optional[str], pattern_type: Opt
 
     # Normalisation forte uniquement pour market_master_article_name
     if pattern_type == "market_master_article_name":
-        txt = unicodedata.normalize("NFKD", txt)
-        txt = "".join(c for c in txt if not unicodedata.combining(c))
-        txt = txt.lower()
+        txt = fold_accents(txt).lower()
 
     # Application regex définie en base
     if pattern:
         try:
-            txt = re.sub(pattern, "", txt)
+            txt = compile_pattern(pattern).sub("", txt)
         except re.error as exc:
             raise ArticleWriteError(f"Regex invalide: {pattern}") from exc
 
@@ -68,10 +65,16 @@ def _apply_regex(pattern: Optional[str], value: Optional[str], pattern_type: Opt
 
 
 def _extract_regex(pattern_type: str) -> Optional[str]:
-    patterns = regex_patterns_service.get_all_regex_patterns(filters={"type": pattern_type}, limit=1)
-    if not patterns:
-        return None
-    return _safe_get(patterns[0], "regex")
+    # Registre process-wide : une requête pour toute la table, puis cache (TTL)
+    return regex_patterns.get(pattern_type)
+
+
+def _clean_product_names(pattern: Optional[str], values: Sequence[Optional[str]]) -> List[Optional[str]]:
+    """Équivalent de `_apply_regex(..., "market_master_article_name")` sur toute une facture."""
+    try:
+        return clean_names(values, pattern, fold=True)
+    except re.error as exc:
+        raise ArticleWriteError(f"Regex invalide: {pattern}") from exc
 
 
 def _as_decimal(value: Any) -> Optional[Decimal]:
@@ -211,11 +214,12 @@ def create_articles_from_lines(
     first_line_by_cleaned: Dict[str, dict] = {}
     cleaned_names_order: List[str] = []
 
-    for line in lines:
-        if not isinstance(line, dict):
-            continue
-        raw_name = line.get("product_name")
-        cleaned_name = _apply_regex(regex_master_article, raw_name, "market_master_article_name") or raw_name
+    dict_lines = [line for line in lines if isinstance(line, dict)]
+    raw_names = [line.get("product_name") for line in dict_lines]
+    cleaned_names = _clean_product_names(regex_master_article, raw_names)
+
+    for line, raw_name, cleaned_name in zip(dict_lines, raw_names, cleaned_names):
+        cleaned_name = cleaned_name or raw_name
         if not cleaned_name:
             raise ArticleWriteError("Nom de produit manquant pour la ligne fournie")
         line_items.append({"line": line, "raw_name": raw_name, "cleaned_name": cleaned_name})
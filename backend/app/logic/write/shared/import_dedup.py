@@ -0,0 +1,293 @@
+# DÉDOUBLONNAGE DES IMPORTS DE FACTURES (empreintes contenu / facture)
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import re
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.regex_registry import fold_accents
+from app.core.supabase_client import supabase
+
+logger = logging.getLogger(__name__)
+
+FINGERPRINTS_SCHEMA = "internal"
+FINGERPRINTS_TABLE = "invoice_import_fingerprints"
+CLAIM_RPC_NAME = "claim_invoice_import_fingerprints"
+STORAGE_BUCKET = "invoices"
+CONTENT = "content"
+INVOICE = "invoice"
+
+# Travail évité depuis le démarrage du process (exposé par /import-stats des workers)
+_stats_lock = threading.Lock()
+_stats = {"duplicates": 0, "lines_skipped": 0, "seconds_saved": 0.0}
+
+
+def _safe_get(obj: Any, key: str, default: Any = None) -> Any:
+    if obj is None:
+        return default
+    if isinstance(obj, dict):
+        return obj.get(key, default)
+    return getattr(obj, key, default)
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _normalized_text(value: Any) -> str:
+    """Majuscules sans accents ni ponctuation : `Métro  France.` -> `METROFRANCE`."""
+    if value is None:
+        return ""
+    return re.sub(r"[^0-9A-Z]+", "", fold_accents(str(value)).upper())
+
+
+def _normalized_amount(value: Any) -> str:
+    if value is None or value == "":
+        return ""
+    try:
+        return str(Decimal(str(value)).quantize(Decimal("0.01")))
+    except (InvalidOperation, TypeError, ValueError):
+        return ""
+
+
+# ---------------------------------------------------------------------------
+# Empreintes
+# ---------------------------------------------------------------------------
+
+@dataclass
+class ImportFingerprints:
+    content: Optional[str] = None
+    invoice: Optional[str] = None
+
+    def items(self) -> List[Tuple[str, str]]:
+        return [(kind, value) for kind, value in ((CONTENT, self.content), (INVOICE, self.invoice)) if value]
+
+
+def content_fingerprint(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def invoice_fingerprint(ocr_payload: Dict[str, Any]) -> Optional[str]:
+    """
+    Empreinte (fournisseur, numéro, date, totaux) lue dans le retour OCR ; None
+    si le fournisseur, le numéro, la date ou tous les totaux manquent (trop peu
+    d'éléments pour conclure à un doublon).
+    """
+    invoice_block = ocr_payload.get("invoice") or {}
+    supplier_block = ocr_payload.get("supplier") or {}
+    supplier = _normalized_text(supplier_block.get("raw_name"))
+    number = _normalized_text(invoice_block.get("invoice_number"))
+    invoice_date = str(invoice_block.get("invoice_date") or "")[:10]
+    totals = [
+        _normalized_amount(invoice_block.get(key))
+        for key in ("total_excl_tax", "total_incl_tax", "total_vat")
+    ]
+    if not supplier or not number or not invoice_date or not any(totals):
+        return None
+    return _sha256("|".join([supplier, number, invoice_date, *totals]))
+
+
+def _download_file(file_path: Optional[str]) -> Optional[bytes]:
+    if not file_path:
+        return None
+    path = file_path.lstrip("/").removeprefix(f"{STORAGE_BUCKET}/")
+    try:
+        response = supabase.storage.from_(STORAGE_BUCKET).download(path)
+    except Exception as exc:
+        logger.warning("[import_dedup] téléchargement de %s impossible (%s)", file_path, exc)
+        return None
+    if isinstance(response, (bytes, bytearray)):
+        return bytes(response)
+    return None
+
+
+def fingerprints_for_job(import_job: Any, ocr_payload: Dict[str, Any]) -> ImportFingerprints:
+    """
+    Empreintes d'un import_job : `content_hash` renseigné à la création du job,
+    sinon sha256 du fichier téléchargé depuis le stockage.
+    """
+    content = _safe_get(import_job, "content_hash")
+    if not content:
+        data = _download_file(_safe_get(import_job, "file_path"))
+        content = content_fingerprint(data) if data else None
+    return ImportFingerprints(content=content, invoice=invoice_fingerprint(ocr_payload))
+
+
+# ---------------------------------------------------------------------------
+# Registre
+# ---------------------------------------------------------------------------
+
+def _registry():
+    return supabase.schema(FINGERPRINTS_SCHEMA).table(FINGERPRINTS_TABLE)
+
+
+def _claim_from_rpc(establishment_id: Any, import_job_id: Any, items: List[Tuple[str, str]]) -> Optional[Dict[str, Any]]:
+    data = (
+        supabase.schema(FINGERPRINTS_SCHEMA)
+        .rpc(
+            CLAIM_RPC_NAME,
+            {
+                "p_establishment_id": str(establishment_id),
+                "p_import_job_id": str(import_job_id),
+                "p_fingerprints": [{"kind": kind, "fingerprint": value} for kind, value in items],
+            },
+        )
+        .execute()
+        .data
+    )
+    if not isinstance(data, dict):
+        raise ValueError(f"Réponse inattendue de {CLAIM_RPC_NAME}")
+    return data.get("original")
+
+
+def _claim_from_table(establishment_id: Any, import_job_id: Any, items: List[Tuple[str, str]]) -> Optional[Dict[str, Any]]:
+    """Même réservation sans la RPC : insert … on conflict do nothing, puis lecture des empreintes perdues."""
+    rows = [
+        {"establishment_id": str(establishment_id), "kind": kind, "fingerprint": value, "import_job_id": str(import_job_id)}
+        for kind, value in items
+    ]
+    claimed = (
+        _registry()
+        .upsert(rows, on_conflict="establishment_id,kind,fingerprint", ignore_duplicates=True)
+        .execute()
+        .data
+        or []
+    )
+    if len(claimed) == len(rows):
+        return None
+    existing = (
+        _registry()
+        .select("*")
+        .eq("establishment_id", str(establishment_id))
+        .in_("fingerprint", [value for _, value in items])
+        .execute()
+        .data
+        or []
+    )
+    by_key = {
+        (row.get("kind"), row.get("fingerprint")): row
+        for row in existing
+        if str(row.get("import_job_id")) != str(import_job_id)
+    }
+    original = next((by_key[key] for key in items if key in by_key), None)
+    if original is None:
+        # Empreintes déjà réservées par ce même job (nouvelle tentative)
+        return None
+    release_import(establishment_id, import_job_id)
+    (
+        _registry()
+        .update(
+            {
+                "duplicates_count": int(original.get("duplicates_count") or 0) + 1,
+                "last_duplicate_job_id": str(import_job_id),
+                "last_duplicate_at": datetime.now(timezone.utc).isoformat(),
+            }
+        )
+        .eq("establishment_id", str(original["establishment_id"]))
+        .eq("kind", original["kind"])
+        .eq("fingerprint", original["fingerprint"])
+        .execute()
+    )
+    return original
+
+
+def claim_import(establishment_id: Any, import_job_id: Any, fingerprints: ImportFingerprints) -> Optional[Dict[str, Any]]:
+    """
+    Réserve atomiquement les empreintes du job avant toute écriture (RPC
+    `claim_invoice_import_fingerprints` : insert … on conflict do nothing).
+    Retourne None si le job les détient (import à poursuivre), sinon la ligne de
+    l'import d'origine : le job est un doublon, ses réservations sont rendues et
+    le compteur de doublons de l'original incrémenté. Une ligne existante n'est
+    jamais réécrite. Registre indisponible : journalisé, l'import se poursuit.
+    """
+    items = fingerprints.items()
+    if not establishment_id or not items:
+        return None
+    try:
+        return _claim_from_rpc(establishment_id, import_job_id, items)
+    except Exception as exc:
+        logger.warning("[import_dedup] RPC %s indisponible (%s), réservation par table", CLAIM_RPC_NAME, exc)
+    try:
+        return _claim_from_table(establishment_id, import_job_id, items)
+    except Exception as exc:
+        logger.warning("[import_dedup] registre des empreintes indisponible (%s)", exc)
+        return None
+
+
+def link_import(
+    establishment_id: Any,
+    import_job_id: Any,
+    invoice_id: Any,
+    *,
+    lines_count: int,
+    duration_seconds: float,
+) -> None:
+    """
+    Rattache la facture créée aux empreintes réservées par le job (les lignes
+    d'autres jobs ne sont pas touchées) ; un échec est journalisé sans effet sur l'import.
+    """
+    if not establishment_id or not invoice_id:
+        return
+    try:
+        (
+            _registry()
+            .update(
+                {
+                    "invoice_id": str(invoice_id),
+                    "lines_count": lines_count,
+                    "duration_ms": int(duration_seconds * 1000),
+                }
+            )
+            .eq("establishment_id", str(establishment_id))
+            .eq("import_job_id", str(import_job_id))
+            .execute()
+        )
+    except Exception as exc:
+        logger.warning("[import_dedup] empreintes non rattachées pour le job %s (%s)", import_job_id, exc)
+
+
+def release_import(establishment_id: Any, import_job_id: Any) -> None:
+    """
+    Rend les empreintes réservées par un job sans facture rattachée (doublon,
+    import en échec) : le même fichier pourra être réimporté.
+    """
+    if not establishment_id:
+        return
+    try:
+        (
+            _registry()
+            .delete()
+            .eq("establishment_id", str(establishment_id))
+            .eq("import_job_id", str(import_job_id))
+            .is_("invoice_id", "null")
+            .execute()
+        )
+    except Exception as exc:
+        logger.warning("[import_dedup] empreintes du job %s non libérées (%s)", import_job_id, exc)
+
+
+def record_duplicate(original: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Comptabilise un doublon évité dans les compteurs du process et retourne le
+    travail économisé : lignes non réimportées, durée de l'import d'origine.
+    """
+    saved = {
+        "lines_skipped": int(original.get("lines_count") or 0),
+        "seconds_saved": (original.get("duration_ms") or 0) / 1000,
+    }
+    with _stats_lock:
+        _stats["duplicates"] += 1
+        _stats["lines_skipped"] += saved["lines_skipped"]
+        _stats["seconds_saved"] += saved["seconds_saved"]
+    return saved
+
+
+def dedup_stats() -> Dict[str, Any]:
+    with _stats_lock:
+        return {**_stats, "seconds_saved": round(_stats["seconds_saved"], 3)}
@@ -10,6 +10,7 @@ from uuid import UUID
 from fastapi.encoders import jsonable_encoder
 
 from app.core.supabase_client import supabase
+from app.logic.write.shared.history_timeline import HistoryTimeline
 from app.logic.write.shared.recipes_history_recipes import update_recipes_and_history_recipes
 from app.services import (
     articles_service,
@@ -96,25 +97,10 @@ def _ensure_portion(recipe_id: Optional[UUID], portion: Optional[Decimal]) -> De
 
 
 def _split_histories(
-    histories: Iterable[Any], target_date: date
+    histories: HistoryTimeline, target_date: date
 ) -> Tuple[Optional[Any], Optional[Any], Optional[Any]]:
-    same_day = None
-    h_prev = None
-    h_next = None
-
-    for history in histories:
-        history_date = _as_date(_safe_get(history, "date"))
-        if history_date is None:
-            continue
-        # priorité absolue : si même date, on stoppe tout
-        if history_date == target_date:
-            same_day = history
-            return same_day, None, None
-        if history_date < target_date:
-            h_prev = history
-        elif history_date > target_date and h_next is None:
-            h_next = history
-    return same_day, h_prev, h_next
+    # priorité absolue : si même date, pas de précédent / suivant
+    return histories.split(target_date)
 
 
 def _chunked(values: Sequence[str], size: int = 500) -> Iterable[List[str]]:
@@ -188,8 +174,8 @@ def update_ingredients_and_history_ingredients(
             for row in response.data or []:
                 ingredients_by_id[str(row.get("id"))] = row
 
-    # Précharger tous les historiques d'ingrédients
-    histories_by_ingredient_id: Dict[str, List[Any]] = {iid: [] for iid in ingredient_ids_set}
+    # Précharger tous les historiques d'ingrédients (frise triée par jour, index par id)
+    histories_by_ingredient_id: Dict[str, HistoryTimeline] = {iid: HistoryTimeline() for iid in ingredient_ids_set}
     if ingredient_ids_set:
         for chunk in _chunked(sorted(ingredient_ids_set)):
             response = (
@@ -201,29 +187,15 @@ def update_ingredients_and_history_ingredients(
                 .execute()
             )
             for row in response.data or []:
-                histories_by_ingredient_id.setdefault(str(row.get("ingredient_id")), []).append(row)
-
-    def _sort_histories(histories: List[Any]) -> None:
-        histories.sort(key=lambda h: _as_date(_safe_get(h, "date")) or date.min)
+                histories_by_ingredient_id.setdefault(str(row.get("ingredient_id")), HistoryTimeline()).upsert(row)
 
     # VA CHERCHER LES HISTORIQUE D'UN INGREDIENT
-    def _get_histories(ingredient_id: UUID) -> List[Any]:
-        return histories_by_ingredient_id.get(str(ingredient_id), [])
+    def _get_histories(ingredient_id: UUID) -> HistoryTimeline:
+        return histories_by_ingredient_id.setdefault(str(ingredient_id), HistoryTimeline())
 
     def _upsert_history_cache(ingredient_id: UUID, history_row: Any) -> None:
-        if not history_row:
-            return
-        key = str(ingredient_id)
-        histories = histories_by_ingredient_id.setdefault(key, [])
-        history_id = _safe_get(history_row, "id")
-        if history_id is not None:
-            for idx, existing in enumerate(histories):
-                if _safe_get(existing, "id") == history_id:
-                    histories[idx] = history_row
-                    _sort_histories(histories)
-                    return
-        histories.append(history_row)
-        _sort_histories(histories)
+        # Insertion / remplacement par id en O(log n), la frise reste triée
+        _get_histories(ingredient_id).upsert(history_row)
 
     pending_history_inserts: List[Dict[str, Any]] = []
 
@@ -587,8 +559,7 @@ def update_ingredients_and_history_ingredients(
             unit_cost = gross_unit_price * quantity
             
             histories = _get_histories(ingredient_id)
-            future_histories = [ h for h in histories
-                if (_as_date(_safe_get(h, "date")) or date.min) > target_date_norm ]
+            future_histories = histories.after(target_date_norm)
             
             portion_recipe = _portion_for_recipe(recipe_id)
             unit_cost_per_portion_recipe = unit_cost / portion_recipe
@@ -613,12 +584,8 @@ def update_ingredients_and_history_ingredients(
                 }
                 pending_history_inserts.append(history_payload)
             else:
-                future_histories_sorted = sorted(
-                    future_histories,
-                    key=lambda h: _as_date(_safe_get(h, "date")) or date.min,
-                    reverse=True,)
-                
-                target_history = future_histories_sorted[0]
+                # Historique futur le plus récent
+                target_history = histories.latest_day()[0]
                 history_payload = {
                     "gross_unit_price": gross_unit_price,
                     "unit_cost": unit_cost,
@@ -7,6 +7,7 @@ from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
 from typing import Any, Dict, Iterable, List, Optional, Sequence
 from uuid import UUID
 
+from app.core.reference_data import reference_data
 from app.services import (
     articles_service,
     financial_ingredients_service,
@@ -16,7 +17,6 @@ from app.services import (
     market_articles_service,
     master_articles_service,
     recipes_service,
-    score_matrix_service,
 )
 
 
@@ -270,23 +270,10 @@ def create_or_update_live_score(*, establishment_id: UUID) -> Dict[str, Decimal]
     purchase = (market_balanced_sum / consumed_value_sum * Decimal("100")) if consumed_value_sum else Decimal("0")
     recipe_score_value = (balanced_margin_sum / total_revenue_sum) if total_revenue_sum else Decimal("0")
 
-    score_matrix = _paginate(
-        score_matrix_service.get_all_score_matrix,
-        filters={"order_by": "score", "direction": "desc"},
-    )
-
     def _score_from_matrix(field: str, result_value: Decimal) -> Decimal:
-        for row in score_matrix:
-            threshold = _as_decimal(_safe_get(row, field, None))
-            score_value = _as_decimal(_safe_get(row, "score", None))
-            if threshold is None or score_value is None:
-                continue
-            if result_value >= threshold:
-                return score_value
-        if score_matrix:
-            last_score = _as_decimal(_safe_get(score_matrix[-1], "score", 0))
-            return last_score if last_score is not None else Decimal("0")
-        return Decimal("0")
+        # Seuils de score_matrix pré-triés, en cache (app.core.reference_data)
+        score_value = _as_decimal(reference_data.score_scale(field, _as_decimal).score(result_value))
+        return score_value if score_value is not None else Decimal("0")
 
     score_purchase = _score_from_matrix("purchase_result", purchase)
     score_recipe_base = (recipe_score_value + score_purchase) / Decimal("2")
@@ -0,0 +1,216 @@
+# RÉSUMÉ D'ACHATS MATÉRIALISÉ (établissement × master_article × mois)
+
+from __future__ import annotations
+
+import logging
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.core.supabase_client import supabase
+from app.logic.read.purchase_summary import SUMMARY_TABLE, month_start
+
+logger = logging.getLogger(__name__)
+
+REFRESH_RPC_NAME = "refresh_master_article_purchase_summary"
+REBUILD_RPC_NAME = "rebuild_master_article_purchase_summary"
+REFRESH_CHUNK_SIZE = 200
+REFRESH_PAGE_SIZE = 1000
+
+
+def _as_decimal(value: Any) -> Optional[Decimal]:
+    if value is None or isinstance(value, bool):
+        return None
+    try:
+        return Decimal(str(value))
+    except (InvalidOperation, TypeError, ValueError):
+        return None
+
+
+def _chunked(values: List[str], size: int = REFRESH_CHUNK_SIZE) -> Iterable[List[str]]:
+    for idx in range(0, len(values), size):
+        yield values[idx : idx + size]
+
+
+def summary_rows_from_articles(articles: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Lignes du résumé calculées à partir d'articles (même calcul que
+    `refresh_master_article_purchase_summary`) ; numériques en texte exact.
+    """
+    buckets: Dict[Tuple[str, str, date], List[Dict[str, Any]]] = {}
+    for article in articles:
+        month = month_start(article.get("date"))
+        if month is None or not article.get("master_article_id") or not article.get("establishment_id"):
+            continue
+        key = (str(article["establishment_id"]), str(article["master_article_id"]), month)
+        buckets.setdefault(key, []).append(article)
+
+    rows = []
+    for (establishment_id, master_article_id, month), bucket in buckets.items():
+        bucket.sort(key=lambda a: (str(a.get("date"))[:10], str(a.get("id"))))
+        priced = [(a, p) for a in bucket if (p := _as_decimal(a.get("unit_price"))) is not None]
+        quantities = [q for a in bucket if (q := _as_decimal(a.get("quantity"))) is not None]
+        spent = [
+            p * q for a, p in priced if (q := _as_decimal(a.get("quantity"))) is not None
+        ]
+        prices = [p for _, p in priced]
+        rows.append(
+            {
+                "establishment_id": establishment_id,
+                "master_article_id": master_article_id,
+                "month": month.isoformat(),
+                "purchases_count": len(bucket),
+                "invoices_count": len({str(a["invoice_id"]) for a in bucket if a.get("invoice_id")}),
+                "priced_count": len(prices),
+                "unit_price_total": str(sum(prices, Decimal("0"))),
+                "min_unit_price": str(min(prices)) if prices else None,
+                "max_unit_price": str(max(prices)) if prices else None,
+                "first_unit_price": str(prices[0]) if prices else None,
+                "last_unit_price": str(prices[-1]) if prices else None,
+                "first_purchase_date": str(priced[0][0]["date"])[:10] if priced else None,
+                "last_purchase_date": str(priced[-1][0]["date"])[:10] if priced else None,
+                "quantity_count": len(quantities),
+                "quantity_total": str(sum(quantities, Decimal("0"))),
+                "spent_count": len(spent),
+                "spent_total": str(sum(spent, Decimal("0"))),
+            }
+        )
+    return rows
+
+
+def _fetch_articles(establishment_id: str, master_ids: List[str], months: Optional[List[date]]) -> List[Dict[str, Any]]:
+    def _query(chunk: List[str]):
+        query = (
+            supabase.table("articles")
+            .select("id, establishment_id, master_article_id, invoice_id, date, unit_price, quantity")
+            .eq("establishment_id", establishment_id)
+            .in_("master_article_id", chunk)
+        )
+        if months:
+            query = query.gte("date", str(min(months)))
+            # Fin du dernier mois : bornée par le 1er du mois suivant
+            last = max(months)
+            next_month = date(last.year + last.month // 12, last.month % 12 + 1, 1)
+            query = query.lt("date", str(next_month))
+        return query.order("date").order("id")
+
+    articles: List[Dict[str, Any]] = []
+    for chunk in _chunked(master_ids):
+        offset = 0
+        while True:
+            page = _query(chunk).range(offset, offset + REFRESH_PAGE_SIZE - 1).execute().data or []
+            articles.extend(page)
+            if len(page) < REFRESH_PAGE_SIZE:
+                break
+            offset += REFRESH_PAGE_SIZE
+    if months:
+        wanted = set(months)
+        articles = [a for a in articles if month_start(a.get("date")) in wanted]
+    return articles
+
+
+def _fetch_master_ids(establishment_id: str) -> List[str]:
+    master_ids: List[str] = []
+    offset = 0
+    while True:
+        page = (
+            supabase.table("master_articles")
+            .select("id")
+            .eq("establishment_id", establishment_id)
+            .order("id")
+            .range(offset, offset + REFRESH_PAGE_SIZE - 1)
+            .execute()
+            .data
+            or []
+        )
+        master_ids.extend(str(m["id"]) for m in page)
+        if len(page) < REFRESH_PAGE_SIZE:
+            return master_ids
+        offset += REFRESH_PAGE_SIZE
+
+
+def _refresh_from_articles(establishment_id: str, master_ids: List[str], months: Optional[List[date]]) -> int:
+    """Recalcul côté Python (RPC absente) : suppression puis réinsertion des mois touchés."""
+    rows = summary_rows_from_articles(_fetch_articles(establishment_id, master_ids, months))
+    for chunk in _chunked(master_ids):
+        query = (
+            supabase.table(SUMMARY_TABLE)
+            .delete()
+            .eq("establishment_id", establishment_id)
+            .in_("master_article_id", chunk)
+        )
+        if months:
+            query = query.in_("month", [m.isoformat() for m in months])
+        query.execute()
+    for idx in range(0, len(rows), REFRESH_PAGE_SIZE):
+        supabase.table(SUMMARY_TABLE).upsert(
+            rows[idx : idx + REFRESH_PAGE_SIZE], on_conflict="establishment_id,master_article_id,month"
+        ).execute()
+    return len(rows)
+
+
+def refresh_purchase_summary(
+    establishment_id: Any,
+    master_article_ids: Iterable[Any],
+    dates: Optional[Iterable[Any]] = None,
+) -> Optional[int]:
+    """
+    Recalcule les mois du résumé touchés par une écriture (import, suppression de
+    facture ou d'article, édition d'article, fusion de fournisseurs) pour les
+    master_articles donnés ; tous leurs mois
+    si `dates` est None. Un échec est journalisé sans interrompre l'écriture :
+    le résumé se rattrape avec `rebuild_purchase_summary`.
+    """
+    master_ids = list(dict.fromkeys(str(mid) for mid in master_article_ids or [] if mid))
+    if not establishment_id or not master_ids:
+        return 0
+    months: Optional[List[date]] = None
+    if dates is not None:
+        months = sorted({m for m in (month_start(d) for d in dates) if m})
+        if not months:
+            return 0
+
+    try:
+        try:
+            refreshed = 0
+            for chunk in _chunked(master_ids):
+                resp = supabase.rpc(
+                    REFRESH_RPC_NAME,
+                    {
+                        "p_establishment_id": str(establishment_id),
+                        "p_master_article_ids": chunk,
+                        "p_months": [m.isoformat() for m in months] if months else None,
+                    },
+                ).execute()
+                refreshed += int(resp.data or 0)
+            return refreshed
+        except Exception as exc:
+            logger.warning("[purchase_summary] RPC %s indisponible (%s), recalcul depuis les articles", REFRESH_RPC_NAME, exc)
+        return _refresh_from_articles(str(establishment_id), master_ids, months)
+    except Exception as exc:
+        logger.warning("[purchase_summary] recalcul impossible pour %s (%s)", establishment_id, exc)
+        return None
+
+
+def rebuild_purchase_summary(establishment_id: Optional[Any] = None) -> int:
+    """Reconstruit tout le résumé d'un établissement (de tous si None) : backfill / rattrapage."""
+    try:
+        resp = supabase.rpc(
+            REBUILD_RPC_NAME,
+            {"p_establishment_id": str(establishment_id) if establishment_id else None},
+        ).execute()
+        return int(resp.data or 0)
+    except Exception as exc:
+        logger.warning("[purchase_summary] RPC %s indisponible (%s), reconstruction depuis les articles", REBUILD_RPC_NAME, exc)
+
+    query = supabase.table("establishments").select("id")
+    if establishment_id:
+        query = query.eq("id", str(establishment_id))
+    total = 0
+    for establishment in query.execute().data or []:
+        est_id = str(establishment["id"])
+        supabase.table(SUMMARY_TABLE).delete().eq("establishment_id", est_id).execute()
+        master_ids = _fetch_master_ids(est_id)
+        if master_ids:
+            total += _refresh_from_articles(est_id, master_ids, None)
+    return total
@@ -1,11 +1,17 @@
 # UTILISER POUR CALCULER/METTRE A JOUR L'ENSEMBLE DES MARGES MOYENNES
 from __future__ import annotations
 
+import logging
+from dataclasses import dataclass, field
 from datetime import date, datetime
 from decimal import Decimal, InvalidOperation
-from typing import Any, Dict, Iterable, List, Optional, Sequence
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
 from uuid import UUID
 
+from app.core.log_writer import write_log
+from app.core.reference_data import reference_data
+from app.core.supabase_client import supabase
+from app.core.unit_of_work import invalidate
 from app.services import (
     recipes_service,
     recipe_margin_service,
@@ -14,9 +20,18 @@ from app.services import (
     recipe_categories_service,
     recipes_subcategories_service,
     establishments_service,
-    logs_service,
 )
 
+logger = logging.getLogger(__name__)
+
+TOTALS_RPC_NAME = "refresh_recipe_margin_totals"
+AVERAGES_RPC_NAME = "upsert_recipe_margin_averages"
+GLOBAL_TABLE = "recipe_margin"
+CATEGORY_TABLE = "recipe_margin_category"
+SUBCATEGORY_TABLE = "recipe_margin_subcategory"
+AVERAGE_TABLES = ((GLOBAL_TABLE, None), (CATEGORY_TABLE, "category_id"), (SUBCATEGORY_TABLE, "subcategory_id"))
+RECIPES_PAGE_SIZE = 1000
+
 # ============================================================
 #                     UTILITAIRES
 # ============================================================
@@ -82,56 +97,231 @@ def _as_decimal(value: Any) -> Optional[Decimal]:
     return None
 
 
-def _mean(values: Sequence[Decimal]) -> Optional[Decimal]:
-    usable = [v for v in values if v is not None]
-    if not usable:
-        return None
-    return sum(usable) / Decimal(len(usable))
-
-
-def _upsert_margin(
-    service_get,
-    service_create,
-    service_update,
-    base_filters: Dict[str, Any],
-    avg_margin: Optional[Decimal],
-    target_date: date,
-) -> Dict[str, Any]:
+@dataclass
+class MarginTotals:
     """
-    Upsert exact RAVY :
-    - date arrondie au jour
-    - si date existante >= target_date → update le + récent
-    - sinon → insert
+    Sommes courantes des marges par bucket (catégorie, sous-catégorie) d'un
+    établissement, et buckets des recettes recalculées (avant / après).
     """
 
-    if avg_margin is None:
-        return {"updated": False, "created": False, "id": None}
+    buckets: Dict[Tuple[Any, Any], Tuple[Decimal, int]] = field(default_factory=dict)
+    touched: List[Tuple[Any, Any]] = field(default_factory=list)
+    rebuilt: bool = False
 
-    target_date_norm = _normalize_to_date(target_date)
-    filters = {**base_filters, "order_by": "date", "direction": "desc"}
+    def add(self, category_id: Any, subcategory_id: Any, margin: Decimal, count: int = 1) -> None:
+        key = (category_id, subcategory_id)
+        total, n = self.buckets.get(key, (Decimal("0"), 0))
+        self.buckets[key] = (total + margin, n + count)
 
-    existing_list = service_get(filters=filters, limit=1)
+    def average(self, *, category_id: Any = None, subcategory_id: Any = None) -> Optional[Decimal]:
+        """Moyenne globale, d'une catégorie ou d'une sous-catégorie (None si aucune recette)."""
+        total, count = Decimal("0"), 0
+        for (cat, sub), (bucket_sum, bucket_count) in self.buckets.items():
+            if category_id is not None and cat != category_id:
+                continue
+            if subcategory_id is not None and sub != subcategory_id:
+                continue
+            total += bucket_sum
+            count += bucket_count
+        return total / Decimal(count) if count else None
 
-    create_payload = {
-        **base_filters,
-        "average_margin": avg_margin,
-        "date": target_date_norm,
-    }
-    update_payload = {
-        **base_filters,
-        "average_margin": avg_margin,
-    }
 
-    if existing_list:
-        existing = existing_list[0]
-        existing_date = _normalize_to_date(_safe_get(existing, "date"))
-        if existing_date and existing_date >= target_date_norm:
-            existing_id = _safe_get(existing, "id")
-            service_update(existing_id, update_payload)
-            return {"updated": True, "created": False, "id": existing_id}
+def _is_counted(recipe: Any) -> bool:
+    return bool(_safe_get(recipe, "saleable") and _safe_get(recipe, "active"))
+
+
+def _as_uuid(value: Any) -> Any:
+    if value is None or isinstance(value, UUID):
+        return value
+    try:
+        return UUID(str(value))
+    except ValueError:
+        return value
+
+
+def _totals_from_rpc(establishment_id: UUID, recipe_ids: Sequence[UUID], full: bool) -> MarginTotals:
+    """Totaux tenus en base (RPC `refresh_recipe_margin_totals`), en O(recettes modifiées)."""
+    data = supabase.rpc(
+        TOTALS_RPC_NAME,
+        {
+            "p_establishment_id": str(establishment_id),
+            "p_recipe_ids": [str(rid) for rid in recipe_ids],
+            "p_full": full,
+        },
+    ).execute().data
+    if not isinstance(data, dict):
+        raise ValueError(f"Réponse inattendue de {TOTALS_RPC_NAME}")
+
+    totals = MarginTotals(rebuilt=bool(data.get("rebuilt")))
+    for row in data.get("totals") or []:
+        totals.add(
+            _as_uuid(row.get("category_id")),
+            _as_uuid(row.get("subcategory_id")),
+            _as_decimal(row.get("margin_sum")) or Decimal("0"),
+            int(row.get("recipes_count") or 0),
+        )
+    for row in (data.get("previous") or []) + (data.get("current") or []):
+        totals.touched.append((_as_uuid(row.get("category_id")), _as_uuid(row.get("subcategory_id"))))
+    if full:
+        # Vérification / rattrapage : toutes les moyennes datées sont réécrites
+        totals.touched.extend(totals.buckets)
+    return totals
+
+
+def _totals_from_recipes(establishment_id: UUID, recipe_ids: Sequence[UUID], full: bool = False) -> MarginTotals:
+    """Recalcul complet depuis toutes les recettes de l'établissement (toutes les pages)."""
+    recipes: List[Any] = []
+    page = 1
+    while True:
+        batch = recipes_service.get_all_recipes(
+            filters={"establishment_id": establishment_id},
+            limit=RECIPES_PAGE_SIZE,
+            page=page,
+        )
+        recipes.extend(batch or [])
+        if not batch or len(batch) < RECIPES_PAGE_SIZE:
+            break
+        page += 1
+
+    totals = MarginTotals(rebuilt=True)
+    wanted = {str(rid) for rid in recipe_ids}
+    for recipe in recipes:
+        if not _is_counted(recipe):
+            continue
+        category_id = _as_uuid(_safe_get(recipe, "category_id"))
+        subcategory_id = _as_uuid(_safe_get(recipe, "subcategory_id"))
+        totals.add(category_id, subcategory_id, _as_decimal(_safe_get(recipe, "current_margin")) or Decimal("0"))
+        if full or str(_safe_get(recipe, "id")) in wanted:
+            totals.touched.append((category_id, subcategory_id))
+    return totals
+
 
-    created = service_create(create_payload)
-    return {"updated": False, "created": True, "id": _safe_get(created, "id")}
+def _average_result(row: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    if not row:
+        return {"updated": False, "created": False, "id": None}
+    created = bool(row.get("created"))
+    return {"updated": not created, "created": created, "id": _as_uuid(row.get("id"))}
+
+
+def _averages_from_rpc(
+    establishment_id: UUID,
+    target_date: date,
+    averages: Dict[str, Dict[Any, Decimal]],
+) -> Dict[str, Dict[Any, Dict[str, Any]]]:
+    """Moyennes datées des trois tables écrites en un appel (RPC `upsert_recipe_margin_averages`)."""
+    global_average = averages[GLOBAL_TABLE].get(None)
+    data = supabase.rpc(
+        AVERAGES_RPC_NAME,
+        {
+            "p_establishment_id": str(establishment_id),
+            "p_date": target_date.isoformat(),
+            "p_global": float(global_average) if global_average is not None else None,
+            "p_categories": [
+                {"id": str(key), "average_margin": float(avg)} for key, avg in averages[CATEGORY_TABLE].items()
+            ],
+            "p_subcategories": [
+                {"id": str(key), "average_margin": float(avg)} for key, avg in averages[SUBCATEGORY_TABLE].items()
+            ],
+        },
+    ).execute().data
+    if not isinstance(data, dict):
+        raise ValueError(f"Réponse inattendue de {AVERAGES_RPC_NAME}")
+    for table, _ in AVERAGE_TABLES:
+        # Écritures hors services : lignes éventuellement chargées dans l'unit of work
+        invalidate(table)
+
+    results: Dict[str, Dict[Any, Dict[str, Any]]] = {GLOBAL_TABLE: {}, CATEGORY_TABLE: {}, SUBCATEGORY_TABLE: {}}
+    if data.get("global"):
+        results[GLOBAL_TABLE][None] = _average_result(data["global"])
+    for table, key_column, field_name in (
+        (CATEGORY_TABLE, "category_id", "categories"),
+        (SUBCATEGORY_TABLE, "subcategory_id", "subcategories"),
+    ):
+        for row in data.get(field_name) or []:
+            results[table][_as_uuid(row.get(key_column))] = _average_result(row)
+    return results
+
+
+def _averages_from_tables(
+    establishment_id: UUID,
+    target_date: date,
+    averages: Dict[str, Dict[Any, Decimal]],
+) -> Dict[str, Dict[Any, Dict[str, Any]]]:
+    """
+    Sans la RPC : une lecture par table des moyennes datées >= target_date de
+    l'établissement (toutes clés confondues), puis update / insert par clé.
+    """
+    services = {
+        GLOBAL_TABLE: (
+            recipe_margin_service.get_all_recipe_margin,
+            recipe_margin_service.create_recipe_margin,
+            recipe_margin_service.update_recipe_margin,
+        ),
+        CATEGORY_TABLE: (
+            recipe_margin_category_service.get_all_recipe_margin_category,
+            recipe_margin_category_service.create_recipe_margin_category,
+            recipe_margin_category_service.update_recipe_margin_category,
+        ),
+        SUBCATEGORY_TABLE: (
+            recipe_margin_subcategory_service.get_all_recipe_margin_subcategory,
+            recipe_margin_subcategory_service.create_recipe_margin_subcategory,
+            recipe_margin_subcategory_service.update_recipe_margin_subcategory,
+        ),
+    }
+    results: Dict[str, Dict[Any, Dict[str, Any]]] = {}
+    for table, key_column in AVERAGE_TABLES:
+        service_get, service_create, service_update = services[table]
+        results[table] = {}
+        if not averages[table]:
+            continue
+
+        latest: Dict[Any, Any] = {}
+        rows = service_get(
+            filters={
+                "establishment_id": establishment_id,
+                "date_gte": target_date,
+                "order_by": "date",
+                "direction": "desc",
+            },
+            limit=RECIPES_PAGE_SIZE,
+        )
+        for row in rows or []:
+            latest.setdefault(_as_uuid(_safe_get(row, key_column)) if key_column else None, row)
+
+        for key, avg in averages[table].items():
+            payload: Dict[str, Any] = {"establishment_id": establishment_id, "average_margin": avg}
+            if key_column:
+                payload[key_column] = key
+            existing = latest.get(key)
+            if existing is not None:
+                existing_id = _safe_get(existing, "id")
+                service_update(existing_id, payload)
+                results[table][key] = {"updated": True, "created": False, "id": existing_id}
+            else:
+                created = service_create({**payload, "date": target_date})
+                results[table][key] = {"updated": False, "created": True, "id": _safe_get(created, "id")}
+    return results
+
+
+def _write_averages(
+    establishment_id: UUID,
+    target_date: date,
+    averages: Dict[str, Dict[Any, Decimal]],
+) -> Dict[str, Dict[Any, Dict[str, Any]]]:
+    """
+    Upsert exact RAVY, pour toutes les moyennes à la fois (`averages` :
+    {table: {clé: moyenne}}, clé None pour la moyenne globale) :
+    - date arrondie au jour
+    - si date existante >= target_date → update le + récent
+    - sinon → insert
+    """
+    try:
+        return _averages_from_rpc(establishment_id, target_date, averages)
+    except Exception as exc:
+        logger.warning(
+            "[recipes_average_margins] RPC %s indisponible (%s), écriture via les services", AVERAGES_RPC_NAME, exc
+        )
+        return _averages_from_tables(establishment_id, target_date, averages)
 
 
 # ============================================================
@@ -142,7 +332,20 @@ def recompute_recipe_margins(
     establishment_id: UUID,
     recipe_ids: Sequence[UUID],
     target_date: date | datetime,
+    full: bool = False,
 ) -> Dict[str, Any]:
+    """
+    Met à jour les marges moyennes (globale, catégories et sous-catégories des
+    recettes `recipe_ids`) à `target_date`.
+
+    Les sommes / nombres de recettes par bucket sont tenus en base : seules les
+    contributions des recettes modifiées (ou supprimées) sont ajustées, y compris
+    celles écrites hors cascade (trigger `recipes_margin_pending`). `full`
+    reconstruit les totaux depuis toutes les recettes et réécrit les moyennes de
+    toutes les catégories (vérification, rattrapage :
+    scripts/rebuild_recipe_margin_totals.py) ; sans la RPC, recalcul complet
+    depuis les recettes.
+    """
 
     # Normalisation date
     target_date_norm = _normalize_to_date(target_date)
@@ -152,7 +355,7 @@ def recompute_recipe_margins(
     est_name = _safe_get(est, "name", "Établissement inconnu")
 
     # LOG — Début
-    logs_service.create_logs(
+    write_log(
         {
             "user_id": None,
             "establishment_id": establishment_id,
@@ -171,47 +374,36 @@ def recompute_recipe_margins(
     )
 
     # -----------------------------------------------------------
-    #   1) Chargement des recettes
+    #   1) Totaux par bucket (catégorie, sous-catégorie)
     # -----------------------------------------------------------
-    recipes = recipes_service.get_all_recipes(
-        filters={"establishment_id": establishment_id}
-    )
-
-    recipes_by_id = { _safe_get(r, "id"): r for r in recipes }
-
-    valid_recipes = [
-        r for r in recipes_by_id.values()
-        if _safe_get(r, "saleable") and _safe_get(r, "active")
-    ]
-
-    impacted_valid = [
-        recipes_by_id[rid]
-        for rid in recipe_ids
-        if rid in recipes_by_id
-        and _safe_get(recipes_by_id[rid], "saleable")
-        and _safe_get(recipes_by_id[rid], "active")
-    ]
+    try:
+        totals = _totals_from_rpc(establishment_id, recipe_ids, full)
+    except Exception as exc:
+        logger.warning("[recipes_average_margins] RPC %s indisponible (%s), recalcul complet", TOTALS_RPC_NAME, exc)
+        totals = _totals_from_recipes(establishment_id, recipe_ids, full)
 
     # -----------------------------------------------------------
-    #   2) Marge globale
+    #   2) Moyennes datées (globale, catégories, sous-catégories)
     # -----------------------------------------------------------
-    global_margins = []
-    for r in valid_recipes:
-        m = _as_decimal(_safe_get(r, "current_margin")) or Decimal("0")
-        global_margins.append(m)
-
-    avg_global = _mean(global_margins)
-
-    global_res = _upsert_margin(
-        recipe_margin_service.get_all_recipe_margin,
-        recipe_margin_service.create_recipe_margin,
-        recipe_margin_service.update_recipe_margin,
-        {"establishment_id": establishment_id},
-        avg_global,
-        target_date_norm,
-    )
-
-    logs_service.create_logs(
+    avg_global = totals.average()
+    averages: Dict[str, Dict[Any, Decimal]] = {
+        GLOBAL_TABLE: {None: avg_global} if avg_global is not None else {},
+        CATEGORY_TABLE: {},
+        SUBCATEGORY_TABLE: {},
+    }
+    for cat_id in _unique(cat_id for cat_id, _ in totals.touched):
+        avg_cat = totals.average(category_id=cat_id)
+        if avg_cat is not None:
+            averages[CATEGORY_TABLE][cat_id] = avg_cat
+    for sub_id in _unique(sub_id for _, sub_id in totals.touched):
+        avg_sub = totals.average(subcategory_id=sub_id)
+        if avg_sub is not None:
+            averages[SUBCATEGORY_TABLE][sub_id] = avg_sub
+
+    written = _write_averages(establishment_id, target_date_norm, averages)
+    global_res = written[GLOBAL_TABLE].get(None) or _average_result(None)
+
+    write_log(
         {
             "user_id": None,
             "establishment_id": establishment_id,
@@ -238,42 +430,16 @@ def recompute_recipe_margins(
     # -----------------------------------------------------------
     categories_result = []
 
-    category_ids = _unique(
-        _safe_get(r, "category_id")
-        for r in impacted_valid
-        if _safe_get(r, "category_id")
-    )
+    for cat_id, avg_cat in averages[CATEGORY_TABLE].items():
 
-    for cat_id in category_ids:
-
-        recipes_in_cat = [
-            r for r in valid_recipes if _safe_get(r, "category_id") == cat_id
-        ]
-        if not recipes_in_cat:
-            continue
+        res_cat = written[CATEGORY_TABLE].get(cat_id) or _average_result(None)
 
-        margins = [
-            _as_decimal(_safe_get(r, "current_margin")) or Decimal("0")
-            for r in recipes_in_cat
-        ]
-        avg_cat = _mean(margins)
-
-        res_cat = _upsert_margin(
-            recipe_margin_category_service.get_all_recipe_margin_category,
-            recipe_margin_category_service.create_recipe_margin_category,
-            recipe_margin_category_service.update_recipe_margin_category,
-            {
-                "establishment_id": establishment_id,
-                "category_id": cat_id,
-            },
-            avg_cat,
-            target_date_norm,
+        cat_obj = reference_data.get_by_id("recipe_categories", cat_id) or (
+            recipe_categories_service.get_recipe_categories_by_id(cat_id)
         )
-
-        cat_obj = recipe_categories_service.get_recipe_categories_by_id(cat_id)
         cat_name = _safe_get(cat_obj, "name", "Sans nom")
 
-        logs_service.create_logs(
+        write_log(
             {
                 "user_id": None,
                 "establishment_id": establishment_id,
@@ -311,42 +477,14 @@ def recompute_recipe_margins(
     # -----------------------------------------------------------
     subcategories_result = []
 
-    subcat_ids = _unique(
-        _safe_get(r, "subcategory_id")
-        for r in impacted_valid
-        if _safe_get(r, "subcategory_id")
-    )
-
-    for sub_id in subcat_ids:
+    for sub_id, avg_sub in averages[SUBCATEGORY_TABLE].items():
 
-        recipes_in_subcat = [
-            r for r in valid_recipes if _safe_get(r, "subcategory_id") == sub_id
-        ]
-        if not recipes_in_subcat:
-            continue
-
-        margins = [
-            _as_decimal(_safe_get(r, "current_margin")) or Decimal("0")
-            for r in recipes_in_subcat
-        ]
-        avg_sub = _mean(margins)
-
-        res_sub = _upsert_margin(
-            recipe_margin_subcategory_service.get_all_recipe_margin_subcategory,
-            recipe_margin_subcategory_service.create_recipe_margin_subcategory,
-            recipe_margin_subcategory_service.update_recipe_margin_subcategory,
-            {
-                "establishment_id": establishment_id,
-                "subcategory_id": sub_id,
-            },
-            avg_sub,
-            target_date_norm,
-        )
+        res_sub = written[SUBCATEGORY_TABLE].get(sub_id) or _average_result(None)
 
         sub_obj = recipes_subcategories_service.get_recipes_subcategories_by_id(sub_id)
         sub_name = _safe_get(sub_obj, "name", "Sans nom")
 
-        logs_service.create_logs(
+        write_log(
             {
                 "user_id": None,
                 "establishment_id": establishment_id,
@@ -383,7 +521,7 @@ def recompute_recipe_margins(
     #   LOG — Fin
     # -----------------------------------------------------------
 
-    logs_service.create_logs(
+    write_log(
         {
             "user_id": None,
             "establishment_id": establishment_id,
@@ -396,6 +534,7 @@ def recompute_recipe_margins(
                 "categories_recalculated": categories_result,
                 "subcategories_recalculated": subcategories_result,
                 "global_result": global_res,
+                "totals_rebuilt": totals.rebuilt,
             },
             "element_id": None,
             "element_type": "recipe",
@@ -410,6 +549,7 @@ def recompute_recipe_margins(
         "success": True,
         "establishment_id": establishment_id,
         "target_date": target_date_norm,
+        "totals_rebuilt": totals.rebuilt,
         "updated": {
             "global": global_res,
             "categories": categories_result,
@@ -8,6 +8,7 @@ from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
 from uuid import UUID
 
 from app.core.supabase_client import supabase
+from app.logic.write.shared.history_timeline import HistoryTimeline
 from app.services import (
     history_recipes_service,
     recipes_service,
@@ -107,23 +108,10 @@ def _ensure_portion(portion: Optional[Decimal]) -> Decimal:
 
 
 def _split_histories(
-    histories: Iterable[Any], target_date: date
+    histories: HistoryTimeline, target_date: date
 ) -> Tuple[List[Any], List[Any]]:
-    ordered = sorted(
-        histories,
-        key=lambda h: _as_date(_safe_get(h, "date")) or date.min,
-    )
-    future: List[Any] = []
-    past_or_same: List[Any] = []
-    for history in ordered:
-        history_date = _as_date(_safe_get(history, "date"))
-        if history_date is None:
-            continue
-        if history_date >= target_date:
-            future.append(history)
-        else:
-            past_or_same.append(history)
-    return past_or_same, future
+    # (antérieurs à target_date, à partir de target_date), dates déjà parsées dans la frise
+    return histories.before(target_date), histories.from_date(target_date)
 
 
 def _compute_manual_version(histories: Sequence[Any]) -> Decimal:
@@ -195,7 +183,7 @@ def update_recipes_and_history_recipes(
                 recipe_key = str(row.get("recipe_id"))
                 ingredients_by_recipe_id.setdefault(recipe_key, []).append(row)
 
-    histories_by_recipe_id: Dict[str, List[Any]] = {rid: [] for rid in recipe_ids_set}
+    histories_by_recipe_id: Dict[str, HistoryTimeline] = {rid: HistoryTimeline() for rid in recipe_ids_set}
     if recipe_ids_set:
         for chunk in _chunked(sorted(recipe_ids_set)):
             response = (
@@ -208,7 +196,7 @@ def update_recipes_and_history_recipes(
             )
             for row in response.data or []:
                 recipe_key = str(row.get("recipe_id"))
-                histories_by_recipe_id.setdefault(recipe_key, []).append(row)
+                histories_by_recipe_id.setdefault(recipe_key, HistoryTimeline()).upsert(row)
 
     # ON COMMENCE PAR DÉFINIR UN ENSEMBLE DE VARIABLES QU'ON APPLIQUERA EN FONCTION DU CAS
 
@@ -238,12 +226,10 @@ def update_recipes_and_history_recipes(
             if price_excl_tax and price_excl_tax != 0:
                 margin = ((price_excl_tax - purchase_cost_per_portion) / price_excl_tax) * Decimal("100")
 
-        histories = list(histories_by_recipe_id.get(str(recipe_id), []))
+        histories = histories_by_recipe_id.setdefault(str(recipe_id), HistoryTimeline())
         past_or_same, future_histories = _split_histories(histories, target_date_norm)
 
-        same_day_histories = [
-            h for h in histories if _as_date(_safe_get(h, "date")) == target_date_norm
-        ]
+        same_day_histories = histories.on(target_date_norm)
         same_day_history = (
             max(
                 same_day_histories,
@@ -258,12 +244,7 @@ def update_recipes_and_history_recipes(
                 history_id = _safe_get(history, "id")
                 if history_id and history_id != same_day_id:
                     history_recipes_service.delete_history_recipes(history_id)
-            histories = [
-                h
-                for h in histories
-                if _safe_get(h, "id") == same_day_id
-                or _as_date(_safe_get(h, "date")) != target_date_norm
-            ]
+                    histories.remove(history_id)
 
         #GESTION DE LA CREATION D'UN NOUVEL HISTORY_RECIPE
         if not same_day_history and (not histories or not future_histories):
@@ -293,15 +274,12 @@ def update_recipes_and_history_recipes(
             }
             new_history = history_recipes_service.create_history_recipes(payload)
             if new_history:
-                histories.append(new_history)
+                histories.upsert(new_history)
 
         #GESTION DE LA MODIFICATION D'UN NOUVEL HISTORY_RECIPE
         else:
-            history_to_update = same_day_history or max(
-                # On récupère l'historique le plus récent qui existe.
-                future_histories,
-                key=lambda h: _as_date(_safe_get(h, "date")) or date.min,
-            )
+            # On récupère l'historique le plus récent qui existe.
+            history_to_update = same_day_history or histories.latest_day()[0]
 
             portion_hist = _ensure_portion(portion_recipe)
             margin_update = None
@@ -324,18 +302,10 @@ def update_recipes_and_history_recipes(
                 _safe_get(history_to_update, "id"), update_payload
             )
             if updated_history:
-                histories = [
-                    h
-                    for h in histories
-                    if _safe_get(h, "id") != _safe_get(updated_history, "id")
-                ]
-                histories.append(updated_history)
+                histories.upsert(updated_history)
 
         if histories:
-            latest_history = max(
-                histories,
-                key=lambda h: _as_date(_safe_get(h, "date")) or date.min,
-            )
+            latest_history = histories.latest_day()[0]
             recipe_payload = {
                 "purchase_cost_total": _as_decimal(_safe_get(latest_history, "purchase_cost_total")),
                 "purchase_cost_per_portion": _as_decimal(
@@ -18,22 +18,21 @@ from uuid import UUID
 
 from fastapi import FastAPI, HTTPException, Request
 
+from app.core.http_pool import pool_stats
+from app.core.log_writer import log_writer
+from app.core.notification_outbox import notification_outbox, notify_telegram
+from app.core.query_trace import QueryTraceMiddleware, trace_queries
 from app.core.supabase_client import supabase
 from app.manufacturers.config import ALLOWED_IPS, MANUFACTURERS_KEY
 from app.logic.write.invoices_imports import import_invoice_from_import_job
+from app.logic.write.shared.import_dedup import dedup_stats
 from app.schemas.import_job import ImportJob
 from app.services import import_job_service
 
-try:
-    from app.services.telegram.gordon_service import GordonTelegram
 
-    _telegram_client = GordonTelegram()
-
-    def send_telegram(message: str) -> None:
-        _telegram_client.send_text(message)
-except Exception:  # fallback if telegram is unavailable
-    def send_telegram(message: str) -> None:
-        print(f"[GORDON FALLBACK] {message}")
+def send_telegram(message: str) -> None:
+    """Dépose le message dans l'outbox : le worker n'attend jamais Telegram."""
+    notify_telegram(message)
 
 
 class BaseWorker:
@@ -192,10 +191,13 @@ class ImportInvoicesWorker(BaseWorker):
             )
 
             try:
-                import_invoice_from_import_job(job_id)
+                with trace_queries(f"import_job {job_id}") as trace:
+                    import_invoice_from_import_job(job_id)
                 import_job_service.update_import_job(job_id, {"status": "completed"})
                 elapsed = time.perf_counter() - job_started_at
-                send_telegram(f"→ [{self.display_id}] finished: {job_id} ({elapsed:.1f}s)")
+                send_telegram(
+                    f"→ [{self.display_id}] finished: {job_id} ({elapsed:.1f}s, {trace.count} requêtes)"
+                )
             except Exception:
                 try:
                     import_job_service.update_import_job(job_id, {"status": "error"})
@@ -208,6 +210,7 @@ def build_import_worker_app(worker_id: str) -> tuple[FastAPI, ImportInvoicesWork
     """Create a FastAPI app and worker instance for a given worker id."""
     worker = ImportInvoicesWorker(worker_id)
     app = FastAPI(title=f"RAVY Worker Import {worker_id}")
+    app.add_middleware(QueryTraceMiddleware)
 
     @app.get("/run")
     async def run_worker(request: Request):
@@ -222,4 +225,32 @@ def build_import_worker_app(worker_id: str) -> tuple[FastAPI, ImportInvoicesWork
         worker.wake_up()
         return {"status": "ok", "worker": worker.name}
 
+    @app.get("/pool-stats")
+    async def get_pool_stats(request: Request):
+        if request.client.host not in ALLOWED_IPS:
+            raise HTTPException(status_code=403, detail="IP non autorisee")
+        if request.headers.get("X-RAVY-KEY") != MANUFACTURERS_KEY:
+            raise HTTPException(status_code=403, detail="Cle interne invalide")
+
+        return {"worker": worker.name, **pool_stats()}
+
+    @app.get("/import-stats")
+    async def get_import_stats(request: Request):
+        if request.client.host not in ALLOWED_IPS:
+            raise HTTPException(status_code=403, detail="IP non autorisee")
+        if request.headers.get("X-RAVY-KEY") != MANUFACTURERS_KEY:
+            raise HTTPException(status_code=403, detail="Cle interne invalide")
+
+        # Doublons clôturés sans import depuis le démarrage du worker (cumul : internal.invoice_import_dedup_savings)
+        return {"worker": worker.name, "dedup": dedup_stats()}
+
+    @app.on_event("startup")
+    def resume_notification_outbox() -> None:
+        notification_outbox.start()
+
+    @app.on_event("shutdown")
+    def drain_background_writers() -> None:
+        log_writer.stop()
+        notification_outbox.stop()
+
     return app, worker
@@ -1,10 +1,10 @@
 # app/manufacturers/wakeuppers/invoice_wakeupper.py
 
 import requests
+from app.core.notification_outbox import notify_telegram
 from app.manufacturers.base_wakeupper import BaseWakeupper
 from app.manufacturers.config import WORKERS, MANUFACTURERS_KEY
-from app.services import maintenance_service
-from app.services.telegram.gordon_service import GordonTelegram
+from app.core.reference_data import reference_data
 
 
 class InvoiceWakeupper(BaseWakeupper):
@@ -19,18 +19,17 @@ class InvoiceWakeupper(BaseWakeupper):
         self.worker_entries = WORKERS["import"]
         urls = [w["url"] for w in self.worker_entries]
         super().__init__("invoice", urls)
-        self.telegram = GordonTelegram()
 
     def wake(self):
-        maintenance_entries = maintenance_service.get_all_maintenance(limit=1)
+        maintenance_entries = reference_data.get("maintenance")
         maintenance_entry = maintenance_entries[0] if maintenance_entries else None
 
         if maintenance_entry and maintenance_entry.is_active:
-            self.telegram.send_text("⏰ Réveil impossible - Maintenance en cours ☠︎")
+            notify_telegram("⏰ Réveil impossible - Maintenance en cours ☠︎")
             return {"status": "maintenance"}
         # 1) Message unique : annonce du réveil
         worker_count = len(self.worker_entries)
-        self.telegram.send_text(
+        notify_telegram(
             f"<b>⏰ Réveil de {worker_count} workers...</b>"
         )
 
@@ -16,6 +16,9 @@ class ImportJob(BaseModel):
     updated_at: Optional[dt.datetime] = None
     is_beverage: Optional[bool] = None
     invoice_date: Optional[dt.datetime] = None
+    content_hash: Optional[str] = None
+    duplicate_of_import_job_id: Optional[UUID] = None
+    duplicate_of_invoice_id: Optional[UUID] = None
 
     class Config:
         json_encoders = {
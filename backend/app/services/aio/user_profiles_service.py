@@ -0,0 +1,96 @@
+from uuid import UUID
+
+from fastapi.encoders import jsonable_encoder
+from postgrest.exceptions import APIError
+
+from app.core.supabase_async_client import get_async_supabase
+from app.core.unit_of_work import current_unit_of_work, invalidate
+from app.schemas.user_profiles import UserProfiles
+
+def _is_no_row_error(exc: APIError) -> bool:
+    payload = exc.args[0] if exc.args else None
+    if isinstance(payload, dict):
+        if payload.get("code") == "PGRST116":
+            return True
+    return "PGRST116" in str(exc)
+
+async def get_all_user_profiles(filters: dict | None = None, limit: int = 200, page: int = 1, raw: bool = False):
+    supabase = await get_async_supabase()
+    query = supabase.table("user_profiles").select("*")
+    if not filters:
+        filters = {}
+
+    # --- Filtres dynamiques (structurels ou contextuels) ---
+    # Aucun filtre structurel spécifique
+
+
+    # --- Filtres additionnels (_gte, _lte, etc.) ---
+    for key, value in filters.items():
+        if key in ("order_by", "direction", "limit", "page", ):
+            continue
+        if key.endswith("_gte"):
+            query = query.gte(key[:-4], value)
+        elif key.endswith("_lte"):
+            query = query.lte(key[:-4], value)
+        elif key.endswith("_like"):
+            query = query.like(key[:-5], f"%{value}%")
+        elif key.endswith("_neq"):
+            query = query.neq(key[:-4], value)
+        else:
+            query = query.eq(key, value)
+
+    # --- Tri & Pagination ---
+    if "order_by" in filters:
+        query = query.order(filters["order_by"], desc=filters.get("direction") == "desc")
+
+    start = (page - 1) * limit
+    end = start + limit - 1
+    query = query.range(start, end)
+
+    response = await query.execute()
+    if raw:
+        # Lecture interne : lignes brutes, sans validation Pydantic
+        return response.data or []
+    return [UserProfiles(**r) for r in (response.data or [])]
+
+
+async def _get_user_profiles_by_ids(ids: list[str]):
+    supabase = await get_async_supabase()
+    response = await supabase.table("user_profiles").select("*").in_("id", ids).execute()
+    return {str(r["id"]): UserProfiles(**r) for r in (response.data or [])}
+
+
+async def get_user_profiles_by_id(id: UUID):
+    uow = current_unit_of_work()
+    if uow is not None:
+        return await uow.aload("user_profiles", id, _get_user_profiles_by_ids)
+    supabase = await get_async_supabase()
+    try:
+        response = await supabase.table("user_profiles").select("*").eq("id", str(id)).single().execute()
+    except APIError as exc:
+        if _is_no_row_error(exc):
+            return None
+        raise
+    return UserProfiles(**response.data) if response.data else None
+
+
+async def create_user_profiles(payload: dict):
+    supabase = await get_async_supabase()
+    prepared = jsonable_encoder({k: v for k, v in payload.items() if v is not None and k != "id"})
+    response = await supabase.table("user_profiles").insert(prepared).execute()
+    return response.data[0] if response.data else None
+
+
+async def update_user_profiles(id: UUID, payload: dict):
+    supabase = await get_async_supabase()
+    prepared = jsonable_encoder(payload)
+    response = await supabase.table("user_profiles").update(prepared).eq("id", str(id)).execute()
+    invalidate("user_profiles", id)
+    return response.data[0] if response.data else None
+
+
+async def delete_user_profiles(id: UUID):
+    supabase = await get_async_supabase()
+    await supabase.table("user_profiles").delete().eq("id", str(id)).execute()
+    invalidate("user_profiles", id)
+    return {"deleted": True}
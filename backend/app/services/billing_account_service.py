@@ -4,6 +4,7 @@ from fastapi.encoders import jsonable_encoder
 from postgrest.exceptions import APIError
 
 from app.core.supabase_client import supabase
+from app.core.unit_of_work import current_unit_of_work, invalidate
 from app.schemas.billing_account import BillingAccount
 
 def _is_no_row_error(exc: APIError) -> bool:
@@ -13,7 +14,7 @@ def _is_no_row_error(exc: APIError) -> bool:
             return True
     return "PGRST116" in str(exc)
 
-def get_all_billing_account(filters: dict | None = None, limit: int = 200, page: int = 1):
+def get_all_billing_account(filters: dict | None = None, limit: int = 200, page: int = 1, raw: bool = False):
     query = supabase.table("billing_account").select("*")
     if not filters:
         filters = {}
@@ -47,10 +48,21 @@ def get_all_billing_account(filters: dict | None = None, limit: int = 200, page:
     query = query.range(start, end)
 
     response = query.execute()
+    if raw:
+        # Lecture interne : lignes brutes, sans validation Pydantic
+        return response.data or []
     return [BillingAccount(**r) for r in (response.data or [])]
 
 
+def _get_billing_account_by_ids(ids: list[str]):
+    response = supabase.table("billing_account").select("*").in_("id", ids).execute()
+    return {str(r["id"]): BillingAccount(**r) for r in (response.data or [])}
+
+
 def get_billing_account_by_id(id: UUID):
+    uow = current_unit_of_work()
+    if uow is not None:
+        return uow.load("billing_account", id, _get_billing_account_by_ids)
     try:
         response = supabase.table("billing_account").select("*").eq("id", str(id)).single().execute()
     except APIError as exc:
@@ -69,9 +81,11 @@ def create_billing_account(payload: dict):
 def update_billing_account(id: UUID, payload: dict):
     prepared = jsonable_encoder(payload)
     response = supabase.table("billing_account").update(prepared).eq("id", str(id)).execute()
+    invalidate("billing_account", id)
     return response.data[0] if response.data else None
 
 
 def delete_billing_account(id: UUID):
     supabase.table("billing_account").delete().eq("id", str(id)).execute()
+    invalidate("billing_account", id)
     return {"deleted": True}
@@ -4,6 +4,7 @@ from fastapi.encoders import jsonable_encoder
 from postgrest.exceptions import APIError
 
 from app.core.supabase_client import supabase
+from app.core.unit_of_work import current_unit_of_work, invalidate
 from app.schemas.countries import Countries
 
 def _is_no_row_error(exc: APIError) -> bool:
@@ -13,7 +14,7 @@ def _is_no_row_error(exc: APIError) -> bool:
             return True
     return "PGRST116" in str(exc)
 
-def get_all_countries(filters: dict | None = None, limit: int = 200, page: int = 1):
+def get_all_countries(filters: dict | None = None, limit: int = 200, page: int = 1, raw: bool = False):
     query = supabase.table("countries").select("*")
     if not filters:
         filters = {}
@@ -46,10 +47,21 @@ def get_all_countries(filters: dict | None = None, limit: int = 200, page: int =
     query = query.range(start, end)
 
     response = query.execute()
+    if raw:
+        # Lecture interne : lignes brutes, sans validation Pydantic
+        return response.data or []
     return [Countries(**r) for r in (response.data or [])]
 
 
+def _get_countries_by_ids(ids: list[str]):
+    response = supabase.table("countries").select("*").in_("id", ids).execute()
+    return {str(r["id"]): Countries(**r) for r in (response.data or [])}
+
+
 def get_countries_by_id(id: UUID):
+    uow = current_unit_of_work()
+    if uow is not None:
+        return uow.load("countries", id, _get_countries_by_ids)
     try:
         response = supabase.table("countries").select("*").eq("id", str(id)).single().execute()
     except APIError as exc:
@@ -68,9 +80,11 @@ def create_countries(payload: dict):
 def update_countries(id: UUID, payload: dict):
     prepared = jsonable_encoder(payload)
     response = supabase.table("countries").update(prepared).eq("id", str(id)).execute()
+    invalidate("countries", id)
     return response.data[0] if response.data else None
 
 
 def delete_countries(id: UUID):
     supabase.table("countries").delete().eq("id", str(id)).execute()
+    invalidate("countries", id)
     return {"deleted": True}
@@ -4,6 +4,7 @@ from fastapi.encoders import jsonable_encoder
 from postgrest.exceptions import APIError
 
 from app.core.supabase_client import supabase
+from app.core.unit_of_work import current_unit_of_work, invalidate
 from app.schemas.history_ingredients import HistoryIngredients
 
 def _is_no_row_error(exc: APIError) -> bool:
@@ -13,7 +14,7 @@ def _is_no_row_error(exc: APIError) -> bool:
             return True
     return "PGRST116" in str(exc)
 
-def get_all_history_ingredients(filters: dict | None = None, limit: int = 200, page: int = 1):
+def get_all_history_ingredients(filters: dict | None = None, limit: int = 200, page: int = 1, raw: bool = False):
     query = supabase.table("history_ingredients").select("*")
     if not filters:
         filters = {}
@@ -49,10 +50,21 @@ def get_all_history_ingredients(filters: dict | None = None, limit: int = 200, p
     query = query.range(start, end)
 
     response = query.execute()
+    if raw:
+        # Lecture interne : lignes brutes, sans validation Pydantic
+        return response.data or []
     return [HistoryIngredients(**r) for r in (response.data or [])]
 
 
+def _get_history_ingredients_by_ids(ids: list[str]):
+    response = supabase.table("history_ingredients").select("*").in_("id", ids).execute()
+    return {str(r["id"]): HistoryIngredients(**r) for r in (response.data or [])}
+
+
 def get_history_ingredients_by_id(id: UUID):
+    uow = current_unit_of_work()
+    if uow is not None:
+        return uow.load("history_ingredients", id, _get_history_ingredients_by_ids)
     try:
         response = supabase.table("history_ingredients").select("*").eq("id", str(id)).single().execute()
     except APIError as exc:
@@ -71,9 +83,11 @@ def create_history_ingredients(payload: dict):
 def update_history_ingredients(id: UUID, payload: dict):
     prepared = jsonable_encoder(payload)
     response = supabase.table("history_ingredients").update(prepared).eq("id", str(id)).execute()
+    invalidate("history_ingredients", id)
     return response.data[0] if response.data else None
 
 
 def delete_history_ingredients(id: UUID):
     supabase.table("history_ingredients").delete().eq("id", str(id)).execute()
+    invalidate("history_ingredients", id)
     return {"deleted": True}
@@ -4,6 +4,7 @@ from fastapi.encoders import jsonable_encoder
 from postgrest.exceptions import APIError
 
 from app.core.supabase_client import supabase
+from app.core.unit_of_work import current_unit_of_work, invalidate
 from app.schemas.impersonations_padrino import ImpersonationsPadrino
 
 def _is_no_row_error(exc: APIError) -> bool:
@@ -13,7 +14,7 @@ def _is_no_row_error(exc: APIError) -> bool:
             return True
     return "PGRST116" in str(exc)
 
-def get_all_impersonations_padrino(filters: dict | None = None, limit: int = 200, page: int = 1):
+def get_all_impersonations_padrino(filters: dict | None = None, limit: int = 200, page: int = 1, raw: bool = False):
     query = supabase.table("impersonations_padrino").select("*")
     if not filters:
         filters = {}
@@ -46,10 +47,21 @@ def get_all_impersonations_padrino(filters: dict | None = None, limit: int = 200
     query = query.range(start, end)
 
     response = query.execute()
+    if raw:
+        # Lecture interne : lignes brutes, sans validation Pydantic
+        return response.data or []
     return [ImpersonationsPadrino(**r) for r in (response.data or [])]
 
 
+def _get_impersonations_padrino_by_ids(ids: list[str]):
+    response = supabase.table("impersonations_padrino").select("*").in_("id", ids).execute()
+    return {str(r["id"]): ImpersonationsPadrino(**r) for r in (response.data or [])}
+
+
 def get_impersonations_padrino_by_id(id: UUID):
+    uow = current_unit_of_work()
+    if uow is not None:
+        return uow.load("impersonations_padrino", id, _get_impersonations_padrino_by_ids)
     try:
         response = supabase.table("impersonations_padrino").select("*").eq("id", str(id)).single().execute()
     except APIError as exc:
@@ -68,9 +80,11 @@ def create_impersonations_padrino(payload: dict):
 def update_impersonations_padrino(id: UUID, payload: dict):
     prepared = jsonable_encoder(payload)
     response = supabase.table("impersonations_padrino").update(prepared).eq("id", str(id)).execute()
+    invalidate("impersonations_padrino", id)
     return response.data[0] if response.data else None
 
 
 def delete_impersonations_padrino(id: UUID):
     supabase.table("impersonations_padrino").delete().eq("id", str(id)).execute()
+    invalidate("impersonations_padrino", id)
     return {"deleted": True}
@@ -1,7 +1,7 @@
 from app.core.supabase_client import supabase
 from app.schemas.label_supplier import LabelSupplier
 
-def get_all_label_supplier(filters: dict | None = None, limit: int = 200, page: int = 1):
+def get_all_label_supplier(filters: dict | None = None, limit: int = 200, page: int = 1, raw: bool = False):
     query = supabase.table("label_supplier").select("*")
     if not filters:
         filters = {}
@@ -34,6 +34,9 @@ def get_all_label_supplier(filters: dict | None = None, limit: int = 200, page:
     query = query.range(start, end)
 
     response = query.execute()
+    if raw:
+        # Lecture interne : lignes brutes, sans validation Pydantic
+        return response.data or []
     return [LabelSupplier(**r) for r in (response.data or [])]
 
 
@@ -4,6 +4,7 @@ from fastapi.encoders import jsonable_encoder
 from postgrest.exceptions import APIError
 
 from app.core.supabase_client import supabase
+from app.core.unit_of_work import current_unit_of_work, invalidate
 from app.schemas.logs_ia import LogsIa
 
 def _is_no_row_error(exc: APIError) -> bool:
@@ -13,7 +14,7 @@ def _is_no_row_error(exc: APIError) -> bool:
             return True
     return "PGRST116" in str(exc)
 
-def get_all_logs_ia(filters: dict | None = None, limit: int = 200, page: int = 1):
+def get_all_logs_ia(filters: dict | None = None, limit: int = 200, page: int = 1, raw: bool = False):
     query = supabase.schema("ia").table("logs_ia").select("*")
     if not filters:
         filters = {}
@@ -46,10 +47,21 @@ def get_all_logs_ia(filters: dict | None = None, limit: int = 200, page: int = 1
     query = query.range(start, end)
 
     response = query.execute()
+    if raw:
+        # Lecture interne : lignes brutes, sans validation Pydantic
+        return response.data or []
     return [LogsIa(**r) for r in (response.data or [])]
 
 
+def _get_logs_ia_by_ids(ids: list[str]):
+    response = supabase.schema("ia").table("logs_ia").select("*").in_("id", ids).execute()
+    return {str(r["id"]): LogsIa(**r) for r in (response.data or [])}
+
+
 def get_logs_ia_by_id(id: UUID):
+    uow = current_unit_of_work()
+    if uow is not None:
+        return uow.load("logs_ia", id, _get_logs_ia_by_ids)
     try:
         response = supabase.schema("ia").table("logs_ia").select("*").eq("id", str(id)).single().execute()
     except APIError as exc:
@@ -68,9 +80,11 @@ def create_logs_ia(payload: dict):
 def update_logs_ia(id: UUID, payload: dict):
     prepared = jsonable_encoder(payload)
     response = supabase.schema("ia").table("logs_ia").update(prepared).eq("id", str(id)).execute()
+    invalidate("logs_ia", id)
     return response.data[0] if response.data else None
 
 
 def delete_logs_ia(id: UUID):
     supabase.schema("ia").table("logs_ia").delete().eq("id", str(id)).execute()
+    invalidate("logs_ia", id)
     return {"deleted": True}
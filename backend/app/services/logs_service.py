@@ -2,8 +2,10 @@ from uuid import UUID
 
 from fastapi.encoders import jsonable_encoder
 from postgrest.exceptions import APIError
+from postgrest.types import ReturnMethod
 
 from app.core.supabase_client import supabase
+from app.core.unit_of_work import current_unit_of_work, invalidate
 from app.schemas.logs import Logs
 
 def _is_no_row_error(exc: APIError) -> bool:
@@ -13,7 +15,7 @@ def _is_no_row_error(exc: APIError) -> bool:
             return True
     return "PGRST116" in str(exc)
 
-def get_all_logs(filters: dict | None = None, limit: int = 200, page: int = 1):
+def get_all_logs(filters: dict | None = None, limit: int = 200, page: int = 1, raw: bool = False):
     query = supabase.schema("internal").table("logs").select("*")
     if not filters:
         filters = {}
@@ -47,10 +49,21 @@ def get_all_logs(filters: dict | None = None, limit: int = 200, page: int = 1):
     query = query.range(start, end)
 
     response = query.execute()
+    if raw:
+        # Lecture interne : lignes brutes, sans validation Pydantic
+        return response.data or []
     return [Logs(**r) for r in (response.data or [])]
 
 
+def _get_logs_by_ids(ids: list[str]):
+    response = supabase.schema("internal").table("logs").select("*").in_("id", ids).execute()
+    return {str(r["id"]): Logs(**r) for r in (response.data or [])}
+
+
 def get_logs_by_id(id: UUID):
+    uow = current_unit_of_work()
+    if uow is not None:
+        return uow.load("logs", id, _get_logs_by_ids)
     try:
         response = supabase.schema("internal").table("logs").select("*").eq("id", str(id)).single().execute()
     except APIError as exc:
@@ -66,12 +79,26 @@ def create_logs(payload: dict):
     return response.data[0] if response.data else None
 
 
+def create_logs_bulk(payloads: list[dict]):
+    prepared = jsonable_encoder(
+        [{k: v for k, v in payload.items() if v is not None and k != "id"} for payload in payloads]
+    )
+    if not prepared:
+        return 0
+    supabase.schema("internal").table("logs").insert(
+        prepared, returning=ReturnMethod.minimal, default_to_null=False
+    ).execute()
+    return len(prepared)
+
+
 def update_logs(id: UUID, payload: dict):
     prepared = jsonable_encoder(payload)
     response = supabase.schema("internal").table("logs").update(prepared).eq("id", str(id)).execute()
+    invalidate("logs", id)
     return response.data[0] if response.data else None
 
 
 def delete_logs(id: UUID):
     supabase.schema("internal").table("logs").delete().eq("id", str(id)).execute()
+    invalidate("logs", id)
     return {"deleted": True}
@@ -4,6 +4,7 @@ from fastapi.encoders import jsonable_encoder
 from postgrest.exceptions import APIError
 
 from app.core.supabase_client import supabase
+from app.core.unit_of_work import current_unit_of_work, invalidate
 from app.schemas.maintenance import Maintenance
 
 def _is_no_row_error(exc: APIError) -> bool:
@@ -13,7 +14,7 @@ def _is_no_row_error(exc: APIError) -> bool:
             return True
     return "PGRST116" in str(exc)
 
-def get_all_maintenance(filters: dict | None = None, limit: int = 200, page: int = 1):
+def get_all_maintenance(filters: dict | None = None, limit: int = 200, page: int = 1, raw: bool = False):
     query = supabase.schema("internal").table("maintenance").select("*")
     if not filters:
         filters = {}
@@ -46,10 +47,21 @@ def get_all_maintenance(filters: dict | None = None, limit: int = 200, page: int
     query = query.range(start, end)
 
     response = query.execute()
+    if raw:
+        # Lecture interne : lignes brutes, sans validation Pydantic
+        return response.data or []
     return [Maintenance(**r) for r in (response.data or [])]
 
 
+def _get_maintenance_by_ids(ids: list[str]):
+    response = supabase.schema("internal").table("maintenance").select("*").in_("id", ids).execute()
+    return {str(r["id"]): Maintenance(**r) for r in (response.data or [])}
+
+
 def get_maintenance_by_id(id: UUID):
+    uow = current_unit_of_work()
+    if uow is not None:
+        return uow.load("maintenance", id, _get_maintenance_by_ids)
     try:
         response = supabase.schema("internal").table("maintenance").select("*").eq("id", str(id)).single().execute()
     except APIError as exc:
@@ -68,9 +80,11 @@ def create_maintenance(payload: dict):
 def update_maintenance(id: UUID, payload: dict):
     prepared = jsonable_encoder(payload)
     response = supabase.schema("internal").table("maintenance").update(prepared).eq("id", str(id)).execute()
+    invalidate("maintenance", id)
     return response.data[0] if response.data else None
 
 
 def delete_maintenance(id: UUID):
     supabase.schema("internal").table("maintenance").delete().eq("id", str(id)).execute()
+    invalidate("maintenance", id)
     return {"deleted": True}
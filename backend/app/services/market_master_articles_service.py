@@ -4,6 +4,7 @@ from fastapi.encoders import jsonable_encoder
 from postgrest.exceptions import APIError
 
 from app.core.supabase_client import supabase
+from app.core.unit_of_work import current_unit_of_work, invalidate
 from app.schemas.market_master_articles import MarketMasterArticles
 
 def _is_no_row_error(exc: APIError) -> bool:
@@ -13,7 +14,7 @@ def _is_no_row_error(exc: APIError) -> bool:
             return True
     return "PGRST116" in str(exc)
 
-def get_all_market_master_articles(filters: dict | None = None, limit: int = 200, page: int = 1):
+def get_all_market_master_articles(filters: dict | None = None, limit: int = 200, page: int = 1, raw: bool = False):
     query = supabase.schema("market").table("market_master_articles").select("*")
     if not filters:
         filters = {}
@@ -46,10 +47,21 @@ def get_all_market_master_articles(filters: dict | None = None, limit: int = 200
     query = query.range(start, end)
 
     response = query.execute()
+    if raw:
+        # Lecture interne : lignes brutes, sans validation Pydantic
+        return response.data or []
     return [MarketMasterArticles(**r) for r in (response.data or [])]
 
 
+def _get_market_master_articles_by_ids(ids: list[str]):
+    response = supabase.schema("market").table("market_master_articles").select("*").in_("id", ids).execute()
+    return {str(r["id"]): MarketMasterArticles(**r) for r in (response.data or [])}
+
+
 def get_market_master_articles_by_id(id: UUID):
+    uow = current_unit_of_work()
+    if uow is not None:
+        return uow.load("market_master_articles", id, _get_market_master_articles_by_ids)
     try:
         response = supabase.schema("market").table("market_master_articles").select("*").eq("id", str(id)).single().execute()
     except APIError as exc:
@@ -68,9 +80,11 @@ def create_market_master_articles(payload: dict):
 def update_market_master_articles(id: UUID, payload: dict):
     prepared = jsonable_encoder(payload)
     response = supabase.schema("market").table("market_master_articles").update(prepared).eq("id", str(id)).execute()
+    invalidate("market_master_articles", id)
     return response.data[0] if response.data else None
 
 
 def delete_market_master_articles(id: UUID):
     supabase.schema("market").table("market_master_articles").delete().eq("id", str(id)).execute()
+    invalidate("market_master_articles", id)
     return {"deleted": True}
@@ -4,6 +4,7 @@ from fastapi.encoders import jsonable_encoder
 from postgrest.exceptions import APIError
 
 from app.core.supabase_client import supabase
+from app.core.unit_of_work import current_unit_of_work, invalidate
 from app.schemas.market_suppliers import MarketSuppliers
 
 def _is_no_row_error(exc: APIError) -> bool:
@@ -13,7 +14,7 @@ def _is_no_row_error(exc: APIError) -> bool:
             return True
     return "PGRST116" in str(exc)
 
-def get_all_market_suppliers(filters: dict | None = None, limit: int = 200, page: int = 1):
+def get_all_market_suppliers(filters: dict | None = None, limit: int = 200, page: int = 1, raw: bool = False):
     query = supabase.schema("market").table("market_suppliers").select("*")
     if not filters:
         filters = {}
@@ -46,10 +47,21 @@ def get_all_market_suppliers(filters: dict | None = None, limit: int = 200, page
     query = query.range(start, end)
 
     response = query.execute()
+    if raw:
+        # Lecture interne : lignes brutes, sans validation Pydantic
+        return response.data or []
     return [MarketSuppliers(**r) for r in (response.data or [])]
 
 
+def _get_market_suppliers_by_ids(ids: list[str]):
+    response = supabase.schema("market").table("market_suppliers").select("*").in_("id", ids).execute()
+    return {str(r["id"]): MarketSuppliers(**r) for r in (response.data or [])}
+
+
 def get_market_suppliers_by_id(id: UUID):
+    uow = current_unit_of_work()
+    if uow is not None:
+        return uow.load("market_suppliers", id, _get_market_suppliers_by_ids)
     try:
         response = supabase.schema("market").table("market_suppliers").select("*").eq("id", str(id)).single().execute()
     except APIError as exc:
@@ -68,9 +80,11 @@ def create_market_suppliers(payload: dict):
 def update_market_suppliers(id: UUID, payload: dict):
     prepared = jsonable_encoder(payload)
     response = supabase.schema("market").table("market_suppliers").update(prepared).eq("id", str(id)).execute()
+    invalidate("market_suppliers", id)
     return response.data[0] if response.data else None
 
 
 def delete_market_suppliers(id: UUID):
     supabase.schema("market").table("market_suppliers").delete().eq("id", str(id)).execute()
+    invalidate("market_suppliers", id)
     return {"deleted": True}
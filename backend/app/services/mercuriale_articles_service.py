@@ -4,6 +4,7 @@ from fastapi.encoders import jsonable_encoder
 from postgrest.exceptions import APIError
 
 from app.core.supabase_client import supabase
+from app.core.unit_of_work import current_unit_of_work, invalidate
 from app.schemas.mercuriale_articles import MercurialeArticles
 
 def _is_no_row_error(exc: APIError) -> bool:
@@ -13,7 +14,7 @@ def _is_no_row_error(exc: APIError) -> bool:
             return True
     return "PGRST116" in str(exc)
 
-def get_all_mercuriale_articles(filters: dict | None = None, limit: int = 200, page: int = 1):
+def get_all_mercuriale_articles(filters: dict | None = None, limit: int = 200, page: int = 1, raw: bool = False):
     query = supabase.table("mercuriale_articles").select("*")
     if not filters:
         filters = {}
@@ -46,10 +47,21 @@ def get_all_mercuriale_articles(filters: dict | None = None, limit: int = 200, p
     query = query.range(start, end)
 
     response = query.execute()
+    if raw:
+        # Lecture interne : lignes brutes, sans validation Pydantic
+        return response.data or []
     return [MercurialeArticles(**r) for r in (response.data or [])]
 
 
+def _get_mercuriale_articles_by_ids(ids: list[str]):
+    response = supabase.table("mercuriale_articles").select("*").in_("id", ids).execute()
+    return {str(r["id"]): MercurialeArticles(**r) for r in (response.data or [])}
+
+
 def get_mercuriale_articles_by_id(id: UUID):
+    uow = current_unit_of_work()
+    if uow is not None:
+        return uow.load("mercuriale_articles", id, _get_mercuriale_articles_by_ids)
     try:
         response = supabase.table("mercuriale_articles").select("*").eq("id", str(id)).single().execute()
     except APIError as exc:
@@ -68,9 +80,11 @@ def create_mercuriale_articles(payload: dict):
 def update_mercuriale_articles(id: UUID, payload: dict):
     prepared = jsonable_encoder(payload)
     response = supabase.table("mercuriale_articles").update(prepared).eq("id", str(id)).execute()
+    invalidate("mercuriale_articles", id)
     return response.data[0] if response.data else None
 
 
 def delete_mercuriale_articles(id: UUID):
     supabase.table("mercuriale_articles").delete().eq("id", str(id)).execute()
+    invalidate("mercuriale_articles", id)
     return {"deleted": True}
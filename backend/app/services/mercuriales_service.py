@@ -4,6 +4,7 @@ from fastapi.encoders import jsonable_encoder
 from postgrest.exceptions import APIError
 
 from app.core.supabase_client import supabase
+from app.core.unit_of_work import current_unit_of_work, invalidate
 from app.schemas.mercuriales import Mercuriales
 
 def _is_no_row_error(exc: APIError) -> bool:
@@ -13,7 +14,7 @@ def _is_no_row_error(exc: APIError) -> bool:
             return True
     return "PGRST116" in str(exc)
 
-def get_all_mercuriales(filters: dict | None = None, limit: int = 200, page: int = 1):
+def get_all_mercuriales(filters: dict | None = None, limit: int = 200, page: int = 1, raw: bool = False):
     query = supabase.table("mercuriales").select("*")
     if not filters:
         filters = {}
@@ -46,10 +47,21 @@ def get_all_mercuriales(filters: dict | None = None, limit: int = 200, page: int
     query = query.range(start, end)
 
     response = query.execute()
+    if raw:
+        # Lecture interne : lignes brutes, sans validation Pydantic
+        return response.data or []
     return [Mercuriales(**r) for r in (response.data or [])]
 
 
+def _get_mercuriales_by_ids(ids: list[str]):
+    response = supabase.table("mercuriales").select("*").in_("id", ids).execute()
+    return {str(r["id"]): Mercuriales(**r) for r in (response.data or [])}
+
+
 def get_mercuriales_by_id(id: UUID):
+    uow = current_unit_of_work()
+    if uow is not None:
+        return uow.load("mercuriales", id, _get_mercuriales_by_ids)
     try:
         response = supabase.table("mercuriales").select("*").eq("id", str(id)).single().execute()
     except APIError as exc:
@@ -68,9 +80,11 @@ def create_mercuriales(payload: dict):
 def update_mercuriales(id: UUID, payload: dict):
     prepared = jsonable_encoder(payload)
     response = supabase.table("mercuriales").update(prepared).eq("id", str(id)).execute()
+    invalidate("mercuriales", id)
     return response.data[0] if response.data else None
 
 
 def delete_mercuriales(id: UUID):
     supabase.table("mercuriales").delete().eq("id", str(id)).execute()
+    invalidate("mercuriales", id)
     return {"deleted": True}
@@ -1,7 +1,7 @@
 from app.core.supabase_client import supabase
 from app.schemas.price import Price
 
-def get_all_price(filters: dict | None = None, limit: int = 200, page: int = 1):
+def get_all_price(filters: dict | None = None, limit: int = 200, page: int = 1, raw: bool = False):
     query = supabase.table("price").select("*")
     if not filters:
         filters = {}
@@ -34,6 +34,9 @@ def get_all_price(filters: dict | None = None, limit: int = 200, page: int = 1):
     query = query.range(start, end)
 
     response = query.execute()
+    if raw:
+        # Lecture interne : lignes brutes, sans validation Pydantic
+        return response.data or []
     return [Price(**r) for r in (response.data or [])]
 
 
@@ -4,6 +4,7 @@ from fastapi.encoders import jsonable_encoder
 from postgrest.exceptions import APIError
 
 from app.core.supabase_client import supabase
+from app.core.unit_of_work import current_unit_of_work, invalidate
 from app.schemas.recommendations_ai import RecommendationsAi
 
 def _is_no_row_error(exc: APIError) -> bool:
@@ -13,7 +14,7 @@ def _is_no_row_error(exc: APIError) -> bool:
             return True
     return "PGRST116" in str(exc)
 
-def get_all_recommendations_ai(filters: dict | None = None, limit: int = 200, page: int = 1):
+def get_all_recommendations_ai(filters: dict | None = None, limit: int = 200, page: int = 1, raw: bool = False):
     query = supabase.table("recommendations_ai").select("*")
     if not filters:
         filters = {}
@@ -47,10 +48,21 @@ def get_all_recommendations_ai(filters: dict | None = None, limit: int = 200, pa
     query = query.range(start, end)
 
     response = query.execute()
+    if raw:
+        # Lecture interne : lignes brutes, sans validation Pydantic
+        return response.data or []
     return [RecommendationsAi(**r) for r in (response.data or [])]
 
 
+def _get_recommendations_ai_by_ids(ids: list[str]):
+    response = supabase.table("recommendations_ai").select("*").in_("id", ids).execute()
+    return {str(r["id"]): RecommendationsAi(**r) for r in (response.data or [])}
+
+
 def get_recommendations_ai_by_id(id: UUID):
+    uow = current_unit_of_work()
+    if uow is not None:
+        return uow.load("recommendations_ai", id, _get_recommendations_ai_by_ids)
     try:
         response = supabase.table("recommendations_ai").select("*").eq("id", str(id)).single().execute()
     except APIError as exc:
@@ -69,9 +81,11 @@ def create_recommendations_ai(payload: dict):
 def update_recommendations_ai(id: UUID, payload: dict):
     prepared = jsonable_encoder(payload)
     response = supabase.table("recommendations_ai").update(prepared).eq("id", str(id)).execute()
+    invalidate("recommendations_ai", id)
     return response.data[0] if response.data else None
 
 
 def delete_recommendations_ai(id: UUID):
     supabase.table("recommendations_ai").delete().eq("id", str(id)).execute()
+    invalidate("recommendations_ai", id)
     return {"deleted": True}
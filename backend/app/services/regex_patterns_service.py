@@ -4,6 +4,7 @@ from fastapi.encoders import jsonable_encoder
 from postgrest.exceptions import APIError
 
 from app.core.supabase_client import supabase
+from app.core.unit_of_work import current_unit_of_work, invalidate
 from app.schemas.regex_patterns import RegexPatterns
 
 def _is_no_row_error(exc: APIError) -> bool:
@@ -13,7 +14,7 @@ def _is_no_row_error(exc: APIError) -> bool:
             return True
     return "PGRST116" in str(exc)
 
-def get_all_regex_patterns(filters: dict | None = None, limit: int = 200, page: int = 1):
+def get_all_regex_patterns(filters: dict | None = None, limit: int = 200, page: int = 1, raw: bool = False):
     query = supabase.schema("internal").table("regex_patterns").select("*")
     if not filters:
         filters = {}
@@ -46,10 +47,21 @@ def get_all_regex_patterns(filters: dict | None = None, limit: int = 200, page:
     query = query.range(start, end)
 
     response = query.execute()
+    if raw:
+        # Lecture interne : lignes brutes, sans validation Pydantic
+        return response.data or []
     return [RegexPatterns(**r) for r in (response.data or [])]
 
 
+def _get_regex_patterns_by_ids(ids: list[str]):
+    response = supabase.schema("internal").table("regex_patterns").select("*").in_("id", ids).execute()
+    return {str(r["id"]): RegexPatterns(**r) for r in (response.data or [])}
+
+
 def get_regex_patterns_by_id(id: UUID):
+    uow = current_unit_of_work()
+    if uow is not None:
+        return uow.load("regex_patterns", id, _get_regex_patterns_by_ids)
     try:
         response = supabase.schema("internal").table("regex_patterns").select("*").eq("id", str(id)).single().execute()
     except APIError as exc:
@@ -68,9 +80,11 @@ def create_regex_patterns(payload: dict):
 def update_regex_patterns(id: UUID, payload: dict):
     prepared = jsonable_encoder(payload)
     response = supabase.schema("internal").table("regex_patterns").update(prepared).eq("id", str(id)).execute()
+    invalidate("regex_patterns", id)
     return response.data[0] if response.data else None
 
 
 def delete_regex_patterns(id: UUID):
     supabase.schema("internal").table("regex_patterns").delete().eq("id", str(id)).execute()
+    invalidate("regex_patterns", id)
     return {"deleted": True}
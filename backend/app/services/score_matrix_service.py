@@ -4,6 +4,7 @@ from fastapi.encoders import jsonable_encoder
 from postgrest.exceptions import APIError
 
 from app.core.supabase_client import supabase
+from app.core.unit_of_work import current_unit_of_work, invalidate
 from app.schemas.score_matrix import ScoreMatrix
 
 def _is_no_row_error(exc: APIError) -> bool:
@@ -13,7 +14,7 @@ def _is_no_row_error(exc: APIError) -> bool:
             return True
     return "PGRST116" in str(exc)
 
-def get_all_score_matrix(filters: dict | None = None, limit: int = 200, page: int = 1):
+def get_all_score_matrix(filters: dict | None = None, limit: int = 200, page: int = 1, raw: bool = False):
     query = supabase.schema("internal").table("score_matrix").select("*")
     if not filters:
         filters = {}
@@ -46,10 +47,21 @@ def get_all_score_matrix(filters: dict | None = None, limit: int = 200, page: in
     query = query.range(start, end)
 
     response = query.execute()
+    if raw:
+        # Lecture interne : lignes brutes, sans validation Pydantic
+        return response.data or []
     return [ScoreMatrix(**r) for r in (response.data or [])]
 
 
+def _get_score_matrix_by_ids(ids: list[str]):
+    response = supabase.schema("internal").table("score_matrix").select("*").in_("id", ids).execute()
+    return {str(r["id"]): ScoreMatrix(**r) for r in (response.data or [])}
+
+
 def get_score_matrix_by_id(id: UUID):
+    uow = current_unit_of_work()
+    if uow is not None:
+        return uow.load("score_matrix", id, _get_score_matrix_by_ids)
     try:
         response = supabase.schema("internal").table("score_matrix").select("*").eq("id", str(id)).single().execute()
     except APIError as exc:
@@ -68,9 +80,11 @@ def create_score_matrix(payload: dict):
 def update_score_matrix(id: UUID, payload: dict):
     prepared = jsonable_encoder(payload)
     response = supabase.schema("internal").table("score_matrix").update(prepared).eq("id", str(id)).execute()
+    invalidate("score_matrix", id)
     return response.data[0] if response.data else None
 
 
 def delete_score_matrix(id: UUID):
     supabase.schema("internal").table("score_matrix").delete().eq("id", str(id)).execute()
+    invalidate("score_matrix", id)
     return {"deleted": True}
@@ -4,6 +4,7 @@ from fastapi.encoders import jsonable_encoder
 from postgrest.exceptions import APIError
 
 from app.core.supabase_client import supabase
+from app.core.unit_of_work import current_unit_of_work, invalidate
 from app.schemas.support_ticket import SupportTicket
 
 def _is_no_row_error(exc: APIError) -> bool:
@@ -13,7 +14,7 @@ def _is_no_row_error(exc: APIError) -> bool:
             return True
     return "PGRST116" in str(exc)
 
-def get_all_support_ticket(filters: dict | None = None, limit: int = 200, page: int = 1):
+def get_all_support_ticket(filters: dict | None = None, limit: int = 200, page: int = 1, raw: bool = False):
     query = supabase.table("support_ticket").select("*")
     if not filters:
         filters = {}
@@ -47,10 +48,21 @@ def get_all_support_ticket(filters: dict | None = None, limit: int = 200, page:
     query = query.range(start, end)
 
     response = query.execute()
+    if raw:
+        # Lecture interne : lignes brutes, sans validation Pydantic
+        return response.data or []
     return [SupportTicket(**r) for r in (response.data or [])]
 
 
+def _get_support_ticket_by_ids(ids: list[str]):
+    response = supabase.table("support_ticket").select("*").in_("id", ids).execute()
+    return {str(r["id"]): SupportTicket(**r) for r in (response.data or [])}
+
+
 def get_support_ticket_by_id(id: UUID):
+    uow = current_unit_of_work()
+    if uow is not None:
+        return uow.load("support_ticket", id, _get_support_ticket_by_ids)
     try:
         response = supabase.table("support_ticket").select("*").eq("id", str(id)).single().execute()
     except APIError as exc:
@@ -69,9 +81,11 @@ def create_support_ticket(payload: dict):
 def update_support_ticket(id: UUID, payload: dict):
     prepared = jsonable_encoder(payload)
     response = supabase.table("support_ticket").update(prepared).eq("id", str(id)).execute()
+    invalidate("support_ticket", id)
     return response.data[0] if response.data else None
 
 
 def delete_support_ticket(id: UUID):
     supabase.table("support_ticket").delete().eq("id", str(id)).execute()
+    invalidate("support_ticket", id)
     return {"deleted": True}
@@ -4,6 +4,7 @@ from fastapi.encoders import jsonable_encoder
 from postgrest.exceptions import APIError
 
 from app.core.supabase_client import supabase
+from app.core.unit_of_work import current_unit_of_work, invalidate
 from app.schemas.vat_rates import VatRates
 
 def _is_no_row_error(exc: APIError) -> bool:
@@ -13,7 +14,7 @@ def _is_no_row_error(exc: APIError) -> bool:
             return True
     return "PGRST116" in str(exc)
 
-def get_all_vat_rates(filters: dict | None = None, limit: int = 200, page: int = 1):
+def get_all_vat_rates(filters: dict | None = None, limit: int = 200, page: int = 1, raw: bool = False):
     query = supabase.table("vat_rates").select("*")
     if not filters:
         filters = {}
@@ -46,10 +47,21 @@ def get_all_vat_rates(filters: dict | None = None, limit: int = 200, page: int =
     query = query.range(start, end)
 
     response = query.execute()
+    if raw:
+        # Lecture interne : lignes brutes, sans validation Pydantic
+        return response.data or []
     return [VatRates(**r) for r in (response.data or [])]
 
 
+def _get_vat_rates_by_ids(ids: list[str]):
+    response = supabase.table("vat_rates").select("*").in_("id", ids).execute()
+    return {str(r["id"]): VatRates(**r) for r in (response.data or [])}
+
+
 def get_vat_rates_by_id(id: UUID):
+    uow = current_unit_of_work()
+    if uow is not None:
+        return uow.load("vat_rates", id, _get_vat_rates_by_ids)
     try:
         response = supabase.table("vat_rates").select("*").eq("id", str(id)).single().execute()
     except APIError as exc:
@@ -68,9 +80,11 @@ def create_vat_rates(payload: dict):
 def update_vat_rates(id: UUID, payload: dict):
     prepared = jsonable_encoder(payload)
     response = supabase.table("vat_rates").update(prepared).eq("id", str(id)).execute()
+    invalidate("vat_rates", id)
     return response.data[0] if response.data else None
 
 
 def delete_vat_rates(id: UUID):
     supabase.table("vat_rates").delete().eq("id", str(id)).execute()
+    invalidate("vat_rates", id)
     return {"deleted": True}
@@ -7,18 +7,21 @@ base_dir = Path("/app")
 app_dir = base_dir / "app"
 schemas_dir = app_dir / "schemas"
 services_dir = app_dir / "services"
+async_services_dir = services_dir / "aio"
 routes_dir = app_dir / "api" / "routes"
-main_file = app_dir / "main.py"
+route_groups_file = app_dir / "api" / "route_groups.py"
 
 print("🔎 DEBUG paths")
 print(f"  base_dir   = {base_dir}")
 print(f"  app_dir    = {app_dir}")
 print(f"  schemas_dir= {schemas_dir}")
 print(f"  services_dir= {services_dir}")
+print(f"  async_services_dir= {async_services_dir}")
 print(f"  routes_dir  = {routes_dir}")
-print(f"  main_file   = {main_file}")
+print(f"  route_groups_file = {route_groups_file}")
 
 services_dir.mkdir(parents=True, exist_ok=True)
+async_services_dir.mkdir(parents=True, exist_ok=True)
 routes_dir.mkdir(parents=True, exist_ok=True)
 
 # === Charger schemas_summary.json ===
@@ -52,6 +55,7 @@ from fastapi.encoders import jsonable_encoder
 from postgrest.exceptions import APIError
 
 from app.core.supabase_client import supabase
+from app.core.unit_of_work import current_unit_of_work, invalidate
 from app.schemas.{name} import {class_name}
 
 def _is_no_row_error(exc: APIError) -> bool:
@@ -61,7 +65,7 @@ def _is_no_row_error(exc: APIError) -> bool:
             return True
     return "PGRST116" in str(exc)
 
-def get_all_{name}(filters: dict | None = None, limit: int = 200, page: int = 1):
+def get_all_{name}(filters: dict | None = None, limit: int = 200, page: int = 1, raw: bool = False):
     query = {table_ref}.select("*")
     if not filters:
         filters = {{}}
@@ -93,10 +97,21 @@ def get_all_{name}(filters: dict | None = None, limit: int = 200, page: int = 1)
     query = query.range(start, end)
 
     response = query.execute()
+    if raw:
+        # Lecture interne : lignes brutes, sans validation Pydantic
+        return response.data or []
     return [{class_name}(**r) for r in (response.data or [])]
 
 
+def _get_{name}_by_ids(ids: list[str]):
+    response = {table_ref}.select("*").in_("id", ids).execute()
+    return {{str(r["id"]): {class_name}(**r) for r in (response.data or [])}}
+
+
 def get_{name}_by_id(id: UUID):
+    uow = current_unit_of_work()
+    if uow is not None:
+        return uow.load("{name}", id, _get_{name}_by_ids)
     try:
         response = {table_ref}.select("*").eq("id", str(id)).single().execute()
     except APIError as exc:
@@ -115,11 +130,111 @@ def create_{name}(payload: dict):
 def update_{name}(id: UUID, payload: dict):
     prepared = jsonable_encoder(payload)
     response = {table_ref}.update(prepared).eq("id", str(id)).execute()
+    invalidate("{name}", id)
     return response.data[0] if response.data else None
 
 
 def delete_{name}(id: UUID):
     {table_ref}.delete().eq("id", str(id)).execute()
+    invalidate("{name}", id)
+    return {{"deleted": True}}
+"""
+
+# === TEMPLATE SERVICE ASYNC ===
+async_service_template = """from uuid import UUID
+
+from fastapi.encoders import jsonable_encoder
+from postgrest.exceptions import APIError
+
+from app.core.supabase_async_client import get_async_supabase
+from app.core.unit_of_work import current_unit_of_work, invalidate
+from app.schemas.{name} import {class_name}
+
+def _is_no_row_error(exc: APIError) -> bool:
+    payload = exc.args[0] if exc.args else None
+    if isinstance(payload, dict):
+        if payload.get("code") == "PGRST116":
+            return True
+    return "PGRST116" in str(exc)
+
+async def get_all_{name}(filters: dict | None = None, limit: int = 200, page: int = 1, raw: bool = False):
+    supabase = await get_async_supabase()
+    query = {table_ref}.select("*")
+    if not filters:
+        filters = {{}}
+
+    # --- Filtres dynamiques (structurels ou contextuels) ---
+{filter_block}
+
+    # --- Filtres additionnels (_gte, _lte, etc.) ---
+    for key, value in filters.items():
+        if key in ("order_by", "direction", "limit", "page", {ignored_fields}):
+            continue
+        if key.endswith("_gte"):
+            query = query.gte(key[:-4], value)
+        elif key.endswith("_lte"):
+            query = query.lte(key[:-4], value)
+        elif key.endswith("_like"):
+            query = query.like(key[:-5], f"%{{value}}%")
+        elif key.endswith("_neq"):
+            query = query.neq(key[:-4], value)
+        else:
+            query = query.eq(key, value)
+
+    # --- Tri & Pagination ---
+    if "order_by" in filters:
+        query = query.order(filters["order_by"], desc=filters.get("direction") == "desc")
+
+    start = (page - 1) * limit
+    end = start + limit - 1
+    query = query.range(start, end)
+
+    response = await query.execute()
+    if raw:
+        # Lecture interne : lignes brutes, sans validation Pydantic
+        return response.data or []
+    return [{class_name}(**r) for r in (response.data or [])]
+
+
+async def _get_{name}_by_ids(ids: list[str]):
+    supabase = await get_async_supabase()
+    response = await {table_ref}.select("*").in_("id", ids).execute()
+    return {{str(r["id"]): {class_name}(**r) for r in (response.data or [])}}
+
+
+async def get_{name}_by_id(id: UUID):
+    uow = current_unit_of_work()
+    if uow is not None:
+        return await uow.aload("{name}", id, _get_{name}_by_ids)
+    supabase = await get_async_supabase()
+    try:
+        response = await {table_ref}.select("*").eq("id", str(id)).single().execute()
+    except APIError as exc:
+        if _is_no_row_error(exc):
+            return None
+        raise
+    return {class_name}(**response.data) if response.data else None
+
+
+async def create_{name}(payload: dict):
+    supabase = await get_async_supabase()
+    prepared = jsonable_encoder({{k: v for k, v in payload.items() if v is not None and k != "id"}})
+    response = await {table_ref}.insert(prepared).execute()
+    return response.data[0] if response.data else None
+
+
+async def update_{name}(id: UUID, payload: dict):
+    supabase = await get_async_supabase()
+    prepared = jsonable_encoder(payload)
+    response = await {table_ref}.update(prepared).eq("id", str(id)).execute()
+    invalidate("{name}", id)
+    return response.data[0] if response.data else None
+
+
+async def delete_{name}(id: UUID):
+    supabase = await get_async_supabase()
+    await {table_ref}.delete().eq("id", str(id)).execute()
+    invalidate("{name}", id)
     return {{"deleted": True}}
 """
 
@@ -272,6 +387,18 @@ for schema_file in schema_files:
     service_path.write_text(service_code)
     print(f"✅ Service régénéré : {service_path.name}")
 
+    # 📄 Service async (app.services.aio)
+    async_service_path = async_services_dir / f"{name}_service.py"
+    async_service_code = async_service_template.format(
+        name=name,
+        class_name=class_name,
+        filter_block=filter_block,
+        ignored_fields=ignored_fields_str,
+        table_ref=table_ref,
+    )
+    async_service_path.write_text(async_service_code)
+    print(f"✅ Service async régénéré : {async_service_path.name}")
+
     # 📄 Route
     route_path = routes_dir / f"{name}.py"
     route_code = route_template.format(
@@ -286,22 +413,20 @@ for schema_file in schema_files:
     routes_to_include.append(name)
     created_routes.append((name, f"/{name}"))
 
-# --- Mise à jour du main.py ---
-if main_file.exists():
-    main_content = main_file.read_text()
-else:
-    main_content = "from fastapi import FastAPI\n\napp = FastAPI()\n"
-
+# --- Mise à jour des groupes de routes (app/api/route_groups.py) ---
+route_groups_content = route_groups_file.read_text()
+crud_block_start = route_groups_content.index("CRUD_ROUTES: List[str] = [\n")
+crud_block_end = route_groups_content.index("]\n", crud_block_start)
+crud_block = route_groups_content[crud_block_start:crud_block_end]
 for name in routes_to_include:
-    import_line = f"from app.api.routes import {name}"
-    include_line = f"app.include_router({name}.router)"
-    if import_line not in main_content:
-        main_content = import_line + "\n" + main_content
-    if include_line not in main_content:
-        main_content += "\n" + include_line
-
-main_file.write_text(main_content)
-print("🔄 main.py mis à jour avec toutes les routes.")
+    entry = f'    "{name}",\n'
+    if entry not in crud_block:
+        crud_block += entry
+route_groups_content = (
+    route_groups_content[:crud_block_start] + crud_block + route_groups_content[crud_block_end:]
+)
+route_groups_file.write_text(route_groups_content)
+print("🔄 route_groups.py mis à jour avec toutes les routes CRUD.")
 
 print("\n📊 Récapitulatif :")
 for name, route in created_routes:
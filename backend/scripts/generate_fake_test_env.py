@@ -32,8 +32,8 @@ FAKE_DB_HEADER = """# AUTO-GENERATED FILE
 
 from uuid import uuid4
 from typing import Dict, Any
-from datetime import datetime, date
-import uuid as uuid_mod
+
+from tests.fixtures.fake_postgrest import TableIndexes, normalize as _normalize
 
 DB = {
 """
@@ -45,112 +45,37 @@ for t in tables:
 
 db_body += """}
 
+# Index de hachage (id / *_id) et index triés (plages de dates), construits à
+# la demande et maintenus par _insert / _update / _delete
+_INDEXES = TableIndexes(DB)
+
 def reset_db():
     for key in DB:
         DB[key] = []
+    _INDEXES.clear()
 
 """
 
-# Normalisation
-NORMALIZE = """
-def _normalize(x):
-    if isinstance(x, uuid_mod.UUID):
-        return str(x)
-    if isinstance(x, datetime):
-        return x.date()
-    if isinstance(x, date):
-        return x
-    if isinstance(x, str) and len(x) == 10 and x.count("-") == 2:
-        try:
-            return datetime.fromisoformat(x).date()
-        except Exception:
-            return x
-    return x
-"""
-
 # Fonctions génériques
 CRUD = """
 def _find(table: str, filters=None, limit=1000):
-    if filters is None:
-        filters = {}
-    out = []
-    for row in DB[table]:
-        ok = True
-        for k, v in filters.items():
-            if v is None:
-                continue
-            if k in ("order_by", "direction", "limit", "page"):
-                continue
-
-            if k.endswith("_lte"):
-                base = k[:-4]
-                rv = _normalize(row.get(base))
-                fv = _normalize(v)
-                if rv is None or rv > fv:
-                    ok = False
-                    break
-                continue
-
-            if k.endswith("_gte"):
-                base = k[:-4]
-                rv = _normalize(row.get(base))
-                fv = _normalize(v)
-                if rv is None or rv < fv:
-                    ok = False
-                    break
-                continue
-
-            if k.endswith("_neq"):
-                base = k[:-4]
-                rv = _normalize(row.get(base))
-                fv = _normalize(v)
-                if rv == fv:
-                    ok = False
-                    break
-                continue
-
-            if k.endswith("_like"):
-                base = k[:-5]
-                rv = row.get(base)
-                if rv is None or str(v).strip("%") not in str(rv):
-                    ok = False
-                    break
-                continue
-
-            if _normalize(row.get(k)) != _normalize(v):
-                ok = False
-                break
-
-        if ok:
-            out.append(row)
-
-    order_by = filters.get("order_by")
-    direction = filters.get("direction")
-
-    if order_by:
-        out.sort(
-            key=lambda r: _normalize(r.get(order_by)),
-            reverse=(direction == "desc")
-        )
+    return _INDEXES.find(table, filters or {}, limit)
+
 
-    return out[:limit]
+def _get_by_id(table: str, id):
+    return _INDEXES.get_by_id(table, id)
 
 
 def _insert(table: str, data: Dict[str, Any]):
-    DB[table].append(data)
-    return data
+    return _INDEXES.insert(table, data)
 
 
 def _update(table: str, id, payload: Dict[str, Any]):
-    for row in DB[table]:
-        if row.get("id") == id:
-            row.update(payload)
-            return row
-    return None
+    return _INDEXES.update(table, id, payload)
 
 
 def _delete(table: str, id):
-    DB[table] = [r for r in DB[table] if r.get("id") != id]
+    _INDEXES.delete(table, id)
     return {"deleted": True}
 """
 
@@ -165,7 +90,7 @@ def create_{t}(data: Dict[str, Any]):
 """
     HELPERS += func
 
-FAKE_DB_PATH.write_text(FAKE_DB_HEADER + db_body + NORMALIZE + CRUD + HELPERS)
+FAKE_DB_PATH.write_text(FAKE_DB_HEADER + db_body + CRUD + HELPERS)
 print(f"✅ fake_db.py généré → {FAKE_DB_PATH}")
 
 
@@ -177,7 +102,7 @@ FAKE_SERVICES_HEADER = """# AUTO-GENERATED FILE
 # DO NOT EDIT MANUALLY – generated by generate_fake_test_env.py
 
 from uuid import uuid4
-from tests.fixtures.fake_db import DB, _find, _insert, _update, _delete
+from tests.fixtures.fake_db import DB, _find, _get_by_id, _insert, _update, _delete
 """
 
 service_files = [p for p in SERVICES_DIR.glob("*_service.py") if p.stem != "__init__"]
@@ -186,11 +111,11 @@ services_code = [FAKE_SERVICES_HEADER]
 
 SERVICE_TEMPLATE = """
 class {class_name}:
-    def get_all_{table}(self, filters=None, limit=1000, page=1):
+    def get_all_{table}(self, filters=None, limit=1000, page=1, raw=False):
         return _find("{table}", filters or {{}}, limit)
 
     def get_{table}_by_id(self, id):
-        return next((r for r in DB["{table}"] if r.get("id") == id), None)
+        return _get_by_id("{table}", id)
 
     def create_{table}(self, payload: dict):
         data = dict(payload)
@@ -0,0 +1,31 @@
+"""
+Backfill / rattrapage du résumé d'achats matérialisé (master_article_purchase_summary).
+
+    python scripts/rebuild_purchase_summary.py                      # tous les établissements
+    python scripts/rebuild_purchase_summary.py --establishment-id <uuid>
+
+Une fois le backfill fait, activer PURCHASE_SUMMARY_READS.
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.logic.write.shared.purchase_summary import rebuild_purchase_summary  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Reconstruit le résumé d'achats par master_article et par mois.")
+    parser.add_argument("--establishment-id", default=None, help="établissement à reconstruire (tous par défaut)")
+    args = parser.parse_args()
+
+    scope = args.establishment_id or "tous les établissements"
+    print(f"[i] Reconstruction du résumé d'achats : {scope}")
+    count = rebuild_purchase_summary(args.establishment_id)
+    print(f"[✓] Lignes (master_article × mois) écrites : {count}")
+
+
+if __name__ == "__main__":
+    main()
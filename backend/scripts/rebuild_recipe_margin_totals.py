@@ -0,0 +1,39 @@
+"""
+Vérification / rattrapage des marges moyennes tenues en sommes courantes
+(recipe_margin_totals) : reconstruction depuis toutes les recettes et
+réécriture des moyennes globale, par catégorie et par sous-catégorie.
+
+    python scripts/rebuild_recipe_margin_totals.py                      # tous les établissements
+    python scripts/rebuild_recipe_margin_totals.py --establishment-id <uuid>
+"""
+
+import argparse
+import sys
+from datetime import date
+from pathlib import Path
+from uuid import UUID
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.core.supabase_client import supabase  # noqa: E402
+from app.logic.write.shared.recipes_average_margins import recompute_recipe_margins  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Reconstruit les sommes courantes des marges moyennes de recettes.")
+    parser.add_argument("--establishment-id", default=None, help="établissement à reconstruire (tous par défaut)")
+    args = parser.parse_args()
+
+    if args.establishment_id:
+        establishment_ids = [args.establishment_id]
+    else:
+        establishment_ids = [row["id"] for row in supabase.table("establishments").select("id").execute().data or []]
+
+    print(f"[i] Reconstruction des marges moyennes : {len(establishment_ids)} établissement(s)")
+    for establishment_id in establishment_ids:
+        recompute_recipe_margins(UUID(str(establishment_id)), [], date.today(), full=True)
+        print(f"[✓] {establishment_id}")
+
+
+if __name__ == "__main__":
+    main()
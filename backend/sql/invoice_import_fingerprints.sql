@@ -0,0 +1,120 @@
+-- Dédoublonnage des imports de factures.
+--
+-- `internal.invoice_import_fingerprints` : une ligne par empreinte d'une facture
+-- importée, par établissement.
+--   - kind = 'content' : sha256 du fichier (re-upload du même PDF)
+--   - kind = 'invoice' : sha256 de (fournisseur, numéro, date, totaux) lus par
+--     l'OCR (même facture renvoyée par email, rescannée...)
+-- Les empreintes d'un import_job sont réservées avant toute écriture par
+-- `claim_invoice_import_fingerprints` (insert … on conflict do nothing) : un job
+-- dont une empreinte est déjà détenue par un autre job est un doublon, clôturé
+-- sans création d'articles ni cascade et rattaché au job d'origine
+-- (duplicate_of_import_job_id / duplicate_of_invoice_id) ; une ligne existante
+-- n'est jamais réécrite (app.logic.write.shared.import_dedup). La facture créée
+-- est rattachée en fin d'import ; un import en échec rend ses réservations. La
+-- ligne disparaît avec la facture (cascade sur invoice_id) : une facture
+-- supprimée peut être réimportée.
+--
+-- lines_count / duration_ms : coût de l'import d'origine ; duplicates_count :
+-- doublons évités depuis. `internal.invoice_import_dedup_savings` en déduit le
+-- travail économisé par établissement.
+
+alter table internal.import_job add column if not exists content_hash text;
+alter table internal.import_job
+    add column if not exists duplicate_of_import_job_id uuid references internal.import_job (id) on delete set null;
+alter table internal.import_job
+    add column if not exists duplicate_of_invoice_id uuid references public.invoices (id) on delete set null;
+
+create table if not exists internal.invoice_import_fingerprints (
+    establishment_id uuid not null references public.establishments (id) on delete cascade,
+    kind text not null check (kind in ('content', 'invoice')),
+    fingerprint text not null,
+    import_job_id uuid,
+    invoice_id uuid references public.invoices (id) on delete cascade,
+    lines_count integer not null default 0,
+    duration_ms integer not null default 0,
+    duplicates_count integer not null default 0,
+    last_duplicate_job_id uuid,
+    last_duplicate_at timestamptz,
+    created_at timestamptz not null default now(),
+    primary key (establishment_id, kind, fingerprint)
+);
+
+create index if not exists invoice_import_fingerprints_invoice_idx
+    on internal.invoice_import_fingerprints (invoice_id);
+
+
+create or replace view internal.invoice_import_dedup_savings as
+select
+    establishment_id,
+    sum(duplicates_count) as duplicates_count,
+    sum(duplicates_count * lines_count) as lines_skipped,
+    sum(duplicates_count::bigint * duration_ms) as duration_ms_saved,
+    max(last_duplicate_at) as last_duplicate_at
+from internal.invoice_import_fingerprints
+where duplicates_count > 0
+group by establishment_id;
+
+-- Réservation atomique des empreintes d'un job (p_fingerprints : [{"kind", "fingerprint"}]).
+-- Retourne {"claimed": true, "original": null} si le job détient toutes ses
+-- empreintes (y compris lors d'une nouvelle tentative du même job), sinon
+-- {"claimed": false, "original": <ligne de l'import d'origine>} : les réservations
+-- faites par l'appel sont rendues et le doublon compté sur la ligne d'origine.
+create or replace function internal.claim_invoice_import_fingerprints(
+    p_establishment_id uuid,
+    p_import_job_id uuid,
+    p_fingerprints jsonb
+)
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_original internal.invoice_import_fingerprints;
+begin
+    with requested as (
+        select e ->> 'kind' as kind, e ->> 'fingerprint' as fingerprint
+        from jsonb_array_elements(coalesce(p_fingerprints, '[]'::jsonb)) e
+    )
+    insert into internal.invoice_import_fingerprints (establishment_id, kind, fingerprint, import_job_id)
+    select p_establishment_id, r.kind, r.fingerprint, p_import_job_id
+    from requested r
+    on conflict (establishment_id, kind, fingerprint) do nothing;
+
+    -- Empreinte détenue par un autre job (contenu en priorité)
+    select f.*
+    into v_original
+    from internal.invoice_import_fingerprints f
+    join (
+        select e ->> 'kind' as kind, e ->> 'fingerprint' as fingerprint
+        from jsonb_array_elements(coalesce(p_fingerprints, '[]'::jsonb)) e
+    ) r on r.kind = f.kind and r.fingerprint = f.fingerprint
+    where f.establishment_id = p_establishment_id
+      and f.import_job_id is distinct from p_import_job_id
+    order by (f.kind = 'content') desc
+    limit 1
+    for update of f;
+
+    if v_original.fingerprint is null then
+        return jsonb_build_object('claimed', true, 'original', null);
+    end if;
+
+    delete from internal.invoice_import_fingerprints f
+    where f.establishment_id = p_establishment_id
+      and f.import_job_id = p_import_job_id
+      and f.invoice_id is null;
+
+    update internal.invoice_import_fingerprints f
+    set duplicates_count = f.duplicates_count + 1,
+        last_duplicate_job_id = p_import_job_id,
+        last_duplicate_at = now()
+    where f.establishment_id = v_original.establishment_id
+      and f.kind = v_original.kind
+      and f.fingerprint = v_original.fingerprint;
+
+    return jsonb_build_object('claimed', false, 'original', to_jsonb(v_original));
+end;
+$$;
+
+grant select, insert, update, delete on internal.invoice_import_fingerprints to service_role;
+grant execute on function internal.claim_invoice_import_fingerprints(uuid, uuid, jsonb) to service_role;
+grant select on internal.invoice_import_dedup_savings to service_role;
@@ -0,0 +1,47 @@
+-- Dépenses factures agrégées par période (jour / semaine ISO / mois)
+-- × fournisseur × label fournisseur, pour les graphiques du dashboard
+-- (app.logic.read.invoices_logic.invoices_spend_by_period).
+
+create index if not exists invoices_establishment_date_idx
+    on public.invoices (establishment_id, date);
+
+create or replace function public.invoice_spend_by_period(
+    p_establishment_id uuid,
+    p_start date,
+    p_end date,
+    p_granularity text default 'month',
+    p_supplier_ids uuid[] default null,
+    p_supplier_labels text[] default null
+)
+returns table (
+    period date,
+    supplier_id uuid,
+    supplier_label text,
+    invoices_count bigint,
+    sum_ht numeric,
+    sum_tva numeric,
+    sum_ttc numeric
+)
+language sql
+stable
+as $$
+    select
+        date_trunc(p_granularity, i.date::timestamp)::date as period,
+        i.supplier_id,
+        s.label::text as supplier_label,
+        count(*) as invoices_count,
+        coalesce(sum(i.total_excl_tax), 0)::numeric as sum_ht,
+        coalesce(sum(i.total_tax), 0)::numeric as sum_tva,
+        coalesce(sum(i.total_incl_tax), 0)::numeric as sum_ttc
+    from public.invoices i
+    left join public.suppliers s on s.id = i.supplier_id
+    where i.establishment_id = p_establishment_id
+      and i.date between p_start and p_end
+      and p_granularity in ('day', 'week', 'month')
+      and (p_supplier_ids is null or i.supplier_id = any(p_supplier_ids))
+      and (p_supplier_labels is null or s.label::text = any(p_supplier_labels))
+    group by 1, 2, 3
+    order by 1, 2;
+$$;
+
+grant execute on function public.invoice_spend_by_period(uuid, date, date, text, uuid[], text[]) to authenticated, service_role;
@@ -0,0 +1,39 @@
+-- Dernier prix d'achat strictement antérieur à une date, par master_article
+-- (une ligne par master_article demandé ; aucune si jamais acheté avant).
+-- Utilisé par le détail de facture et la détection des variations à l'import
+-- (app.logic.read.last_article_prices).
+--
+-- LATERAL + LIMIT 1 : une descente d'index par master_article au lieu de
+-- transférer tout l'historique d'achats.
+
+create index if not exists articles_establishment_master_date_idx
+    on public.articles (establishment_id, master_article_id, date desc, created_at desc);
+
+create or replace function public.last_article_prices_before(
+    p_establishment_id uuid,
+    p_master_article_ids uuid[],
+    p_before date
+)
+returns table (
+    master_article_id uuid,
+    id uuid,
+    unit_price public.articles.unit_price%type,
+    date public.articles.date%type
+)
+language sql
+stable
+as $$
+    select m.master_article_id, a.id, a.unit_price, a.date
+    from unnest(p_master_article_ids) as m(master_article_id)
+    cross join lateral (
+        select ar.id, ar.unit_price, ar.date
+        from public.articles ar
+        where ar.establishment_id = p_establishment_id
+          and ar.master_article_id = m.master_article_id
+          and ar.date < p_before
+        order by ar.date desc, ar.created_at desc
+        limit 1
+    ) a;
+$$;
+
+grant execute on function public.last_article_prices_before(uuid, uuid[], date) to authenticated, service_role;
@@ -0,0 +1,64 @@
+-- Statistiques d'achat par master_article sur une période, pour tous les
+-- produits demandés en une requête (liste de produits, un fournisseur ou tout
+-- l'établissement) : prix moyen / min / max, quantités, total dépensé, premier
+-- et dernier prix, nombre de factures ; liste des factures (invoice_ids)
+-- seulement si p_include_invoices, null sinon.
+-- Lignes triées par master_article_id : l'appelant pagine avec .range().
+-- Utilisé par la liste produits (app.logic.read.master_article_analysis.master_articles_analysis).
+--
+-- Les arrondis (round numeric = ROUND_HALF_UP) sont ceux de l'analyse produit.
+-- Index utilisé : articles_establishment_master_date_idx (last_article_prices_before.sql).
+
+drop function if exists public.master_article_purchase_stats(uuid, date, date, uuid[], uuid);
+
+create or replace function public.master_article_purchase_stats(
+    p_establishment_id uuid,
+    p_start date,
+    p_end date,
+    p_master_article_ids uuid[] default null,
+    p_supplier_id uuid default null,
+    p_include_invoices boolean default false
+)
+returns table (
+    master_article_id uuid,
+    count_articles bigint,
+    avg_unit_price numeric,
+    min_unit_price numeric,
+    max_unit_price numeric,
+    total_quantity numeric,
+    avg_quantity numeric,
+    total_spent numeric,
+    price_first numeric,
+    price_last numeric,
+    invoices_count bigint,
+    invoice_ids uuid[]
+)
+language sql
+stable
+as $$
+    select
+        a.master_article_id,
+        count(*) as count_articles,
+        round(avg(a.unit_price), 3) as avg_unit_price,
+        round(min(a.unit_price), 3) as min_unit_price,
+        round(max(a.unit_price), 3) as max_unit_price,
+        round(sum(a.quantity), 3) as total_quantity,
+        round(avg(a.quantity), 3) as avg_quantity,
+        round(sum(a.unit_price * a.quantity), 2) as total_spent,
+        round((array_agg(a.unit_price order by a.date, a.id) filter (where a.unit_price is not null))[1], 3) as price_first,
+        round((array_agg(a.unit_price order by a.date desc, a.id desc) filter (where a.unit_price is not null))[1], 3) as price_last,
+        count(distinct a.invoice_id) as invoices_count,
+        case when p_include_invoices
+            then array_agg(distinct a.invoice_id) filter (where a.invoice_id is not null)
+        end as invoice_ids
+    from public.articles a
+    join public.master_articles m on m.id = a.master_article_id
+    where a.establishment_id = p_establishment_id
+      and a.date between p_start and p_end
+      and (p_master_article_ids is null or a.master_article_id = any(p_master_article_ids))
+      and (p_supplier_id is null or m.supplier_id = p_supplier_id)
+    group by a.master_article_id
+    order by a.master_article_id;
+$$;
+
+grant execute on function public.master_article_purchase_stats(uuid, date, date, uuid[], uuid, boolean) to authenticated, service_role;
@@ -0,0 +1,131 @@
+-- Résumé d'achats matérialisé par (établissement, master_article, mois).
+--
+-- Maintenu à l'écriture (app.logic.write.shared.purchase_summary) : l'import de
+-- facture, la suppression de facture ou d'article, l'édition d'article et la
+-- fusion de fournisseurs recalculent les seuls mois touchés des master_articles
+-- concernés. Lu par l'analyse produits groupée, la comparaison utilisateur de
+-- la base marché et les rapports financiers au lieu de relire l'historique
+-- d'articles.
+--
+-- Sommes et compteurs bruts (non arrondis) : moyennes et totaux d'une période
+-- de plusieurs mois se recomposent exactement. Premier / dernier prix du mois
+-- dans l'ordre (date, id), comme master_article_purchase_stats.
+--
+-- Backfill : select public.rebuild_master_article_purchase_summary();
+-- (ou scripts/rebuild_purchase_summary.py).
+
+create table if not exists public.master_article_purchase_summary (
+    establishment_id uuid not null references public.establishments (id) on delete cascade,
+    master_article_id uuid not null references public.master_articles (id) on delete cascade,
+    month date not null,
+    purchases_count integer not null default 0,
+    invoices_count integer not null default 0,
+    priced_count integer not null default 0,
+    unit_price_total numeric not null default 0,
+    min_unit_price numeric,
+    max_unit_price numeric,
+    first_unit_price numeric,
+    last_unit_price numeric,
+    first_purchase_date date,
+    last_purchase_date date,
+    quantity_count integer not null default 0,
+    quantity_total numeric not null default 0,
+    spent_count integer not null default 0,
+    spent_total numeric not null default 0,
+    updated_at timestamptz not null default now(),
+    primary key (establishment_id, master_article_id, month)
+);
+
+create index if not exists master_article_purchase_summary_master_month_idx
+    on public.master_article_purchase_summary (master_article_id, month);
+
+
+-- Recalcule les mois `p_months` (tous si null) des master_articles donnés.
+create or replace function public.refresh_master_article_purchase_summary(
+    p_establishment_id uuid,
+    p_master_article_ids uuid[],
+    p_months date[] default null
+)
+returns integer
+language plpgsql
+as $$
+declare
+    v_count integer;
+begin
+    -- Imports concurrents d'un même établissement : suppression / réinsertion sérialisées
+    perform pg_advisory_xact_lock(hashtext('master_article_purchase_summary:' || p_establishment_id::text));
+
+    delete from public.master_article_purchase_summary s
+    where s.establishment_id = p_establishment_id
+      and s.master_article_id = any(p_master_article_ids)
+      and (p_months is null or s.month = any(p_months));
+
+    insert into public.master_article_purchase_summary as s (
+        establishment_id, master_article_id, month,
+        purchases_count, invoices_count, priced_count, unit_price_total,
+        min_unit_price, max_unit_price, first_unit_price, last_unit_price,
+        first_purchase_date, last_purchase_date,
+        quantity_count, quantity_total, spent_count, spent_total, updated_at
+    )
+    select
+        a.establishment_id,
+        a.master_article_id,
+        date_trunc('month', a.date)::date as month,
+        count(*),
+        count(distinct a.invoice_id),
+        count(a.unit_price),
+        coalesce(sum(a.unit_price), 0),
+        min(a.unit_price),
+        max(a.unit_price),
+        (array_agg(a.unit_price order by a.date, a.id) filter (where a.unit_price is not null))[1],
+        (array_agg(a.unit_price order by a.date desc, a.id desc) filter (where a.unit_price is not null))[1],
+        (array_agg(a.date order by a.date, a.id) filter (where a.unit_price is not null))[1],
+        (array_agg(a.date order by a.date desc, a.id desc) filter (where a.unit_price is not null))[1],
+        count(a.quantity),
+        coalesce(sum(a.quantity), 0),
+        count(a.unit_price * a.quantity),
+        coalesce(sum(a.unit_price * a.quantity), 0),
+        now()
+    from public.articles a
+    where a.establishment_id = p_establishment_id
+      and a.master_article_id = any(p_master_article_ids)
+      and a.date is not null
+      and (p_months is null or date_trunc('month', a.date)::date = any(p_months))
+    group by 1, 2, 3;
+
+    get diagnostics v_count = row_count;
+    return v_count;
+end;
+$$;
+
+
+-- Reconstruit tout le résumé (d'un établissement, ou de tous si null).
+create or replace function public.rebuild_master_article_purchase_summary(
+    p_establishment_id uuid default null
+)
+returns integer
+language plpgsql
+as $$
+declare
+    v_establishment record;
+    v_total integer := 0;
+begin
+    for v_establishment in
+        select e.id from public.establishments e
+        where p_establishment_id is null or e.id = p_establishment_id
+    loop
+        perform pg_advisory_xact_lock(hashtext('master_article_purchase_summary:' || v_establishment.id::text));
+        delete from public.master_article_purchase_summary where establishment_id = v_establishment.id;
+        v_total := v_total + public.refresh_master_article_purchase_summary(
+            v_establishment.id,
+            array(select m.id from public.master_articles m where m.establishment_id = v_establishment.id),
+            null
+        );
+    end loop;
+    return v_total;
+end;
+$$;
+
+grant select on public.master_article_purchase_summary to authenticated, service_role;
+grant execute on function public.refresh_master_article_purchase_summary(uuid, uuid[], date[]) to service_role;
+grant execute on function public.rebuild_master_article_purchase_summary(uuid) to service_role;
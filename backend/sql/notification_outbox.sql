@@ -0,0 +1,86 @@
+-- Outbox des notifications sortantes (Telegram, alertes SMS via alert_logs).
+--
+-- Les logiques métier insèrent une ligne par notification
+-- (app.core.notification_outbox.NotificationOutbox.enqueue) au lieu d'appeler
+-- les API externes. Le dispatcher en arrière-plan de chaque process réserve des
+-- lots par canal (`claim_notification_outbox`, for update skip locked), les
+-- livre, puis marque les lignes envoyées (status = 'sent') ou les replanifie
+-- avec backoff (`retry_notification_outbox`) jusqu'à max_attempts ('dropped').
+--
+-- Une ligne réservée par un process arrêté brutalement redevient disponible à
+-- l'expiration de son bail (locked_until) : rien n'est perdu sur un crash, au
+-- prix d'une livraison possiblement répétée (au moins une fois).
+--
+-- Purge des lignes livrées :
+--   delete from internal.notification_outbox
+--   where status in ('sent', 'dropped') and created_at < now() - interval '30 days';
+
+create table if not exists internal.notification_outbox (
+    id uuid primary key default gen_random_uuid(),
+    channel text not null check (channel in ('telegram', 'sms_alert')),
+    payload jsonb not null,
+    status text not null default 'pending' check (status in ('pending', 'sending', 'sent', 'dropped')),
+    attempts integer not null default 0,
+    next_attempt_at timestamptz not null default now(),
+    locked_until timestamptz,
+    last_error text,
+    created_at timestamptz not null default now(),
+    sent_at timestamptz
+);
+
+create index if not exists notification_outbox_ready_idx
+    on internal.notification_outbox (channel, next_attempt_at)
+    where status in ('pending', 'sending');
+
+
+-- Réserve au plus p_limit lignes prêtes d'un canal (en attente, ou réservées
+-- par un process dont le bail a expiré) pour p_lease_seconds.
+create or replace function internal.claim_notification_outbox(
+    p_channel text,
+    p_limit integer,
+    p_lease_seconds integer
+)
+returns setof internal.notification_outbox
+language sql
+as $$
+    update internal.notification_outbox o
+    set status = 'sending',
+        locked_until = now() + make_interval(secs => p_lease_seconds)
+    where o.id in (
+        select q.id
+        from internal.notification_outbox q
+        where q.channel = p_channel
+          and q.next_attempt_at <= now()
+          and (q.status = 'pending' or (q.status = 'sending' and q.locked_until < now()))
+        order by q.created_at
+        limit p_limit
+        for update skip locked
+    )
+    returning o.*;
+$$;
+
+
+-- Livraison en échec : nouvel essai après p_backoff_seconds * 2^(essais - 1),
+-- abandon ('dropped') au p_max_attempts-ième échec.
+create or replace function internal.retry_notification_outbox(
+    p_ids uuid[],
+    p_max_attempts integer,
+    p_backoff_seconds numeric,
+    p_error text default null
+)
+returns setof internal.notification_outbox
+language sql
+as $$
+    update internal.notification_outbox o
+    set attempts = o.attempts + 1,
+        status = case when o.attempts + 1 >= p_max_attempts then 'dropped' else 'pending' end,
+        next_attempt_at = now() + make_interval(secs => p_backoff_seconds * power(2, o.attempts)),
+        locked_until = null,
+        last_error = p_error
+    where o.id = any(p_ids)
+    returning o.*;
+$$;
+
+grant select, insert, update, delete on internal.notification_outbox to service_role;
+grant execute on function internal.claim_notification_outbox(text, integer, integer) to service_role;
+grant execute on function internal.retry_notification_outbox(uuid[], integer, numeric, text) to service_role;
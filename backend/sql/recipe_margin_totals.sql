@@ -0,0 +1,371 @@
+-- Marges moyennes des recettes tenues en sommes courantes.
+--
+-- `recipe_margin_totals` : somme des marges et nombre de recettes vendables et
+-- actives par (établissement, catégorie, sous-catégorie) — le « bucket ». Les
+-- moyennes globale, par catégorie et par sous-catégorie se recomposent en
+-- sommant les buckets. `recipe_margin_contributions` garde ce que chaque recette
+-- apporte aux totaux, pour retirer son ancienne contribution quand sa marge, sa
+-- catégorie ou son statut change (ou qu'elle est supprimée : pas de cascade sur
+-- recipe_id, la contribution est retirée au recalcul suivant).
+--
+-- Utilisé par app.logic.write.shared.recipes_average_margins.recompute_recipe_margins :
+-- un appel par cascade, en O(recettes modifiées). Les moyennes datées restent
+-- dans recipe_margin / recipe_margin_category / recipe_margin_subcategory,
+-- écrites en un appel par `upsert_recipe_margin_averages`.
+--
+-- Les écritures hors cascade (routes CRUD /recipes, SQL direct) passent par le
+-- trigger `recipes_margin_pending` : la recette est mise en attente dans
+-- `recipe_margin_pending` et sa contribution est ajustée au prochain appel pour
+-- l'établissement. Vérification / rattrapage : scripts/rebuild_recipe_margin_totals.py.
+
+create table if not exists public.recipe_margin_contributions (
+    recipe_id uuid primary key,
+    establishment_id uuid not null references public.establishments (id) on delete cascade,
+    bucket text not null,
+    category_id uuid,
+    subcategory_id uuid,
+    margin numeric not null,
+    updated_at timestamptz not null default now()
+);
+
+create index if not exists recipe_margin_contributions_establishment_idx
+    on public.recipe_margin_contributions (establishment_id);
+
+create table if not exists public.recipe_margin_totals (
+    establishment_id uuid not null references public.establishments (id) on delete cascade,
+    bucket text not null,
+    category_id uuid,
+    subcategory_id uuid,
+    margin_sum numeric not null default 0,
+    recipes_count integer not null default 0,
+    updated_at timestamptz not null default now(),
+    primary key (establishment_id, bucket)
+);
+
+create table if not exists public.recipe_margin_pending (
+    recipe_id uuid primary key,
+    establishment_id uuid not null references public.establishments (id) on delete cascade,
+    queued_at timestamptz not null default now()
+);
+
+create index if not exists recipe_margin_pending_establishment_idx
+    on public.recipe_margin_pending (establishment_id);
+
+
+-- Met en attente les recettes dont la contribution aux totaux a pu changer.
+-- Recettes supprimées avec leur établissement (cascade) : rien à rattraper, les
+-- contributions et totaux partent aussi en cascade, et une ligne en attente vers
+-- l'établissement supprimé violerait la clé étrangère (DELETE annulé).
+create or replace function public._queue_recipe_margin_pending()
+returns trigger
+language plpgsql
+as $$
+begin
+    if tg_op in ('UPDATE', 'DELETE')
+       and exists (select 1 from public.establishments e where e.id = old.establishment_id) then
+        insert into public.recipe_margin_pending (recipe_id, establishment_id)
+        values (old.id, old.establishment_id)
+        on conflict (recipe_id) do nothing;
+    end if;
+    if tg_op in ('INSERT', 'UPDATE')
+       and exists (select 1 from public.establishments e where e.id = new.establishment_id) then
+        insert into public.recipe_margin_pending (recipe_id, establishment_id)
+        values (new.id, new.establishment_id)
+        on conflict (recipe_id) do nothing;
+    end if;
+    return null;
+end;
+$$;
+
+drop trigger if exists recipes_margin_pending on public.recipes;
+create trigger recipes_margin_pending
+    after insert or delete or update of saleable, active, category_id, subcategory_id, current_margin, establishment_id
+    on public.recipes
+    for each row execute function public._queue_recipe_margin_pending();
+
+
+-- Ajoute aux contributions / totaux les recettes `p_recipe_ids` (toutes si null)
+-- vendables et actives ; marge absente comptée 0 comme le calcul historique.
+create or replace function public._add_recipe_margin_contributions(
+    p_establishment_id uuid,
+    p_recipe_ids uuid[]
+)
+returns void
+language sql
+as $$
+    insert into public.recipe_margin_contributions (
+        recipe_id, establishment_id, bucket, category_id, subcategory_id, margin, updated_at
+    )
+    select
+        r.id,
+        r.establishment_id,
+        coalesce(r.category_id::text, '-') || ':' || coalesce(r.subcategory_id::text, '-'),
+        r.category_id,
+        r.subcategory_id,
+        coalesce(r.current_margin, 0),
+        now()
+    from public.recipes r
+    where r.establishment_id = p_establishment_id
+      and (p_recipe_ids is null or r.id = any(p_recipe_ids))
+      and r.saleable
+      and r.active;
+
+    insert into public.recipe_margin_totals as t (
+        establishment_id, bucket, category_id, subcategory_id, margin_sum, recipes_count, updated_at
+    )
+    select p_establishment_id, c.bucket, c.category_id, c.subcategory_id, sum(c.margin), count(*), now()
+    from public.recipe_margin_contributions c
+    where c.establishment_id = p_establishment_id
+      and (p_recipe_ids is null or c.recipe_id = any(p_recipe_ids))
+    group by c.bucket, c.category_id, c.subcategory_id
+    on conflict (establishment_id, bucket) do update
+        set margin_sum = t.margin_sum + excluded.margin_sum,
+            recipes_count = t.recipes_count + excluded.recipes_count,
+            updated_at = now();
+$$;
+
+
+-- Met à jour les totaux pour les recettes modifiées (`p_recipe_ids` et recettes
+-- en attente de l'établissement : retrait de l'ancienne contribution, ajout de la
+-- nouvelle), ou les reconstruit entièrement si `p_full` ou si l'établissement
+-- n'a pas encore de totaux.
+-- Retourne { rebuilt, previous, current, totals } (buckets des recettes avant /
+-- après, totaux de l'établissement).
+create or replace function public.refresh_recipe_margin_totals(
+    p_establishment_id uuid,
+    p_recipe_ids uuid[],
+    p_full boolean default false
+)
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_rebuilt boolean;
+    v_previous jsonb;
+begin
+    -- Cascades concurrentes d'un même établissement : mises à jour sérialisées
+    perform pg_advisory_xact_lock(hashtext('recipe_margin_totals:' || p_establishment_id::text));
+
+    -- Recettes écrites hors cascade depuis le dernier appel
+    with pending as (
+        delete from public.recipe_margin_pending q
+        where q.establishment_id = p_establishment_id
+        returning q.recipe_id
+    )
+    select coalesce(array_agg(distinct r), '{}')
+    into p_recipe_ids
+    from (
+        select unnest(coalesce(p_recipe_ids, '{}')) as r
+        union
+        select recipe_id from pending
+    ) ids;
+
+    select coalesce(jsonb_agg(jsonb_build_object(
+               'recipe_id', c.recipe_id, 'category_id', c.category_id, 'subcategory_id', c.subcategory_id
+           )), '[]'::jsonb)
+    into v_previous
+    from public.recipe_margin_contributions c
+    where c.establishment_id = p_establishment_id
+      and c.recipe_id = any(p_recipe_ids);
+
+    v_rebuilt := p_full or not exists (
+        select 1 from public.recipe_margin_totals t where t.establishment_id = p_establishment_id
+    );
+
+    if v_rebuilt then
+        delete from public.recipe_margin_contributions where establishment_id = p_establishment_id;
+        delete from public.recipe_margin_totals where establishment_id = p_establishment_id;
+        perform public._add_recipe_margin_contributions(p_establishment_id, null);
+    else
+        with removed as (
+            delete from public.recipe_margin_contributions c
+            where c.establishment_id = p_establishment_id
+              and c.recipe_id = any(p_recipe_ids)
+            returning c.bucket, c.margin
+        ),
+        by_bucket as (
+            select bucket, sum(margin) as margin_sum, count(*) as recipes_count
+            from removed
+            group by bucket
+        )
+        update public.recipe_margin_totals t
+        set margin_sum = t.margin_sum - b.margin_sum,
+            recipes_count = t.recipes_count - b.recipes_count,
+            updated_at = now()
+        from by_bucket b
+        where t.establishment_id = p_establishment_id
+          and t.bucket = b.bucket;
+
+        perform public._add_recipe_margin_contributions(p_establishment_id, p_recipe_ids);
+    end if;
+
+    return jsonb_build_object(
+        'rebuilt', v_rebuilt,
+        'previous', v_previous,
+        'current', (
+            select coalesce(jsonb_agg(jsonb_build_object(
+                       'recipe_id', c.recipe_id, 'category_id', c.category_id, 'subcategory_id', c.subcategory_id
+                   )), '[]'::jsonb)
+            from public.recipe_margin_contributions c
+            where c.establishment_id = p_establishment_id
+              and c.recipe_id = any(p_recipe_ids)
+        ),
+        'totals', (
+            select coalesce(jsonb_agg(jsonb_build_object(
+                       'category_id', t.category_id,
+                       'subcategory_id', t.subcategory_id,
+                       'margin_sum', t.margin_sum,
+                       'recipes_count', t.recipes_count
+                   )), '[]'::jsonb)
+            from public.recipe_margin_totals t
+            where t.establishment_id = p_establishment_id
+        )
+    );
+end;
+$$;
+
+grant execute on function public.refresh_recipe_margin_totals(uuid, uuid[], boolean) to service_role;
+
+-- Moyennes datées (globale, catégories, sous-catégories) écrites en un appel par
+-- recompute_recipe_margins. Par clé naturelle (établissement [, catégorie |
+-- sous-catégorie]) : si la ligne la plus récente est datée au moins de p_date
+-- elle est mise à jour, sinon une ligne est insérée à p_date.
+-- p_categories / p_subcategories : [{"id": uuid, "average_margin": numeric}].
+create or replace function public.upsert_recipe_margin_averages(
+    p_establishment_id uuid,
+    p_date date,
+    p_global numeric,
+    p_categories jsonb,
+    p_subcategories jsonb
+)
+returns jsonb
+language plpgsql
+as $$
+declare
+    v_global jsonb;
+    v_categories jsonb;
+    v_subcategories jsonb;
+begin
+    perform pg_advisory_xact_lock(hashtext('recipe_margin_averages:' || p_establishment_id::text));
+
+    if p_global is not null then
+        with latest as (
+            select m.id, m.date
+            from public.recipe_margin m
+            where m.establishment_id = p_establishment_id
+            order by m.date desc
+            limit 1
+        ),
+        updated as (
+            update public.recipe_margin m
+            set average_margin = p_global,
+                updated_at = now()
+            from latest l
+            where m.id = l.id
+              and l.date::date >= p_date
+            returning m.id
+        ),
+        inserted as (
+            insert into public.recipe_margin (establishment_id, date, average_margin)
+            select p_establishment_id, p_date, p_global
+            where not exists (select 1 from latest l where l.date::date >= p_date)
+            returning id
+        )
+        select jsonb_build_object('id', r.id, 'created', r.created)
+        into v_global
+        from (
+            select id, false as created from updated
+            union all
+            select id, true from inserted
+        ) r;
+    end if;
+
+    with input as (
+        select (e ->> 'id')::uuid as category_id, (e ->> 'average_margin')::numeric as average_margin
+        from jsonb_array_elements(coalesce(p_categories, '[]'::jsonb)) e
+    ),
+    latest as (
+        select distinct on (m.category_id) m.id, m.category_id, m.date
+        from public.recipe_margin_category m
+        join input i on i.category_id = m.category_id
+        where m.establishment_id = p_establishment_id
+        order by m.category_id, m.date desc
+    ),
+    updated as (
+        update public.recipe_margin_category m
+        set average_margin = i.average_margin,
+            updated_at = now()
+        from latest l
+        join input i on i.category_id = l.category_id
+        where m.id = l.id
+          and l.date::date >= p_date
+        returning m.id, m.category_id
+    ),
+    inserted as (
+        insert into public.recipe_margin_category (establishment_id, category_id, date, average_margin)
+        select p_establishment_id, i.category_id, p_date, i.average_margin
+        from input i
+        where not exists (
+            select 1 from latest l where l.category_id = i.category_id and l.date::date >= p_date
+        )
+        returning id, category_id
+    )
+    select coalesce(jsonb_agg(jsonb_build_object(
+               'id', r.id, 'category_id', r.category_id, 'created', r.created
+           )), '[]'::jsonb)
+    into v_categories
+    from (
+        select id, category_id, false as created from updated
+        union all
+        select id, category_id, true from inserted
+    ) r;
+
+    with input as (
+        select (e ->> 'id')::uuid as subcategory_id, (e ->> 'average_margin')::numeric as average_margin
+        from jsonb_array_elements(coalesce(p_subcategories, '[]'::jsonb)) e
+    ),
+    latest as (
+        select distinct on (m.subcategory_id) m.id, m.subcategory_id, m.date
+        from public.recipe_margin_subcategory m
+        join input i on i.subcategory_id = m.subcategory_id
+        where m.establishment_id = p_establishment_id
+        order by m.subcategory_id, m.date desc
+    ),
+    updated as (
+        update public.recipe_margin_subcategory m
+        set average_margin = i.average_margin,
+            updated_at = now()
+        from latest l
+        join input i on i.subcategory_id = l.subcategory_id
+        where m.id = l.id
+          and l.date::date >= p_date
+        returning m.id, m.subcategory_id
+    ),
+    inserted as (
+        insert into public.recipe_margin_subcategory (establishment_id, subcategory_id, date, average_margin)
+        select p_establishment_id, i.subcategory_id, p_date, i.average_margin
+        from input i
+        where not exists (
+            select 1 from latest l where l.subcategory_id = i.subcategory_id and l.date::date >= p_date
+        )
+        returning id, subcategory_id
+    )
+    select coalesce(jsonb_agg(jsonb_build_object(
+               'id', r.id, 'subcategory_id', r.subcategory_id, 'created', r.created
+           )), '[]'::jsonb)
+    into v_subcategories
+    from (
+        select id, subcategory_id, false as created from updated
+        union all
+        select id, subcategory_id, true from inserted
+    ) r;
+
+    return jsonb_build_object(
+        'global', v_global,
+        'categories', v_categories,
+        'subcategories', v_subcategories
+    );
+end;
+$$;
+
+grant execute on function public.upsert_recipe_margin_averages(uuid, date, numeric, jsonb, jsonb) to service_role;
@@ -0,0 +1,68 @@
+import os
+from pathlib import Path
+import subprocess
+import sys
+
+import pytest
+
+from app.api.route_groups import ROUTE_GROUPS, resolve_route_groups
+
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+
+# Budget d'import de app.main (toutes les routes) : large pour absorber les
+# machines de CI lentes, mais détecte un retour des imports lourds au boot.
+STARTUP_IMPORT_BUDGET_SECONDS = 4.0
+LAZY_DEPENDENCIES = ("fpdf", "openpyxl", "rapidfuzz", "unidecode")
+
+
+def _import_times(route_groups: str) -> dict[str, int]:
+    env = {
+        "SUPABASE_URL": "https://example.supabase.co",
+        "SUPABASE_KEY": "test-key",
+        "RAVY_MANUFCATURERS_KEY": "test",
+        **os.environ,
+        "API_ROUTE_GROUPS": route_groups,
+    }
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=120,
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+
+    cumulative: dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumul, name = line.split("|")
+        try:
+            cumulative[name.strip()] = int(cumul)
+        except ValueError:
+            continue
+    return cumulative
+
+
+def test_app_startup_stays_within_import_budget():
+    times = _import_times("all")
+
+    loaded = [dep for dep in LAZY_DEPENDENCIES if dep in times]
+    assert loaded == [], f"dépendances lourdes importées au démarrage : {loaded}"
+    assert times["app.main"] / 1_000_000 < STARTUP_IMPORT_BUDGET_SECONDS
+
+
+def test_route_groups_limit_what_is_imported():
+    times = _import_times("monitoring")
+
+    assert "app.api.routes.articles" not in times
+    assert "app.api.routes.read" not in times
+    assert "app.api.routes.monitoring.http_pool" in times
+
+
+def test_resolve_route_groups():
+    assert resolve_route_groups("all") == list(ROUTE_GROUPS)
+    assert resolve_route_groups(" crud , read ") == ["read", "crud"]
+    with pytest.raises(ValueError):
+        resolve_route_groups("read,unknown")
@@ -0,0 +1,135 @@
+"""Base de test indexée : mêmes résultats qu'un parcours linéaire, client PostgREST."""
+
+import random
+from datetime import date, timedelta
+from uuid import uuid4
+
+import pytest
+from postgrest.exceptions import APIError
+
+from tests.fixtures.fake_postgrest import (
+    FakeSupabase,
+    TableIndexes,
+    _matches,
+    filters_to_conditions,
+    normalize,
+)
+
+ROWS = 20000
+
+
+def _linear_find(db, table, filters, limit=1000):
+    conditions = filters_to_conditions(filters)
+    out = [row for row in db[table] if all(_matches(row, c) for c in conditions)]
+    order_by = filters.get("order_by")
+    if order_by:
+        out.sort(key=lambda r: normalize(r.get(order_by)), reverse=filters.get("direction") == "desc")
+    return out[:limit]
+
+
+def _seed(count=ROWS):
+    rng = random.Random(7)
+    establishments = [uuid4() for _ in range(5)]
+    suppliers = [str(uuid4()) for _ in range(40)]
+    start = date(2024, 1, 1)
+    rows = [
+        {
+            "id": uuid4() if i % 2 else str(uuid4()),
+            "establishment_id": rng.choice(establishments),
+            "supplier_id": rng.choice(suppliers),
+            "date": (start + timedelta(days=rng.randrange(365))).isoformat() if i % 3 else start + timedelta(days=rng.randrange(365)),
+            "unit_price": rng.random() * 10,
+        }
+        for i in range(count)
+    ]
+    return {"articles": rows}, establishments, suppliers
+
+
+def test_indexed_find_matches_linear_scan():
+    db, establishments, suppliers = _seed()
+    indexes = TableIndexes(db)
+    cases = [
+        {"establishment_id": establishments[0]},
+        {"establishment_id": str(establishments[1]), "supplier_id": suppliers[3]},
+        {"date_gte": "2024-03-01", "date_lte": date(2024, 3, 31)},
+        {"supplier_id": suppliers[2], "date_gte": date(2024, 6, 1), "order_by": "date", "direction": "desc"},
+        {"supplier_id_neq": suppliers[0], "order_by": "unit_price"},
+        {"id": db["articles"][123]["id"]},
+    ]
+    for filters in cases:
+        assert indexes.find("articles", filters, 5000) == _linear_find(db, "articles", filters, 5000)
+
+    # Écritures : les index suivent
+    row = db["articles"][10]
+    indexes.update("articles", row["id"], {"supplier_id": "moved", "date": "2030-01-01"})
+    indexes.insert("articles", {"id": "new", "supplier_id": "moved", "date": date(2030, 1, 2)})
+    indexes.delete("articles", db["articles"][20]["id"])
+    db["articles"].append({"id": "direct", "supplier_id": "moved", "date": "2030-01-03"})
+    for filters in ({"supplier_id": "moved"}, {"date_gte": "2030-01-01"}, {"supplier_id": suppliers[5]}):
+        assert indexes.find("articles", filters, 5000) == _linear_find(db, "articles", filters, 5000)
+
+
+def test_indexed_lookups_scan_only_matching_rows():
+    db, establishments, suppliers = _seed()
+    indexes = TableIndexes(db)
+    ids = [row["id"] for row in db["articles"][::200]]
+
+    for id in ids:
+        assert [row["id"] for row in indexes.find("articles", {"id": id})] == [id]
+    assert indexes.index_hits == len(ids)
+    assert indexes.scanned == len(ids)
+
+    # Plage de dates : seules les lignes du mois sont examinées
+    indexes.scanned = 0
+    march = indexes.find("articles", {"date_gte": "2024-03-01", "date_lte": "2024-03-31"}, ROWS)
+    assert 0 < indexes.scanned < ROWS // 2
+    assert len(march) <= indexes.scanned
+
+    # Sans condition indexable, la table entière est parcourue
+    indexes.scanned = 0
+    hits = indexes.index_hits
+    indexes.find("articles", {"supplier_id_neq": suppliers[0]})
+    assert indexes.scanned == ROWS
+    assert indexes.index_hits == hits
+
+
+def test_fake_supabase_client_select_write_paths():
+    db, establishments, suppliers = _seed(2000)
+    client = FakeSupabase(db)
+    establishment = str(establishments[0])
+
+    response = (
+        client.table("articles")
+        .select("id, supplier_id, date", count="exact")
+        .eq("establishment_id", establishment)
+        .in_("supplier_id", suppliers[:10])
+        .gte("date", "2024-02-01")
+        .order("date", desc=True)
+        .range(0, 9)
+        .execute()
+    )
+    expected = sorted(
+        (
+            r for r in db["articles"]
+            if str(r["establishment_id"]) == establishment
+            and r["supplier_id"] in suppliers[:10]
+            and normalize(r["date"]) >= date(2024, 2, 1)
+        ),
+        key=lambda r: normalize(r["date"]),
+        reverse=True,
+    )
+    assert response.count == len(expected)
+    assert [r["id"] for r in response.data] == [str(r["id"]) for r in expected[:10]]
+    assert set(response.data[0]) == {"id", "supplier_id", "date"}
+    assert isinstance(response.data[0]["date"], str)
+
+    created = client.table("articles").insert({"supplier_id": "s-new", "date": "2025-01-01"}).execute().data[0]
+    client.table("articles").update({"unit_price": 42}).eq("id", created["id"]).execute()
+    single = client.table("articles").select("*").eq("supplier_id", "s-new").single().execute().data
+    assert single["unit_price"] == 42
+
+    deleted = client.table("articles").delete().eq("id", created["id"]).execute().data
+    assert [r["id"] for r in deleted] == [created["id"]]
+    with pytest.raises(APIError):
+        client.table("articles").select("*").eq("id", created["id"]).single().execute()
+    assert client.requests[-1] == ("select", "articles")
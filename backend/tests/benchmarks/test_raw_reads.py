@@ -0,0 +1,100 @@
+"""Micro-benchmark : get_all_* validé (Pydantic) vs mode raw (dicts).
+
+Le test vérifie le comportement (dicts, aucun modèle construit) ; les temps
+sont seulement rapportés, comme pour les cascades d'écriture.
+"""
+
+import time
+from types import SimpleNamespace
+from uuid import uuid4
+
+from app.services import ingredients_service
+
+ROWS = 5000
+
+
+def _rows(count: int) -> list[dict]:
+    establishment_id = str(uuid4())
+    return [
+        {
+            "id": str(uuid4()),
+            "recipe_id": str(uuid4()),
+            "type": "ARTICLE",
+            "master_article_id": str(uuid4()),
+            "subrecipe_id": None,
+            "unit_cost": 1.234,
+            "quantity": 0.5,
+            "unit": "kg",
+            "percentage_loss": 10.0,
+            "gross_unit_price": 2.5,
+            "establishment_id": establishment_id,
+            "created_at": "2025-01-01T10:00:00+00:00",
+            "updated_at": "2025-01-02T10:00:00+00:00",
+            "created_by": None,
+            "updated_by": None,
+            "loss_value": 0.12,
+            "unit_cost_per_portion_recipe": 0.61,
+        }
+        for _ in range(count)
+    ]
+
+
+class _FakeQuery:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def __getattr__(self, _name):
+        return lambda *args, **kwargs: self
+
+    def execute(self):
+        return SimpleNamespace(data=self.rows)
+
+
+class _FakeClient:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def table(self, _name):
+        return _FakeQuery(self.rows)
+
+
+def _best_of(fn, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def test_raw_reads_skip_validation(monkeypatch):
+    rows = _rows(ROWS)
+    monkeypatch.setattr(ingredients_service, "supabase", _FakeClient(rows))
+
+    def validated():
+        return ingredients_service.get_all_ingredients(filters={"establishment_id": "x"}, limit=ROWS)
+
+    def raw():
+        return ingredients_service.get_all_ingredients(filters={"establishment_id": "x"}, limit=ROWS, raw=True)
+
+    assert str(validated()[0].id) == rows[0]["id"]
+    validated_time = _best_of(validated)
+
+    built = []
+
+    class _CountingIngredients(ingredients_service.Ingredients):
+        def __init__(self, **data):
+            built.append(data)
+            super().__init__(**data)
+
+    monkeypatch.setattr(ingredients_service, "Ingredients", _CountingIngredients)
+    result = raw()
+    assert result == rows
+    assert all(type(row) is dict for row in result)
+    validated()
+    assert len(built) == ROWS
+
+    built.clear()
+    raw_time = _best_of(raw)
+    assert built == []
+    print(f"\nget_all_ingredients x{ROWS}: validated={validated_time * 1000:.1f}ms raw={raw_time * 1000:.2f}ms")
@@ -0,0 +1,171 @@
+"""
+Benchmarks des cascades d'écriture (import de facture, édition d'article,
+suppression de facture, historiques, marges, rapport financier).
+
+Chaque cascade tourne avec les vrais services (`app.services.*`) branchés sur
+`FakeSupabase`, sur un établissement synthétique petit / moyen / gros :
+le nombre d'allers-retours PostgREST est comparé à un budget : le test échoue
+si une modification en ajoute (N+1 réintroduit, préchargement perdu...). Pas de
+mesure de temps : elle dépendrait de la machine, les allers-retours non.
+
+Quand une optimisation réduit les allers-retours, baisser le budget dans
+`ROUND_TRIP_BUDGETS` pour verrouiller le gain.
+"""
+
+from collections import Counter
+from datetime import date
+from uuid import UUID
+
+import pytest
+from tabulate import tabulate
+
+from tests.fixtures.synthetic_establishment import SIZES
+
+TARGET_DATE = date(2025, 6, 1)
+
+# Allers-retours maximum par (cascade, taille) — mesurés + ~10 % de marge
+ROUND_TRIP_BUDGETS = {
+    "import_invoice_from_import_job": {"small": 115, "medium": 305, "large": 495},
+    "edit_article": {"small": 40, "medium": 45, "large": 35},
+    "delete_invoice": {"small": 175, "medium": 485, "large": 880},
+    "update_ingredients_and_history_ingredients": {"small": 265, "medium": 695, "large": 690},
+    "update_recipes_and_history_recipes": {"small": 40, "medium": 180, "large": 555},
+    "recompute_recipe_margins": {"small": 10, "medium": 10, "large": 10},
+    "create_or_update_financial_report": {"small": 1490, "medium": 10790, "large": 33915},
+}
+
+# Cascade -> (module, fonction)
+CASCADE_FUNCTIONS = {
+    "import_invoice_from_import_job": ("app.logic.write.invoices_imports", "import_invoice_from_import_job"),
+    "edit_article": ("app.logic.write.edit_article", "edit_article"),
+    "delete_invoice": ("app.logic.write.delete_invoices", "delete_invoice"),
+    "update_ingredients_and_history_ingredients": (
+        "app.logic.write.shared.ingredients_history_ingredients",
+        "update_ingredients_and_history_ingredients",
+    ),
+    "update_recipes_and_history_recipes": (
+        "app.logic.write.shared.recipes_history_recipes",
+        "update_recipes_and_history_recipes",
+    ),
+    "recompute_recipe_margins": ("app.logic.write.shared.recipes_average_margins", "recompute_recipe_margins"),
+    "create_or_update_financial_report": ("app.logic.write.financial_reports", "create_or_update_financial_report"),
+}
+
+_RESULTS = []
+
+
+def _import_invoice(synthetic, function):
+    function(UUID(synthetic.import_job_id))
+
+
+def _edit_article(synthetic, function):
+    article = synthetic.rows("articles")[-1]
+    invoice = synthetic.first("invoices", id=article["invoice_id"])
+    new_price = round(article["unit_price"] * 1.2, 2)
+    function(
+        establishment_id=UUID(synthetic.establishment_id),
+        invoice_id=UUID(article["invoice_id"]),
+        master_article_id=UUID(article["master_article_id"]),
+        invoice_date=invoice["date"],
+        article_id=UUID(article["id"]),
+        article_unit=article["unit"],
+        article_quantity=article["quantity"],
+        article_gross_unit_price=new_price,
+        article_new_unit_price=new_price,
+        article_old_unit_price=article["unit_price"],
+        article_total=round(new_price * article["quantity"], 2),
+        article_discounts=None,
+        article_duties_and_taxes=None,
+    )
+
+
+def _delete_invoice(synthetic, function):
+    invoice = synthetic.first("invoices", id=synthetic.invoice_ids[len(synthetic.invoice_ids) // 2])
+    function(
+        establishment_id=UUID(synthetic.establishment_id),
+        invoice_to_delete_id=UUID(invoice["id"]),
+        invoice_to_delete_date=invoice["date"],
+        supplier_id=UUID(invoice["supplier_id"]),
+    )
+
+
+def _update_ingredients(synthetic, function):
+    function(
+        establishment_id=UUID(synthetic.establishment_id),
+        ingredient_ids=[UUID(i) for i in synthetic.ingredient_ids()[:200]],
+        trigger="manual",
+        target_date=TARGET_DATE,
+    )
+
+
+def _update_recipes(synthetic, function):
+    function(
+        establishment_id=UUID(synthetic.establishment_id),
+        recipe_ids=[UUID(r) for r in synthetic.recipe_ids],
+        target_date=TARGET_DATE,
+        trigger="manual",
+    )
+
+
+def _recompute_margins(synthetic, function):
+    function(
+        UUID(synthetic.establishment_id),
+        [UUID(r) for r in synthetic.recipe_ids],
+        TARGET_DATE,
+    )
+
+
+def _financial_report(synthetic, function):
+    function(
+        establishment_id=UUID(synthetic.establishment_id),
+        target_month=TARGET_DATE,
+        payload=[{"recipe_id": UUID(r), "sales_number": 10} for r in synthetic.recipe_ids],
+        fte_count=3,
+        fte_cost=9000,
+        total_fixed_cost=5000,
+        total_variable_cost=2000,
+        total_other_cost=500,
+        total_revenue_excl_tax=60000,
+        total_revenue_food_excl_tax=40000,
+    )
+
+
+CASCADES = {
+    "import_invoice_from_import_job": _import_invoice,
+    "edit_article": _edit_article,
+    "delete_invoice": _delete_invoice,
+    "update_ingredients_and_history_ingredients": _update_ingredients,
+    "update_recipes_and_history_recipes": _update_recipes,
+    "recompute_recipe_margins": _recompute_margins,
+    "create_or_update_financial_report": _financial_report,
+}
+
+
+@pytest.fixture(scope="module")
+def cascade_functions(import_with_real_services):
+    return {
+        cascade: getattr(import_with_real_services(module), name)
+        for cascade, (module, name) in CASCADE_FUNCTIONS.items()
+    }
+
+
+@pytest.mark.parametrize("size", list(SIZES))
+@pytest.mark.parametrize("cascade", list(CASCADES))
+def test_write_cascade_round_trips(cascade, size, fake_establishment, cascade_functions):
+    synthetic, client = fake_establishment(size)
+
+    CASCADES[cascade](synthetic, cascade_functions[cascade])
+
+    round_trips = len(client.requests)
+    top = ", ".join(f"{action} {table}×{count}" for (action, table), count in Counter(client.requests).most_common(3))
+    _RESULTS.append([cascade, size, round_trips, ROUND_TRIP_BUDGETS[cascade][size], top])
+
+    assert round_trips <= ROUND_TRIP_BUDGETS[cascade][size], (
+        f"{cascade} ({size}) : {round_trips} allers-retours > budget "
+        f"{ROUND_TRIP_BUDGETS[cascade][size]} — {top}"
+    )
+
+
+def teardown_module(_module):
+    if _RESULTS:
+        print("\n" + tabulate(_RESULTS, headers=["cascade", "taille", "allers-retours", "budget", "top"]))
@@ -0,0 +1,65 @@
+import importlib
+import sys
+
+import pytest
+
+from app.core import notification_outbox
+from app.core.reference_data import reference_data
+from app.core.regex_registry import regex_patterns
+from tests.fixtures.fake_postgrest import FakeSupabase, install_fake_supabase
+from tests.fixtures.synthetic_establishment import build_establishment
+
+
+@pytest.fixture(autouse=True)
+def _reset_process_caches():
+    # Caches process-wide : chaque test repart de sa propre base (fake ou non)
+    regex_patterns.invalidate()
+    reference_data.invalidate()
+    yield
+    regex_patterns.invalidate()
+    reference_data.invalidate()
+
+
+@pytest.fixture
+def fake_establishment(monkeypatch):
+    """
+    Fabrique `fake_establishment(size)` -> (synthetic, client) : établissement
+    synthétique servi par le client PostgREST hors ligne, logs applicatifs et
+    outbox des notifications neutralisés dans les modules `app.logic` importés.
+    """
+
+    def _build(size: str = "small"):
+        synthetic = build_establishment(size)
+        client = FakeSupabase(synthetic.db)
+        install_fake_supabase(monkeypatch, client)
+        monkeypatch.setattr(notification_outbox.notification_outbox, "enqueue", lambda *args, **kwargs: True)
+        for name, module in list(sys.modules.items()):
+            if name.startswith("app.logic") and hasattr(module, "write_log"):
+                monkeypatch.setattr(module, "write_log", lambda *args, **kwargs: None)
+        return synthetic, client
+
+    return _build
+
+
+@pytest.fixture(scope="module")
+def import_with_real_services():
+    """
+    Les tests sandbox remplacent `app.services` par leurs fakes dès la collecte :
+    retourne un `import_module` qui réimporte avec les vrais services (sous-modules
+    compris, pour que `app.services.<table>_service` reste un attribut du paquet).
+    sys.modules est restauré en fin de module de test.
+    """
+
+    def _reloaded(name):
+        return name.startswith("app.services") or name.startswith("app.logic")
+
+    saved = {n: m for n, m in sys.modules.items() if _reloaded(n)}
+    for name in saved:
+        del sys.modules[name]
+    importlib.import_module("app.services")
+    try:
+        yield importlib.import_module
+    finally:
+        for name in [n for n in sys.modules if _reloaded(n)]:
+            del sys.modules[name]
+        sys.modules.update(saved)
@@ -0,0 +1,64 @@
+import asyncio
+
+import httpx
+
+from app.core.http_pool import AsyncRetryTransport, PoolStats, RetryTransport
+
+
+def _flaky_handler(failures):
+    calls = []
+
+    def handler(request):
+        calls.append(request.method)
+        if len(calls) <= failures:
+            return httpx.Response(503)
+        return httpx.Response(200, json={"ok": True})
+
+    return handler, calls
+
+
+def test_get_is_retried_on_503():
+    handler, calls = _flaky_handler(failures=2)
+    stats = PoolStats("test")
+    transport = RetryTransport(stats, max_attempts=3, backoff=0, transport=httpx.MockTransport(handler))
+    with httpx.Client(transport=transport) as client:
+        response = client.get("https://example.test/rest/v1/articles")
+
+    assert response.status_code == 200
+    assert calls == ["GET", "GET", "GET"]
+    assert stats.snapshot()["retries"] == 2
+
+
+def test_insert_is_not_replayed_on_503():
+    handler, calls = _flaky_handler(failures=1)
+    transport = RetryTransport(PoolStats("test"), backoff=0, transport=httpx.MockTransport(handler))
+    with httpx.Client(transport=transport) as client:
+        response = client.post("https://example.test/rest/v1/articles", json={})
+
+    assert response.status_code == 503
+    assert calls == ["POST"]
+
+
+def test_connect_errors_are_retried_for_all_methods():
+    calls = []
+
+    def handler(request):
+        calls.append(request.method)
+        if len(calls) == 1:
+            raise httpx.ConnectError("connection refused", request=request)
+        return httpx.Response(201)
+
+    stats = PoolStats("test")
+    transport = AsyncRetryTransport(stats, backoff=0, transport=httpx.MockTransport(handler))
+
+    async def run():
+        async with httpx.AsyncClient(transport=transport) as client:
+            return await client.post("https://example.test/rest/v1/articles", json={})
+
+    response = asyncio.run(run())
+    assert response.status_code == 201
+    assert calls == ["POST", "POST"]
+    snapshot = stats.snapshot()
+    assert snapshot["requests"] == 1
+    assert snapshot["retries"] == 1
+    assert snapshot["errors"] == 0
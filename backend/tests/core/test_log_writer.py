@@ -0,0 +1,47 @@
+import time
+
+from app.core.log_writer import BufferedLogWriter
+
+
+def test_logs_are_flushed_in_multi_row_batches():
+    batches = []
+    writer = BufferedLogWriter(sink=lambda rows: batches.append(list(rows)), batch_size=10, flush_interval=5)
+
+    for i in range(25):
+        assert writer.write({"type": "job", "text": f"log {i}"})
+
+    assert writer.flush(timeout=5)
+    assert [len(b) for b in batches] == [10, 10, 5]
+    assert [row["text"] for b in batches for row in b] == [f"log {i}" for i in range(25)]
+    writer.stop()
+
+
+def test_write_does_not_wait_on_sink():
+    def slow_sink(rows):
+        time.sleep(0.3)
+
+    writer = BufferedLogWriter(sink=slow_sink, batch_size=1, flush_interval=0.01)
+    started = time.perf_counter()
+    for i in range(5):
+        writer.write({"type": "job", "text": str(i)})
+    assert time.perf_counter() - started < 0.1
+    writer.stop(timeout=0.1)
+
+
+def test_backpressure_samples_context_logs_and_drops_when_full():
+    writer = BufferedLogWriter(
+        sink=lambda rows: time.sleep(10),
+        batch_size=1000,
+        flush_interval=60,
+        max_queue=10,
+        high_watermark=0.5,
+        sample_rate_under_pressure=0.0,
+    )
+    kept_context = sum(writer.write({"type": "context", "text": "view"}) for _ in range(10))
+    kept_jobs = sum(writer.write({"type": "job", "text": "job"}) for _ in range(10))
+
+    stats = writer.stats()
+    assert kept_context == 5
+    assert kept_jobs == 5
+    assert stats["sampled_out"] == 5
+    assert stats["dropped"] == 5
@@ -0,0 +1,205 @@
+import time
+
+import pytest
+
+from app.core.notification_outbox import (
+    CHANNEL_SMS_ALERT,
+    CHANNEL_TELEGRAM,
+    OUTBOX_TABLE,
+    TELEGRAM_MAX_MESSAGE_LENGTH,
+    NotificationOutbox,
+    OutboxTable,
+    _pack_telegram_messages,
+    NotificationRecord,
+    split_telegram_text,
+)
+from tests.fixtures.fake_postgrest import FakeSupabase
+
+
+def _table(db=None):
+    return OutboxTable(FakeSupabase({} if db is None else db))
+
+
+def test_enqueue_never_waits_on_sender():
+    delivered = []
+
+    def slow_sender(records):
+        time.sleep(0.3)
+        delivered.extend(r.payload["text"] for r in records)
+        return []
+
+    outbox = NotificationOutbox(
+        senders={CHANNEL_TELEGRAM: slow_sender},
+        flush_interval=0.01,
+        min_interval_by_channel={},
+        table=_table(),
+    )
+
+    started = time.perf_counter()
+    for i in range(10):
+        outbox.enqueue_telegram(f"msg {i}")
+    assert time.perf_counter() - started < 0.1
+
+    assert outbox.stop(timeout=5)
+    assert delivered == [f"msg {i}" for i in range(10)]
+
+
+@pytest.mark.parametrize("persistent", [True, False])
+def test_failed_batches_are_retried_then_dropped(persistent):
+    calls = []
+
+    def flaky_sender(records):
+        calls.append(len(records))
+        # Le premier message échoue toujours, le second passe au 2e essai
+        return [r for r in records if r.payload["text"] == "ko" or len(calls) == 1]
+
+    outbox = NotificationOutbox(
+        senders={CHANNEL_TELEGRAM: flaky_sender},
+        flush_interval=0.01,
+        retry_backoff=0.01,
+        max_attempts=3,
+        min_interval_by_channel={},
+        table=_table(),
+        persistent=persistent,
+    )
+    outbox.enqueue_telegram("ko")
+    outbox.enqueue_telegram("ok")
+    assert outbox.stop(timeout=5)
+
+    stats = outbox.stats()
+    assert stats["delivered"] == 1
+    assert stats["dropped"] == 1
+    assert stats["pending"] == 0
+
+
+def test_sms_alerts_are_batched_together():
+    batches = []
+
+    def sms_sender(records):
+        batches.append([r.payload for r in records])
+        return []
+
+    outbox = NotificationOutbox(
+        senders={CHANNEL_SMS_ALERT: sms_sender},
+        flush_interval=0.05,
+        min_interval_by_channel={CHANNEL_SMS_ALERT: 0.2},
+        table=_table(),
+    )
+    outbox.enqueue_sms_alerts([{"content": "a"}], variation_ids=["v1"])
+    outbox.enqueue_sms_alerts([{"content": "b"}, {"content": "c"}], variation_ids=["v2"])
+    assert outbox.stop(timeout=5)
+
+    sent = [alert["content"] for batch in batches for payload in batch for alert in payload["alerts"]]
+    assert sent == ["a", "b", "c"]
+    assert len(batches) <= 2
+
+
+def test_telegram_messages_are_packed_under_limit():
+    records = [
+        NotificationRecord(channel=CHANNEL_TELEGRAM, payload={"text": "x" * 1500})
+        for _ in range(5)
+    ]
+    packs = _pack_telegram_messages(records)
+    assert [len(pack) for pack in packs] == [2, 2, 1]
+
+
+def test_plain_text_messages_are_not_packed_with_html_ones():
+    flags = [True, True, False, True, False, False]
+    records = [
+        NotificationRecord(channel=CHANNEL_TELEGRAM, payload={"text": f"message {i}", "html": html})
+        for i, html in enumerate(flags)
+    ]
+    packs = _pack_telegram_messages(records)
+    assert [[r.payload["html"] for r in pack] for pack in packs] == [[True, True], [False], [True], [False, False]]
+    assert [r for pack in packs for r in pack] == records
+
+
+def test_records_are_persisted_and_marked_once_delivered():
+    db = {}
+    delivered = []
+
+    def sender(records):
+        delivered.extend(r.payload["text"] for r in records)
+        return []
+
+    outbox = NotificationOutbox(
+        senders={CHANNEL_TELEGRAM: sender}, flush_interval=0.01, min_interval_by_channel={}, table=_table(db)
+    )
+    outbox.enqueue_telegram("import terminé")
+    assert outbox.stop(timeout=5)
+
+    assert delivered == ["import terminé"]
+    assert [(row["channel"], row["status"]) for row in db[OUTBOX_TABLE]] == [(CHANNEL_TELEGRAM, "sent")]
+
+
+def test_records_of_a_crashed_process_are_delivered_by_the_next_one():
+    db = {}
+    table = _table(db)
+    # Process arrêté : une ligne jamais réservée, une réservée dont le bail a expiré
+    table.insert([NotificationRecord(channel=CHANNEL_TELEGRAM, payload={"text": "en attente", "html": True})])
+    table.insert([NotificationRecord(channel=CHANNEL_TELEGRAM, payload={"text": "en cours", "html": True})])
+    table.claim(CHANNEL_TELEGRAM, limit=1, lease_seconds=0)
+
+    delivered = []
+
+    def sender(records):
+        delivered.extend(r.payload["text"] for r in records)
+        return []
+
+    outbox = NotificationOutbox(
+        senders={CHANNEL_TELEGRAM: sender}, flush_interval=0.01, min_interval_by_channel={}, table=_table(db)
+    )
+    outbox.start()
+    deadline = time.monotonic() + 5
+    while len(delivered) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    outbox.stop(timeout=5)
+
+    assert sorted(delivered) == ["en attente", "en cours"]
+    assert {row["status"] for row in db[OUTBOX_TABLE]} == {"sent"}
+
+
+def test_unavailable_table_falls_back_to_memory():
+    class _Down(OutboxTable):
+        def insert(self, records):
+            raise RuntimeError("relation internal.notification_outbox does not exist")
+
+    delivered = []
+
+    def sender(records):
+        delivered.extend(records)
+        return []
+
+    outbox = NotificationOutbox(
+        senders={CHANNEL_TELEGRAM: sender},
+        flush_interval=0.01,
+        min_interval_by_channel={},
+        table=_Down(FakeSupabase({})),
+    )
+    assert outbox.enqueue_telegram("hors ligne")
+    assert outbox.stop(timeout=5)
+    assert [r.payload["text"] for r in delivered] == ["hors ligne"]
+
+
+def test_oversized_telegram_messages_are_split_when_enqueued():
+    db = {}
+    outbox = NotificationOutbox(
+        senders={CHANNEL_TELEGRAM: lambda records: []}, flush_interval=0.01, min_interval_by_channel={}, table=_table(db)
+    )
+    lines = [f"ligne {i} " + "x" * 90 for i in range(100)]
+    outbox.enqueue_telegram("\n".join(lines) + "\n" + "y" * 5000, html=False)
+    assert outbox.stop(timeout=5)
+
+    texts = [row["payload"]["text"] for row in db[OUTBOX_TABLE]]
+    assert len(texts) > 1
+    assert all(len(text) <= TELEGRAM_MAX_MESSAGE_LENGTH for text in texts)
+    assert all(row["payload"]["html"] is False for row in db[OUTBOX_TABLE])
+    # Découpe sur les fins de ligne, rien n'est perdu
+    assert all(text.startswith(("ligne", "y")) for text in texts)
+    assert "".join(texts).replace("\n", "") == "".join(lines) + "y" * 5000
+
+
+def test_split_telegram_text_keeps_whole_lines():
+    text = "\n".join(["a" * 3000, "b" * 3000, "c" * 10])
+    assert split_telegram_text(text) == ["a" * 3000, "b" * 3000 + "\n" + "c" * 10]
+    assert split_telegram_text("court") == ["court"]
@@ -0,0 +1,87 @@
+import asyncio
+import logging
+
+import httpx
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.core.http_pool import AsyncRetryTransport, PoolStats, RetryTransport
+from app.core.query_trace import QueryTraceMiddleware, current_trace, trace_queries
+
+BASE_URL = "https://example.test/rest/v1"
+
+
+def _handler(request):
+    if request.method == "GET":
+        return httpx.Response(200, json=[{"id": 1}, {"id": 2}], headers={"Content-Range": "0-1/*"})
+    return httpx.Response(201, json=[{"id": 3}])
+
+
+def _client():
+    transport = RetryTransport(PoolStats("test"), backoff=0, transport=httpx.MockTransport(_handler))
+    return httpx.Client(transport=transport)
+
+
+def test_queries_are_recorded_in_the_current_trace():
+    with _client() as client, trace_queries("job") as trace:
+        client.get(
+            f"{BASE_URL}/articles",
+            params={"select": "*", "establishment_id": "eq.e1", "date": "gte.2025-01-01"},
+        )
+        client.post(
+            f"{BASE_URL}/market_articles",
+            json=[{"unit_price": 1}],
+            headers={"Content-Profile": "market", "Prefer": "resolution=merge-duplicates"},
+        )
+        client.get("https://example.test/storage/v1/object/x")
+
+    assert trace.count == 2
+    select, upsert = trace.records
+    assert (select.table, select.operation, select.filters) == ("articles", "select", "date=gte&establishment_id=eq")
+    assert select.rows == 2
+    assert select.response_bytes == len(b'[{"id":1},{"id":2}]')
+    assert (upsert.table, upsert.operation) == ("market.market_articles", "upsert")
+    assert upsert.request_bytes > 0
+    assert current_trace() is None
+
+
+def test_repeated_query_shapes_are_logged(caplog):
+    caplog.set_level(logging.WARNING, logger="app.core.query_trace")
+    with _client() as client, trace_queries("edit_article") as trace:
+        for i in range(25):
+            client.get(f"{BASE_URL}/recipes", params={"id": f"eq.{i}"})
+
+    assert trace.repeated_shapes() == [(("recipes", "select", "id=eq"), 25)]
+    assert "select recipes[id=eq]x25" in caplog.text
+
+
+def test_async_queries_are_recorded():
+    async def run():
+        transport = AsyncRetryTransport(PoolStats("test"), backoff=0, transport=httpx.MockTransport(_handler))
+        async with httpx.AsyncClient(transport=transport) as client:
+            with trace_queries("async") as trace:
+                await asyncio.gather(*(client.get(f"{BASE_URL}/articles") for _ in range(3)))
+        return trace
+
+    trace = asyncio.run(run())
+    assert trace.count == 3
+    assert all(record.rows == 2 for record in trace.records)
+
+
+def test_middleware_sets_server_timing_per_request():
+    app = FastAPI()
+    app.add_middleware(QueryTraceMiddleware)
+    http = _client()
+
+    @app.get("/report")
+    def report():
+        for _ in range(3):
+            http.get(f"{BASE_URL}/recipes", params={"establishment_id": "eq.e1"})
+        return {"ok": True}
+
+    with TestClient(app) as client:
+        response = client.get("/report")
+
+    assert response.status_code == 200
+    assert 'desc="PostgREST x3"' in response.headers["server-timing"]
+    assert "app;dur=" in response.headers["server-timing"]
@@ -0,0 +1,116 @@
+import random
+from decimal import Decimal
+
+import pytest
+
+from app.core.config import settings
+from app.core.reference_data import ReferenceDataCache, ScoreScale
+
+
+def _old_score_from_matrix(score_matrix, field, result_value):
+    # Implémentation historique de financial_reports._score_from_matrix
+    for row in score_matrix:
+        threshold = row.get(field)
+        score = row.get("score")
+        if threshold is None or score is None:
+            continue
+        if result_value >= threshold:
+            return float(score)
+    return float(score_matrix[-1].get("score", 0)) if score_matrix else 0
+
+
+def _matrix(rng):
+    rows = [
+        {
+            "id": str(i),
+            "score": rng.choice([None, *range(0, 101, 5)]),
+            "purchase_result": rng.choice([None, round(rng.uniform(-20, 120), 2)]),
+            "financial_result": round(rng.uniform(-30, 40), 1),
+        }
+        for i in range(rng.randint(1, 15))
+    ]
+    # Ordre PostgREST `score.desc` : NULL en premier
+    return sorted(rows, key=lambda r: (r["score"] is not None, -(r["score"] or 0)))
+
+
+class _Loader:
+    def __init__(self, tables):
+        self.tables = tables
+        self.calls = []
+
+    def __call__(self, table):
+        self.calls.append(table)
+        rows = self.tables[table]
+        if isinstance(rows, Exception):
+            raise rows
+        return rows
+
+
+def test_score_scale_matches_linear_scan():
+    rng = random.Random(7)
+    for _ in range(300):
+        matrix = _matrix(rng)
+        for field in ("purchase_result", "financial_result"):
+            scale = ScoreScale(matrix, field)
+            for value in [rng.uniform(-40, 130) for _ in range(20)] + [r[field] for r in matrix if r[field]]:
+                expected = _old_score_from_matrix(matrix, field, value)
+                assert float(scale.score(value) or 0) == float(expected or 0)
+
+
+def test_score_scale_with_decimal_thresholds():
+    matrix = [{"score": 90, "purchase_result": 95.5}, {"score": 50, "purchase_result": 60.1}, {"score": 10, "purchase_result": 0}]
+    scale = ScoreScale(matrix, "purchase_result", lambda v: Decimal(str(v)))
+    assert scale.score(Decimal("95.5")) == 90
+    assert scale.score(Decimal("95.49")) == 50
+    assert scale.score(Decimal("-1")) == 10
+
+
+def test_tables_are_loaded_once_until_invalidated(monkeypatch):
+    monkeypatch.setitem(settings.REFERENCE_DATA_TTL_SECONDS, "vat_rates", 60.0)
+    loader = _Loader({"vat_rates": [{"id": "a", "rate": 5.5}, {"id": "b", "rate": 20}]})
+    cache = ReferenceDataCache(loader)
+
+    assert len(cache.get("vat_rates")) == 2
+    assert cache.get_by_id("vat_rates", "b")["rate"] == 20
+    assert cache.get_by_id("vat_rates", "z") is None
+    assert loader.calls == ["vat_rates"]
+
+    loader.tables["vat_rates"] = [{"id": "a", "rate": 10}]
+    cache.invalidate("vat_rates")
+    assert cache.get_by_id("vat_rates", "a")["rate"] == 10
+    assert cache.stats()["vat_rates"]["hits"] == 2
+    assert cache.stats()["vat_rates"]["loads"] == 2
+    assert cache.stats()["vat_rates"]["hit_ratio"] == 0.5
+
+
+def test_ttl_is_per_table(monkeypatch):
+    monkeypatch.setitem(settings.REFERENCE_DATA_TTL_SECONDS, "maintenance", 0.0)
+    monkeypatch.setitem(settings.REFERENCE_DATA_TTL_SECONDS, "countries", 60.0)
+    loader = _Loader({"maintenance": [{"is_active": False}], "countries": []})
+    cache = ReferenceDataCache(loader)
+
+    for _ in range(3):
+        cache.get("maintenance")
+        cache.get("countries")
+    assert loader.calls.count("maintenance") == 3
+    assert loader.calls.count("countries") == 1
+
+
+def test_score_scale_is_rebuilt_after_reload():
+    loader = _Loader({"score_matrix": [{"score": 80, "financial_result": 10}, {"score": 20, "financial_result": 0}]})
+    cache = ReferenceDataCache(loader)
+    assert cache.score_scale("financial_result").score(12) == 80
+
+    loader.tables["score_matrix"] = [{"score": 70, "financial_result": 15}, {"score": 20, "financial_result": 0}]
+    cache.invalidate()
+    assert cache.score_scale("financial_result").score(12) == 20
+
+
+def test_warm_up_isolates_failing_tables():
+    loader = _Loader({"score_matrix": [{"score": 1}], "countries": RuntimeError("boom")})
+    cache = ReferenceDataCache(loader)
+
+    assert cache.warm_up(["score_matrix", "countries"]) == {"score_matrix": 1}
+    assert cache.stats()["countries"]["errors"] == 1
+    with pytest.raises(RuntimeError):
+        cache.get("countries")
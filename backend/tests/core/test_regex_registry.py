@@ -0,0 +1,81 @@
+import re
+import unicodedata
+
+import pytest
+
+from app.core.regex_registry import RegexPatternRegistry, clean_names, fold_accents
+
+ROWS = [
+    {"type": "supplier_name", "regex": r"(?i)\s+(sas|sarl)$"},
+    {"type": "market_master_article_name", "regex": r"\s*\d+\s*(kg|g)\b"},
+    {"type": "market_master_article_name", "regex": "ignoré"},
+]
+
+NAMES = ["  Crème Fraîche 1 kg ", "Œufs Bio", "JAMBON CUIT 500g", "", None, "Pâté", "ﬁlet de bœuf"]
+
+
+def _old_apply_regex(pattern, value):
+    # Implémentation historique de import_articles._apply_regex
+    if not value:
+        return None
+    txt = value.strip()
+    txt = unicodedata.normalize("NFKD", txt)
+    txt = "".join(c for c in txt if not unicodedata.combining(c))
+    txt = txt.lower()
+    if pattern:
+        txt = re.sub(pattern, "", txt)
+    return txt.strip() or None
+
+
+class _Loader:
+    def __init__(self, rows):
+        self.rows = rows
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.rows
+
+
+def test_fold_accents_matches_per_character_loop():
+    for name in filter(None, NAMES):
+        expected = "".join(c for c in unicodedata.normalize("NFKD", name) if not unicodedata.combining(c))
+        assert fold_accents(name) == expected
+
+
+def test_clean_names_matches_historic_apply_regex():
+    pattern = ROWS[1]["regex"]
+    assert clean_names(NAMES, pattern, fold=True) == [_old_apply_regex(pattern, name) for name in NAMES]
+    assert clean_names(NAMES, None, fold=True) == [_old_apply_regex(None, name) for name in NAMES]
+
+
+def test_registry_loads_table_once_and_keeps_first_pattern_per_type():
+    loader = _Loader(ROWS)
+    registry = RegexPatternRegistry(loader, ttl_seconds=60)
+
+    assert registry.get("supplier_name") == ROWS[0]["regex"]
+    assert registry.get("market_master_article_name") == ROWS[1]["regex"]
+    assert registry.get("inconnu") is None
+    assert registry.compiled("supplier_name").sub("", "Metro SAS") == "Metro"
+    assert loader.calls == 1
+
+
+def test_registry_reloads_after_invalidate_or_ttl():
+    loader = _Loader(ROWS)
+    registry = RegexPatternRegistry(loader, ttl_seconds=60)
+    registry.get("supplier_name")
+
+    loader.rows = [{"type": "supplier_name", "regex": "x"}]
+    registry.invalidate()
+    assert registry.get("supplier_name") == "x"
+
+    expired = RegexPatternRegistry(loader, ttl_seconds=0)
+    expired.get("supplier_name")
+    expired.get("supplier_name")
+    assert loader.calls == 4
+
+
+def test_invalid_pattern_raises_re_error():
+    registry = RegexPatternRegistry(_Loader([{"type": "market_master_article_name", "regex": "("}]))
+    with pytest.raises(re.error):
+        registry.clean_names("market_master_article_name", ["Lait"])
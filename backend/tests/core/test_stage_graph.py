@@ -0,0 +1,90 @@
+import threading
+
+import pytest
+
+from app.core.stage_graph import StageGraph, StageGraphError
+from app.core.unit_of_work import current_unit_of_work, unit_of_work
+
+
+def test_independent_stages_run_concurrently_after_their_dependencies():
+    order = []
+    # Les deux étapes indépendantes ne passent la barrière qu'ensemble
+    barrier = threading.Barrier(2, timeout=5)
+
+    def stage(name, wait=False):
+        def run():
+            if wait:
+                barrier.wait()
+            order.append(name)
+            return name.upper()
+
+        return run
+
+    graph = StageGraph("test", max_workers=4)
+    graph.add("load", stage("load"))
+    graph.add("cascade", stage("cascade", wait=True), after=["load"])
+    graph.add("variations", stage("variations", wait=True))
+    graph.add("sms", stage("sms"), after=["cascade", "variations"])
+    run = graph.run()
+
+    assert order.index("load") < order.index("cascade") < order.index("sms")
+    assert order.index("variations") < order.index("sms")
+    assert run.results == {"load": "LOAD", "cascade": "CASCADE", "variations": "VARIATIONS", "sms": "SMS"}
+    assert set(run.durations) == set(run.completed) == set(run.results)
+
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_non_critical_failure_skips_only_its_dependents(max_workers):
+    ran = []
+
+    def boom():
+        raise RuntimeError("variations KO")
+
+    graph = StageGraph("test", max_workers=max_workers)
+    graph.add("variations", boom, critical=False)
+    graph.add("sms", lambda: ran.append("sms"), after=["variations"], critical=False)
+    graph.add("sms_log", lambda: ran.append("sms_log"), after=["sms"])
+    graph.add("live_score", lambda: ran.append("live_score"), critical=False)
+    run = graph.run()
+
+    assert ran == ["live_score"]
+    assert isinstance(run.failed["variations"], RuntimeError)
+    assert run.skipped == ["sms", "sms_log"]
+
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_critical_failure_is_raised_and_stops_the_graph(max_workers):
+    ran = []
+
+    class CascadeError(Exception):
+        pass
+
+    def cascade():
+        raise CascadeError("cascade KO")
+
+    graph = StageGraph("test", max_workers=max_workers)
+    graph.add("cascade", cascade)
+    graph.add("margins", lambda: ran.append("margins"), after=["cascade"])
+    with pytest.raises(CascadeError):
+        graph.run()
+    assert ran == []
+
+
+def test_stages_share_the_caller_unit_of_work():
+    seen = []
+    with unit_of_work() as uow:
+        graph = StageGraph("test", max_workers=2)
+        graph.add("a", lambda: seen.append(current_unit_of_work()))
+        graph.add("b", lambda: seen.append(current_unit_of_work()))
+        graph.run()
+
+    assert seen == [uow, uow]
+
+
+def test_invalid_graphs_are_rejected():
+    graph = StageGraph("test")
+    graph.add("load", lambda: None)
+    with pytest.raises(StageGraphError):
+        graph.add("load", lambda: None)
+    with pytest.raises(StageGraphError):
+        graph.add("sms", lambda: None, after=["variations"])
@@ -0,0 +1,106 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from app.core.unit_of_work import current_unit_of_work, defer, invalidate, unit_of_work
+
+ROWS = {str(i): {"id": str(i), "name": f"row {i}"} for i in range(10)}
+
+
+def _loader(calls):
+    def load(ids):
+        calls.append(sorted(ids))
+        return {i: ROWS[i] for i in ids if i in ROWS}
+
+    return load
+
+
+def _aloader(calls):
+    async def load(ids):
+        await asyncio.sleep(0)
+        calls.append(sorted(ids))
+        return {i: ROWS[i] for i in ids if i in ROWS}
+
+    return load
+
+
+def test_lookups_are_memoized_and_invalidated_by_writes():
+    calls = []
+    load = _loader(calls)
+    with unit_of_work() as uow:
+        assert uow.load("recipes", 1, load) == ROWS["1"]
+        assert uow.load("recipes", "1", load) is ROWS["1"]
+        assert uow.load("recipes", "missing", load) is None
+        assert uow.load("recipes", "missing", load) is None
+        invalidate("recipes", "1")
+        uow.load("recipes", "1", load)
+
+    assert calls == [["1"], ["missing"], ["1"]]
+    assert current_unit_of_work() is None
+
+
+def test_deferred_ids_are_fetched_in_one_query():
+    calls = []
+    load = _loader(calls)
+    with unit_of_work() as uow:
+        defer("master_articles", ["2", "3", None, "4"])
+        for i in ("2", "3", "4"):
+            assert uow.load("master_articles", i, load) == ROWS[i]
+
+    assert calls == [["2", "3", "4"]]
+
+
+def test_concurrent_async_lookups_are_coalesced():
+    calls = []
+    load = _aloader(calls)
+
+    async def run():
+        with unit_of_work() as uow:
+            results = await asyncio.gather(*(uow.aload("recipes", i, load) for i in ("5", "6", "5", "7")))
+            again = await uow.aload("recipes", "6", load)
+            return results, again, uow.stats
+
+    results, again, stats = asyncio.run(run())
+    assert results == [ROWS["5"], ROWS["6"], ROWS["5"], ROWS["7"]]
+    assert again == ROWS["6"]
+    assert calls == [["5", "6", "7"]]
+    assert stats["queries"] == 1
+
+
+def test_nested_contexts_share_the_outer_unit_of_work():
+    with unit_of_work() as outer:
+        with unit_of_work() as inner:
+            assert inner is outer
+
+
+def test_one_unit_of_work_can_be_shared_across_threads():
+    calls = []
+    load = _loader(calls)
+    with unit_of_work() as uow:
+        uow.defer("recipes", ROWS)
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(lambda i: uow.load("recipes", str(i % 10), load), range(200)))
+
+    assert results == [ROWS[str(i % 10)] for i in range(200)]
+    assert uow.stats["hits"] + uow.stats["misses"] == 200
+    assert uow.stats["queries"] == len(calls)
+
+
+def test_rows_invalidated_during_their_load_are_not_memoized():
+    calls = []
+    rows = dict(ROWS)
+
+    with unit_of_work() as uow:
+
+        def load(ids):
+            calls.append(sorted(ids))
+            found = {i: rows[i] for i in ids}
+            if len(calls) == 1:
+                # Écriture d'une autre étape pendant la requête
+                rows["1"] = {"id": "1", "name": "modifiée"}
+                uow.invalidate("recipes", "1")
+            return found
+
+        assert uow.load("recipes", "1", load) == ROWS["1"]
+        assert uow.load("recipes", "1", load) == {"id": "1", "name": "modifiée"}
+
+    assert calls == [["1"], ["1"]]
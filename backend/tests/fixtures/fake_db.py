@@ -3,8 +3,8 @@
 
 from uuid import uuid4
 from typing import Dict, Any
-from datetime import datetime, date
-import uuid as uuid_mod
+
+from tests.fixtures.fake_postgrest import TableIndexes, normalize as _normalize
 
 DB = {
     "messages_ia": [],
@@ -67,106 +67,34 @@ DB = {
     "regex_patterns": [],
 }
 
+# Index de hachage (id / *_id) et index triés (plages de dates), construits à
+# la demande et maintenus par _insert / _update / _delete
+_INDEXES = TableIndexes(DB)
+
 def reset_db():
     for key in DB:
         DB[key] = []
+    _INDEXES.clear()
 
 
-def _normalize(x):
-    if isinstance(x, uuid_mod.UUID):
-        return str(x)
-    if isinstance(x, datetime):
-        return x.date()
-    if isinstance(x, date):
-        return x
-    if isinstance(x, str) and len(x) == 10 and x.count("-") == 2:
-        try:
-            return datetime.fromisoformat(x).date()
-        except Exception:
-            return x
-    return x
-
 def _find(table: str, filters=None, limit=1000):
-    if filters is None:
-        filters = {}
-    out = []
-    for row in DB[table]:
-        ok = True
-        for k, v in filters.items():
-            if v is None:
-                continue
-            if k in ("order_by", "direction", "limit", "page"):
-                continue
-
-            if k.endswith("_lte"):
-                base = k[:-4]
-                rv = _normalize(row.get(base))
-                fv = _normalize(v)
-                if rv is None or rv > fv:
-                    ok = False
-                    break
-                continue
-
-            if k.endswith("_gte"):
-                base = k[:-4]
-                rv = _normalize(row.get(base))
-                fv = _normalize(v)
-                if rv is None or rv < fv:
-                    ok = False
-                    break
-                continue
-
-            if k.endswith("_neq"):
-                base = k[:-4]
-                rv = _normalize(row.get(base))
-                fv = _normalize(v)
-                if rv == fv:
-                    ok = False
-                    break
-                continue
-
-            if k.endswith("_like"):
-                base = k[:-5]
-                rv = row.get(base)
-                if rv is None or str(v).strip("%") not in str(rv):
-                    ok = False
-                    break
-                continue
-
-            if _normalize(row.get(k)) != _normalize(v):
-                ok = False
-                break
-
-        if ok:
-            out.append(row)
-
-    order_by = filters.get("order_by")
-    direction = filters.get("direction")
-
-    if order_by:
-        out.sort(
-            key=lambda r: _normalize(r.get(order_by)),
-            reverse=(direction == "desc")
-        )
-
-    return out[:limit]
+    return _INDEXES.find(table, filters or {}, limit)
+
+
+def _get_by_id(table: str, id):
+    return _INDEXES.get_by_id(table, id)
 
 
 def _insert(table: str, data: Dict[str, Any]):
-    DB[table].append(data)
-    return data
+    return _INDEXES.insert(table, data)
 
 
 def _update(table: str, id, payload: Dict[str, Any]):
-    for row in DB[table]:
-        if row.get("id") == id:
-            row.update(payload)
-            return row
-    return None
+    return _INDEXES.update(table, id, payload)
 
 
 def _delete(table: str, id):
-    DB[table] = [r for r in DB[table] if r.get("id") != id]
+    _INDEXES.delete(table, id)
     return {"deleted": True}
 
 # --- HELPERS AUTO-GÉNÉRÉS ---
@@ -0,0 +1,1287 @@
+"""
+Base de test en mémoire indexée + client compatible PostgREST.
+
+- `TableIndexes` : index de hachage (colonnes `id` / `*_id`) et index triés
+  (filtres de plage sur les dates) construits à la demande et maintenus à
+  chaque insert / update / delete. Utilisé par `fake_db._find` & co.
+- `FakeSupabase` : remplaçant hors ligne de `supabase` (`table/schema/select/
+  eq/in_/gte/lte/order/range/insert/update/upsert/delete/single/execute`)
+  branché sur le même `DB`, pour exécuter les vrais chemins
+  `supabase.table(...)` des logiques à volumétrie réelle.
+- `install_fake_supabase(monkeypatch, client)` remplace le client dans tous
+  les modules `app.*` déjà importés.
+
+Les index sont reconstruits si une table est remplacée ou modifiée
+directement (`DB[table].append(...)`) ; une modification « à la main » d'une
+colonne indexée sur une ligne existante doit passer par `_update`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal, ROUND_HALF_UP
+import re
+import sys
+import threading
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+import uuid as uuid_mod
+from uuid import uuid4
+
+RESERVED_FILTER_KEYS = ("order_by", "direction", "limit", "page")
+RANGE_OPS = ("gt", "gte", "lt", "lte")
+
+Condition = Tuple[str, str, Any]
+
+
+def normalize(x):
+    if isinstance(x, uuid_mod.UUID):
+        return str(x)
+    if isinstance(x, datetime):
+        return x.date()
+    if isinstance(x, date):
+        return x
+    if isinstance(x, str) and len(x) == 10 and x.count("-") == 2:
+        try:
+            return datetime.fromisoformat(x).date()
+        except Exception:
+            return x
+    return x
+
+
+def _temporal(x):
+    """Date / datetime / chaîne ISO -> datetime naïf (comparaison à la Postgres)."""
+    if isinstance(x, datetime):
+        return x.replace(tzinfo=None)
+    if isinstance(x, date):
+        return datetime.combine(x, time())
+    if isinstance(x, str) and len(x) >= 10 and x[4:5] == "-" and x[7:8] == "-":
+        try:
+            return datetime.fromisoformat(x.replace("Z", "+00:00")).replace(tzinfo=None)
+        except ValueError:
+            return x
+    return x
+
+
+def _compare(op: str, left: Any, right: Any) -> bool:
+    try:
+        return _COMPARATORS[op](left, right)
+    except TypeError:
+        # ex. timestamp stocké en chaîne ISO comparé à une date
+        return _COMPARATORS[op](_temporal(left), _temporal(right))
+
+
+_COMPARATORS: Dict[str, Callable[[Any, Any], bool]] = {
+    "gte": lambda a, b: a >= b,
+    "lte": lambda a, b: a <= b,
+    "gt": lambda a, b: a > b,
+    "lt": lambda a, b: a < b,
+}
+
+
+def sort_key(value: Any) -> Any:
+    return _temporal(normalize(value))
+
+
+def _is_hash_column(column: str) -> bool:
+    return column == "id" or column.endswith("_id")
+
+
+def _hashable(value: Any) -> bool:
+    try:
+        hash(value)
+    except TypeError:
+        return False
+    return True
+
+
+def _like_regex(pattern: str, ignore_case: bool) -> re.Pattern:
+    parts = (".*" if c == "%" else "." if c == "_" else re.escape(c) for c in str(pattern))
+    return re.compile("^" + "".join(parts) + "$", re.IGNORECASE if ignore_case else 0)
+
+
+def _matches(row: Dict[str, Any], condition: Condition) -> bool:
+    op, column, value = condition
+    if op == "like_contains":
+        # Sémantique historique de `_find` : `<col>_like` = sous-chaîne
+        rv = row.get(column)
+        return rv is not None and str(value).strip("%") in str(rv)
+    if op in ("like", "ilike"):
+        rv = row.get(column)
+        return rv is not None and _like_regex(value, op == "ilike").match(str(rv)) is not None
+    if op == "is":
+        rv = row.get(column)
+        if value in (None, "null"):
+            return rv is None
+        return rv is (value in (True, "true"))
+
+    rv = normalize(row.get(column))
+    if op == "eq":
+        return rv == normalize(value)
+    if op == "neq":
+        return rv != normalize(value)
+    if op == "in":
+        return rv in {normalize(v) for v in value}
+    if rv is None:
+        return False
+    if op in _COMPARATORS:
+        return _compare(op, rv, normalize(value))
+    raise ValueError(f"Opérateur non supporté : {op}")
+
+
+def filters_to_conditions(filters: Dict[str, Any]) -> List[Condition]:
+    """Convertit les filtres des services (`date_gte`, `name_like`...) en conditions."""
+    conditions: List[Condition] = []
+    for key, value in filters.items():
+        if value is None or key in RESERVED_FILTER_KEYS:
+            continue
+        if key.endswith("_lte"):
+            conditions.append(("lte", key[:-4], value))
+        elif key.endswith("_gte"):
+            conditions.append(("gte", key[:-4], value))
+        elif key.endswith("_neq"):
+            conditions.append(("neq", key[:-4], value))
+        elif key.endswith("_like"):
+            conditions.append(("like_contains", key[:-5], value))
+        else:
+            conditions.append(("eq", key, value))
+    return conditions
+
+
+# ---------------------------------------------------------------------------
+# Index
+# ---------------------------------------------------------------------------
+
+
+class _Table:
+    def __init__(self, rows: List[Dict[str, Any]]) -> None:
+        self.rows = rows
+        self.size = len(rows)
+        self.seq: Dict[int, int] = {id(row): i for i, row in enumerate(rows)}
+        self.next_seq = len(rows)
+        self.hash: Dict[str, Dict[Any, List[Dict[str, Any]]]] = {}
+        self.sorted: Dict[str, Tuple[List[Any], List[Dict[str, Any]]]] = {}
+        self.unindexable: set[str] = set()
+
+    # --- Construction à la demande --------------------------------------
+
+    def hash_index(self, column: str) -> Optional[Dict[Any, List[Dict[str, Any]]]]:
+        if column in self.unindexable:
+            return None
+        index = self.hash.get(column)
+        if index is None:
+            index = {}
+            for row in self.rows:
+                key = normalize(row.get(column))
+                if not _hashable(key):
+                    self.unindexable.add(column)
+                    return None
+                index.setdefault(key, []).append(row)
+            self.hash[column] = index
+        return index
+
+    def sorted_index(self, column: str) -> Optional[Tuple[List[Any], List[Dict[str, Any]]]]:
+        if column in self.unindexable:
+            return None
+        index = self.sorted.get(column)
+        if index is None:
+            pairs = [(sort_key(row.get(column)), row) for row in self.rows]
+            pairs = [(key, row) for key, row in pairs if key is not None]
+            try:
+                pairs.sort(key=lambda pair: pair[0])
+            except TypeError:
+                self.unindexable.add(column)
+                return None
+            index = ([key for key, _ in pairs], [row for _, row in pairs])
+            self.sorted[column] = index
+        return index
+
+    # --- Maintenance ------------------------------------------------------
+
+    def add(self, row: Dict[str, Any]) -> None:
+        self.seq[id(row)] = self.next_seq
+        self.next_seq += 1
+        self._index_row(row)
+
+    def _index_row(self, row: Dict[str, Any]) -> None:
+        for column, index in list(self.hash.items()):
+            key = normalize(row.get(column))
+            if not _hashable(key):
+                self.hash.pop(column)
+                self.unindexable.add(column)
+                continue
+            index.setdefault(key, []).append(row)
+        for column, (keys, rows) in list(self.sorted.items()):
+            key = sort_key(row.get(column))
+            if key is None:
+                continue
+            try:
+                position = bisect_right(keys, key)
+            except TypeError:
+                self.sorted.pop(column)
+                continue
+            keys.insert(position, key)
+            rows.insert(position, row)
+
+    def unindex_row(self, row: Dict[str, Any]) -> None:
+        for column, index in self.hash.items():
+            bucket = index.get(normalize(row.get(column)))
+            if bucket:
+                for i, candidate in enumerate(bucket):
+                    if candidate is row:
+                        del bucket[i]
+                        break
+        for column, (keys, rows) in list(self.sorted.items()):
+            key = sort_key(row.get(column))
+            if key is None:
+                continue
+            try:
+                lo, hi = bisect_left(keys, key), bisect_right(keys, key)
+            except TypeError:
+                self.sorted.pop(column)
+                continue
+            for i in range(lo, hi):
+                if rows[i] is row:
+                    del keys[i]
+                    del rows[i]
+                    break
+
+    def reindex_row(self, row: Dict[str, Any]) -> None:
+        self._index_row(row)
+
+    # --- Sélection des candidats --------------------------------------------
+
+    def candidates(self, conditions: Sequence[Condition]) -> List[Dict[str, Any]]:
+        best: Optional[List[Dict[str, Any]]] = None
+        for op, column, value in conditions:
+            found: Optional[List[Dict[str, Any]]] = None
+            if op == "eq" and _is_hash_column(column):
+                index = self.hash_index(column)
+                key = normalize(value)
+                if index is not None and _hashable(key):
+                    found = index.get(key, [])
+            elif op == "in" and _is_hash_column(column):
+                index = self.hash_index(column)
+                keys = [normalize(v) for v in value]
+                if index is not None and all(_hashable(k) for k in keys):
+                    found = [row for key in dict.fromkeys(keys) for row in index.get(key, [])]
+            elif op in RANGE_OPS:
+                found = self._range(column, op, value)
+            if found is not None and (best is None or len(found) < len(best)):
+                best = found
+                if not best:
+                    break
+
+        if best is None:
+            return list(self.rows)
+        # Ordre d'insertion, comme un parcours complet de la table
+        return sorted(best, key=lambda row: self.seq.get(id(row), 0))
+
+    def _range(self, column: str, op: str, value: Any) -> Optional[List[Dict[str, Any]]]:
+        index = self.sorted_index(column)
+        if index is None:
+            return None
+        keys, rows = index
+        key = sort_key(value)
+        try:
+            if op == "gte":
+                return rows[bisect_left(keys, key):]
+            if op == "gt":
+                return rows[bisect_right(keys, key):]
+            if op == "lte":
+                return rows[: bisect_right(keys, key)]
+            return rows[: bisect_left(keys, key)]
+        except TypeError:
+            return None
+
+
+class TableIndexes:
+    """Index des tables d'un dict `{table: [rows]}` (le dict reste la source)."""
+
+    def __init__(self, db: Dict[str, List[Dict[str, Any]]]) -> None:
+        self.db = db
+        self._tables: Dict[str, _Table] = {}
+        # Lignes examinées par les sélections, et sélections servies par un index
+        self.scanned = 0
+        self.index_hits = 0
+
+    def clear(self) -> None:
+        self._tables.clear()
+
+    def table(self, name: str) -> _Table:
+        rows = self.db.setdefault(name, [])
+        table = self._tables.get(name)
+        if table is None or table.rows is not rows or table.size != len(rows):
+            table = self._tables[name] = _Table(rows)
+        return table
+
+    # --- Lecture -----------------------------------------------------------
+
+    def select(self, name: str, conditions: Sequence[Condition]) -> List[Dict[str, Any]]:
+        table = self.table(name)
+        candidates = table.candidates(conditions)
+        self.scanned += len(candidates)
+        if len(candidates) < len(table.rows):
+            self.index_hits += 1
+        return [row for row in candidates if all(_matches(row, c) for c in conditions)]
+
+    def find(self, name: str, filters: Dict[str, Any], limit: int = 1000) -> List[Dict[str, Any]]:
+        out = self.select(name, filters_to_conditions(filters))
+        order_by = filters.get("order_by")
+        if order_by:
+            out.sort(key=lambda r: normalize(r.get(order_by)), reverse=filters.get("direction") == "desc")
+        return out[:limit]
+
+    def get_by_id(self, name: str, id: Any) -> Optional[Dict[str, Any]]:
+        for row in self.table(name).candidates([("eq", "id", id)]):
+            if row.get("id") == id:
+                return row
+        return None
+
+    # --- Écriture ----------------------------------------------------------
+
+    def insert(self, name: str, row: Dict[str, Any]) -> Dict[str, Any]:
+        table = self.table(name)
+        table.rows.append(row)
+        table.size += 1
+        table.add(row)
+        return row
+
+    def update_row(self, name: str, row: Dict[str, Any], payload: Dict[str, Any]) -> Dict[str, Any]:
+        table = self.table(name)
+        table.unindex_row(row)
+        row.update(payload)
+        table.reindex_row(row)
+        return row
+
+    def update(self, name: str, id: Any, payload: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        row = self.get_by_id(name, id)
+        if row is None:
+            return None
+        return self.update_row(name, row, payload)
+
+    def delete_rows(self, name: str, doomed: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        table = self.table(name)
+        doomed_ids = {id(row) for row in doomed}
+        if not doomed_ids:
+            return []
+        removed = [row for row in table.rows if id(row) in doomed_ids]
+        for row in removed:
+            table.unindex_row(row)
+            table.seq.pop(id(row), None)
+        table.rows[:] = [row for row in table.rows if id(row) not in doomed_ids]
+        table.size = len(table.rows)
+        return removed
+
+    def delete(self, name: str, id: Any) -> List[Dict[str, Any]]:
+        table = self.table(name)
+        return self.delete_rows(
+            name, [row for row in table.candidates([("eq", "id", id)]) if row.get("id") == id]
+        )
+
+
+# ---------------------------------------------------------------------------
+# Client PostgREST
+# ---------------------------------------------------------------------------
+
+
+def _to_json(value: Any) -> Any:
+    if isinstance(value, uuid_mod.UUID):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, dict):
+        return {k: _to_json(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_to_json(v) for v in value]
+    return value
+
+
+def _no_row_error(count: int):
+    from postgrest.exceptions import APIError
+
+    return APIError(
+        {
+            "code": "PGRST116",
+            "message": "JSON object requested, multiple (or no) rows returned",
+            "details": f"The result contains {count} rows",
+            "hint": None,
+        }
+    )
+
+
+class FakeQuery:
+    def __init__(self, client: "FakeSupabase", table: str) -> None:
+        self.client = client
+        self.table_name = table
+        self.action = "select"
+        self.columns = "*"
+        self.count_mode: Optional[str] = None
+        self.payload: Any = None
+        self.on_conflict: Optional[str] = None
+        self.ignore_duplicates = False
+        self.returning = "representation"
+        self.conditions: List[Condition] = []
+        self.orders: List[Tuple[str, bool, Optional[bool]]] = []
+        self.offset = 0
+        self.max_rows: Optional[int] = None
+        self.single_mode: Optional[str] = None
+
+    # --- Actions -----------------------------------------------------------
+
+    def select(self, *columns: str, count: Optional[str] = None, **_kwargs) -> "FakeQuery":
+        self.columns = ",".join(columns) if columns else "*"
+        self.count_mode = count
+        return self
+
+    def insert(self, data, *, returning=None, default_to_null: bool = True, **_kwargs) -> "FakeQuery":
+        self.action = "insert"
+        self.payload = data
+        self.returning = getattr(returning, "value", returning) or "representation"
+        return self
+
+    def upsert(
+        self, data, *, on_conflict: str = "id", returning=None, ignore_duplicates: bool = False, **_kwargs
+    ) -> "FakeQuery":
+        self.action = "upsert"
+        self.payload = data
+        self.on_conflict = on_conflict or "id"
+        # on conflict do nothing : seules les lignes insérées sont retournées
+        self.ignore_duplicates = ignore_duplicates
+        self.returning = getattr(returning, "value", returning) or "representation"
+        return self
+
+    def update(self, data, **_kwargs) -> "FakeQuery":
+        self.action = "update"
+        self.payload = data
+        return self
+
+    def delete(self, **_kwargs) -> "FakeQuery":
+        self.action = "delete"
+        return self
+
+    # --- Filtres -------------------------------------------------------------
+
+    def _filter(self, op: str, column: str, value: Any) -> "FakeQuery":
+        self.conditions.append((op, column, value))
+        return self
+
+    def eq(self, column, value):
+        return self._filter("eq", column, value)
+
+    def neq(self, column, value):
+        return self._filter("neq", column, value)
+
+    def gt(self, column, value):
+        return self._filter("gt", column, value)
+
+    def gte(self, column, value):
+        return self._filter("gte", column, value)
+
+    def lt(self, column, value):
+        return self._filter("lt", column, value)
+
+    def lte(self, column, value):
+        return self._filter("lte", column, value)
+
+    def in_(self, column, values):
+        return self._filter("in", column, list(values))
+
+    def is_(self, column, value):
+        return self._filter("is", column, value)
+
+    def like(self, column, pattern):
+        return self._filter("like", column, pattern)
+
+    def ilike(self, column, pattern):
+        return self._filter("ilike", column, pattern)
+
+    # --- Tri / pagination ----------------------------------------------------
+
+    def order(self, column: str, *, desc: bool = False, nullsfirst: Optional[bool] = None, **_kwargs):
+        self.orders.append((column, desc, nullsfirst))
+        return self
+
+    def limit(self, size: int, **_kwargs):
+        self.max_rows = size
+        return self
+
+    def range(self, start: int, end: int, **_kwargs):
+        self.offset = start
+        self.max_rows = end - start + 1
+        return self
+
+    def single(self):
+        self.single_mode = "single"
+        return self
+
+    def maybe_single(self):
+        self.single_mode = "maybe"
+        return self
+
+    # --- Exécution -----------------------------------------------------------
+
+    def _sorted(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        for column, desc, nullsfirst in reversed(self.orders):
+            nulls_first = desc if nullsfirst is None else nullsfirst
+            present = [r for r in rows if r.get(column) is not None]
+            missing = [r for r in rows if r.get(column) is None]
+            present.sort(key=lambda r: sort_key(r.get(column)), reverse=desc)
+            rows = missing + present if nulls_first else present + missing
+        return rows
+
+    def _project(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        columns = [c.strip() for c in self.columns.split(",") if c.strip()]
+        if not columns or "*" in columns or any("(" in c for c in columns):
+            return _to_json(row)
+        projected = {}
+        for column in columns:
+            alias, _, source = column.partition(":")
+            source = source or alias
+            projected[alias] = row.get(source)
+        return _to_json(projected)
+
+    def _run(self) -> SimpleNamespace:
+        with self.client.lock:
+            return self._execute()
+
+    def _execute(self) -> SimpleNamespace:
+        indexes = self.client.indexes
+        self.client.record(self.action, self.table_name)
+
+        if self.action in ("insert", "upsert"):
+            rows = self.payload if isinstance(self.payload, list) else [self.payload]
+            written = []
+            for data in rows:
+                data = dict(data)
+                existing = None
+                if self.action == "upsert":
+                    keys = [k.strip() for k in (self.on_conflict or "id").split(",")]
+                    if all(k in data for k in keys):
+                        matches = indexes.select(self.table_name, [("eq", k, data[k]) for k in keys])
+                        existing = matches[0] if matches else None
+                if existing is not None and self.ignore_duplicates:
+                    continue
+                if existing is not None:
+                    old = dict(existing)
+                    written.append(indexes.update_row(self.table_name, existing, data))
+                    self.client.fire(self.table_name, "update", old, existing)
+                    continue
+                data.setdefault("id", str(uuid4()))
+                written.append(indexes.insert(self.table_name, data))
+                self.client.fire(self.table_name, "insert", None, data)
+            data_out = [] if self.returning == "minimal" else [self._project(r) for r in written]
+            return SimpleNamespace(data=data_out, count=None)
+
+        matched = indexes.select(self.table_name, self.conditions)
+        if self.action == "update":
+            for row in matched:
+                old = dict(row)
+                indexes.update_row(self.table_name, row, dict(self.payload))
+                self.client.fire(self.table_name, "update", old, row)
+            return SimpleNamespace(data=[self._project(r) for r in matched], count=None)
+        if self.action == "delete":
+            removed = indexes.delete_rows(self.table_name, matched)
+            for row in removed:
+                self.client.fire(self.table_name, "delete", row, None)
+            return SimpleNamespace(data=[self._project(r) for r in removed], count=None)
+
+        rows = self._sorted(matched)
+        total = len(rows)
+        end = None if self.max_rows is None else self.offset + self.max_rows
+        rows = rows[self.offset:end]
+        if self.client.max_rows is not None:
+            rows = rows[: self.client.max_rows]
+        data = [self._project(r) for r in rows]
+        count = total if self.count_mode else None
+
+        if self.single_mode == "single":
+            if len(data) != 1:
+                raise _no_row_error(len(data))
+            return SimpleNamespace(data=data[0], count=count)
+        if self.single_mode == "maybe":
+            if len(data) > 1:
+                raise _no_row_error(len(data))
+            return SimpleNamespace(data=data[0] if data else None, count=count)
+        return SimpleNamespace(data=data, count=count)
+
+    def execute(self):
+        if self.client.asynchronous:
+            return self._run_async()
+        return self._run()
+
+    async def _run_async(self) -> SimpleNamespace:
+        if self.client.latency:
+            await asyncio.sleep(self.client.latency)
+        return self._run()
+
+
+class FakeRPC:
+    def __init__(self, client: "FakeSupabase", name: str, params: Dict[str, Any]) -> None:
+        self.client = client
+        self.name = name
+        self.params = params
+        self.offset = 0
+        self.max_rows: Optional[int] = None
+
+    def range(self, start: int, end: int, **_kwargs) -> "FakeRPC":
+        self.offset = start
+        self.max_rows = end - start + 1
+        return self
+
+    def _run(self) -> SimpleNamespace:
+        with self.client.lock:
+            return self._execute()
+
+    def _execute(self) -> SimpleNamespace:
+        self.client.record("rpc", self.name)
+        function = self.client.rpc_functions.get(self.name)
+        if function is None:
+            raise KeyError(f"RPC non enregistrée dans le client de test : {self.name}")
+        data = function(self.client, **self.params)
+        if isinstance(data, list):
+            # Fonction ensembliste : pagination et plafond max-rows comme PostgREST
+            end = None if self.max_rows is None else self.offset + self.max_rows
+            data = data[self.offset:end]
+            if self.client.max_rows is not None:
+                data = data[: self.client.max_rows]
+        return SimpleNamespace(data=_to_json(data), count=None)
+
+    def execute(self):
+        if self.client.asynchronous:
+            async def _run_async():
+                if self.client.latency:
+                    await asyncio.sleep(self.client.latency)
+                return self._run()
+
+            return _run_async()
+        return self._run()
+
+
+# ---------------------------------------------------------------------------
+# Fonctions SQL du dépôt (backend/sql/*.sql) rejouées en mémoire
+# ---------------------------------------------------------------------------
+
+
+def rpc_last_article_prices_before(client: "FakeSupabase", p_establishment_id, p_master_article_ids, p_before):
+    """Équivalent de `last_article_prices_before` : dernier article < p_before par master_article."""
+    out = []
+    for master_id in dict.fromkeys(str(mid) for mid in p_master_article_ids or []):
+        rows = client.indexes.select(
+            "articles",
+            [
+                ("eq", "establishment_id", str(p_establishment_id)),
+                ("eq", "master_article_id", master_id),
+                ("lt", "date", p_before),
+            ],
+        )
+        if not rows:
+            continue
+        last = max(rows, key=lambda r: (sort_key(r.get("date")), sort_key(r.get("created_at")) or datetime.min))
+        out.append(
+            {
+                "master_article_id": master_id,
+                "id": last.get("id"),
+                "unit_price": last.get("unit_price"),
+                "date": last.get("date"),
+            }
+        )
+    return out
+
+
+def _date_trunc(granularity: str, value: date) -> date:
+    if granularity == "month":
+        return value.replace(day=1)
+    if granularity == "week":
+        return date.fromordinal(value.toordinal() - value.weekday())
+    return value
+
+
+def rpc_invoice_spend_by_period(
+    client: "FakeSupabase",
+    p_establishment_id,
+    p_start,
+    p_end,
+    p_granularity="month",
+    p_supplier_ids=None,
+    p_supplier_labels=None,
+):
+    """Équivalent de `invoice_spend_by_period` : somme des factures par période × fournisseur × label."""
+    if p_granularity not in ("day", "week", "month"):
+        return []
+    conditions = [
+        ("eq", "establishment_id", str(p_establishment_id)),
+        ("gte", "date", p_start),
+        ("lte", "date", p_end),
+    ]
+    if p_supplier_ids:
+        conditions.append(("in", "supplier_id", [str(sid) for sid in p_supplier_ids]))
+    buckets: Dict[Tuple[Any, ...], Dict[str, Any]] = {}
+    for invoice in client.indexes.select("invoices", conditions):
+        supplier = client.indexes.get_by_id("suppliers", invoice.get("supplier_id"))
+        label = supplier.get("label") if supplier else None
+        if p_supplier_labels and label not in p_supplier_labels:
+            continue
+        period = _date_trunc(p_granularity, sort_key(invoice["date"]).date())
+        key = (period, invoice.get("supplier_id"), label)
+        bucket = buckets.setdefault(
+            key,
+            {
+                "period": period,
+                "supplier_id": key[1],
+                "supplier_label": label,
+                "invoices_count": 0,
+                "sum_ht": Decimal("0"),
+                "sum_tva": Decimal("0"),
+                "sum_ttc": Decimal("0"),
+            },
+        )
+        bucket["invoices_count"] += 1
+        for column, total in (("total_excl_tax", "sum_ht"), ("total_tax", "sum_tva"), ("total_incl_tax", "sum_ttc")):
+            bucket[total] += Decimal(str(invoice.get(column) or 0))
+    return [buckets[key] for key in sorted(buckets, key=lambda k: (k[0], str(k[1])))]
+
+
+def _round_half_up(value: Optional[Decimal], exp: str) -> Optional[Decimal]:
+    return value.quantize(Decimal(exp), rounding=ROUND_HALF_UP) if value is not None else None
+
+
+def rpc_master_article_purchase_stats(
+    client: "FakeSupabase",
+    p_establishment_id,
+    p_start,
+    p_end,
+    p_master_article_ids=None,
+    p_supplier_id=None,
+    p_include_invoices=False,
+):
+    """Équivalent de `master_article_purchase_stats` : agrégats d'achat par master_article."""
+    conditions = [
+        ("eq", "establishment_id", str(p_establishment_id)),
+        ("gte", "date", p_start),
+        ("lte", "date", p_end),
+    ]
+    if p_master_article_ids is not None:
+        conditions.append(("in", "master_article_id", [str(mid) for mid in p_master_article_ids]))
+    groups: Dict[str, List[Dict[str, Any]]] = {}
+    for article in client.indexes.select("articles", conditions):
+        master = client.indexes.get_by_id("master_articles", article.get("master_article_id"))
+        if master is None or (p_supplier_id and str(master.get("supplier_id")) != str(p_supplier_id)):
+            continue
+        groups.setdefault(str(article["master_article_id"]), []).append(article)
+
+    out = []
+    for master_id, articles in sorted(groups.items()):
+        articles.sort(key=lambda a: (sort_key(a.get("date")), str(a.get("id"))))
+        invoice_ids = sorted({str(a["invoice_id"]) for a in articles if a.get("invoice_id")})
+        prices = [Decimal(str(a["unit_price"])) for a in articles if a.get("unit_price") is not None]
+        quantities = [Decimal(str(a["quantity"])) for a in articles if a.get("quantity") is not None]
+        spent = [
+            Decimal(str(a["unit_price"])) * Decimal(str(a["quantity"]))
+            for a in articles
+            if a.get("unit_price") is not None and a.get("quantity") is not None
+        ]
+        out.append(
+            {
+                "master_article_id": master_id,
+                "count_articles": len(articles),
+                "avg_unit_price": _round_half_up(sum(prices) / len(prices) if prices else None, "0.001"),
+                "min_unit_price": _round_half_up(min(prices) if prices else None, "0.001"),
+                "max_unit_price": _round_half_up(max(prices) if prices else None, "0.001"),
+                "total_quantity": _round_half_up(sum(quantities) if quantities else None, "0.001"),
+                "avg_quantity": _round_half_up(sum(quantities) / len(quantities) if quantities else None, "0.001"),
+                "total_spent": _round_half_up(sum(spent) if spent else None, "0.01"),
+                "price_first": _round_half_up(prices[0] if prices else None, "0.001"),
+                "price_last": _round_half_up(prices[-1] if prices else None, "0.001"),
+                "invoices_count": len(invoice_ids),
+                "invoice_ids": (invoice_ids or None) if p_include_invoices else None,
+            }
+        )
+    return out
+
+
+def _month_start(value: Any) -> Optional[date]:
+    day = _temporal(value)
+    if isinstance(day, datetime):
+        day = day.date()
+    return day.replace(day=1) if isinstance(day, date) else None
+
+
+def rpc_refresh_master_article_purchase_summary(
+    client: "FakeSupabase",
+    p_establishment_id,
+    p_master_article_ids,
+    p_months=None,
+):
+    """Équivalent de `refresh_master_article_purchase_summary` : recalcul des mois touchés."""
+    establishment_id = str(p_establishment_id)
+    master_ids = [str(mid) for mid in p_master_article_ids or []]
+    months = {_month_start(m) for m in p_months} if p_months is not None else None
+
+    def _in_scope(month: Optional[date]) -> bool:
+        return month is not None and (months is None or month in months)
+
+    doomed = [
+        row
+        for row in client.indexes.select(
+            "master_article_purchase_summary",
+            [("eq", "establishment_id", establishment_id), ("in", "master_article_id", master_ids)],
+        )
+        if _in_scope(_month_start(row.get("month")))
+    ]
+    client.indexes.delete_rows("master_article_purchase_summary", doomed)
+
+    groups: Dict[Tuple[str, date], List[Dict[str, Any]]] = {}
+    for article in client.indexes.select(
+        "articles",
+        [("eq", "establishment_id", establishment_id), ("in", "master_article_id", master_ids)],
+    ):
+        month = _month_start(article.get("date"))
+        if _in_scope(month):
+            groups.setdefault((str(article["master_article_id"]), month), []).append(article)
+
+    for (master_id, month), articles in groups.items():
+        articles.sort(key=lambda a: (sort_key(a.get("date")), str(a.get("id"))))
+        priced = [a for a in articles if a.get("unit_price") is not None]
+        prices = [Decimal(str(a["unit_price"])) for a in priced]
+        quantities = [Decimal(str(a["quantity"])) for a in articles if a.get("quantity") is not None]
+        spent = [
+            Decimal(str(a["unit_price"])) * Decimal(str(a["quantity"]))
+            for a in priced
+            if a.get("quantity") is not None
+        ]
+        client.indexes.insert(
+            "master_article_purchase_summary",
+            {
+                "establishment_id": establishment_id,
+                "master_article_id": master_id,
+                "month": month.isoformat(),
+                "purchases_count": len(articles),
+                "invoices_count": len({str(a["invoice_id"]) for a in articles if a.get("invoice_id")}),
+                "priced_count": len(prices),
+                "unit_price_total": str(sum(prices, Decimal("0"))),
+                "min_unit_price": str(min(prices)) if prices else None,
+                "max_unit_price": str(max(prices)) if prices else None,
+                "first_unit_price": str(prices[0]) if prices else None,
+                "last_unit_price": str(prices[-1]) if prices else None,
+                "first_purchase_date": str(priced[0]["date"])[:10] if priced else None,
+                "last_purchase_date": str(priced[-1]["date"])[:10] if priced else None,
+                "quantity_count": len(quantities),
+                "quantity_total": str(sum(quantities, Decimal("0"))),
+                "spent_count": len(spent),
+                "spent_total": str(sum(spent, Decimal("0"))),
+            },
+        )
+    return len(groups)
+
+
+def rpc_rebuild_master_article_purchase_summary(client: "FakeSupabase", p_establishment_id=None):
+    """Équivalent de `rebuild_master_article_purchase_summary`."""
+    establishments = client.indexes.select(
+        "establishments", [("eq", "id", str(p_establishment_id))] if p_establishment_id else []
+    )
+    total = 0
+    for establishment in establishments:
+        establishment_id = str(establishment["id"])
+        client.indexes.delete_rows(
+            "master_article_purchase_summary",
+            client.indexes.select("master_article_purchase_summary", [("eq", "establishment_id", establishment_id)]),
+        )
+        master_ids = [
+            str(m["id"])
+            for m in client.indexes.select("master_articles", [("eq", "establishment_id", establishment_id)])
+        ]
+        total += rpc_refresh_master_article_purchase_summary(client, establishment_id, master_ids)
+    return total
+
+
+def _recipe_margin_bucket(row: Dict[str, Any]) -> str:
+    return f"{row.get('category_id') or '-'}:{row.get('subcategory_id') or '-'}"
+
+
+def _add_recipe_margin_contributions(client: "FakeSupabase", establishment_id: str, recipe_ids) -> None:
+    conditions = [("eq", "establishment_id", establishment_id)]
+    if recipe_ids is not None:
+        conditions.append(("in", "id", recipe_ids))
+    added: Dict[str, Dict[str, Any]] = {}
+    for recipe in client.indexes.select("recipes", conditions):
+        if not (recipe.get("saleable") and recipe.get("active")):
+            continue
+        contribution = {
+            "id": str(recipe["id"]),
+            "recipe_id": str(recipe["id"]),
+            "establishment_id": establishment_id,
+            "bucket": _recipe_margin_bucket(recipe),
+            "category_id": recipe.get("category_id"),
+            "subcategory_id": recipe.get("subcategory_id"),
+            "margin": Decimal(str(recipe.get("current_margin") or 0)),
+        }
+        client.indexes.insert("recipe_margin_contributions", contribution)
+        bucket = added.setdefault(
+            contribution["bucket"], dict(contribution, margin=Decimal("0"), recipes_count=0)
+        )
+        bucket["margin"] += contribution["margin"]
+        bucket["recipes_count"] += 1
+
+    for key, bucket in added.items():
+        existing = client.indexes.select(
+            "recipe_margin_totals", [("eq", "establishment_id", establishment_id), ("eq", "bucket", key)]
+        )
+        if existing:
+            total = existing[0]
+            client.indexes.update_row(
+                "recipe_margin_totals",
+                total,
+                {
+                    "margin_sum": total["margin_sum"] + bucket["margin"],
+                    "recipes_count": total["recipes_count"] + bucket["recipes_count"],
+                },
+            )
+        else:
+            client.indexes.insert(
+                "recipe_margin_totals",
+                {
+                    "establishment_id": establishment_id,
+                    "bucket": key,
+                    "category_id": bucket["category_id"],
+                    "subcategory_id": bucket["subcategory_id"],
+                    "margin_sum": bucket["margin"],
+                    "recipes_count": bucket["recipes_count"],
+                },
+            )
+
+
+def rpc_refresh_recipe_margin_totals(client: "FakeSupabase", p_establishment_id, p_recipe_ids, p_full=False):
+    """
+    Équivalent de `refresh_recipe_margin_totals` : ajustement des sommes courantes de marges.
+    `recipe_margin_pending` est alimentée par `trigger_recipes_margin_pending` lors des
+    écritures PostgREST (les écritures directes via `client.indexes` ne déclenchent rien).
+    """
+    establishment_id = str(p_establishment_id)
+    scope = [("eq", "establishment_id", establishment_id)]
+    pending = client.indexes.delete_rows("recipe_margin_pending", client.indexes.select("recipe_margin_pending", scope))
+    recipe_ids = list(dict.fromkeys([str(rid) for rid in p_recipe_ids or []] + [str(q["recipe_id"]) for q in pending]))
+
+    def _buckets(rows):
+        return [
+            {"recipe_id": r["recipe_id"], "category_id": r.get("category_id"), "subcategory_id": r.get("subcategory_id")}
+            for r in rows
+        ]
+
+    previous_rows = client.indexes.select("recipe_margin_contributions", scope + [("in", "recipe_id", recipe_ids)])
+    previous = _buckets(previous_rows)
+    rebuilt = bool(p_full) or not client.indexes.select("recipe_margin_totals", scope)
+
+    if rebuilt:
+        client.indexes.delete_rows("recipe_margin_contributions", client.indexes.select("recipe_margin_contributions", scope))
+        client.indexes.delete_rows("recipe_margin_totals", client.indexes.select("recipe_margin_totals", scope))
+        _add_recipe_margin_contributions(client, establishment_id, None)
+    else:
+        for contribution in previous_rows:
+            total = client.indexes.select(
+                "recipe_margin_totals", scope + [("eq", "bucket", contribution["bucket"])]
+            )[0]
+            client.indexes.update_row(
+                "recipe_margin_totals",
+                total,
+                {
+                    "margin_sum": total["margin_sum"] - contribution["margin"],
+                    "recipes_count": total["recipes_count"] - 1,
+                },
+            )
+        client.indexes.delete_rows("recipe_margin_contributions", previous_rows)
+        _add_recipe_margin_contributions(client, establishment_id, recipe_ids)
+
+    return {
+        "rebuilt": rebuilt,
+        "previous": previous,
+        "current": _buckets(
+            client.indexes.select("recipe_margin_contributions", scope + [("in", "recipe_id", recipe_ids)])
+        ),
+        "totals": [
+            {k: t[k] for k in ("category_id", "subcategory_id", "margin_sum", "recipes_count")}
+            for t in client.indexes.select("recipe_margin_totals", scope)
+        ],
+    }
+
+
+def rpc_upsert_recipe_margin_averages(
+    client: "FakeSupabase", p_establishment_id, p_date, p_global, p_categories, p_subcategories
+):
+    """Équivalent de `upsert_recipe_margin_averages` : moyennes datées des trois tables."""
+    establishment_id = str(p_establishment_id)
+    target = _temporal(p_date).date()
+
+    def _write(table: str, key_column: Optional[str], key: Any, average: Any) -> Dict[str, Any]:
+        conditions = [("eq", "establishment_id", establishment_id)]
+        if key_column:
+            conditions.append(("eq", key_column, key))
+        rows = client.indexes.select(table, conditions)
+        latest = max(rows, key=lambda r: _temporal(r["date"]), default=None)
+        if latest is not None and _temporal(latest["date"]).date() >= target:
+            client.indexes.update_row(table, latest, {"average_margin": average})
+            return {"id": latest["id"], "created": False}
+        row = {"id": str(uuid4()), "establishment_id": establishment_id, "date": p_date, "average_margin": average}
+        if key_column:
+            row[key_column] = key
+        client.indexes.insert(table, row)
+        return {"id": row["id"], "created": True}
+
+    out: Dict[str, Any] = {"global": None, "categories": [], "subcategories": []}
+    if p_global is not None:
+        out["global"] = _write("recipe_margin", None, None, p_global)
+    for field_name, table, key_column, entries in (
+        ("categories", "recipe_margin_category", "category_id", p_categories),
+        ("subcategories", "recipe_margin_subcategory", "subcategory_id", p_subcategories),
+    ):
+        for entry in entries or []:
+            written = _write(table, key_column, entry["id"], entry["average_margin"])
+            out[field_name].append(dict(written, **{key_column: entry["id"]}))
+    return out
+
+
+def rpc_claim_invoice_import_fingerprints(client: "FakeSupabase", p_establishment_id, p_import_job_id, p_fingerprints):
+    """Équivalent de `internal.claim_invoice_import_fingerprints` : réservation des empreintes d'un job."""
+    table = "invoice_import_fingerprints"
+    establishment_id, job_id = str(p_establishment_id), str(p_import_job_id)
+    scope = [("eq", "establishment_id", establishment_id)]
+    for entry in p_fingerprints or []:
+        key = scope + [("eq", "kind", entry["kind"]), ("eq", "fingerprint", entry["fingerprint"])]
+        if not client.indexes.select(table, key):
+            client.indexes.insert(
+                table,
+                {
+                    "establishment_id": establishment_id,
+                    "kind": entry["kind"],
+                    "fingerprint": entry["fingerprint"],
+                    "import_job_id": job_id,
+                    "invoice_id": None,
+                    "lines_count": 0,
+                    "duration_ms": 0,
+                    "duplicates_count": 0,
+                },
+            )
+
+    held = [
+        row
+        for entry in p_fingerprints or []
+        for row in client.indexes.select(
+            table, scope + [("eq", "kind", entry["kind"]), ("eq", "fingerprint", entry["fingerprint"])]
+        )
+        if str(row.get("import_job_id")) != job_id
+    ]
+    if not held:
+        return {"claimed": True, "original": None}
+    original = min(held, key=lambda row: row["kind"] != "content")
+    found = dict(original)
+    client.indexes.delete_rows(
+        table,
+        client.indexes.select(table, scope + [("eq", "import_job_id", job_id), ("is", "invoice_id", None)]),
+    )
+    client.indexes.update_row(
+        table,
+        original,
+        {
+            "duplicates_count": int(original.get("duplicates_count") or 0) + 1,
+            "last_duplicate_job_id": job_id,
+            "last_duplicate_at": datetime.now(),
+        },
+    )
+    return {"claimed": False, "original": found}
+
+
+def _outbox_ready(row: Dict[str, Any], channel: str, now: datetime) -> bool:
+    status = row.get("status") or "pending"
+    if row.get("channel") != channel or _temporal(row.get("next_attempt_at") or now) > now:
+        return False
+    return status == "pending" or (status == "sending" and _temporal(row["locked_until"]) < now)
+
+
+def rpc_claim_notification_outbox(client: "FakeSupabase", p_channel, p_limit, p_lease_seconds):
+    """Équivalent de `internal.claim_notification_outbox` (ordre d'insertion à défaut de created_at)."""
+    now = datetime.now()
+    ready = [row for row in client.indexes.select("notification_outbox", []) if _outbox_ready(row, p_channel, now)]
+    claimed = ready[:p_limit]
+    for row in claimed:
+        client.indexes.update_row(
+            "notification_outbox",
+            row,
+            {"status": "sending", "locked_until": now + timedelta(seconds=p_lease_seconds)},
+        )
+    return [dict(row) for row in claimed]
+
+
+def rpc_retry_notification_outbox(client: "FakeSupabase", p_ids, p_max_attempts, p_backoff_seconds, p_error=None):
+    """Équivalent de `internal.retry_notification_outbox`."""
+    now = datetime.now()
+    updated = []
+    for row in client.indexes.select("notification_outbox", [("in", "id", list(p_ids))]):
+        attempts = int(row.get("attempts") or 0)
+        client.indexes.update_row(
+            "notification_outbox",
+            row,
+            {
+                "attempts": attempts + 1,
+                "status": "dropped" if attempts + 1 >= p_max_attempts else "pending",
+                "next_attempt_at": now + timedelta(seconds=float(p_backoff_seconds) * 2**attempts),
+                "locked_until": None,
+                "last_error": p_error,
+            },
+        )
+        updated.append(dict(row))
+    return updated
+
+
+DEFAULT_RPCS: Dict[str, Callable[..., Any]] = {
+    "last_article_prices_before": rpc_last_article_prices_before,
+    "invoice_spend_by_period": rpc_invoice_spend_by_period,
+    "master_article_purchase_stats": rpc_master_article_purchase_stats,
+    "refresh_master_article_purchase_summary": rpc_refresh_master_article_purchase_summary,
+    "rebuild_master_article_purchase_summary": rpc_rebuild_master_article_purchase_summary,
+    "refresh_recipe_margin_totals": rpc_refresh_recipe_margin_totals,
+    "upsert_recipe_margin_averages": rpc_upsert_recipe_margin_averages,
+    "claim_invoice_import_fingerprints": rpc_claim_invoice_import_fingerprints,
+    "claim_notification_outbox": rpc_claim_notification_outbox,
+    "retry_notification_outbox": rpc_retry_notification_outbox,
+}
+
+
+# ---------------------------------------------------------------------------
+# Triggers (AFTER ... FOR EACH ROW) déclenchés par les écritures PostgREST
+# ---------------------------------------------------------------------------
+
+RECIPE_MARGIN_WATCHED_COLUMNS = (
+    "saleable",
+    "active",
+    "category_id",
+    "subcategory_id",
+    "current_margin",
+    "establishment_id",
+)
+
+
+def trigger_recipes_margin_pending(client: "FakeSupabase", op: str, old, new) -> None:
+    """Équivalent de `_queue_recipe_margin_pending` (ignore les établissements supprimés)."""
+    if op == "update" and all(old.get(c) == new.get(c) for c in RECIPE_MARGIN_WATCHED_COLUMNS):
+        return
+    for row in (old, new):
+        if row is None:
+            continue
+        establishment_id = row.get("establishment_id")
+        if client.indexes.get_by_id("establishments", establishment_id) is None:
+            continue
+        if client.indexes.select("recipe_margin_pending", [("eq", "recipe_id", row["id"])]):
+            continue
+        client.indexes.insert(
+            "recipe_margin_pending",
+            {"id": str(uuid4()), "recipe_id": row["id"], "establishment_id": establishment_id},
+        )
+
+
+def trigger_establishments_cascade(client: "FakeSupabase", op: str, old, _new) -> None:
+    """
+    `on delete cascade` des tables rattachées à un établissement : suppression,
+    puis triggers des lignes supprimées, puis contrôle des clés étrangères (une
+    ligne écrite entre-temps vers l'établissement supprimé fait échouer le DELETE).
+    """
+    if op != "delete":
+        return
+    scope = [("eq", "establishment_id", old["id"])]
+    removed = [
+        (name, client.indexes.delete_rows(name, client.indexes.select(name, scope)))
+        for name in list(client.db)
+        if name != "establishments"
+    ]
+    for name, rows in removed:
+        for row in rows:
+            client.fire(name, "delete", row, None)
+    orphans = [name for name in list(client.db) if client.indexes.select(name, scope)]
+    if orphans:
+        from postgrest.exceptions import APIError
+
+        raise APIError(
+            {
+                "code": "23503",
+                "message": f"insert or update on table \"{orphans[0]}\" violates foreign key constraint",
+                "details": f"Key (establishment_id)=({old['id']}) is not present in table \"establishments\".",
+                "hint": None,
+            }
+        )
+
+
+DEFAULT_TRIGGERS: Dict[str, List[Callable[..., Any]]] = {
+    "recipes": [trigger_recipes_margin_pending],
+    "establishments": [trigger_establishments_cascade],
+}
+
+
+class FakeSupabase:
+    """Client PostgREST hors ligne (sync, ou async avec `asynchronous=True`)."""
+
+    def __init__(
+        self,
+        db: Dict[str, List[Dict[str, Any]]],
+        indexes: Optional[TableIndexes] = None,
+        *,
+        asynchronous: bool = False,
+        latency: float = 0.0,
+        max_rows: Optional[int] = None,
+    ) -> None:
+        self.db = db
+        # Plafond de lignes par réponse (db-max-rows de PostgREST), None = illimité
+        self.max_rows = max_rows
+        self.indexes = indexes or TableIndexes(db)
+        self.asynchronous = asynchronous
+        self.latency = latency
+        self.rpc_functions: Dict[str, Callable[..., Any]] = dict(DEFAULT_RPCS)
+        self.triggers: Dict[str, List[Callable[..., Any]]] = {k: list(v) for k, v in DEFAULT_TRIGGERS.items()}
+        # Requêtes sérialisées : le client est partagé entre threads (StageGraph, outbox)
+        self.lock = threading.RLock()
+        self.requests: List[Tuple[str, str]] = []
+
+    def record(self, action: str, target: str) -> None:
+        self.requests.append((action, target))
+
+    def schema(self, _name: str) -> "FakeSupabase":
+        return self
+
+    def table(self, name: str) -> FakeQuery:
+        return FakeQuery(self, name)
+
+    from_ = table
+
+    def fire(self, table: str, op: str, old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]) -> None:
+        for trigger in self.triggers.get(table, ()):
+            trigger(self, op, old, new)
+
+    def register_rpc(self, name: str, function: Callable[..., Any]) -> None:
+        self.rpc_functions[name] = function
+
+    def rpc(self, name: str, params: Optional[Dict[str, Any]] = None) -> FakeRPC:
+        return FakeRPC(self, name, dict(params or {}))
+
+
+def install_fake_supabase(monkeypatch, client: FakeSupabase, async_client: Optional[FakeSupabase] = None) -> None:
+    """Remplace le client Supabase (sync et async) dans les modules `app.*` importés."""
+    from app.core import supabase_async_client, supabase_client
+
+    real_client = supabase_client.supabase
+    real_get_async = supabase_async_client.get_async_supabase
+    async_client = async_client or FakeSupabase(
+        client.db, client.indexes, asynchronous=True, max_rows=client.max_rows
+    )
+
+    async def fake_get_async_supabase():
+        return async_client
+
+    for name, module in list(sys.modules.items()):
+        if not name.startswith("app") or module is None:
+            continue
+        if getattr(module, "supabase", None) is real_client:
+            monkeypatch.setattr(module, "supabase", client)
+        if getattr(module, "get_async_supabase", None) is real_get_async:
+            monkeypatch.setattr(module, "get_async_supabase", fake_get_async_supabase)
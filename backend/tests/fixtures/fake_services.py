@@ -2,15 +2,15 @@
 # DO NOT EDIT MANUALLY – generated by generate_fake_test_env.py
 
 from uuid import uuid4
-from tests.fixtures.fake_db import DB, _find, _insert, _update, _delete
+from tests.fixtures.fake_db import DB, _find, _get_by_id, _insert, _update, _delete
 
 
 class AlertLogsService:
-    def get_all_alert_logs(self, filters=None, limit=1000, page=1):
+    def get_all_alert_logs(self, filters=None, limit=1000, page=1, raw=False):
         return _find("alert_logs", filters or {}, limit)
 
     def get_alert_logs_by_id(self, id):
-        return next((r for r in DB["alert_logs"] if r.get("id") == id), None)
+        return _get_by_id("alert_logs", id)
 
     def create_alert_logs(self, payload: dict):
         data = dict(payload)
@@ -28,11 +28,11 @@ alert_logs_service = AlertLogsService()
 
 
 class VariationsService:
-    def get_all_variations(self, filters=None, limit=1000, page=1):
+    def get_all_variations(self, filters=None, limit=1000, page=1, raw=False):
         return _find("variations", filters or {}, limit)
 
     def get_variations_by_id(self, id):
-        return next((r for r in DB["variations"] if r.get("id") == id), None)
+        return _get_by_id("variations", id)
 
     def create_variations(self, payload: dict):
         data = dict(payload)
@@ -50,11 +50,11 @@ variations_service = VariationsService()
 
 
 class BillingItemService:
-    def get_all_billing_item(self, filters=None, limit=1000, page=1):
+    def get_all_billing_item(self, filters=None, limit=1000, page=1, raw=False):
         return _find("billing_item", filters or {}, limit)
 
     def get_billing_item_by_id(self, id):
-        return next((r for r in DB["billing_item"] if r.get("id") == id), None)
+        return _get_by_id("billing_item", id)
 
     def create_billing_item(self, payload: dict):
         data = dict(payload)
@@ -72,11 +72,11 @@ billing_item_service = BillingItemService()
 
 
 class MarketSupplierAliasService:
-    def get_all_market_supplier_alias(self, filters=None, limit=1000, page=1):
+    def get_all_market_supplier_alias(self, filters=None, limit=1000, page=1, raw=False):
         return _find("market_supplier_alias", filters or {}, limit)
 
     def get_market_supplier_alias_by_id(self, id):
-        return next((r for r in DB["market_supplier_alias"] if r.get("id") == id), None)
+        return _get_by_id("market_supplier_alias", id)
 
     def create_market_supplier_alias(self, payload: dict):
         data = dict(payload)
@@ -94,11 +94,11 @@ market_supplier_alias_service = MarketSupplierAliasService()
 
 
 class MercurialeSubcategoriesService:
-    def get_all_mercuriale_subcategories(self, filters=None, limit=1000, page=1):
+    def get_all_mercuriale_subcategories(self, filters=None, limit=1000, page=1, raw=False):
         return _find("mercuriale_subcategories", filters or {}, limit)
 
     def get_mercuriale_subcategories_by_id(self, id):
-        return next((r for r in DB["mercuriale_subcategories"] if r.get("id") == id), None)
+        return _get_by_id("mercuriale_subcategories", id)
 
     def create_mercuriale_subcategories(self, payload: dict):
         data = dict(payload)
@@ -116,11 +116,11 @@ mercuriale_subcategories_service = MercurialeSubcategoriesService()
 
 
 class MercurialesService:
-    def get_all_mercuriales(self, filters=None, limit=1000, page=1):
+    def get_all_mercuriales(self, filters=None, limit=1000, page=1, raw=False):
         return _find("mercuriales", filters or {}, limit)
 
     def get_mercuriales_by_id(self, id):
-        return next((r for r in DB["mercuriales"] if r.get("id") == id), None)
+        return _get_by_id("mercuriales", id)
 
     def create_mercuriales(self, payload: dict):
         data = dict(payload)
@@ -138,11 +138,11 @@ mercuriales_service = MercurialesService()
 
 
 class RecommendationsAiService:
-    def get_all_recommendations_ai(self, filters=None, limit=1000, page=1):
+    def get_all_recommendations_ai(self, filters=None, limit=1000, page=1, raw=False):
         return _find("recommendations_ai", filters or {}, limit)
 
     def get_recommendations_ai_by_id(self, id):
-        return next((r for r in DB["recommendations_ai"] if r.get("id") == id), None)
+        return _get_by_id("recommendations_ai", id)
 
     def create_recommendations_ai(self, payload: dict):
         data = dict(payload)
@@ -160,11 +160,11 @@ recommendations_ai_service = RecommendationsAiService()
 
 
 class MaintenanceService:
-    def get_all_maintenance(self, filters=None, limit=1000, page=1):
+    def get_all_maintenance(self, filters=None, limit=1000, page=1, raw=False):
         return _find("maintenance", filters or {}, limit)
 
     def get_maintenance_by_id(self, id):
-        return next((r for r in DB["maintenance"] if r.get("id") == id), None)
+        return _get_by_id("maintenance", id)
 
     def create_maintenance(self, payload: dict):
         data = dict(payload)
@@ -182,11 +182,11 @@ maintenance_service = MaintenanceService()
 
 
 class HistoryRecipesService:
-    def get_all_history_recipes(self, filters=None, limit=1000, page=1):
+    def get_all_history_recipes(self, filters=None, limit=1000, page=1, raw=False):
         return _find("history_recipes", filters or {}, limit)
 
     def get_history_recipes_by_id(self, id):
-        return next((r for r in DB["history_recipes"] if r.get("id") == id), None)
+        return _get_by_id("history_recipes", id)
 
     def create_history_recipes(self, payload: dict):
         data = dict(payload)
@@ -204,11 +204,11 @@ history_recipes_service = HistoryRecipesService()
 
 
 class MarketMasterArticlesService:
-    def get_all_market_master_articles(self, filters=None, limit=1000, page=1):
+    def get_all_market_master_articles(self, filters=None, limit=1000, page=1, raw=False):
         return _find("market_master_articles", filters or {}, limit)
 
     def get_market_master_articles_by_id(self, id):
-        return next((r for r in DB["market_master_articles"] if r.get("id") == id), None)
+        return _get_by_id("market_master_articles", id)
 
     def create_market_master_articles(self, payload: dict):
         data = dict(payload)
@@ -226,11 +226,11 @@ market_master_articles_service = MarketMasterArticlesService()
 
 
 class SupplierMergeRequestService:
-    def get_all_supplier_merge_request(self, filters=None, limit=1000, page=1):
+    def get_all_supplier_merge_request(self, filters=None, limit=1000, page=1, raw=False):
         return _find("supplier_merge_request", filters or {}, limit)
 
     def get_supplier_merge_request_by_id(self, id):
-        return next((r for r in DB["supplier_merge_request"] if r.get("id") == id), None)
+        return _get_by_id("supplier_merge_request", id)
 
     def create_supplier_merge_request(self, payload: dict):
         data = dict(payload)
@@ -248,11 +248,11 @@ supplier_merge_request_service = SupplierMergeRequestService()
 
 
 class MercurialeMasterArticleService:
-    def get_all_mercuriale_master_article(self, filters=None, limit=1000, page=1):
+    def get_all_mercuriale_master_article(self, filters=None, limit=1000, page=1, raw=False):
         return _find("mercuriale_master_article", filters or {}, limit)
 
     def get_mercuriale_master_article_by_id(self, id):
-        return next((r for r in DB["mercuriale_master_article"] if r.get("id") == id), None)
+        return _get_by_id("mercuriale_master_article", id)
 
     def create_mercuriale_master_article(self, payload: dict):
         data = dict(payload)
@@ -270,11 +270,11 @@ mercuriale_master_article_service = MercurialeMasterArticleService()
 
 
 class RecipeCategoriesService:
-    def get_all_recipe_categories(self, filters=None, limit=1000, page=1):
+    def get_all_recipe_categories(self, filters=None, limit=1000, page=1, raw=False):
         return _find("recipe_categories", filters or {}, limit)
 
     def get_recipe_categories_by_id(self, id):
-        return next((r for r in DB["recipe_categories"] if r.get("id") == id), None)
+        return _get_by_id("recipe_categories", id)
 
     def create_recipe_categories(self, payload: dict):
         data = dict(payload)
@@ -292,11 +292,11 @@ recipe_categories_service = RecipeCategoriesService()
 
 
 class ImpersonationsPadrinoService:
-    def get_all_impersonations_padrino(self, filters=None, limit=1000, page=1):
+    def get_all_impersonations_padrino(self, filters=None, limit=1000, page=1, raw=False):
         return _find("impersonations_padrino", filters or {}, limit)
 
     def get_impersonations_padrino_by_id(self, id):
-        return next((r for r in DB["impersonations_padrino"] if r.get("id") == id), None)
+        return _get_by_id("impersonations_padrino", id)
 
     def create_impersonations_padrino(self, payload: dict):
         data = dict(payload)
@@ -314,11 +314,11 @@ impersonations_padrino_service = ImpersonationsPadrinoService()
 
 
 class CountriesService:
-    def get_all_countries(self, filters=None, limit=1000, page=1):
+    def get_all_countries(self, filters=None, limit=1000, page=1, raw=False):
         return _find("countries", filters or {}, limit)
 
     def get_countries_by_id(self, id):
-        return next((r for r in DB["countries"] if r.get("id") == id), None)
+        return _get_by_id("countries", id)
 
     def create_countries(self, payload: dict):
         data = dict(payload)
@@ -336,11 +336,11 @@ countries_service = CountriesService()
 
 
 class RegexPatternsService:
-    def get_all_regex_patterns(self, filters=None, limit=1000, page=1):
+    def get_all_regex_patterns(self, filters=None, limit=1000, page=1, raw=False):
         return _find("regex_patterns", filters or {}, limit)
 
     def get_regex_patterns_by_id(self, id):
-        return next((r for r in DB["regex_patterns"] if r.get("id") == id), None)
+        return _get_by_id("regex_patterns", id)
 
     def create_regex_patterns(self, payload: dict):
         data = dict(payload)
@@ -358,11 +358,11 @@ regex_patterns_service = RegexPatternsService()
 
 
 class LiveScoreService:
-    def get_all_live_score(self, filters=None, limit=1000, page=1):
+    def get_all_live_score(self, filters=None, limit=1000, page=1, raw=False):
         return _find("live_score", filters or {}, limit)
 
     def get_live_score_by_id(self, id):
-        return next((r for r in DB["live_score"] if r.get("id") == id), None)
+        return _get_by_id("live_score", id)
 
     def create_live_score(self, payload: dict):
         data = dict(payload)
@@ -380,11 +380,11 @@ live_score_service = LiveScoreService()
 
 
 class HistoryIngredientsService:
-    def get_all_history_ingredients(self, filters=None, limit=1000, page=1):
+    def get_all_history_ingredients(self, filters=None, limit=1000, page=1, raw=False):
         return _find("history_ingredients", filters or {}, limit)
 
     def get_history_ingredients_by_id(self, id):
-        return next((r for r in DB["history_ingredients"] if r.get("id") == id), None)
+        return _get_by_id("history_ingredients", id)
 
     def create_history_ingredients(self, payload: dict):
         data = dict(payload)
@@ -402,11 +402,11 @@ history_ingredients_service = HistoryIngredientsService()
 
 
 class PriceService:
-    def get_all_price(self, filters=None, limit=1000, page=1):
+    def get_all_price(self, filters=None, limit=1000, page=1, raw=False):
         return _find("price", filters or {}, limit)
 
     def get_price_by_id(self, id):
-        return next((r for r in DB["price"] if r.get("id") == id), None)
+        return _get_by_id("price", id)
 
     def create_price(self, payload: dict):
         data = dict(payload)
@@ -424,11 +424,11 @@ price_service = PriceService()
 
 
 class StripeWebhookEventsService:
-    def get_all_stripe_webhook_events(self, filters=None, limit=1000, page=1):
+    def get_all_stripe_webhook_events(self, filters=None, limit=1000, page=1, raw=False):
         return _find("stripe_webhook_events", filters or {}, limit)
 
     def get_stripe_webhook_events_by_id(self, id):
-        return next((r for r in DB["stripe_webhook_events"] if r.get("id") == id), None)
+        return _get_by_id("stripe_webhook_events", id)
 
     def create_stripe_webhook_events(self, payload: dict):
         data = dict(payload)
@@ -446,11 +446,11 @@ stripe_webhook_events_service = StripeWebhookEventsService()
 
 
 class MarketArticlesService:
-    def get_all_market_articles(self, filters=None, limit=1000, page=1):
+    def get_all_market_articles(self, filters=None, limit=1000, page=1, raw=False):
         return _find("market_articles", filters or {}, limit)
 
     def get_market_articles_by_id(self, id):
-        return next((r for r in DB["market_articles"] if r.get("id") == id), None)
+        return _get_by_id("market_articles", id)
 
     def create_market_articles(self, payload: dict):
         data = dict(payload)
@@ -468,11 +468,11 @@ market_articles_service = MarketArticlesService()
 
 
 class MessagesIaService:
-    def get_all_messages_ia(self, filters=None, limit=1000, page=1):
+    def get_all_messages_ia(self, filters=None, limit=1000, page=1, raw=False):
         return _find("messages_ia", filters or {}, limit)
 
     def get_messages_ia_by_id(self, id):
-        return next((r for r in DB["messages_ia"] if r.get("id") == id), None)
+        return _get_by_id("messages_ia", id)
 
     def create_messages_ia(self, payload: dict):
         data = dict(payload)
@@ -490,11 +490,11 @@ messages_ia_service = MessagesIaService()
 
 
 class RecipesService:
-    def get_all_recipes(self, filters=None, limit=1000, page=1):
+    def get_all_recipes(self, filters=None, limit=1000, page=1, raw=False):
         return _find("recipes", filters or {}, limit)
 
     def get_recipes_by_id(self, id):
-        return next((r for r in DB["recipes"] if r.get("id") == id), None)
+        return _get_by_id("recipes", id)
 
     def create_recipes(self, payload: dict):
         data = dict(payload)
@@ -512,11 +512,11 @@ recipes_service = RecipesService()
 
 
 class SuppliersService:
-    def get_all_suppliers(self, filters=None, limit=1000, page=1):
+    def get_all_suppliers(self, filters=None, limit=1000, page=1, raw=False):
         return _find("suppliers", filters or {}, limit)
 
     def get_suppliers_by_id(self, id):
-        return next((r for r in DB["suppliers"] if r.get("id") == id), None)
+        return _get_by_id("suppliers", id)
 
     def create_suppliers(self, payload: dict):
         data = dict(payload)
@@ -534,11 +534,11 @@ suppliers_service = SuppliersService()
 
 
 class EstablishmentEmailAliasService:
-    def get_all_establishment_email_alias(self, filters=None, limit=1000, page=1):
+    def get_all_establishment_email_alias(self, filters=None, limit=1000, page=1, raw=False):
         return _find("establishment_email_alias", filters or {}, limit)
 
     def get_establishment_email_alias_by_id(self, id):
-        return next((r for r in DB["establishment_email_alias"] if r.get("id") == id), None)
+        return _get_by_id("establishment_email_alias", id)
 
     def create_establishment_email_alias(self, payload: dict):
         data = dict(payload)
@@ -556,11 +556,11 @@ establishment_email_alias_service = EstablishmentEmailAliasService()
 
 
 class MercurialeSupplierService:
-    def get_all_mercuriale_supplier(self, filters=None, limit=1000, page=1):
+    def get_all_mercuriale_supplier(self, filters=None, limit=1000, page=1, raw=False):
         return _find("mercuriale_supplier", filters or {}, limit)
 
     def get_mercuriale_supplier_by_id(self, id):
-        return next((r for r in DB["mercuriale_supplier"] if r.get("id") == id), None)
+        return _get_by_id("mercuriale_supplier", id)
 
     def create_mercuriale_supplier(self, payload: dict):
         data = dict(payload)
@@ -578,11 +578,11 @@ mercuriale_supplier_service = MercurialeSupplierService()
 
 
 class RecipeMarginService:
-    def get_all_recipe_margin(self, filters=None, limit=1000, page=1):
+    def get_all_recipe_margin(self, filters=None, limit=1000, page=1, raw=False):
         return _find("recipe_margin", filters or {}, limit)
 
     def get_recipe_margin_by_id(self, id):
-        return next((r for r in DB["recipe_margin"] if r.get("id") == id), None)
+        return _get_by_id("recipe_margin", id)
 
     def create_recipe_margin(self, payload: dict):
         data = dict(payload)
@@ -600,11 +600,11 @@ recipe_margin_service = RecipeMarginService()
 
 
 class MasterArticlesService:
-    def get_all_master_articles(self, filters=None, limit=1000, page=1):
+    def get_all_master_articles(self, filters=None, limit=1000, page=1, raw=False):
         return _find("master_articles", filters or {}, limit)
 
     def get_master_articles_by_id(self, id):
-        return next((r for r in DB["master_articles"] if r.get("id") == id), None)
+        return _get_by_id("master_articles", id)
 
     def create_master_articles(self, payload: dict):
         data = dict(payload)
@@ -622,11 +622,11 @@ master_articles_service = MasterArticlesService()
 
 
 class UserEstablishmentService:
-    def get_all_user_establishment(self, filters=None, limit=1000, page=1):
+    def get_all_user_establishment(self, filters=None, limit=1000, page=1, raw=False):
         return _find("user_establishment", filters or {}, limit)
 
     def get_user_establishment_by_id(self, id):
-        return next((r for r in DB["user_establishment"] if r.get("id") == id), None)
+        return _get_by_id("user_establishment", id)
 
     def create_user_establishment(self, payload: dict):
         data = dict(payload)
@@ -644,11 +644,11 @@ user_establishment_service = UserEstablishmentService()
 
 
 class RecipesSubcategoriesService:
-    def get_all_recipes_subcategories(self, filters=None, limit=1000, page=1):
+    def get_all_recipes_subcategories(self, filters=None, limit=1000, page=1, raw=False):
         return _find("recipes_subcategories", filters or {}, limit)
 
     def get_recipes_subcategories_by_id(self, id):
-        return next((r for r in DB["recipes_subcategories"] if r.get("id") == id), None)
+        return _get_by_id("recipes_subcategories", id)
 
     def create_recipes_subcategories(self, payload: dict):
         data = dict(payload)
@@ -666,11 +666,11 @@ recipes_subcategories_service = RecipesSubcategoriesService()
 
 
 class SupportTicketService:
-    def get_all_support_ticket(self, filters=None, limit=1000, page=1):
+    def get_all_support_ticket(self, filters=None, limit=1000, page=1, raw=False):
         return _find("support_ticket", filters or {}, limit)
 
     def get_support_ticket_by_id(self, id):
-        return next((r for r in DB["support_ticket"] if r.get("id") == id), None)
+        return _get_by_id("support_ticket", id)
 
     def create_support_ticket(self, payload: dict):
         data = dict(payload)
@@ -688,11 +688,11 @@ support_ticket_service = SupportTicketService()
 
 
 class LogsIaService:
-    def get_all_logs_ia(self, filters=None, limit=1000, page=1):
+    def get_all_logs_ia(self, filters=None, limit=1000, page=1, raw=False):
         return _find("logs_ia", filters or {}, limit)
 
     def get_logs_ia_by_id(self, id):
-        return next((r for r in DB["logs_ia"] if r.get("id") == id), None)
+        return _get_by_id("logs_ia", id)
 
     def create_logs_ia(self, payload: dict):
         data = dict(payload)
@@ -710,11 +710,11 @@ logs_ia_service = LogsIaService()
 
 
 class PriceStripeService:
-    def get_all_price_stripe(self, filters=None, limit=1000, page=1):
+    def get_all_price_stripe(self, filters=None, limit=1000, page=1, raw=False):
         return _find("price_stripe", filters or {}, limit)
 
     def get_price_stripe_by_id(self, id):
-        return next((r for r in DB["price_stripe"] if r.get("id") == id), None)
+        return _get_by_id("price_stripe", id)
 
     def create_price_stripe(self, payload: dict):
         data = dict(payload)
@@ -732,11 +732,11 @@ price_stripe_service = PriceStripeService()
 
 
 class UserProfilesService:
-    def get_all_user_profiles(self, filters=None, limit=1000, page=1):
+    def get_all_user_profiles(self, filters=None, limit=1000, page=1, raw=False):
         return _find("user_profiles", filters or {}, limit)
 
     def get_user_profiles_by_id(self, id):
-        return next((r for r in DB["user_profiles"] if r.get("id") == id), None)
+        return _get_by_id("user_profiles", id)
 
     def create_user_profiles(self, payload: dict):
         data = dict(payload)
@@ -754,11 +754,11 @@ user_profiles_service = UserProfilesService()
 
 
 class BillingAccountService:
-    def get_all_billing_account(self, filters=None, limit=1000, page=1):
+    def get_all_billing_account(self, filters=None, limit=1000, page=1, raw=False):
         return _find("billing_account", filters or {}, limit)
 
     def get_billing_account_by_id(self, id):
-        return next((r for r in DB["billing_account"] if r.get("id") == id), None)
+        return _get_by_id("billing_account", id)
 
     def create_billing_account(self, payload: dict):
         data = dict(payload)
@@ -776,11 +776,11 @@ billing_account_service = BillingAccountService()
 
 
 class LabelSupplierService:
-    def get_all_label_supplier(self, filters=None, limit=1000, page=1):
+    def get_all_label_supplier(self, filters=None, limit=1000, page=1, raw=False):
         return _find("label_supplier", filters or {}, limit)
 
     def get_label_supplier_by_id(self, id):
-        return next((r for r in DB["label_supplier"] if r.get("id") == id), None)
+        return _get_by_id("label_supplier", id)
 
     def create_label_supplier(self, payload: dict):
         data = dict(payload)
@@ -798,11 +798,11 @@ label_supplier_service = LabelSupplierService()
 
 
 class RecipeMarginSubcategoryService:
-    def get_all_recipe_margin_subcategory(self, filters=None, limit=1000, page=1):
+    def get_all_recipe_margin_subcategory(self, filters=None, limit=1000, page=1, raw=False):
         return _find("recipe_margin_subcategory", filters or {}, limit)
 
     def get_recipe_margin_subcategory_by_id(self, id):
-        return next((r for r in DB["recipe_margin_subcategory"] if r.get("id") == id), None)
+        return _get_by_id("recipe_margin_subcategory", id)
 
     def create_recipe_margin_subcategory(self, payload: dict):
         data = dict(payload)
@@ -820,11 +820,11 @@ recipe_margin_subcategory_service = RecipeMarginSubcategoryService()
 
 
 class ProductStripeService:
-    def get_all_product_stripe(self, filters=None, limit=1000, page=1):
+    def get_all_product_stripe(self, filters=None, limit=1000, page=1, raw=False):
         return _find("product_stripe", filters or {}, limit)
 
     def get_product_stripe_by_id(self, id):
-        return next((r for r in DB["product_stripe"] if r.get("id") == id), None)
+        return _get_by_id("product_stripe", id)
 
     def create_product_stripe(self, payload: dict):
         data = dict(payload)
@@ -842,11 +842,11 @@ product_stripe_service = ProductStripeService()
 
 
 class LogsService:
-    def get_all_logs(self, filters=None, limit=1000, page=1):
+    def get_all_logs(self, filters=None, limit=1000, page=1, raw=False):
         return _find("logs", filters or {}, limit)
 
     def get_logs_by_id(self, id):
-        return next((r for r in DB["logs"] if r.get("id") == id), None)
+        return _get_by_id("logs", id)
 
     def create_logs(self, payload: dict):
         data = dict(payload)
@@ -854,6 +854,11 @@ class LogsService:
             data["id"] = uuid4()
         return _insert("logs", data)
 
+    def create_logs_bulk(self, payloads: list):
+        for payload in payloads:
+            self.create_logs(payload)
+        return len(payloads)
+
     def update_logs(self, id, payload: dict):
         return _update("logs", id, payload)
 
@@ -864,11 +869,11 @@ logs_service = LogsService()
 
 
 class ScoreMatrixService:
-    def get_all_score_matrix(self, filters=None, limit=1000, page=1):
+    def get_all_score_matrix(self, filters=None, limit=1000, page=1, raw=False):
         return _find("score_matrix", filters or {}, limit)
 
     def get_score_matrix_by_id(self, id):
-        return next((r for r in DB["score_matrix"] if r.get("id") == id), None)
+        return _get_by_id("score_matrix", id)
 
     def create_score_matrix(self, payload: dict):
         data = dict(payload)
@@ -886,11 +891,11 @@ score_matrix_service = ScoreMatrixService()
 
 
 class MercurialeArticlesService:
-    def get_all_mercuriale_articles(self, filters=None, limit=1000, page=1):
+    def get_all_mercuriale_articles(self, filters=None, limit=1000, page=1, raw=False):
         return _find("mercuriale_articles", filters or {}, limit)
 
     def get_mercuriale_articles_by_id(self, id):
-        return next((r for r in DB["mercuriale_articles"] if r.get("id") == id), None)
+        return _get_by_id("mercuriale_articles", id)
 
     def create_mercuriale_articles(self, payload: dict):
         data = dict(payload)
@@ -908,11 +913,11 @@ mercuriale_articles_service = MercurialeArticlesService()
 
 
 class MercurialeCategoriesService:
-    def get_all_mercuriale_categories(self, filters=None, limit=1000, page=1):
+    def get_all_mercuriale_categories(self, filters=None, limit=1000, page=1, raw=False):
         return _find("mercuriale_categories", filters or {}, limit)
 
     def get_mercuriale_categories_by_id(self, id):
-        return next((r for r in DB["mercuriale_categories"] if r.get("id") == id), None)
+        return _get_by_id("mercuriale_categories", id)
 
     def create_mercuriale_categories(self, payload: dict):
         data = dict(payload)
@@ -930,11 +935,11 @@ mercuriale_categories_service = MercurialeCategoriesService()
 
 
 class VatRatesService:
-    def get_all_vat_rates(self, filters=None, limit=1000, page=1):
+    def get_all_vat_rates(self, filters=None, limit=1000, page=1, raw=False):
         return _find("vat_rates", filters or {}, limit)
 
     def get_vat_rates_by_id(self, id):
-        return next((r for r in DB["vat_rates"] if r.get("id") == id), None)
+        return _get_by_id("vat_rates", id)
 
     def create_vat_rates(self, payload: dict):
         data = dict(payload)
@@ -952,11 +957,11 @@ vat_rates_service = VatRatesService()
 
 
 class FinancialRecipesService:
-    def get_all_financial_recipes(self, filters=None, limit=1000, page=1):
+    def get_all_financial_recipes(self, filters=None, limit=1000, page=1, raw=False):
         return _find("financial_recipes", filters or {}, limit)
 
     def get_financial_recipes_by_id(self, id):
-        return next((r for r in DB["financial_recipes"] if r.get("id") == id), None)
+        return _get_by_id("financial_recipes", id)
 
     def create_financial_recipes(self, payload: dict):
         data = dict(payload)
@@ -974,11 +979,11 @@ financial_recipes_service = FinancialRecipesService()
 
 
 class SupplierMergeSuggestionsService:
-    def get_all_supplier_merge_suggestions(self, filters=None, limit=1000, page=1):
+    def get_all_supplier_merge_suggestions(self, filters=None, limit=1000, page=1, raw=False):
         return _find("supplier_merge_suggestions", filters or {}, limit)
 
     def get_supplier_merge_suggestions_by_id(self, id):
-        return next((r for r in DB["supplier_merge_suggestions"] if r.get("id") == id), None)
+        return _get_by_id("supplier_merge_suggestions", id)
 
     def create_supplier_merge_suggestions(self, payload: dict):
         data = dict(payload)
@@ -996,11 +1001,11 @@ supplier_merge_suggestions_service = SupplierMergeSuggestionsService()
 
 
 class SupplierAliasService:
-    def get_all_supplier_alias(self, filters=None, limit=1000, page=1):
+    def get_all_supplier_alias(self, filters=None, limit=1000, page=1, raw=False):
         return _find("supplier_alias", filters or {}, limit)
 
     def get_supplier_alias_by_id(self, id):
-        return next((r for r in DB["supplier_alias"] if r.get("id") == id), None)
+        return _get_by_id("supplier_alias", id)
 
     def create_supplier_alias(self, payload: dict):
         data = dict(payload)
@@ -1018,11 +1023,11 @@ supplier_alias_service = SupplierAliasService()
 
 
 class UsageCountersService:
-    def get_all_usage_counters(self, filters=None, limit=1000, page=1):
+    def get_all_usage_counters(self, filters=None, limit=1000, page=1, raw=False):
         return _find("usage_counters", filters or {}, limit)
 
     def get_usage_counters_by_id(self, id):
-        return next((r for r in DB["usage_counters"] if r.get("id") == id), None)
+        return _get_by_id("usage_counters", id)
 
     def create_usage_counters(self, payload: dict):
         data = dict(payload)
@@ -1040,11 +1045,11 @@ usage_counters_service = UsageCountersService()
 
 
 class SessionsIaService:
-    def get_all_sessions_ia(self, filters=None, limit=1000, page=1):
+    def get_all_sessions_ia(self, filters=None, limit=1000, page=1, raw=False):
         return _find("sessions_ia", filters or {}, limit)
 
     def get_sessions_ia_by_id(self, id):
-        return next((r for r in DB["sessions_ia"] if r.get("id") == id), None)
+        return _get_by_id("sessions_ia", id)
 
     def create_sessions_ia(self, payload: dict):
         data = dict(payload)
@@ -1062,11 +1067,11 @@ sessions_ia_service = SessionsIaService()
 
 
 class IngredientsService:
-    def get_all_ingredients(self, filters=None, limit=1000, page=1):
+    def get_all_ingredients(self, filters=None, limit=1000, page=1, raw=False):
         return _find("ingredients", filters or {}, limit)
 
     def get_ingredients_by_id(self, id):
-        return next((r for r in DB["ingredients"] if r.get("id") == id), None)
+        return _get_by_id("ingredients", id)
 
     def create_ingredients(self, payload: dict):
         data = dict(payload)
@@ -1084,11 +1089,11 @@ ingredients_service = IngredientsService()
 
 
 class ProductService:
-    def get_all_product(self, filters=None, limit=1000, page=1):
+    def get_all_product(self, filters=None, limit=1000, page=1, raw=False):
         return _find("product", filters or {}, limit)
 
     def get_product_by_id(self, id):
-        return next((r for r in DB["product"] if r.get("id") == id), None)
+        return _get_by_id("product", id)
 
     def create_product(self, payload: dict):
         data = dict(payload)
@@ -1106,11 +1111,11 @@ product_service = ProductService()
 
 
 class FinancialIngredientsService:
-    def get_all_financial_ingredients(self, filters=None, limit=1000, page=1):
+    def get_all_financial_ingredients(self, filters=None, limit=1000, page=1, raw=False):
         return _find("financial_ingredients", filters or {}, limit)
 
     def get_financial_ingredients_by_id(self, id):
-        return next((r for r in DB["financial_ingredients"] if r.get("id") == id), None)
+        return _get_by_id("financial_ingredients", id)
 
     def create_financial_ingredients(self, payload: dict):
         data = dict(payload)
@@ -1128,11 +1133,11 @@ financial_ingredients_service = FinancialIngredientsService()
 
 
 class RecipeMarginCategoryService:
-    def get_all_recipe_margin_category(self, filters=None, limit=1000, page=1):
+    def get_all_recipe_margin_category(self, filters=None, limit=1000, page=1, raw=False):
         return _find("recipe_margin_category", filters or {}, limit)
 
     def get_recipe_margin_category_by_id(self, id):
-        return next((r for r in DB["recipe_margin_category"] if r.get("id") == id), None)
+        return _get_by_id("recipe_margin_category", id)
 
     def create_recipe_margin_category(self, payload: dict):
         data = dict(payload)
@@ -1150,11 +1155,11 @@ recipe_margin_category_service = RecipeMarginCategoryService()
 
 
 class MarketSuppliersService:
-    def get_all_market_suppliers(self, filters=None, limit=1000, page=1):
+    def get_all_market_suppliers(self, filters=None, limit=1000, page=1, raw=False):
         return _find("market_suppliers", filters or {}, limit)
 
     def get_market_suppliers_by_id(self, id):
-        return next((r for r in DB["market_suppliers"] if r.get("id") == id), None)
+        return _get_by_id("market_suppliers", id)
 
     def create_market_suppliers(self, payload: dict):
         data = dict(payload)
@@ -1172,11 +1177,11 @@ market_suppliers_service = MarketSuppliersService()
 
 
 class ArticlesService:
-    def get_all_articles(self, filters=None, limit=1000, page=1):
+    def get_all_articles(self, filters=None, limit=1000, page=1, raw=False):
         return _find("articles", filters or {}, limit)
 
     def get_articles_by_id(self, id):
-        return next((r for r in DB["articles"] if r.get("id") == id), None)
+        return _get_by_id("articles", id)
 
     def create_articles(self, payload: dict):
         data = dict(payload)
@@ -1194,11 +1199,11 @@ articles_service = ArticlesService()
 
 
 class EstablishmentsService:
-    def get_all_establishments(self, filters=None, limit=1000, page=1):
+    def get_all_establishments(self, filters=None, limit=1000, page=1, raw=False):
         return _find("establishments", filters or {}, limit)
 
     def get_establishments_by_id(self, id):
-        return next((r for r in DB["establishments"] if r.get("id") == id), None)
+        return _get_by_id("establishments", id)
 
     def create_establishments(self, payload: dict):
         data = dict(payload)
@@ -1216,11 +1221,11 @@ establishments_service = EstablishmentsService()
 
 
 class UserMercurialeAccessService:
-    def get_all_user_mercuriale_access(self, filters=None, limit=1000, page=1):
+    def get_all_user_mercuriale_access(self, filters=None, limit=1000, page=1, raw=False):
         return _find("user_mercuriale_access", filters or {}, limit)
 
     def get_user_mercuriale_access_by_id(self, id):
-        return next((r for r in DB["user_mercuriale_access"] if r.get("id") == id), None)
+        return _get_by_id("user_mercuriale_access", id)
 
     def create_user_mercuriale_access(self, payload: dict):
         data = dict(payload)
@@ -1238,11 +1243,11 @@ user_mercuriale_access_service = UserMercurialeAccessService()
 
 
 class InvoicesRejectedService:
-    def get_all_invoices_rejected(self, filters=None, limit=1000, page=1):
+    def get_all_invoices_rejected(self, filters=None, limit=1000, page=1, raw=False):
         return _find("invoices_rejected", filters or {}, limit)
 
     def get_invoices_rejected_by_id(self, id):
-        return next((r for r in DB["invoices_rejected"] if r.get("id") == id), None)
+        return _get_by_id("invoices_rejected", id)
 
     def create_invoices_rejected(self, payload: dict):
         data = dict(payload)
@@ -1260,11 +1265,11 @@ invoices_rejected_service = InvoicesRejectedService()
 
 
 class ImportJobService:
-    def get_all_import_job(self, filters=None, limit=1000, page=1):
+    def get_all_import_job(self, filters=None, limit=1000, page=1, raw=False):
         return _find("import_job", filters or {}, limit)
 
     def get_import_job_by_id(self, id):
-        return next((r for r in DB["import_job"] if r.get("id") == id), None)
+        return _get_by_id("import_job", id)
 
     def create_import_job(self, payload: dict):
         data = dict(payload)
@@ -1282,11 +1287,11 @@ import_job_service = ImportJobService()
 
 
 class MercurialRequestService:
-    def get_all_mercurial_request(self, filters=None, limit=1000, page=1):
+    def get_all_mercurial_request(self, filters=None, limit=1000, page=1, raw=False):
         return _find("mercurial_request", filters or {}, limit)
 
     def get_mercurial_request_by_id(self, id):
-        return next((r for r in DB["mercurial_request"] if r.get("id") == id), None)
+        return _get_by_id("mercurial_request", id)
 
     def create_mercurial_request(self, payload: dict):
         data = dict(payload)
@@ -1304,11 +1309,11 @@ mercurial_request_service = MercurialRequestService()
 
 
 class InvoicesService:
-    def get_all_invoices(self, filters=None, limit=1000, page=1):
+    def get_all_invoices(self, filters=None, limit=1000, page=1, raw=False):
         return _find("invoices", filters or {}, limit)
 
     def get_invoices_by_id(self, id):
-        return next((r for r in DB["invoices"] if r.get("id") == id), None)
+        return _get_by_id("invoices", id)
 
     def create_invoices(self, payload: dict):
         data = dict(payload)
@@ -1326,11 +1331,11 @@ invoices_service = InvoicesService()
 
 
 class FinancialReportsService:
-    def get_all_financial_reports(self, filters=None, limit=1000, page=1):
+    def get_all_financial_reports(self, filters=None, limit=1000, page=1, raw=False):
         return _find("financial_reports", filters or {}, limit)
 
     def get_financial_reports_by_id(self, id):
-        return next((r for r in DB["financial_reports"] if r.get("id") == id), None)
+        return _get_by_id("financial_reports", id)
 
     def create_financial_reports(self, payload: dict):
         data = dict(payload)
@@ -0,0 +1,384 @@
+"""
+Générateur d'établissements synthétiques (petit / moyen / gros) pour les
+benchmarks des cascades d'écriture.
+
+Les lignes sont stockées comme PostgREST les renvoie (ids et dates en chaînes)
+dans un dict `{table: [rows]}` utilisable tel quel par `FakeSupabase`.
+Le générateur est déterministe (graine fixe) : mêmes volumes, mêmes cascades
+d'une exécution à l'autre.
+"""
+
+from __future__ import annotations
+
+import random
+import uuid
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List
+
+
+@dataclass(frozen=True)
+class EstablishmentSize:
+    name: str
+    suppliers: int
+    master_articles: int
+    invoices: int
+    lines_per_invoice: int
+    recipes: int
+    ingredients_per_recipe: int
+    import_lines: int
+
+
+SIZES = {
+    "small": EstablishmentSize("small", 3, 40, 12, 8, 15, 5, 8),
+    "medium": EstablishmentSize("medium", 8, 200, 60, 15, 80, 7, 20),
+    "large": EstablishmentSize("large", 20, 600, 180, 25, 250, 8, 40),
+}
+
+START_DATE = date(2025, 1, 1)
+TABLES = (
+    "establishments",
+    "user_profiles",
+    "user_establishment",
+    "regex_patterns",
+    "market_suppliers",
+    "market_supplier_alias",
+    "market_master_articles",
+    "market_articles",
+    "suppliers",
+    "master_articles",
+    "invoices",
+    "articles",
+    "recipe_categories",
+    "recipes",
+    "ingredients",
+    "history_ingredients",
+    "history_recipes",
+    "recipe_margin",
+    "recipe_margin_category",
+    "recipe_margin_subcategory",
+    "variations",
+    "import_job",
+    "invoices_rejected",
+    "financial_reports",
+    "financial_recipes",
+    "financial_ingredients",
+    "live_score",
+    "score_matrix",
+    "alert_logs",
+    "logs",
+)
+
+
+@dataclass
+class SyntheticEstablishment:
+    size: EstablishmentSize
+    db: Dict[str, List[Dict[str, Any]]]
+    establishment_id: str
+    supplier_ids: List[str] = field(default_factory=list)
+    invoice_ids: List[str] = field(default_factory=list)
+    recipe_ids: List[str] = field(default_factory=list)
+    import_job_id: str = ""
+
+    def rows(self, table: str) -> List[Dict[str, Any]]:
+        return self.db.setdefault(table, [])
+
+    def first(self, table: str, **filters: Any) -> Dict[str, Any]:
+        return next(r for r in self.rows(table) if all(r.get(k) == v for k, v in filters.items()))
+
+    def ingredient_ids(self) -> List[str]:
+        return [r["id"] for r in self.rows("ingredients") if r.get("type") == "ARTICLE"]
+
+
+def _day(offset: int) -> str:
+    return (START_DATE + timedelta(days=offset)).isoformat()
+
+
+def build_establishment(size: str = "small", seed: int = 42) -> SyntheticEstablishment:
+    spec = SIZES[size]
+    rng = random.Random(seed)
+    uid = lambda: str(uuid.UUID(int=rng.getrandbits(128), version=4))  # noqa: E731
+    db: Dict[str, List[Dict[str, Any]]] = {table: [] for table in TABLES}
+    created_at = datetime(2025, 1, 1, 8, 0).isoformat()
+
+    establishment_id = uid()
+    db["establishments"].append(
+        {
+            "id": establishment_id,
+            "name": f"Établissement {spec.name}",
+            "active_sms": False,
+            "sms_variation_trigger": "ALL",
+        }
+    )
+    user_id = uid()
+    db["user_profiles"].append({"id": user_id, "first_name": "Bench", "last_name": spec.name})
+    db["user_establishment"].append(
+        {"id": uid(), "user_id": user_id, "establishment_id": establishment_id, "role": "owner"}
+    )
+    db["regex_patterns"].extend(
+        [
+            {"id": uid(), "type": "supplier_name", "regex": r"(?i)\bfrance\b", "created_at": created_at},
+            {"id": uid(), "type": "market_master_article_name", "regex": r"[^0-9A-Za-zÀ-ÖØ-öø-ÿ]+", "created_at": created_at},
+        ]
+    )
+
+    synthetic = SyntheticEstablishment(size=spec, db=db, establishment_id=establishment_id)
+
+    # Fournisseurs (établissement + marché)
+    for i in range(spec.suppliers):
+        market_supplier_id = uid()
+        name = f"FOURNISSEUR {i:03d}"
+        db["market_suppliers"].append({"id": market_supplier_id, "name": name, "active": True, "label": "FOOD"})
+        db["market_supplier_alias"].append({"id": uid(), "supplier_market_id": market_supplier_id, "alias": name})
+        supplier_id = uid()
+        db["suppliers"].append(
+            {
+                "id": supplier_id,
+                "establishment_id": establishment_id,
+                "name": name,
+                "label": "FOOD",
+                "market_supplier_id": market_supplier_id,
+                "active": True,
+                "active_analyses": True,
+            }
+        )
+        synthetic.supplier_ids.append(supplier_id)
+
+    # Articles maîtres (établissement + marché)
+    masters_by_supplier: Dict[str, List[Dict[str, Any]]] = {s: [] for s in synthetic.supplier_ids}
+    for i in range(spec.master_articles):
+        supplier = db["suppliers"][i % spec.suppliers]
+        name = f"PRODUIT {i:04d}"
+        market_master_id = uid()
+        db["market_master_articles"].append(
+            {
+                "id": market_master_id,
+                "market_supplier_id": supplier["market_supplier_id"],
+                "name": name,
+                "unformatted_name": name.replace(" ", "").lower(),
+                "unit": "KG",
+                "created_at": created_at,
+            }
+        )
+        master = {
+            "id": uid(),
+            "establishment_id": establishment_id,
+            "supplier_id": supplier["id"],
+            "market_master_article_id": market_master_id,
+            "name": name,
+            "unformatted_name": name.replace(" ", "").lower(),
+            "unit": "KG",
+            "current_unit_price": round(rng.uniform(1, 30), 2),
+            "created_at": created_at,
+        }
+        db["master_articles"].append(master)
+        masters_by_supplier[supplier["id"]].append(master)
+
+    # Factures + articles (un prix par master_article et par facture)
+    for i in range(spec.invoices):
+        supplier_id = synthetic.supplier_ids[i % spec.suppliers]
+        invoice_id = uid()
+        invoice_date = _day(i * 300 // spec.invoices)
+        masters = masters_by_supplier[supplier_id]
+        lines = rng.sample(masters, min(spec.lines_per_invoice, len(masters)))
+        total = 0.0
+        for master in lines:
+            quantity = rng.randint(1, 10)
+            unit_price = round(master["current_unit_price"] * rng.uniform(0.9, 1.1), 2)
+            total += quantity * unit_price
+            db["articles"].append(
+                {
+                    "id": uid(),
+                    "invoice_id": invoice_id,
+                    "establishment_id": establishment_id,
+                    "supplier_id": supplier_id,
+                    "master_article_id": master["id"],
+                    "date": invoice_date,
+                    "unit": "KG",
+                    "quantity": quantity,
+                    "unit_price": unit_price,
+                    "gross_unit_price": unit_price,
+                    "total": round(quantity * unit_price, 2),
+                    "created_at": created_at,
+                }
+            )
+            db["market_articles"].append(
+                {
+                    "id": uid(),
+                    "market_master_article_id": master["market_master_article_id"],
+                    "market_supplier_id": db["suppliers"][i % spec.suppliers]["market_supplier_id"],
+                    "establishment_id": establishment_id,
+                    "invoice_id": invoice_id,
+                    "date": invoice_date,
+                    "unit_price": unit_price,
+                    "unit": "KG",
+                    "is_active": True,
+                }
+            )
+        db["invoices"].append(
+            {
+                "id": invoice_id,
+                "establishment_id": establishment_id,
+                "supplier_id": supplier_id,
+                "invoice_number": f"F{i:05d}",
+                "date": invoice_date,
+                "total_excl_tax": round(total, 2),
+                "total_tax": round(total * 0.2, 2),
+                "total_incl_tax": round(total * 1.2, 2),
+                "import_mode": "EMAIL",
+                "created_at": created_at,
+            }
+        )
+        synthetic.invoice_ids.append(invoice_id)
+
+    # Recettes, ingrédients et historiques (10 % de sous-recettes)
+    category_id = uid()
+    db["recipe_categories"].append({"id": category_id, "name": "PLATS", "establishment_id": establishment_id})
+    for i in range(spec.recipes):
+        recipe_id = uid()
+        cost_total = 0.0
+        ingredients = []
+        for master in rng.sample(db["master_articles"], spec.ingredients_per_recipe):
+            quantity = round(rng.uniform(0.05, 0.5), 3)
+            unit_cost = round(quantity * master["current_unit_price"], 4)
+            cost_total += unit_cost
+            ingredients.append(
+                {
+                    "id": uid(),
+                    "recipe_id": recipe_id,
+                    "type": "ARTICLE",
+                    "master_article_id": master["id"],
+                    "quantity": quantity,
+                    "unit": "KG",
+                    "unit_cost": unit_cost,
+                    "gross_unit_price": master["current_unit_price"],
+                    "percentage_loss": 0,
+                    "loss_value": 0,
+                    "unit_cost_per_portion_recipe": unit_cost,
+                    "establishment_id": establishment_id,
+                }
+            )
+        if i >= 10 and i % 10 == 0:
+            subrecipe_id = synthetic.recipe_ids[rng.randrange(len(synthetic.recipe_ids))]
+            ingredients.append(
+                {
+                    "id": uid(),
+                    "recipe_id": recipe_id,
+                    "type": "SUBRECIPE",
+                    "subrecipe_id": subrecipe_id,
+                    "quantity": 1,
+                    "unit_cost": 1,
+                    "gross_unit_price": 1,
+                    "percentage_loss": 0,
+                    "loss_value": 0,
+                    "unit_cost_per_portion_recipe": 1,
+                    "establishment_id": establishment_id,
+                }
+            )
+            cost_total += 1
+        price = round(cost_total * 3.5 + 5, 2)
+        margin = round((price - cost_total) / price * 100, 2)
+        db["recipes"].append(
+            {
+                "id": recipe_id,
+                "establishment_id": establishment_id,
+                "name": f"RECETTE {i:04d}",
+                "active": True,
+                "saleable": True,
+                "contains_sub_recipe": any(x["type"] == "SUBRECIPE" for x in ingredients),
+                "portion": 1,
+                "purchase_cost_total": round(cost_total, 4),
+                "purchase_cost_per_portion": round(cost_total, 4),
+                "price_excl_tax": price,
+                "price_incl_tax": round(price * 1.1, 2),
+                "price_tax": round(price * 0.1, 2),
+                "current_margin": margin,
+                "category_id": category_id,
+                "created_at": created_at,
+            }
+        )
+        db["history_recipes"].append(
+            {
+                "id": uid(),
+                "recipe_id": recipe_id,
+                "establishment_id": establishment_id,
+                "version_number": 1,
+                "date": _day(0),
+                "portion": 1,
+                "purchase_cost_total": round(cost_total, 4),
+                "purchase_cost_per_portion": round(cost_total, 4),
+                "price_excl_tax": price,
+                "price_incl_tax": round(price * 1.1, 2),
+                "price_tax": round(price * 0.1, 2),
+                "margin": margin,
+                "invoice_affected": False,
+                "created_at": created_at,
+            }
+        )
+        for ingredient in ingredients:
+            db["ingredients"].append(ingredient)
+            db["history_ingredients"].append(
+                {
+                    "id": uid(),
+                    "ingredient_id": ingredient["id"],
+                    "recipe_id": recipe_id,
+                    "establishment_id": establishment_id,
+                    "master_article_id": ingredient.get("master_article_id"),
+                    "subrecipe_id": ingredient.get("subrecipe_id"),
+                    "version_number": 1,
+                    "date": _day(0),
+                    "quantity": ingredient["quantity"],
+                    "unit": ingredient.get("unit"),
+                    "unit_cost": ingredient["unit_cost"],
+                    "gross_unit_price": ingredient["gross_unit_price"],
+                    "percentage_loss": 0,
+                    "loss_value": 0,
+                    "unit_cost_per_portion_recipe": ingredient["unit_cost_per_portion_recipe"],
+                    "created_at": created_at,
+                }
+            )
+        synthetic.recipe_ids.append(recipe_id)
+
+    # Job d'import : une facture dont les lignes reprennent des articles existants
+    supplier = db["suppliers"][0]
+    import_masters = masters_by_supplier[supplier["id"]][: spec.import_lines]
+    lines = []
+    for master in import_masters:
+        quantity = rng.randint(1, 10)
+        unit_price = round(master["current_unit_price"] * 1.15, 2)
+        lines.append(
+            {
+                "product_name": master["name"],
+                "unit": "KG",
+                "quantity": str(quantity),
+                "unit_price_excl_tax": str(unit_price),
+                "line_total_excl_tax": str(round(quantity * unit_price, 2)),
+                "discounts": None,
+                "duties_and_taxes": None,
+            }
+        )
+    total = sum(float(line["line_total_excl_tax"]) for line in lines)
+    synthetic.import_job_id = uid()
+    db["import_job"].append(
+        {
+            "id": synthetic.import_job_id,
+            "establishment_id": establishment_id,
+            "status": "pending",
+            "file_path": f"bench/{spec.name}.pdf",
+            "is_beverage": False,
+            "created_at": created_at,
+            "ocr_result_json": {
+                "invoice": {
+                    "invoice_number": f"IMPORT-{spec.name}",
+                    "invoice_date": _day(320),
+                    "total_excl_tax": str(round(total, 2)),
+                    "total_incl_tax": str(round(total * 1.2, 2)),
+                    "total_vat": str(round(total * 0.2, 2)),
+                },
+                "supplier": {"raw_name": supplier["name"], "contact_email": "bench@test.com"},
+                "lines": lines,
+                "file": {"original_filename": f"{spec.name}.pdf", "mime_type": "application/pdf", "page_count": 1},
+            },
+        }
+    )
+    return synthetic
@@ -0,0 +1,62 @@
+import threading
+import time
+import zipfile
+from io import BytesIO
+
+from openpyxl import load_workbook
+
+from app.logic.invoice_export import export_invoices as export_module
+from app.logic.invoice_export.export_invoices import InvoiceExportRow, iter_export_zip
+
+
+def _rows(count):
+    return [
+        InvoiceExportRow(
+            invoice_id=str(i),
+            supplier_name="Metro",
+            invoice_number=f"F{i}",
+            date_label="01/01/2025",
+            ht="10,00 €",
+            tva="2,00 €",
+            ttc="12,00 €",
+            file_name=f"Metro-F{i}.pdf",
+            storage_path=None if i == 3 else f"est/{i}.pdf",
+        )
+        for i in range(count)
+    ]
+
+
+def test_zip_is_streamed_with_bounded_concurrent_downloads(monkeypatch):
+    lock = threading.Lock()
+    running = {"now": 0, "max": 0}
+
+    def fake_download(path):
+        with lock:
+            running["now"] += 1
+            running["max"] = max(running["max"], running["now"])
+        time.sleep(0.01)
+        with lock:
+            running["now"] -= 1
+        if path == "est/5.pdf":
+            return None
+        return f"%PDF {path}".encode()
+
+    monkeypatch.setattr(export_module, "_download_pdf", fake_download)
+
+    missing = []
+    chunks = list(iter_export_zip("ravy-export", _rows(12), missing=missing, max_workers=4))
+
+    assert len(chunks) > 2
+    assert running["max"] <= 4
+
+    archive = zipfile.ZipFile(BytesIO(b"".join(chunks)))
+    names = archive.namelist()
+    assert names[0] == "ravy-export.xlsx"
+    pdfs = [n for n in names if n.startswith("factures/")]
+    assert pdfs == [f"factures/Metro-F{i}.pdf" for i in range(12) if i not in (3, 5)]
+    assert archive.read("factures/Metro-F7.pdf") == b"%PDF est/7.pdf"
+    assert missing == ["Metro-F3.pdf", "Metro-F5.pdf"]
+    assert archive.read("factures-manquantes.txt").decode() == "Metro-F3.pdf\nMetro-F5.pdf"
+
+    sheet = load_workbook(BytesIO(archive.read("ravy-export.xlsx"))).active
+    assert sheet.max_row == 13
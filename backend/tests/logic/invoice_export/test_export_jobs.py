@@ -0,0 +1,150 @@
+import json
+import os
+import subprocess
+import sys
+import time
+import zipfile
+from dataclasses import asdict
+from datetime import datetime, timedelta, timezone
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.routes.invoice_export import router as invoice_export_router
+from app.core.config import settings
+from app.logic.invoice_export import export_invoices as export_module
+from app.logic.invoice_export import export_jobs
+from app.logic.invoice_export.export_invoices import InvoiceExportRow
+
+
+def _rows(count):
+    return [
+        InvoiceExportRow(
+            invoice_id=str(i),
+            supplier_name="Metro",
+            invoice_number=f"F{i}",
+            date_label="01/01/2025",
+            ht="--",
+            tva="--",
+            ttc="--",
+            file_name=f"Metro-F{i}.pdf",
+            storage_path=f"est/{i}.pdf" if i % 2 == 0 else None,
+        )
+        for i in range(count)
+    ]
+
+
+def _wait_finished(job_id, timeout=5):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = export_jobs.get_export_job(job_id)
+        if job.status in {"completed", "error"}:
+            return job
+        time.sleep(0.02)
+    raise AssertionError("job not finished")
+
+
+def test_export_job_builds_archive_and_reports_progress(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "INVOICE_EXPORT_JOBS_DIR", str(tmp_path))
+    monkeypatch.setattr(export_jobs, "prepare_export", lambda est, ids: ("ravy-export", _rows(len(ids))))
+    monkeypatch.setattr(export_module, "_download_pdf", lambda path: b"%PDF")
+
+    job = export_jobs.submit_export_job("est-1", [f"inv-{i}" for i in range(6)])
+    finished = _wait_finished(job.id)
+
+    assert finished.status == "completed"
+    assert finished.invoices_total == 6
+    assert finished.invoices_processed == 6
+    assert finished.missing == ["Metro-F1.pdf", "Metro-F3.pdf", "Metro-F5.pdf"]
+
+    _, path = export_jobs.get_export_archive(job.id)
+    assert finished.bytes_written == path.stat().st_size
+    assert len([n for n in zipfile.ZipFile(path).namelist() if n.startswith("factures/")]) == 3
+
+    # Un autre process (ou un redémarrage) retrouve le job depuis le disque
+    export_jobs._jobs.clear()
+    reloaded = export_jobs.get_export_job(job.id)
+    assert reloaded.status == "completed"
+    assert export_jobs.get_export_archive(job.id) is not None
+
+
+def _write_running_job(job_id, **owner):
+    job = export_jobs.ExportJob(id=job_id, establishment_id="est-1", invoice_ids=["a"], status="running", **owner)
+    job.heartbeat_at = datetime.now(timezone.utc).isoformat()
+    export_jobs._meta_path(job_id).write_text(json.dumps(asdict(job)))
+
+
+def test_only_orphaned_jobs_are_marked_interrupted(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "INVOICE_EXPORT_JOBS_DIR", str(tmp_path))
+    dead = subprocess.Popen([sys.executable, "-c", "pass"])
+    dead.wait()
+
+    # Job en cours dans un autre worker vivant : relu tel quel, sans mise en cache
+    _write_running_job("alive", owner_pid=os.getppid())
+    assert export_jobs.get_export_job("alive").status == "running"
+    assert "alive" not in export_jobs._jobs
+
+    _write_running_job("dead", owner_pid=dead.pid)
+    _write_running_job("previous-instance")
+    for job_id in ("dead", "previous-instance"):
+        job = export_jobs.get_export_job(job_id)
+        assert job.status == "error"
+        assert json.loads(export_jobs._meta_path(job_id).read_text())["status"] == "error"
+
+    # Autre hôte : seul un battement trop ancien signale l'interruption
+    _write_running_job("remote", owner_host="autre-hote", owner_pid=1)
+    assert export_jobs.get_export_job("remote").status == "running"
+    stale = datetime.now(timezone.utc) - timedelta(seconds=settings.INVOICE_EXPORT_JOBS_STALE_SECONDS + 1)
+    meta = json.loads(export_jobs._meta_path("remote").read_text())
+    export_jobs._meta_path("remote").write_text(json.dumps({**meta, "heartbeat_at": stale.isoformat()}))
+    assert export_jobs.get_export_job("remote").status == "error"
+
+
+def test_progress_is_written_to_disk_while_running(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "INVOICE_EXPORT_JOBS_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "INVOICE_EXPORT_JOBS_HEARTBEAT_SECONDS", 0)
+    monkeypatch.setattr(export_jobs, "prepare_export", lambda est, ids: ("ravy-export", _rows(len(ids))))
+    seen = []
+
+    def _download(path):
+        (meta,) = tmp_path.glob("*.json")
+        seen.append(json.loads(meta.read_text())["invoices_processed"])
+        return b"%PDF"
+
+    monkeypatch.setattr(export_module, "_download_pdf", _download)
+    monkeypatch.setattr(settings, "INVOICE_EXPORT_DOWNLOAD_CONCURRENCY", 1)
+    job = export_jobs.submit_export_job("est-1", [f"inv-{i}" for i in range(6)])
+    assert _wait_finished(job.id).status == "completed"
+
+    assert seen and seen[-1] > 0
+
+
+def test_export_job_download_supports_range_requests(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "INVOICE_EXPORT_JOBS_DIR", str(tmp_path))
+    monkeypatch.setattr(export_jobs, "prepare_export", lambda est, ids: ("ravy-export", _rows(len(ids))))
+    monkeypatch.setattr(export_module, "_download_pdf", lambda path: b"%PDF" * 1000)
+
+    app = FastAPI()
+    app.include_router(invoice_export_router)
+    client = TestClient(app)
+
+    created = client.post(
+        "/invoices/export/jobs",
+        json={"establishment_id": "est-1", "invoice_ids": ["a", "b", "c"]},
+    ).json()
+    _wait_finished(created["id"])
+
+    status = client.get(f"/invoices/export/jobs/{created['id']}").json()
+    assert status["status"] == "completed"
+    assert status["missing_count"] == 1
+
+    full = client.get(f"/invoices/export/jobs/{created['id']}/download")
+    assert full.status_code == 200
+    assert len(full.content) == status["bytes_written"]
+
+    tail = client.get(
+        f"/invoices/export/jobs/{created['id']}/download",
+        headers={"Range": "bytes=100-"},
+    )
+    assert tail.status_code == 206
+    assert tail.content == full.content[100:]
@@ -0,0 +1,80 @@
+import zipfile
+from io import BytesIO
+
+from app.core.config import settings
+from app.logic.pdf_recipes import generator
+from app.logic.pdf_recipes.generator import RecipeBookEntry, iter_recipe_book_zip, render_recipe_book_pdf
+from app.schemas.recipes import Recipes
+
+PNG_1PX = bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+    "1f15c4890000000d49444154789c6360000002000154a24f5d0000000049454e44ae426082"
+)
+
+
+def _entries(count, image_url="https://img.example/plat.png"):
+    return [
+        RecipeBookEntry(
+            recipe=Recipes(name=f"Plat {i}", portion=2, price_incl_tax=12.5),
+            ingredients=[{"name": "Tomate", "type": "ARTICLE", "quantity": 1, "unit": "kg", "unit_cost": 2.0}],
+            technical_image_url=image_url,
+        )
+        for i in range(count)
+    ]
+
+
+def test_images_are_downloaded_once_for_the_whole_book(monkeypatch):
+    calls = []
+
+    def fake_download(url):
+        calls.append(url)
+        return PNG_1PX
+
+    generator._image_cache.clear()
+    monkeypatch.setattr(generator, "_download_image_bytes", fake_download)
+
+    pdf_bytes = render_recipe_book_pdf(_entries(3))
+    pdf_again = render_recipe_book_pdf(_entries(2))
+
+    assert pdf_bytes.startswith(b"%PDF")
+    assert pdf_again.startswith(b"%PDF")
+    assert calls == ["https://img.example/plat.png"]
+
+
+def test_image_cache_evicts_least_recently_used():
+    cache = generator._ImageCache(max_bytes=10)
+    cache.put("a", b"12345")
+    cache.put("b", b"12345")
+    assert cache.get("a") == b"12345"
+    cache.put("c", b"12345")
+    assert cache.get("b") is None
+    assert cache.get("a") == b"12345"
+    assert cache.get("c") == b"12345"
+
+
+def test_recipe_book_zip_contains_one_pdf_per_recipe(monkeypatch):
+    monkeypatch.setattr(settings, "PDF_RENDER_PROCESSES", 1)
+    monkeypatch.setattr(generator, "_download_image_bytes", lambda url: None)
+
+    entries = _entries(3, image_url=None)
+    entries.append(_entries(1, image_url=None)[0])
+    archive = zipfile.ZipFile(BytesIO(b"".join(iter_recipe_book_zip(entries))))
+
+    assert archive.namelist() == ["Plat 0.pdf", "Plat 1.pdf", "Plat 2.pdf", "Plat 0 (4).pdf"]
+    assert all(archive.read(name).startswith(b"%PDF") for name in archive.namelist())
+
+
+def test_recipe_book_zip_renders_in_spawned_processes(monkeypatch):
+    monkeypatch.setattr(settings, "PDF_RENDER_PROCESSES", 2)
+    monkeypatch.setattr(generator, "_process_pool", None)
+    monkeypatch.setattr(generator, "_download_image_bytes", lambda url: None)
+
+    pool = generator._get_process_pool()
+    try:
+        assert pool._mp_context.get_start_method() == "spawn"
+        archive = zipfile.ZipFile(BytesIO(b"".join(iter_recipe_book_zip(_entries(3, image_url=None)))))
+    finally:
+        pool.shutdown()
+
+    assert archive.namelist() == ["Plat 0.pdf", "Plat 1.pdf", "Plat 2.pdf"]
+    assert all(archive.read(name).startswith(b"%PDF") for name in archive.namelist())
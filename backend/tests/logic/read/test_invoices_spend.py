@@ -0,0 +1,88 @@
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from app.logic.read import invoices_logic as module
+
+START = date(2025, 1, 1)
+END = date(2025, 12, 31)
+
+
+def _establishment(fake_establishment):
+    synthetic, client = fake_establishment("medium")
+    # Un fournisseur "boissons" pour le détail par label
+    synthetic.db["suppliers"][0]["label"] = "BEVERAGES"
+    return synthetic, client
+
+
+def _expected_monthly(synthetic):
+    totals = defaultdict(Decimal)
+    for invoice in synthetic.rows("invoices"):
+        totals[invoice["date"][:7]] += Decimal(str(invoice["total_excl_tax"]))
+    return {month: float(total.quantize(Decimal("0.01"))) for month, total in totals.items()}
+
+
+def test_monthly_spend_in_one_request(fake_establishment):
+    synthetic, client = _establishment(fake_establishment)
+
+    result = module.invoices_spend_by_period(synthetic.establishment_id, START, END, "month")
+
+    assert client.requests == [("rpc", module.SPEND_RPC_NAME)]
+    assert [p["period"] for p in result["periods"]] == [f"2025-{m:02d}-01" for m in range(1, 13)]
+    expected = _expected_monthly(synthetic)
+    for period in result["periods"]:
+        assert period["totals"]["sum_ht"] == expected.get(period["period"][:7], 0.0)
+    assert result["count"] == len(synthetic.rows("invoices"))
+    assert {row["supplier_label"] for row in result["series"]} == {"FOOD", "BEVERAGES"}
+
+
+def test_fallback_matches_rpc(monkeypatch, fake_establishment):
+    # Petites pages : le repli doit paginer au-delà du plafond max-rows
+    monkeypatch.setattr(module, "SPEND_PAGE_SIZE", 50)
+    for granularity in ("day", "week", "month"):
+        for labels in (None, ["BEVERAGES"]):
+            synthetic, _ = _establishment(fake_establishment)
+            with_rpc = module.invoices_spend_by_period(
+                synthetic.establishment_id, START, END, granularity, supplier_labels=labels
+            )
+            synthetic, client = _establishment(fake_establishment)
+            client.rpc_functions.clear()
+            fallback = module.invoices_spend_by_period(
+                synthetic.establishment_id, START, END, granularity, supplier_labels=labels
+            )
+
+            assert fallback == with_rpc
+            assert ("select", "invoices") in client.requests
+
+
+def test_rpc_rows_are_paged_past_max_rows(monkeypatch, fake_establishment):
+    synthetic, client = _establishment(fake_establishment)
+    client.rpc_functions.clear()
+    expected = module.invoices_spend_by_period(synthetic.establishment_id, START, END, "day")
+
+    # Plafond PostgREST inférieur au nombre de lignes (jour × fournisseur) de la RPC
+    monkeypatch.setattr(module, "SPEND_PAGE_SIZE", 20)
+    synthetic, client = _establishment(fake_establishment)
+    client.max_rows = 20
+    result = module.invoices_spend_by_period(synthetic.establishment_id, START, END, "day")
+
+    assert result == expected
+    assert client.requests.count(("rpc", module.SPEND_RPC_NAME)) > 1
+    assert ("select", "invoices") not in client.requests
+
+
+def test_weeks_start_on_monday_and_empty_periods_are_zero(fake_establishment):
+    synthetic, _ = _establishment(fake_establishment)
+
+    result = module.invoices_spend_by_period(synthetic.establishment_id, date(2027, 3, 4), date(2027, 3, 20), "week")
+
+    assert [p["period"] for p in result["periods"]] == ["2027-03-01", "2027-03-08", "2027-03-15"]
+    assert all(p["count"] == 0 and p["totals"]["sum_ttc"] == 0 for p in result["periods"])
+
+
+def test_invalid_granularity(fake_establishment):
+    synthetic, _ = _establishment(fake_establishment)
+    with pytest.raises(ValueError):
+        module.invoices_spend_by_period(synthetic.establishment_id, START, END, "year")
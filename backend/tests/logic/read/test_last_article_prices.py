@@ -0,0 +1,60 @@
+from datetime import date
+
+from app.logic.read import last_article_prices as module
+
+BEFORE = date(2025, 4, 1)
+
+
+def _legacy_previous_by_master(db, establishment_id, master_ids, before):
+    # Ancienne lecture de invoices_details : tri date desc, premier article par master
+    rows = [
+        r
+        for r in db["articles"]
+        if r["establishment_id"] == establishment_id
+        and r["master_article_id"] in master_ids
+        and date.fromisoformat(r["date"][:10]) < before
+    ]
+    rows.sort(key=lambda r: r["date"], reverse=True)
+    previous = {}
+    for row in rows:
+        previous.setdefault(row["master_article_id"], row)
+    return previous
+
+
+def _master_ids(synthetic):
+    return sorted({r["master_article_id"] for r in synthetic.rows("articles")})
+
+
+def test_one_row_per_master_in_a_single_rpc(fake_establishment):
+    synthetic, client = fake_establishment("medium")
+    master_ids = _master_ids(synthetic)
+
+    result = module.get_last_article_prices_before(synthetic.establishment_id, master_ids + [None], BEFORE)
+    legacy = _legacy_previous_by_master(synthetic.db, synthetic.establishment_id, set(master_ids), BEFORE)
+
+    assert client.requests == [("rpc", module.RPC_NAME)]
+    assert set(result) == set(legacy)
+    for master_id, row in result.items():
+        # Même date ; à date égale, n'importe quel article de ce jour-là
+        assert row["date"] == legacy[master_id]["date"]
+        assert synthetic.first("articles", id=row["id"])["master_article_id"] == master_id
+
+
+def test_falls_back_to_full_scan_without_rpc(fake_establishment):
+    synthetic, client = fake_establishment("medium")
+    master_ids = _master_ids(synthetic)
+    client.rpc_functions.clear()
+
+    result = module.get_last_article_prices_before(synthetic.establishment_id, master_ids, BEFORE)
+    legacy = _legacy_previous_by_master(synthetic.db, synthetic.establishment_id, set(master_ids), BEFORE)
+
+    assert {k: v["date"] for k, v in result.items()} == {k: v["date"] for k, v in legacy.items()}
+    assert ("select", "articles") in client.requests
+
+
+def test_nothing_to_look_up(fake_establishment):
+    synthetic, client = fake_establishment("medium")
+
+    assert module.get_last_article_prices_before(synthetic.establishment_id, [], BEFORE) == {}
+    assert module.get_last_article_prices_before(None, ["m1"], BEFORE) == {}
+    assert client.requests == []
@@ -0,0 +1,154 @@
+import asyncio
+from datetime import date
+from types import SimpleNamespace
+
+from app.logic.read import market_comparator as module
+
+LATENCY = 0.1
+
+TABLES = {
+    "market_master_articles": [
+        {"id": "m1", "name": "Beurre"},
+        {"id": "m2", "name": "Crème"},
+    ],
+    "market_articles": [
+        {"market_master_article_id": "m1", "unit_price": 10, "date": "2025-01-03"},
+        {"market_master_article_id": "m1", "unit_price": 12, "date": "2025-01-03"},
+        {"market_master_article_id": "m1", "unit_price": 11, "date": "2025-01-10"},
+        {"market_master_article_id": "m2", "unit_price": 9, "date": "2025-01-05"},
+    ],
+}
+
+
+class _Query:
+    def __init__(self, table, client):
+        self.rows = list(TABLES.get(table, []))
+        self.client = client
+        self.is_async = client.is_async
+
+    def select(self, *_args):
+        return self
+
+    def eq(self, key, value):
+        self.rows = [r for r in self.rows if r.get(key) == value]
+        return self
+
+    def gte(self, key, value):
+        self.rows = [r for r in self.rows if r.get(key) >= value]
+        return self
+
+    def lte(self, key, value):
+        self.rows = [r for r in self.rows if r.get(key) <= value]
+        return self
+
+    def order(self, key, desc=False):
+        self.rows.sort(key=lambda r: r.get(key), reverse=desc)
+        return self
+
+    def limit(self, n):
+        self.rows = self.rows[:n]
+        return self
+
+    def execute(self):
+        if not self.is_async:
+            return SimpleNamespace(data=self.rows)
+
+        async def _run():
+            self.client.in_flight += 1
+            self.client.peak_in_flight = max(self.client.peak_in_flight, self.client.in_flight)
+            try:
+                await asyncio.sleep(LATENCY)
+            finally:
+                self.client.in_flight -= 1
+            return SimpleNamespace(data=self.rows)
+
+        return _run()
+
+
+class _Client:
+    def __init__(self, is_async):
+        self.is_async = is_async
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    def schema(self, _name):
+        return self
+
+    def table(self, name):
+        return _Query(name, self)
+
+
+def test_async_comparator_runs_queries_concurrently_and_matches_sync(monkeypatch):
+    async_client = _Client(is_async=True)
+
+    async def fake_get_async_supabase():
+        return async_client
+
+    monkeypatch.setattr(module, "supabase", _Client(is_async=False))
+    monkeypatch.setattr(module, "get_async_supabase", fake_get_async_supabase)
+    monkeypatch.setattr(module, "write_log", lambda payload: None)
+
+    kwargs = dict(
+        market_master_article_1_id="m1",
+        market_master_article_2_id="m2",
+        establishment_id="e1",
+        start_date=date(2025, 1, 1),
+        end_date=date(2025, 1, 31),
+    )
+    expected = module.market_comparator(**kwargs)
+
+    result = asyncio.run(module.market_comparator_async(**kwargs))
+
+    assert result == expected
+    assert result["product1"]["stats"]["count_purchases"] == 3
+    # 4 requêtes indépendantes : toutes en vol en même temps
+    assert async_client.peak_in_flight == 4
+    assert async_client.in_flight == 0
+
+
+def test_batch_comparator_matches_single_pairs_in_few_queries(monkeypatch):
+    from tests.fixtures.fake_postgrest import FakeSupabase, install_fake_supabase
+    from tests.fixtures.synthetic_establishment import build_establishment
+
+    synthetic = build_establishment("small")
+    client = FakeSupabase(synthetic.db)
+    async_client = FakeSupabase(synthetic.db, client.indexes, asynchronous=True)
+    install_fake_supabase(monkeypatch, client, async_client)
+    monkeypatch.setattr(module, "write_log", lambda payload: None)
+
+    market_ids = [r["id"] for r in synthetic.rows("market_master_articles")][:6]
+    pairs = [
+        {
+            "market_master_article_1_id": market_ids[i],
+            "market_master_article_2_id": market_ids[i + 1],
+            "only_my_invoices_product1": i % 2 == 0,
+            "only_my_invoices_product2": False,
+        }
+        for i in range(0, len(market_ids) - 1)
+    ]
+    period = dict(start_date=date(2025, 1, 1), end_date=date(2025, 12, 31))
+
+    result = asyncio.run(
+        module.market_comparator_batch_async(
+            establishment_id=synthetic.establishment_id,
+            pairs=pairs,
+            market_master_article_ids=market_ids,
+            **period,
+        )
+    )
+
+    for pair, comparison in zip(pairs, result["comparisons"]):
+        assert comparison == module.market_comparator(establishment_id=synthetic.establishment_id, **pair, **period)
+
+    assert [p["market_master_article_id"] for p in result["products"]] == market_ids
+    for product in result["products"]:
+        single = module.market_comparator(
+            market_master_article_1_id=product["market_master_article_id"],
+            market_master_article_2_id=product["market_master_article_id"],
+            establishment_id=synthetic.establishment_id,
+            **period,
+        )["product1"]
+        assert {k: v for k, v in product.items() if k in single} == single
+
+    # Métadonnées, prix marché, master_articles + articles : 4 requêtes pour tout le panier
+    assert len(async_client.requests) == 4
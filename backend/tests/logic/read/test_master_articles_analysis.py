@@ -0,0 +1,101 @@
+from collections import Counter
+from datetime import date
+
+from app.logic.read import master_article_analysis as module
+
+PERIOD = dict(start_date=date(2024, 1, 1), end_date=date(2026, 12, 31))
+
+
+def _without_first_last(stats):
+    return {k: v for k, v in stats.items() if k not in ("price_first", "price_last")}
+
+
+def test_grouped_analysis_matches_single_product_analysis(fake_establishment):
+    synthetic, client = fake_establishment("small")
+
+    result = module.master_articles_analysis(synthetic.establishment_id, **PERIOD)
+
+    assert client.requests == [("select", "master_articles"), ("rpc", module.PURCHASE_STATS_RPC_NAME)]
+    assert result["count"] == len(synthetic.rows("master_articles"))
+    for product in result["products"]:
+        master_id = product["master_article"]["id"]
+        single = module.master_article_analysis(master_id, synthetic.establishment_id, **PERIOD)
+        days = Counter(a["date"] for a in single["articles"])
+        if all(count == 1 for count in days.values()):
+            assert product["stats"] == single["stats"]
+        else:
+            # Même jour : premier / dernier prix dépendent de l'ordre des lignes à date égale
+            assert _without_first_last(product["stats"]) == _without_first_last(single["stats"])
+        assert product["invoices_count"] == len(single["invoices"])
+        assert "invoices" not in product
+
+
+def test_rpc_rows_are_paged_past_max_rows(monkeypatch, fake_establishment):
+    synthetic, client = fake_establishment("small")
+    expected = module.master_articles_analysis(synthetic.establishment_id, **PERIOD)
+
+    # Plafond PostgREST inférieur au nombre de produits de l'établissement
+    monkeypatch.setattr(module, "ANALYSIS_PAGE_SIZE", 5)
+    client.max_rows = 5
+    client.requests.clear()
+    result = module.master_articles_analysis(synthetic.establishment_id, **PERIOD)
+
+    assert result == expected
+    assert client.requests.count(("rpc", module.PURCHASE_STATS_RPC_NAME)) > 1
+
+
+def test_invoice_ids_are_read_only_on_request(fake_establishment):
+    synthetic, client = fake_establishment("small")
+    returned = []
+    rpc = client.rpc_functions[module.PURCHASE_STATS_RPC_NAME]
+
+    def _recorded(*args, **kwargs):
+        rows = rpc(*args, **kwargs)
+        returned.extend(rows)
+        return rows
+
+    client.rpc_functions[module.PURCHASE_STATS_RPC_NAME] = _recorded
+
+    module.master_articles_analysis(synthetic.establishment_id, **PERIOD)
+    assert returned and all(row["invoice_ids"] is None and row["invoices_count"] for row in returned)
+
+    returned.clear()
+    module.master_articles_analysis(synthetic.establishment_id, include_invoices=True, **PERIOD)
+    assert all(len(row["invoice_ids"]) == row["invoices_count"] for row in returned)
+
+
+def test_streamed_pass_matches_aggregate_query(fake_establishment):
+    synthetic, client = fake_establishment("small")
+    supplier_id = synthetic.supplier_ids[0]
+    master_ids = [m["id"] for m in synthetic.rows("master_articles")][:7]
+
+    scopes = [
+        dict(),
+        dict(supplier_id=supplier_id),
+        dict(master_article_ids=master_ids + ["inconnu"]),
+    ]
+    expected = [module.master_articles_analysis(synthetic.establishment_id, **scope, **PERIOD) for scope in scopes]
+
+    client.rpc_functions.clear()
+    for scope, aggregated in zip(scopes, expected):
+        streamed = module.master_articles_analysis(synthetic.establishment_id, **scope, **PERIOD)
+        assert streamed == aggregated
+
+    assert expected[2]["missing_master_article_ids"] == ["inconnu"]
+    assert [p["master_article"]["id"] for p in expected[2]["products"]] == master_ids
+    assert all(p["master_article"]["supplier_id"] == supplier_id for p in expected[1]["products"])
+
+
+def test_invoices_are_expanded_only_on_request(fake_establishment):
+    synthetic, client = fake_establishment("small")
+    master_ids = [m["id"] for m in synthetic.rows("master_articles")][:5]
+
+    result = module.master_articles_analysis(
+        synthetic.establishment_id, master_article_ids=master_ids, include_invoices=True, **PERIOD
+    )
+
+    assert client.requests.count(("select", "invoices")) == 1
+    for product in result["products"]:
+        single = module.master_article_analysis(product["master_article"]["id"], synthetic.establishment_id, **PERIOD)
+        assert sorted(i["id"] for i in product["invoices"]) == sorted(i["id"] for i in single["invoices"])
+        assert product["invoices_count"] == len(product["invoices"])
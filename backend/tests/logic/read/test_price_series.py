@@ -0,0 +1,202 @@
+import random
+from collections import defaultdict
+from datetime import date, timedelta
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+from app.logic.read.price_series import PriceColumns, PriceSeries, exact_price, round_ratio, scaled_price
+
+
+# ----------------------------------------------------------------------------
+# Anciens calculs en Decimal (market_database_overview / market_comparator)
+# ----------------------------------------------------------------------------
+
+def _to_decimal(value):
+    try:
+        return Decimal(str(value))
+    except (InvalidOperation, TypeError, ValueError):
+        return None
+
+
+def _quantize(value, exp="0.001"):
+    if value is None:
+        return 0.0
+    return float(value.quantize(Decimal(exp), rounding=ROUND_HALF_UP))
+
+
+def _legacy_daily_avg_series(rows):
+    by_day = defaultdict(list)
+    for r in rows:
+        price = _to_decimal(r.get("unit_price"))
+        if price is not None and r.get("date"):
+            by_day[r["date"]].append(price)
+    return [{"date": d, "avg_unit_price": _quantize(sum(v) / len(v))} for d, v in sorted(by_day.items())]
+
+
+def _legacy_stats(rows):
+    rows_sorted = sorted(rows, key=lambda r: r.get("date") or "")
+    prices = [_to_decimal(r["unit_price"]) for r in rows_sorted]
+    avg_price = _quantize(sum(prices) / len(prices))
+    min_price = _quantize(min(prices))
+    max_price = _quantize(max(prices))
+    return {
+        "avg_unit_price": avg_price,
+        "min_unit_price": min_price,
+        "max_unit_price": max_price,
+        "last_unit_price": _quantize(_to_decimal(rows_sorted[-1]["unit_price"])),
+        "last_purchase_date": rows_sorted[-1]["date"],
+        "count_purchases": len(rows_sorted),
+        "volatility_range": f"{min_price}€ → {max_price}€",
+    }
+
+
+def _legacy_variation(rows):
+    if len(rows) < 2:
+        return None, None
+    rows_sorted = sorted(rows, key=lambda r: r.get("date") or "")
+    first = _to_decimal(rows_sorted[0]["unit_price"])
+    last = _to_decimal(rows_sorted[-1]["unit_price"])
+    pct = (
+        float(((last - first) / first * Decimal("100")).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP))
+        if first
+        else None
+    )
+    return _quantize(last - first), pct
+
+
+def _legacy_volatility(stats):
+    avg_p = _to_decimal(stats["avg_unit_price"])
+    if not avg_p:
+        return None
+    return _quantize((_to_decimal(stats["max_unit_price"]) - _to_decimal(stats["min_unit_price"])) / avg_p)
+
+
+def _legacy_good_time(series_daily, window_days=14):
+    prices = [_to_decimal(p["avg_unit_price"]) for p in series_daily]
+    if not prices:
+        return None
+    period_avg = _to_decimal(sum(prices) / len(prices))
+    tail = prices[-min(window_days, len(prices)):]
+    tail_avg = _to_decimal(sum(tail) / len(tail))
+    if period_avg == 0:
+        return None
+    delta = (tail_avg - period_avg) / period_avg
+    if delta <= -0.03:
+        return True
+    if delta >= 0.03:
+        return False
+    return None
+
+
+def _random_rows(rng, count, products=("p1",)):
+    start = date(2025, 1, 1)
+    rows = []
+    for _ in range(count):
+        base = rng.choice([0, 0.5, 3, 12.5, 48])
+        value = round(base + rng.uniform(0, 5), rng.choice([0, 2, 3, 4, 6]))
+        price = rng.choice([value, str(value), int(value)])
+        rows.append(
+            {
+                "market_master_article_id": rng.choice(products),
+                "date": (start + timedelta(days=rng.randrange(40))).isoformat(),
+                "unit_price": price,
+            }
+        )
+    return rows
+
+
+# ----------------------------------------------------------------------------
+# Équivalence
+# ----------------------------------------------------------------------------
+
+def test_series_matches_legacy_decimal_helpers():
+    rng = random.Random(45)
+    for _ in range(300):
+        rows = _random_rows(rng, rng.randint(1, 40))
+        series = PriceSeries(rows)
+        legacy_series = _legacy_daily_avg_series(rows)
+        legacy_stats = _legacy_stats(rows)
+
+        assert series.series_daily() == legacy_series
+        assert series.stats() == legacy_stats
+        assert series.variation() == _legacy_variation(rows)
+        assert series.volatility_index() == _legacy_volatility(legacy_stats)
+        assert series.is_good_time_to_buy() == _legacy_good_time(legacy_series)
+        assert series.is_good_time_to_buy(3) == _legacy_good_time(legacy_series, 3)
+
+
+def test_prices_beyond_micro_euro_keep_full_precision():
+    # 1.0004996 arrondi au micro-euro donnerait 1.000500, puis 1.001 au lieu de 1.000
+    rows = [
+        {"date": "2025-01-02", "unit_price": 1.0004996},
+        {"date": "2025-01-03", "unit_price": "2.5"},
+        {"date": "2025-01-03", "unit_price": "0.00049999999"},
+    ]
+    series = PriceSeries(rows)
+    assert series.stats() == _legacy_stats(rows)
+    assert series.stats()["min_unit_price"] == 0.0
+    assert series.series_daily() == _legacy_daily_avg_series(rows)
+    assert series.variation() == _legacy_variation(rows)
+
+    rng = random.Random(46)
+    for _ in range(200):
+        rows = _random_rows(rng, rng.randint(1, 30), products=("a", "b"))
+        for row in rows[:: rng.randint(1, 4)]:
+            row["unit_price"] = round(rng.uniform(0, 20), rng.choice([7, 9, 12]))
+        columns = PriceColumns(rows, key="market_master_article_id")
+        for product_id, series in columns.items():
+            product_rows = [r for r in rows if r["market_master_article_id"] == product_id]
+            legacy_series = _legacy_daily_avg_series(product_rows)
+            legacy_stats = _legacy_stats(product_rows)
+            assert series.stats() == legacy_stats == PriceSeries(product_rows).stats()
+            assert series.series_daily() == legacy_series
+            assert series.variation() == _legacy_variation(product_rows)
+            assert series.volatility_index() == _legacy_volatility(legacy_stats)
+            assert series.is_good_time_to_buy() == _legacy_good_time(legacy_series)
+
+
+def test_columns_group_many_products_in_one_pass():
+    rng = random.Random(7)
+    rows = _random_rows(rng, 400, products=("a", "b", "c", "d"))
+
+    columns = PriceColumns(rows, key="market_master_article_id")
+
+    assert columns.keys() == list(dict.fromkeys(r["market_master_article_id"] for r in rows))
+    for product_id in columns.keys():
+        product_rows = [r for r in rows if r["market_master_article_id"] == product_id]
+        assert columns.series(product_id).stats() == PriceSeries(product_rows).stats()
+        assert columns.series(product_id).series_daily() == _legacy_daily_avg_series(product_rows)
+    assert columns.series("absent").stats()["count_purchases"] == 0
+
+
+def test_rows_without_numeric_price_are_counted_but_not_priced():
+    rows = [
+        {"date": "2025-01-02", "unit_price": "1.5"},
+        {"date": "2025-01-03", "unit_price": None},
+        {"date": "2025-01-04", "unit_price": "n/a"},
+        {"date": None, "unit_price": 9},
+    ]
+
+    stats = PriceSeries(rows).stats()
+
+    assert stats["count_purchases"] == 3
+    assert stats["avg_unit_price"] == 1.5
+    assert stats["last_purchase_date"] == "2025-01-02"
+
+    only_invalid = PriceSeries(rows[1:3]).stats()
+    assert only_invalid["avg_unit_price"] == 0
+    assert only_invalid["last_purchase_date"] == "2025-01-04"
+    assert PriceSeries([]).stats()["count_purchases"] == 0
+
+
+def test_scaled_arithmetic_rounds_half_up():
+    assert scaled_price(0.1) == 100000
+    assert scaled_price("12.3456789") == 12345679
+    assert scaled_price(True) is None
+    assert scaled_price(float("nan")) is None
+    assert exact_price(0.1) == (100000, 6)
+    assert exact_price(1.0004996) == (10004996, 7)
+    assert exact_price("-12.3456789") == (-123456789, 7)
+    assert exact_price("1E+2") == (100000000, 6)
+    assert round_ratio(2345, 1000, 0) == 2
+    assert round_ratio(2500, 1000, 0) == 3
+    assert round_ratio(-2500, 1000, 0) == -3
@@ -0,0 +1,80 @@
+import random
+from datetime import date, datetime, timedelta
+
+from app.logic.write.shared.history_timeline import HistoryTimeline, _as_date
+
+START = date(2023, 1, 1)
+
+
+def _sort_key(history):
+    return _as_date(history.get("date")) or date.min
+
+
+def _old_split(histories, target_date):
+    # Implémentation historique de ingredients_history_ingredients._split_histories
+    h_prev = None
+    h_next = None
+    for history in histories:
+        history_date = _as_date(history.get("date"))
+        if history_date is None:
+            continue
+        if history_date == target_date:
+            return history, None, None
+        if history_date < target_date:
+            h_prev = history
+        elif history_date > target_date and h_next is None:
+            h_next = history
+    return None, h_prev, h_next
+
+
+def _old_upsert(histories, row):
+    # Implémentation historique de _upsert_history_cache (remplacement par id + tri stable)
+    for idx, existing in enumerate(histories):
+        if existing.get("id") == row.get("id"):
+            histories[idx] = row
+            histories.sort(key=_sort_key)
+            return
+    histories.append(row)
+    histories.sort(key=_sort_key)
+
+
+def _random_date(rng):
+    value = START + timedelta(days=rng.randint(0, 60))
+    return rng.choice([value.isoformat(), f"{value.isoformat()}T08:30:00", datetime.combine(value, datetime.min.time()), None])
+
+
+def test_timeline_matches_sorted_list_semantics():
+    rng = random.Random(11)
+    for _ in range(50):
+        reference = []
+        timeline = HistoryTimeline()
+        for step in range(120):
+            if reference and rng.random() < 0.4:
+                row = dict(rng.choice(reference), date=_random_date(rng), version=step)
+            else:
+                row = {"id": f"h{step}", "date": _random_date(rng), "version": step}
+            _old_upsert(reference, row)
+            timeline.upsert(row)
+
+            assert timeline.rows == reference
+            target = START + timedelta(days=rng.randint(-2, 62))
+            assert timeline.split(target) == _old_split(reference, target)
+            assert timeline.after(target) == [h for h in reference if _sort_key(h) > target]
+            assert timeline.before(target) == [
+                h for h in reference if _as_date(h.get("date")) and _sort_key(h) < target
+            ]
+            assert timeline.on(target) == [h for h in reference if _as_date(h.get("date")) == target]
+            assert timeline.latest_day()[0] is max(reference, key=_sort_key)
+
+
+def test_remove_and_get_by_id():
+    rows = [{"id": f"h{i}", "date": (START + timedelta(days=i % 3)).isoformat()} for i in range(6)]
+    timeline = HistoryTimeline(rows)
+
+    assert timeline.get("h4") is rows[4]
+    assert timeline.remove("h4") is rows[4]
+    assert timeline.get("h4") is None
+    assert timeline.remove("absent") is None
+    assert [h["id"] for h in timeline] == ["h0", "h3", "h1", "h2", "h5"]
+    assert timeline[-1]["id"] == "h5"
+    assert timeline.on(START + timedelta(days=1)) == [rows[1]]
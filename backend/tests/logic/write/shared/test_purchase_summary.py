@@ -0,0 +1,107 @@
+from datetime import date
+
+from app.core.config import settings
+from app.logic.read import market_database_overview as overview_module
+from app.logic.read import master_article_analysis as analysis_module
+from app.logic.read.purchase_summary import SUMMARY_TABLE, is_month_aligned
+from app.logic.write.shared import purchase_summary as module
+
+PERIOD = dict(start_date=date(2024, 1, 1), end_date=date(2026, 12, 31))
+NUMERIC = (
+    "unit_price_total", "min_unit_price", "max_unit_price", "first_unit_price",
+    "last_unit_price", "quantity_total", "spent_total",
+)
+
+
+def _normalized(rows):
+    out = {}
+    for row in rows:
+        kept = {k: v for k, v in row.items() if k not in ("id", "updated_at")}
+        for key in NUMERIC:
+            kept[key] = None if kept[key] is None else float(kept[key])
+        out[(kept["master_article_id"], kept["month"])] = kept
+    return out
+
+
+def _expected(synthetic):
+    return _normalized(module.summary_rows_from_articles(synthetic.rows("articles")))
+
+
+def test_rebuild_matches_a_scan_of_articles(fake_establishment):
+    synthetic, client = fake_establishment("small")
+    expected = _expected(synthetic)
+
+    assert module.rebuild_purchase_summary(synthetic.establishment_id) == len(expected)
+    assert _normalized(synthetic.rows(SUMMARY_TABLE)) == expected
+
+    # Sans RPC : même résultat reconstruit depuis les articles
+    client.rpc_functions.clear()
+    assert module.rebuild_purchase_summary(synthetic.establishment_id) == len(expected)
+    assert _normalized(synthetic.rows(SUMMARY_TABLE)) == expected
+
+
+def test_refresh_of_touched_months_matches_a_rebuild(fake_establishment):
+    synthetic, client = fake_establishment("small")
+    module.rebuild_purchase_summary(synthetic.establishment_id)
+    articles = synthetic.rows("articles")
+
+    for with_rpc in (True, False):
+        if not with_rpc:
+            client.rpc_functions.clear()
+
+        # Ajout d'un article (import), édition d'un prix, suppression d'une facture
+        added = dict(articles[0], id=f"nouveau-{with_rpc}", date="2026-06-15", unit_price=4.2, invoice_id="f-nouvelle")
+        client.indexes.insert("articles", added)
+        module.refresh_purchase_summary(synthetic.establishment_id, [added["master_article_id"]], [added["date"]])
+
+        edited = articles[3]
+        client.indexes.update("articles", edited["id"], {"unit_price": 99.5, "quantity": None})
+        module.refresh_purchase_summary(synthetic.establishment_id, [edited["master_article_id"]], [edited["date"]])
+
+        invoice_id = articles[-1]["invoice_id"]
+        doomed = [a for a in synthetic.rows("articles") if a["invoice_id"] == invoice_id]
+        client.indexes.delete_rows("articles", doomed)
+        module.refresh_purchase_summary(
+            synthetic.establishment_id, [a["master_article_id"] for a in doomed], [a["date"] for a in doomed]
+        )
+
+        assert _normalized(synthetic.rows(SUMMARY_TABLE)) == _expected(synthetic)
+        articles = synthetic.rows("articles")
+
+
+def test_refresh_failure_does_not_raise(monkeypatch, fake_establishment):
+    synthetic, client = fake_establishment("small")
+    client.rpc_functions.clear()
+    monkeypatch.setattr(module, "_refresh_from_articles", lambda *args: 1 / 0)
+
+    assert module.refresh_purchase_summary(synthetic.establishment_id, ["m"], ["2025-01-02"]) is None
+    assert module.refresh_purchase_summary(synthetic.establishment_id, [], ["2025-01-02"]) == 0
+
+
+def test_readers_match_article_scans_on_whole_months(monkeypatch, fake_establishment):
+    synthetic, client = fake_establishment("small")
+    module.rebuild_purchase_summary(synthetic.establishment_id)
+    supplier_id = synthetic.supplier_ids[0]
+    assert is_month_aligned(PERIOD["start_date"], PERIOD["end_date"])
+
+    scopes = [dict(), dict(supplier_id=supplier_id)]
+    expected = [analysis_module.master_articles_analysis(synthetic.establishment_id, **s, **PERIOD) for s in scopes]
+    expected_overview = overview_module.market_database_overview(synthetic.establishment_id, **PERIOD)
+
+    monkeypatch.setattr(settings, "PURCHASE_SUMMARY_READS", True)
+    client.requests.clear()
+    for scope, aggregated in zip(scopes, expected):
+        assert analysis_module.master_articles_analysis(synthetic.establishment_id, **scope, **PERIOD) == aggregated
+    assert ("rpc", analysis_module.PURCHASE_STATS_RPC_NAME) not in client.requests
+
+    client.requests.clear()
+    assert overview_module.market_database_overview(synthetic.establishment_id, **PERIOD) == expected_overview
+    assert any(p["user"]["has_purchased"] for s in expected_overview["suppliers"] for p in s["products"])
+    assert ("select", "articles") not in client.requests
+
+    # Période hors mois entiers : lecture des articles
+    client.requests.clear()
+    analysis_module.master_articles_analysis(
+        synthetic.establishment_id, start_date=date(2025, 1, 2), end_date=date(2025, 3, 31)
+    )
+    assert ("rpc", analysis_module.PURCHASE_STATS_RPC_NAME) in client.requests
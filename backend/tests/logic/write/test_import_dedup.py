@@ -0,0 +1,154 @@
+import copy
+from uuid import UUID, uuid4
+
+import pytest
+
+MODULE = "app.logic.write.invoices_imports"
+DEDUP_MODULE = "app.logic.write.shared.import_dedup"
+
+
+@pytest.fixture(scope="module")
+def modules(import_with_real_services):
+    return import_with_real_services(MODULE), import_with_real_services(DEDUP_MODULE)
+
+
+def _add_job(synthetic, *, invoice_number=None, content_hash=None):
+    job = copy.deepcopy(synthetic.first("import_job", id=synthetic.import_job_id))
+    job.update(id=str(uuid4()), status="pending", content_hash=content_hash, file_path=f"upload/{uuid4()}.pdf")
+    if invoice_number:
+        job["ocr_result_json"]["invoice"]["invoice_number"] = invoice_number
+    synthetic.rows("import_job").append(job)
+    return job
+
+
+def _import(module, client, job):
+    client.indexes.clear()
+    client.requests.clear()
+    module.import_invoice_from_import_job(UUID(job["id"]))
+    return list(client.requests)
+
+
+def test_duplicates_are_closed_without_any_import_work(fake_establishment, modules):
+    module, dedup = modules
+    synthetic, client = fake_establishment("small")
+    original = synthetic.first("import_job", id=synthetic.import_job_id)
+    original["content_hash"] = "sha-du-pdf"
+
+    requests = _import(module, client, original)
+    assert ("insert", "articles") in requests
+    invoices_count = len(synthetic.rows("invoices"))
+    articles_count = len(synthetic.rows("articles"))
+    registry = synthetic.rows(dedup.FINGERPRINTS_TABLE)
+    assert {row["kind"] for row in registry} == {dedup.CONTENT, dedup.INVOICE}
+
+    before = dedup.dedup_stats()
+    # Même facture renvoyée par email (autre fichier), puis même PDF relu autrement par l'OCR
+    forwarded = _add_job(synthetic)
+    reuploaded = _add_job(synthetic, invoice_number="IMPORT-RELU", content_hash="sha-du-pdf")
+    invoice_id = registry[0]["invoice_id"]
+    for job, kind in ((forwarded, dedup.INVOICE), (reuploaded, dedup.CONTENT)):
+        requests = _import(module, client, job)
+        assert len(requests) < 10
+        assert not any(action == "insert" for action, _ in requests)
+        assert job["status"] == "completed"
+        assert job["duplicate_of_import_job_id"] == original["id"]
+        assert job["duplicate_of_invoice_id"] == invoice_id
+        assert next(r for r in registry if r["kind"] == kind)["duplicates_count"] == 1
+    # Les lignes d'origine ne sont jamais réécrites par les doublons
+    assert {(r["import_job_id"], r["invoice_id"]) for r in registry} == {(original["id"], invoice_id)}
+
+    assert len(synthetic.rows("invoices")) == invoices_count
+    assert len(synthetic.rows("articles")) == articles_count
+    after = dedup.dedup_stats()
+    lines = len(original["ocr_result_json"]["lines"])
+    assert after["duplicates"] - before["duplicates"] == 2
+    assert after["lines_skipped"] - before["lines_skipped"] == 2 * lines
+
+    # Autre facture du même fournisseur : importée normalement
+    other = _add_job(synthetic, invoice_number="IMPORT-AUTRE")
+    assert ("insert", "articles") in _import(module, client, other)
+    assert len(synthetic.rows("invoices")) == invoices_count + 1
+
+
+@pytest.mark.parametrize("with_rpc", [True, False])
+def test_a_concurrent_duplicate_loses_the_claim(fake_establishment, modules, with_rpc):
+    module, dedup = modules
+    synthetic, client = fake_establishment("small")
+    if not with_rpc:
+        del client.rpc_functions[dedup.CLAIM_RPC_NAME]
+    first = synthetic.first("import_job", id=synthetic.import_job_id)
+    first["content_hash"] = "sha-du-pdf"
+    second = _add_job(synthetic, content_hash="sha-du-pdf")
+    invoices_count = len(synthetic.rows("invoices"))
+
+    # Le premier job a réservé ses empreintes et n'a pas encore créé sa facture
+    fingerprints = dedup.fingerprints_for_job(first, first["ocr_result_json"])
+    assert dedup.claim_import(synthetic.establishment_id, first["id"], fingerprints) is None
+
+    _import(module, client, second)
+    assert second["status"] == "completed"
+    assert second["duplicate_of_import_job_id"] == first["id"]
+    assert len(synthetic.rows("invoices")) == invoices_count
+
+    # Le premier job reprend ses propres réservations et rattache sa facture
+    assert ("insert", "articles") in _import(module, client, first)
+    registry = synthetic.rows(dedup.FINGERPRINTS_TABLE)
+    assert len(registry) == 2
+    assert {r["import_job_id"] for r in registry} == {first["id"]}
+    assert all(r["invoice_id"] for r in registry)
+
+
+def test_a_failed_import_releases_its_fingerprints(monkeypatch, fake_establishment, modules):
+    module, dedup = modules
+    synthetic, client = fake_establishment("small")
+    job = synthetic.first("import_job", id=synthetic.import_job_id)
+
+    create_articles = module.create_articles_from_lines
+
+    def _failing(**_kwargs):
+        raise RuntimeError("OCR illisible")
+
+    monkeypatch.setattr(module, "create_articles_from_lines", _failing)
+    with pytest.raises(RuntimeError):
+        _import(module, client, job)
+    assert job["status"] == "error"
+    assert not synthetic.rows(dedup.FINGERPRINTS_TABLE)
+
+    # La même facture renvoyée est importée normalement
+    monkeypatch.setattr(module, "create_articles_from_lines", create_articles)
+    retry = _add_job(synthetic)
+    assert ("insert", "articles") in _import(module, client, retry)
+
+
+def test_registry_failures_do_not_block_the_import(monkeypatch, fake_establishment, modules):
+    module, dedup = modules
+    synthetic, client = fake_establishment("small")
+
+    def _unavailable():
+        raise RuntimeError("relation internal.invoice_import_fingerprints does not exist")
+
+    monkeypatch.setattr(dedup, "_registry", _unavailable)
+    job = synthetic.first("import_job", id=synthetic.import_job_id)
+    assert ("insert", "articles") in _import(module, client, job)
+    assert job["status"] == "completed"
+
+
+def test_invoice_fingerprint_ignores_formatting(modules):
+    _, dedup = modules
+    ocr = {
+        "supplier": {"raw_name": "Métro France"},
+        "invoice": {"invoice_number": "fa-2025/001", "invoice_date": "2025-03-04", "total_excl_tax": "12.5"},
+    }
+    same = {
+        "supplier": {"raw_name": " METRO  france. "},
+        "invoice": {"invoice_number": "FA 2025 001", "invoice_date": "2025-03-04T00:00:00", "total_excl_tax": 12.50},
+    }
+    assert dedup.invoice_fingerprint(ocr) == dedup.invoice_fingerprint(same)
+
+    other_total = copy.deepcopy(ocr)
+    other_total["invoice"]["total_excl_tax"] = "12.51"
+    assert dedup.invoice_fingerprint(other_total) != dedup.invoice_fingerprint(ocr)
+
+    no_number = copy.deepcopy(ocr)
+    no_number["invoice"]["invoice_number"] = None
+    assert dedup.invoice_fingerprint(no_number) is None
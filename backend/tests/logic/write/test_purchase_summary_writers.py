@@ -0,0 +1,64 @@
+from uuid import UUID, uuid4
+
+import pytest
+
+from tests.logic.write.shared.test_purchase_summary import _expected, _normalized
+
+
+@pytest.fixture(scope="module")
+def modules(import_with_real_services):
+    return (
+        import_with_real_services("app.logic.write.shared.purchase_summary"),
+        import_with_real_services("app.logic.write.delete_article"),
+        import_with_real_services("app.logic.write.merge_suppliers"),
+    )
+
+
+def _rebuild(summary, synthetic):
+    summary.rebuild_purchase_summary(synthetic.establishment_id)
+    assert _normalized(synthetic.rows(summary.SUMMARY_TABLE)) == _expected(synthetic)
+
+
+def test_article_deletion_refreshes_the_summary(fake_establishment, modules):
+    summary, delete_module, _ = modules
+    synthetic, client = fake_establishment("small")
+    _rebuild(summary, synthetic)
+
+    article = synthetic.rows("articles")[0]
+    delete_module.delete_article(
+        establishment_id=UUID(synthetic.establishment_id),
+        invoice_id=UUID(article["invoice_id"]),
+        invoice_date=article["date"],
+        master_article_id=UUID(article["master_article_id"]),
+        supplier_id=UUID(article["supplier_id"]),
+        id_article_to_delete=UUID(article["id"]),
+    )
+
+    assert article not in synthetic.rows("articles")
+    assert ("rpc", summary.REFRESH_RPC_NAME) in client.requests
+    assert _normalized(synthetic.rows(summary.SUMMARY_TABLE)) == _expected(synthetic)
+
+
+def test_supplier_merge_refreshes_old_and_target_masters(fake_establishment, modules):
+    summary, _, merge_module = modules
+    synthetic, client = fake_establishment("small")
+    _rebuild(summary, synthetic)
+    target, source = synthetic.rows("suppliers")[:2]
+    # Un produit du fournisseur source existe déjà chez la cible : ses articles y sont déplacés
+    source_master = next(m for m in synthetic.rows("master_articles") if m["supplier_id"] == source["id"])
+    target_master = next(m for m in synthetic.rows("master_articles") if m["supplier_id"] == target["id"])
+    source_master["unformatted_name"] = target_master["unformatted_name"]
+    merge_request_id = str(uuid4())
+    synthetic.db["supplier_merge_request"] = [
+        {
+            "id": merge_request_id,
+            "status": "accepted",
+            "source_market_supplier_ids": {"ids": [source["market_supplier_id"]]},
+            "target_market_supplier_id": target["market_supplier_id"],
+        }
+    ]
+
+    merge_module.merge_suppliers(merge_request_id=UUID(merge_request_id))
+
+    assert not [a for a in synthetic.rows("articles") if a["master_article_id"] == source_master["id"]]
+    assert _normalized(synthetic.rows(summary.SUMMARY_TABLE)) == _expected(synthetic)
@@ -0,0 +1,221 @@
+import random
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+from uuid import UUID
+
+import pytest
+
+TARGET_DATE = date(2025, 6, 1)
+MODULE = "app.logic.write.shared.recipes_average_margins"
+
+
+@pytest.fixture(scope="module")
+def modules(import_with_real_services):
+    return (
+        import_with_real_services(MODULE),
+        import_with_real_services("app.services.recipes_service"),
+        import_with_real_services("app.services.establishments_service"),
+    )
+
+
+@pytest.fixture(scope="module")
+def module(modules):
+    return modules[0]
+
+
+def _spread_over_buckets(synthetic):
+    """Recettes réparties sur 3 catégories et 3 sous-catégories (certaines non vendables)."""
+    rng = random.Random(48)
+    categories = [synthetic.rows("recipe_categories")[0]["id"]]
+    for name in ("ENTRÉES", "DESSERTS"):
+        category_id = str(UUID(int=rng.getrandbits(128), version=4))
+        synthetic.db["recipe_categories"].append(
+            {"id": category_id, "name": name, "establishment_id": synthetic.establishment_id}
+        )
+        categories.append(category_id)
+    subcategories = [str(UUID(int=rng.getrandbits(128), version=4)) for _ in range(3)]
+    synthetic.db["recipes_subcategories"] = [
+        {"id": s, "name": f"SOUS {i}", "establishment_id": synthetic.establishment_id} for i, s in enumerate(subcategories)
+    ]
+    for recipe in synthetic.rows("recipes"):
+        recipe["category_id"] = rng.choice(categories)
+        recipe["subcategory_id"] = rng.choice(subcategories + [None])
+        recipe["saleable"] = rng.random() > 0.15
+        if rng.random() < 0.1:
+            recipe["current_margin"] = None
+    return rng, categories, subcategories
+
+
+def _expected_buckets(synthetic):
+    buckets = defaultdict(lambda: [Decimal("0"), 0])
+    for recipe in synthetic.rows("recipes"):
+        if recipe.get("saleable") and recipe.get("active"):
+            key = (recipe.get("category_id"), recipe.get("subcategory_id"))
+            buckets[key][0] += Decimal(str(recipe.get("current_margin") or 0))
+            buckets[key][1] += 1
+    return {k: (round(float(s), 6), n) for k, (s, n) in buckets.items()}
+
+
+def _stored_buckets(synthetic):
+    return {
+        (t["category_id"], t["subcategory_id"]): (round(float(t["margin_sum"]), 6), t["recipes_count"])
+        for t in synthetic.rows("recipe_margin_totals")
+        if t["recipes_count"]
+    }
+
+
+def _run(module, synthetic, recipe_ids, **kwargs):
+    return module.recompute_recipe_margins(
+        UUID(synthetic.establishment_id), [UUID(r) for r in recipe_ids], TARGET_DATE, **kwargs
+    )
+
+
+def test_incremental_totals_match_a_full_recompute(fake_establishment, module):
+    synthetic, client = fake_establishment("small")
+    rng, categories, subcategories = _spread_over_buckets(synthetic)
+    recipes = synthetic.rows("recipes")
+
+    first = _run(module, synthetic, [recipes[0]["id"]])
+    assert first["totals_rebuilt"] is True
+    assert _stored_buckets(synthetic) == _expected_buckets(synthetic)
+
+    for _ in range(5):
+        changed = rng.sample(synthetic.rows("recipes"), 4)
+        changed[0]["current_margin"] = round(rng.uniform(10, 90), 2)
+        changed[1]["category_id"] = rng.choice(categories)
+        changed[1]["subcategory_id"] = rng.choice(subcategories)
+        changed[2]["active"] = not changed[2]["active"]
+        client.indexes.delete_rows("recipes", [changed[3]])
+        for recipe in changed[:3]:
+            client.indexes.update_row("recipes", recipe, {})
+
+        client.requests.clear()
+        result = _run(module, synthetic, [r["id"] for r in changed])
+
+        assert result["totals_rebuilt"] is False
+        assert ("select", "recipes") not in client.requests
+        assert _stored_buckets(synthetic) == _expected_buckets(synthetic)
+
+    incremental = _stored_buckets(synthetic)
+    assert _run(module, synthetic, [], full=True)["totals_rebuilt"] is True
+    assert _stored_buckets(synthetic) == incremental
+
+
+def test_averages_cover_every_recipe_and_moved_categories(fake_establishment, module):
+    synthetic, client = fake_establishment("large")
+    _, categories, _ = _spread_over_buckets(synthetic)
+    counted = [r for r in synthetic.rows("recipes") if r["saleable"] and r["active"]]
+    assert len(counted) > 200
+
+    _run(module, synthetic, [r["id"] for r in counted[:3]])
+    expected_global = sum(Decimal(str(r["current_margin"] or 0)) for r in counted) / len(counted)
+    assert float(synthetic.rows("recipe_margin")[-1]["average_margin"]) == pytest.approx(float(expected_global))
+
+    # Recette déplacée : l'ancienne catégorie est aussi recalculée
+    moved = counted[0]
+    old_category, new_category = moved["category_id"], next(c for c in categories if c != moved["category_id"])
+    client.indexes.update_row("recipes", moved, {"category_id": new_category})
+    _run(module, synthetic, [moved["id"]])
+
+    latest = {}
+    for row in synthetic.rows("recipe_margin_category"):
+        latest[row["category_id"]] = row
+    for category_id in (old_category, new_category):
+        in_category = [r for r in synthetic.rows("recipes") if r["saleable"] and r["active"] and r["category_id"] == category_id]
+        expected = sum(Decimal(str(r["current_margin"] or 0)) for r in in_category) / len(in_category)
+        assert float(latest[category_id]["average_margin"]) == pytest.approx(float(expected))
+
+
+def test_without_the_rpc_averages_are_recomputed_from_recipes(fake_establishment, module):
+    synthetic, client = fake_establishment("small")
+    _spread_over_buckets(synthetic)
+    client.rpc_functions.clear()
+
+    result = _run(module, synthetic, [synthetic.rows("recipes")[0]["id"]])
+
+    assert result["totals_rebuilt"] is True
+    counted = [r for r in synthetic.rows("recipes") if r["saleable"] and r["active"]]
+    expected_global = sum(Decimal(str(r["current_margin"] or 0)) for r in counted) / len(counted)
+    assert float(synthetic.rows("recipe_margin")[-1]["average_margin"]) == pytest.approx(float(expected_global))
+
+
+def test_recipes_written_outside_cascades_are_caught_up(fake_establishment, modules):
+    module, recipes_service, _ = modules
+    synthetic, _ = fake_establishment("small")
+    _spread_over_buckets(synthetic)
+    recipes = synthetic.rows("recipes")
+    _run(module, synthetic, [recipes[0]["id"]])
+
+    # Écritures CRUD directes : le trigger `recipes_margin_pending` met les recettes en attente
+    edited, deleted = recipes[1], recipes[2]
+    recipes_service.update_recipes(UUID(edited["id"]), {"current_margin": 12.5, "saleable": True, "active": True})
+    recipes_service.delete_recipes(UUID(deleted["id"]))
+    assert {q["recipe_id"] for q in synthetic.rows("recipe_margin_pending")} == {edited["id"], deleted["id"]}
+
+    _run(module, synthetic, [recipes[5]["id"]])
+    assert _stored_buckets(synthetic) == _expected_buckets(synthetic)
+    assert not synthetic.rows("recipe_margin_pending")
+
+
+def test_deleting_an_establishment_with_recipes(fake_establishment, modules):
+    module, recipes_service, establishments_service = modules
+    synthetic, _ = fake_establishment("small")
+    _spread_over_buckets(synthetic)
+    recipes = synthetic.rows("recipes")
+    _run(module, synthetic, [recipes[0]["id"]])
+    recipes_service.update_recipes(UUID(recipes[1]["id"]), {"current_margin": 33.0})
+    assert synthetic.rows("recipe_margin_pending")
+
+    # La cascade supprime les recettes : le trigger ne met rien en attente pour
+    # l'établissement supprimé (aucune ligne orpheline, suppression non bloquée)
+    establishments_service.delete_establishments(UUID(synthetic.establishment_id))
+
+    assert not synthetic.rows("establishments")
+    assert not synthetic.rows("recipes")
+    assert not synthetic.rows("recipe_margin_pending")
+    assert not synthetic.rows("recipe_margin_totals")
+
+
+def test_averages_are_written_in_one_round_trip(fake_establishment, module):
+    synthetic, client = fake_establishment("small")
+    _spread_over_buckets(synthetic)
+    _run(module, synthetic, [], full=True)
+
+    client.requests.clear()
+    result = _run(module, synthetic, [], full=True)
+
+    margin_tables = {"recipe_margin", "recipe_margin_category", "recipe_margin_subcategory"}
+    assert not [r for r in client.requests if r[1] in margin_tables]
+    assert client.requests.count(("rpc", module.AVERAGES_RPC_NAME)) == 1
+    assert result["updated"]["global"]["updated"] is True
+    assert all(c["updated"] and not c["created"] for c in result["updated"]["categories"])
+    assert len(synthetic.rows("recipe_margin_category")) == len(result["updated"]["categories"])
+
+
+def test_without_the_averages_rpc_each_table_is_read_once(fake_establishment, module):
+    synthetic, client = fake_establishment("small")
+    _, categories, subcategories = _spread_over_buckets(synthetic)
+    del client.rpc_functions[module.AVERAGES_RPC_NAME]
+    _run(module, synthetic, [], full=True)
+    created = {t: len(synthetic.rows(t)) for t in ("recipe_margin_category", "recipe_margin_subcategory")}
+
+    client.requests.clear()
+    result = _run(module, synthetic, [], full=True)
+
+    assert client.requests.count(("select", "recipe_margin_category")) == 1
+    assert client.requests.count(("select", "recipe_margin_subcategory")) == 1
+    assert {t: len(synthetic.rows(t)) for t in created} == created
+    assert len(result["updated"]["subcategories"]) == len(subcategories)
+    assert all(s["updated"] and not s["created"] for s in result["updated"]["subcategories"])
+
+
+def test_full_mode_rewrites_every_category_average(fake_establishment, module):
+    synthetic, _ = fake_establishment("small")
+    _spread_over_buckets(synthetic)
+    _run(module, synthetic, [synthetic.rows("recipes")[0]["id"]])
+
+    result = _run(module, synthetic, [], full=True)
+    assert result["totals_rebuilt"] is True
+    counted = {r["category_id"] for r in synthetic.rows("recipes") if r["saleable"] and r["active"]}
+    assert {c["category_id"] for c in result["updated"]["categories"]} == {UUID(c) for c in counted}